@@ -22,12 +22,15 @@ Coordinate conventions
 
 from __future__ import annotations
 
+import functools
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass, field
 from typing import List, Optional, Tuple
 
 import numpy as np
 
 from laue_portal.analysis.geometry import BeamlineGeometry, DetectorGeometry
+from laue_portal.analysis.peak_store import PeakStore, RaggedColumn
 
 _KI = np.array([0.0, 0.0, 1.0])
 
@@ -180,6 +183,69 @@ def q_to_pixel(
     return xyz_to_pixel(d, kout, depth=depth_eff, on_detector=on_detector)
 
 
+def xyz_to_pixel_batch(
+    d: DetectorGeometry,
+    xyz: np.ndarray,
+    depth=0.0,
+    on_detector: bool = False,
+) -> np.ndarray:
+    """
+    Vectorised :func:`xyz_to_pixel` for an ``(N, 3)`` array of rays.
+
+    Performs the same arithmetic, in the same order, as the scalar port so
+    results agree to the last bit.
+
+    Parameters
+    ----------
+    d : DetectorGeometry
+    xyz : ndarray (N, 3)
+        Points or directions in beam-line frame.
+    depth : float or ndarray (N,)
+        Sample depth along the beam, per ray or shared.
+    on_detector : bool
+        When True, NaN out each pixel coordinate that falls off the chip.
+
+    Returns
+    -------
+    ndarray (N, 2)
+        Columns ``[px, py]`` in full-chip un-binned pixels.
+    """
+    xyz = np.asarray(xyz, dtype=float).reshape(-1, 3)
+    x, y, z = xyz[:, 0], xyz[:, 1], xyz[:, 2]
+    rho, P = d.rho, d.P
+
+    xp = rho[0, 0] * x + rho[1, 0] * y + rho[2, 0] * z - P[0]
+    yp = rho[0, 1] * x + rho[1, 1] * y + rho[2, 1] * z - P[1]
+    zp = rho[0, 2] * x + rho[1, 2] * y + rho[2, 2] * z - P[2]
+
+    dxp = -P[0] - xp
+    dyp = -P[1] - yp
+    dzp = -P[2] - zp
+
+    depth = np.asarray(depth, dtype=float)
+    if np.any(depth):
+        xp = xp + rho[2, 0] * depth
+        yp = yp + rho[2, 1] * depth
+        zp = zp + rho[2, 2] * depth
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t = -zp / dzp
+    # dzp == 0: ray parallel to the detector; t > 1: ray goes backwards
+    # through the origin -- neither is visible.
+    hidden = (dzp == 0) | (t > 1)
+
+    px = (xp + t * dxp) / d.sizeX * d.Nx + 0.5 * (d.Nx - 1)
+    py = (yp + t * dyp) / d.sizeY * d.Ny + 0.5 * (d.Ny - 1)
+    px[hidden] = np.nan
+    py[hidden] = np.nan
+
+    if on_detector:
+        # NaN compares False, so already-hidden rows stay NaN.
+        px[~((px >= 0) & (px <= d.Nx - 0.5))] = np.nan
+        py[~((py >= 0) & (py <= d.Ny - 0.5))] = np.nan
+    return np.column_stack([px, py])
+
+
 def q_to_pixel_batch(
     d: DetectorGeometry,
     qvecs: np.ndarray,
@@ -189,12 +255,18 @@ def q_to_pixel_batch(
     """
     Vectorised :func:`q_to_pixel`.
 
+    The whole q → kout → detector → pixel chain runs on ``(N, 3)`` arrays
+    with the scalar port's arithmetic.  Results agree with
+    :func:`q_to_pixel` to ~1e-9 px; the only difference is the rounding of
+    ``|q|``, which the scalar path takes from a BLAS dot product.
+
     Parameters
     ----------
     d : DetectorGeometry
     qvecs : ndarray (N, 3)
         Reciprocal-space vectors.
-    depth, on_detector : see :func:`q_to_pixel`.
+    depth, on_detector : see :func:`q_to_pixel`.  ``depth`` may also be
+        an ``(N,)`` array of per-reflection depths.
 
     Returns
     -------
@@ -205,9 +277,21 @@ def q_to_pixel_batch(
     qvecs = np.asarray(qvecs, dtype=float)
     if qvecs.ndim == 1:
         qvecs = qvecs[None, :]
-    out = np.full((qvecs.shape[0], 2), np.nan)
-    for i in range(qvecs.shape[0]):
-        out[i] = q_to_pixel(d, qvecs[i], depth=depth, on_detector=on_detector)
+
+    q_norm = np.linalg.norm(qvecs, axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        qhat = qvecs / q_norm[:, None]
+
+    # qhat · ki with ki = (0, 0, 1) is just the z component.
+    q_len = -2.0 * qhat[:, 2]
+    kout = qhat * q_len[:, None] + _KI
+
+    if depth is None:
+        depth = 0.0
+    depth = np.nan_to_num(np.asarray(depth, dtype=float), nan=0.0)
+    out = xyz_to_pixel_batch(d, kout, depth=depth, on_detector=on_detector)
+    # Zero Q, or a reflection from behind the sample.
+    out[(q_norm == 0.0) | (q_len < 0)] = np.nan
     return out
 
 
@@ -386,12 +470,8 @@ def build_step_overlay(
     overlay.image_path = step_peaks.get("input_image")
 
     # ── Detector resolution ──────────────────────────────────────────
-    detector_id = ""
-    det_attr_el = parsed["_steps"][step_index].get("detector_el")
-    if det_attr_el is not None:
-        det_id_el = det_attr_el.find("detectorID")
-        if det_id_el is not None and det_id_el.text:
-            detector_id = det_id_el.text.strip()
+    store = parsed["_steps"]
+    detector_id = store.detector_id.get(step_index) or ""
     overlay.detector_id = detector_id
 
     detector: Optional[DetectorGeometry] = geometry.detector_by_id(detector_id)
@@ -412,10 +492,9 @@ def build_step_overlay(
     overlay.Ny = detector.Ny
 
     # ── ROI ──────────────────────────────────────────────────────────
-    if det_attr_el is not None:
-        roi_el = det_attr_el.find("ROI")
-        if roi_el is not None:
-            overlay.roi = ROI.from_attrib(roi_el.attrib)
+    roi_attrib = store.roi.get(step_index)
+    if roi_attrib is not None:
+        overlay.roi = ROI.from_attrib(roi_attrib)
 
     # ── Measured peaks ───────────────────────────────────────────────
     px_meas = step_peaks.get("pixel_positions")
@@ -514,70 +593,191 @@ def _simulate_missing_spots(
     space_group: int | None = None,
 ) -> MissingSpotOverlay:
     """Lightweight candidate-reflection enumerator for missing spot display."""
-    hkl_candidates = _enumerate_hkl(int(hkl_limit))
-    hkl_candidates = hkl_candidates[_centering_allowed_mask(hkl_candidates, space_group)]
-    if len(hkl_candidates) == 0:
+    table = _hkl_candidate_table(_normalize_space_group(space_group), max(1, int(hkl_limit)))
+    if len(table.hkl) == 0:
+        return MissingSpotOverlay(pattern_num=pattern.pattern_num)
+
+    roi = overlay.roi
+    direction_xy, energy, missing = _missing_candidates(
+        table,
+        recip[None],
+        detector,
+        np.array([depth], dtype=float),
+        roi_start=np.array([[roi.startx, roi.starty]], dtype=float),
+        roi_group=np.array([[roi.groupx, roi.groupy]], dtype=float),
+        roi_limit=np.array([_roi_limits(roi, overlay.Nx, overlay.Ny)], dtype=float),
+        indexed=_rows_in(table.hkl, pattern.hkl)[None],
+        energy_range_kev=energy_range_kev,
+    )
+    pred_xy, energy = direction_xy[0][table.direction], energy[0]
+    missing_idx = np.flatnonzero(missing[0])
+    if not len(missing_idx):
         return MissingSpotOverlay(pattern_num=pattern.pattern_num)
-    qvecs = hkl_candidates @ recip
-    full_xy = q_to_pixel_batch(detector, qvecs, depth=depth)
-    px_roi, py_roi = full_to_roi(full_xy[:, 0], full_xy[:, 1], overlay.roi)
-    pred_xy = np.column_stack([px_roi, py_roi])
 
+    # Rows are grouped by direction in harmonic (= energy) order, so the
+    # first missing row of each direction is its lowest-energy reflection.
+    direction = table.direction[missing_idx]
+    starts = np.flatnonzero(np.r_[True, direction[1:] != direction[:-1]])
+    idx = missing_idx[starts]
+    # Sort by energy; ties keep the order in which directions are enumerated.
+    first_seen = np.minimum.reduceat(table.cube_index[missing_idx], starts)
+    idx = idx[np.lexsort((first_seen, energy[idx]))]
+    return MissingSpotOverlay(
+        pattern_num=pattern.pattern_num,
+        hkl=table.hkl[idx].astype(int),
+        predicted_xy=pred_xy[idx],
+        energy_kev=energy[idx],
+    )
+
+
+def _missing_candidates(
+    table: "_HklCandidateTable",
+    recips: np.ndarray,
+    detector: DetectorGeometry,
+    depths: np.ndarray,
+    *,
+    roi_start: np.ndarray,
+    roi_group: np.ndarray,
+    roi_limit: np.ndarray,
+    indexed: np.ndarray,
+    energy_range_kev: Tuple[float, float],
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Evaluate the candidate table for ``B`` patterns on one detector.
+
+    Parameters
+    ----------
+    table : _HklCandidateTable
+        ``M`` candidate reflections.
+    recips : ndarray (B, 3, 3)
+        Reciprocal lattices, rows a*, b*, c*.
+    depths : ndarray (B,)
+        Source depth of each pattern (NaN-free).
+    roi_start, roi_group, roi_limit : ndarray (B, 2)
+        ROI origin and binning, and the on-chip extent in ROI pixels, as
+        ``(x, y)`` per pattern.
+    indexed : ndarray (B, M) bool
+        Table rows already indexed by each pattern.
+
+    Returns
+    -------
+    direction_xy : ndarray (B, D, 2)
+        Predicted ROI pixel of every table direction.
+    energy : ndarray (B, M)
+        Reflection energy in keV, evaluated for on-chip, un-indexed
+        candidates only (NaN elsewhere).
+    missing : ndarray (B, M) bool
+        On-chip, in-window candidates that are not indexed.
+    """
+    n_patterns = len(recips)
+    n_directions = len(table.directions)
+    # Harmonics share a scattering direction, hence a pixel: project and
+    # bounds-check each direction once.  Only directions with q_z < 0 can
+    # diffract forward, so the rest are never projected.
+    direction_q = np.matmul(table.directions, recips)
+    forward = direction_q[..., 2] < 0
+    full_xy = np.full((n_patterns, n_directions, 2), np.nan)
+    full_xy[forward] = q_to_pixel_batch(
+        detector, direction_q[forward], depth=np.broadcast_to(depths[:, None], forward.shape)[forward]
+    )
+    # full_to_roi with per-pattern ROI parameters.
+    roi_xy = (full_xy - roi_start[:, None, :] - (roi_group[:, None, :] - 1) / 2.0) / roi_group[:, None, :]
+    on_chip = np.all(np.isfinite(roi_xy) & (roi_xy >= 0) & (roi_xy <= roi_limit[:, None, :]), axis=2)
+
+    # Energies are only needed for on-chip candidates.
+    pattern, row = np.nonzero(on_chip[:, table.direction] & ~indexed)
+    qvecs = np.einsum("kj,kji->ki", table.hkl[row], recips[pattern])
     q_norm = np.linalg.norm(qvecs, axis=1)
-    qhat_z = np.full(len(q_norm), np.nan)
-    nonzero = q_norm > 0
-    qhat_z[nonzero] = qvecs[nonzero, 2] / q_norm[nonzero]
-    sin_theta = -qhat_z
-    energy = np.full(len(q_norm), np.nan)
-    valid_theta = sin_theta > 0
-    # The XML reciprocal lattice is in 1/nm; hc is keV*nm.
-    energy[valid_theta] = q_norm[valid_theta] * 1.2398419739 / (4.0 * np.pi * sin_theta[valid_theta])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sin_theta = -qvecs[:, 2] / q_norm
+        # The XML reciprocal lattice is in 1/nm; hc is keV*nm.
+        candidate_energy = q_norm * 1.2398419739 / (4.0 * np.pi * sin_theta)
+    candidate_energy[~(sin_theta > 0)] = np.nan
 
     emin, emax = sorted((float(energy_range_kev[0]), float(energy_range_kev[1])))
-    x_max = (overlay.roi.endx - overlay.roi.startx) / overlay.roi.groupx if overlay.roi.endx else overlay.Nx
-    y_max = (overlay.roi.endy - overlay.roi.starty) / overlay.roi.groupy if overlay.roi.endy else overlay.Ny
-    finite = np.isfinite(pred_xy[:, 0]) & np.isfinite(pred_xy[:, 1]) & np.isfinite(energy)
-    on_chip = finite & (pred_xy[:, 0] >= 0) & (pred_xy[:, 1] >= 0) & (pred_xy[:, 0] <= x_max) & (pred_xy[:, 1] <= y_max)
-    in_energy = (energy >= emin) & (energy <= emax)
-    keep = on_chip & in_energy
-
-    if not np.any(keep):
-        return MissingSpotOverlay(pattern_num=pattern.pattern_num)
+    energy = np.full((n_patterns, len(table.hkl)), np.nan)
+    energy[pattern, row] = candidate_energy
+    missing = np.zeros(energy.shape, dtype=bool)
+    missing[pattern, row] = (candidate_energy >= emin) & (candidate_energy <= emax)
+    return roi_xy, energy, missing
 
-    indexed_hkl = {tuple(map(int, hkl)) for hkl in pattern.hkl}
-    missing_idx = []
 
-    for idx in np.where(keep)[0]:
-        hkl = tuple(map(int, hkl_candidates[idx]))
-        if hkl in indexed_hkl:
-            continue
-        missing_idx.append(idx)
+def _roi_limits(roi: ROI, nx: int, ny: int) -> Tuple[float, float]:
+    """On-chip extent ``(x_max, y_max)`` in ROI pixels."""
+    x_max = (roi.endx - roi.startx) / roi.groupx if roi.endx else nx
+    y_max = (roi.endy - roi.starty) / roi.groupy if roi.endy else ny
+    return x_max, y_max
 
-    if not missing_idx:
-        return MissingSpotOverlay(pattern_num=pattern.pattern_num)
 
-    idx = _deduplicate_by_direction(np.asarray(missing_idx, dtype=int), qvecs, energy)
-    return MissingSpotOverlay(
-        pattern_num=pattern.pattern_num,
-        hkl=hkl_candidates[idx].astype(int),
-        predicted_xy=pred_xy[idx],
-        energy_kev=energy[idx],
+def _rows_in(hkl: np.ndarray, reference: np.ndarray) -> np.ndarray:
+    """Boolean mask of the ``hkl`` rows that also occur in ``reference``."""
+    reference = np.asarray(reference, dtype=np.int64).reshape(-1, 3)
+    if len(hkl) == 0 or len(reference) == 0:
+        return np.zeros(len(hkl), dtype=bool)
+    return np.isin(_hkl_keys(hkl), _hkl_keys(reference))
+
+
+def _hkl_keys(hkl: np.ndarray) -> np.ndarray:
+    """Pack integer (h, k, l) rows into one int64 each (|h|, |k|, |l| < 2**20)."""
+    hkl = np.asarray(hkl, dtype=np.int64) + (1 << 20)
+    return (hkl[:, 0] << 42) | (hkl[:, 1] << 21) | hkl[:, 2]
+
+
+@dataclass(frozen=True)
+class _HklCandidateTable:
+    """
+    Allowed candidate reflections for one (space group, HKL limit) pair.
+
+    Rows are grouped by scattering direction -- the primitive HKL, since
+    ``q = hkl @ recip`` is linear -- and ordered by harmonic within each
+    group, i.e. by increasing |G| along that direction.
+    """
+
+    hkl: np.ndarray  # (M, 3) float, allowed reflections
+    direction: np.ndarray  # (M,) row of ``directions`` each reflection lies along
+    cube_index: np.ndarray  # (M,) position in the ``_enumerate_hkl`` cube
+    directions: np.ndarray  # (D, 3) float, primitive HKL of each direction
+    direction_start: np.ndarray  # (D,) first row of each direction
+    key_order: np.ndarray  # (M,) rows sorted by ``_hkl_keys``, for lookups
+
+
+@functools.lru_cache(maxsize=32)
+def _hkl_candidate_table(space_group: int | None, hkl_limit: int) -> _HklCandidateTable:
+    """
+    Build (once per space group and limit) the missing-spot candidate table.
+
+    The table is independent of the lattice parameters, so every pattern of
+    every step with the same space group shares it; per pattern only the
+    matrix product with the reciprocal lattice remains.
+    """
+    cube = _enumerate_hkl(hkl_limit)
+    cube_index = np.flatnonzero(_centering_allowed_mask(cube, space_group))
+    hkl = cube[cube_index]
+    harmonic = np.gcd.reduce(np.abs(hkl), axis=1)
+    primitive = hkl // harmonic[:, None]
+    _, first_seen, direction = np.unique(_hkl_keys(primitive), return_index=True, return_inverse=True)
+    direction = direction.reshape(-1)
+    order = np.lexsort((harmonic, direction))
+    direction = direction[order]
+    table = _HklCandidateTable(
+        hkl=hkl[order].astype(float),
+        direction=direction,
+        cube_index=cube_index[order],
+        directions=primitive[first_seen].astype(float),
+        direction_start=np.searchsorted(direction, np.arange(len(first_seen))),
+        key_order=np.argsort(_hkl_keys(hkl[order]), kind="stable"),
     )
+    for array in vars(table).values():
+        array.setflags(write=False)
+    return table
 
 
-def _deduplicate_by_direction(indices: np.ndarray, qvecs: np.ndarray, energy: np.ndarray) -> np.ndarray:
-    """Collapse harmonic reflections that share the same scattering direction."""
-    by_direction: dict[tuple[int, int, int], int] = {}
-    for idx in indices:
-        q = qvecs[idx]
-        norm = float(np.linalg.norm(q))
-        if norm == 0.0 or not np.isfinite(norm):
-            continue
-        key = tuple(int(v) for v in np.trunc((q / norm) * 1e5))
-        prev = by_direction.get(key)
-        if prev is None or energy[idx] < energy[prev]:
-            by_direction[key] = int(idx)
-    return np.array(sorted(by_direction.values(), key=lambda i: energy[i]), dtype=int)
+def _normalize_space_group(space_group) -> int | None:
+    """Space-group number as an ``int`` cache key, or ``None`` when unknown."""
+    try:
+        return int(space_group)
+    except (TypeError, ValueError):
+        return None
 
 
 def _enumerate_hkl(limit: int) -> np.ndarray:
@@ -699,8 +899,7 @@ def overlay_statistics(overlay: StepOverlay) -> dict:
         if n_predicted:
             px = pat.predicted_xy[:, 0]
             py = pat.predicted_xy[:, 1]
-            x_max = (overlay.roi.endx - overlay.roi.startx) / overlay.roi.groupx if overlay.roi.endx else overlay.Nx
-            y_max = (overlay.roi.endy - overlay.roi.starty) / overlay.roi.groupy if overlay.roi.endy else overlay.Ny
+            x_max, y_max = _roi_limits(overlay.roi, overlay.Nx, overlay.Ny)
             in_bounds = np.isfinite(px) & np.isfinite(py) & (px >= 0) & (py >= 0) & (px <= x_max) & (py <= y_max)
             n_on = int(in_bounds.sum())
         else:
@@ -724,3 +923,270 @@ def overlay_statistics(overlay: StepOverlay) -> dict:
         "indexed_fraction": (n_indexed / n_meas) if n_meas else 0.0,
         "patterns": by_pattern,
     }
+
+
+# ---------------------------------------------------------------------------
+# Whole-scan statistics
+# ---------------------------------------------------------------------------
+
+# Per-block row budgets for the batched passes; bounds the temporaries to
+# a few hundred MB however large the scan is.
+_REFLECTION_BLOCK_ROWS = 1_000_000
+_MISSING_BLOCK_ROWS = 2_000_000
+# Smallest step range worth shipping to a worker process.
+_MIN_STEPS_PER_TASK = 1000
+
+_SCAN_STEP_FIELDS = (
+    "n_measured",
+    "n_indexed",
+    "indexed_fraction",
+    "n_patterns",
+    "n_predicted",
+    "n_predicted_on_detector",
+    "n_matched",
+    "n_missing",
+)
+
+
+def scan_overlay_statistics(
+    parsed: dict,
+    geometry: BeamlineGeometry,
+    simulate_missing: bool = False,
+    missing_energy_range_kev: Tuple[float, float] = (6.0, 30.0),
+    missing_hkl_limit: int = 12,
+    workers: int = 1,
+) -> dict:
+    """
+    :func:`overlay_statistics` for every step of a scan, as arrays.
+
+    Equivalent to calling :func:`build_step_overlay` and
+    :func:`overlay_statistics` on each step, but back-projects all indexed
+    reflections of the scan in a few vectorised passes over the stacked
+    reciprocal lattices and depths of the parsed store.  Suited to
+    whole-scan quality maps (predicted vs measured, missing-spot counts).
+
+    Parameters
+    ----------
+    parsed : dict
+        Output of :func:`laue_portal.analysis.xml_parser.parse_indexing_xml`.
+    geometry : BeamlineGeometry
+        Detector geometry for the scan.
+    simulate_missing, missing_energy_range_kev, missing_hkl_limit :
+        As for :func:`build_step_overlay`; ``n_missing`` is zero unless
+        ``simulate_missing`` is set.
+    workers : int
+        Process count.  Large scans are split into contiguous step ranges
+        evaluated in a process pool; ``1`` runs in-process.
+
+    Returns
+    -------
+    dict
+        Per-step ``(S,)`` arrays ``has_overlay`` (False where
+        :func:`build_step_overlay` returns ``None``), ``n_measured``,
+        ``n_indexed``, ``indexed_fraction`` and ``n_patterns``, plus the
+        per-step sums ``n_predicted``, ``n_predicted_on_detector``,
+        ``n_matched`` and ``n_missing``.  ``patterns`` holds ``(P,)``
+        arrays with the keys of ``overlay_statistics(...)["patterns"]``
+        and a ``step`` column, one row per back-projected pattern in step
+        order.
+    """
+    store = parsed["_steps"]
+    depths = np.nan_to_num(np.asarray(parsed["depths"], dtype=float), nan=0.0)
+    options = {
+        "space_group": _normalize_space_group(parsed.get("space_group")),
+        "simulate_missing": bool(simulate_missing),
+        "energy_range_kev": tuple(missing_energy_range_kev),
+        "hkl_limit": max(1, int(missing_hkl_limit)),
+    }
+    n_steps = len(store)
+    if workers <= 1 or n_steps < 2 * _MIN_STEPS_PER_TASK:
+        return _scan_statistics(store, depths, geometry, **options)
+
+    per_task = max(_MIN_STEPS_PER_TASK, -(-n_steps // (2 * workers)))
+    bounds = [(a, min(a + per_task, n_steps)) for a in range(0, n_steps, per_task)]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(_scan_statistics, store.take(np.arange(a, b)), depths[a:b], geometry, **options)
+            for a, b in bounds
+        ]
+        parts = [future.result() for future in futures]
+
+    result = {key: np.concatenate([part[key] for part in parts]) for key in ("has_overlay",) + _SCAN_STEP_FIELDS}
+    patterns = {key: np.concatenate([part["patterns"][key] for part in parts]) for key in parts[0]["patterns"]}
+    patterns["step"] = np.concatenate(
+        [part["patterns"]["step"] + a for part, (a, _) in zip(parts, bounds, strict=True)]
+    )
+    result["patterns"] = patterns
+    return result
+
+
+def _scan_statistics(
+    store: PeakStore,
+    depths: np.ndarray,
+    geometry: BeamlineGeometry,
+    *,
+    space_group: int | None,
+    simulate_missing: bool,
+    energy_range_kev: Tuple[float, float],
+    hkl_limit: int,
+) -> dict:
+    """In-process body of :func:`scan_overlay_statistics` for one :class:`PeakStore`."""
+    n_steps = len(store)
+    n_pat = store.n_patterns_total
+
+    # ── Per-step detector, ROI and measured-peak count ───────────────
+    detector_index = _step_detector_index(store, geometry)
+    has_detector = detector_index >= 0
+    nx = np.array([d.Nx for d in geometry.detectors] + [0], dtype=float)[detector_index]
+    ny = np.array([d.Ny for d in geometry.detectors] + [0], dtype=float)[detector_index]
+    roi_start, roi_group, roi_limit = _step_roi_arrays(store, nx, ny)
+
+    has_overlay = store.has_peaks.astype(bool)
+    xcol, ycol = store.peaks["Xpixel"], store.peaks["Ypixel"]
+    # build_step_overlay returns before reading peaks when there is no detector.
+    n_measured = np.where(has_overlay & has_detector & xcol.present & ycol.present, xcol.lengths, 0)
+
+    # ── Patterns that build_step_overlay back-projects ───────────────
+    pattern_step = np.repeat(np.arange(n_steps), np.diff(store.pattern_offsets))
+    n_hkl = np.where(store.hkl.present, store.hkl.lengths, 0)
+    active = (has_overlay & has_detector)[pattern_step] & store.has_recip & (n_hkl > 0)
+
+    # ── Indexed reflections: on-detector predictions ─────────────────
+    n_on = np.zeros(n_pat, dtype=np.int64)
+    refl_pattern = np.repeat(np.arange(n_pat), store.hkl.lengths)
+    refl_rows = np.flatnonzero(active[refl_pattern])
+    for block in _blocks(refl_rows, _REFLECTION_BLOCK_ROWS):
+        pat = refl_pattern[block]
+        step = pattern_step[pat]
+        qvecs = np.einsum("kj,kji->ki", store.hkl.values[block].astype(float), store.recip_lattice[pat])
+        full_xy = np.empty((len(block), 2))
+        for d in np.unique(detector_index[step]):
+            on_d = detector_index[step] == d
+            full_xy[on_d] = q_to_pixel_batch(geometry.detectors[d], qvecs[on_d], depth=depths[step[on_d]])
+        roi_xy = (full_xy - roi_start[step] - (roi_group[step] - 1) / 2.0) / roi_group[step]
+        in_bounds = np.all(np.isfinite(roi_xy) & (roi_xy >= 0) & (roi_xy <= roi_limit[step]), axis=1)
+        n_on += np.bincount(pat[in_bounds], minlength=n_pat)
+
+    # ── PkIndex matches and indexed measured peaks ───────────────────
+    pk = store.peak_index
+    pk_pattern = np.repeat(np.arange(n_pat), pk.lengths)
+    position = np.arange(len(pk_pattern)) - np.repeat(pk.offsets[:-1], pk.lengths)
+    values = pk.values
+    pk_step = pattern_step[pk_pattern]
+    valid = active[pk_pattern] & (position < n_hkl[pk_pattern]) & (values >= 0) & (values < n_measured[pk_step])
+    n_matched = np.bincount(pk_pattern[valid], minlength=n_pat)
+    stride = int(n_measured.max(initial=0)) + 1
+    indexed_peaks = np.unique(pk_step[valid] * stride + values[valid])
+    n_indexed = np.bincount(indexed_peaks // stride, minlength=n_steps)
+
+    # ── Simulated missing spots ──────────────────────────────────────
+    n_missing = np.zeros(n_pat, dtype=np.int64)
+    if simulate_missing and active.any():
+        table = _hkl_candidate_table(space_group, hkl_limit)
+        if len(table.hkl):
+            sorted_keys = _hkl_keys(table.hkl)[table.key_order]
+            patterns_per_block = max(1, _MISSING_BLOCK_ROWS // len(table.hkl))
+            for d in np.unique(detector_index[pattern_step[active]]):
+                rows = np.flatnonzero(active & (detector_index[pattern_step] == d))
+                for block in _blocks(rows, patterns_per_block):
+                    step = pattern_step[block]
+                    _, _, missing = _missing_candidates(
+                        table,
+                        store.recip_lattice[block],
+                        geometry.detectors[d],
+                        depths[step],
+                        roi_start=roi_start[step],
+                        roi_group=roi_group[step],
+                        roi_limit=roi_limit[step],
+                        indexed=_indexed_table_rows(store.hkl.take(block), table, sorted_keys),
+                        energy_range_kev=energy_range_kev,
+                    )
+                    # One spot per direction with any missing harmonic.
+                    n_missing[block] = np.logical_or.reduceat(missing, table.direction_start, axis=1).sum(axis=1)
+
+    # ── Assemble ─────────────────────────────────────────────────────
+    rows = np.flatnonzero(active)
+    patterns = {
+        "step": pattern_step[rows],
+        "pattern_num": _nan_to_int(store.pattern_num[rows]),
+        "n_indexed": _nan_to_int(store.n_indexed[rows]),
+        "n_predicted": n_hkl[rows],
+        "n_predicted_on_detector": n_on[rows],
+        "n_matched": n_matched[rows],
+        "n_missing": n_missing[rows],
+        "rms_error": store.rms_error[rows].astype(float),
+        "goodness": store.goodness[rows].astype(float),
+        "n_pkindex": n_matched[rows],
+    }
+
+    def per_step(values):
+        return np.bincount(patterns["step"], weights=values, minlength=n_steps).astype(np.int64)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        indexed_fraction = np.where(n_measured > 0, n_indexed / n_measured, 0.0)
+    return {
+        "has_overlay": has_overlay,
+        "n_measured": n_measured.astype(np.int64),
+        "n_indexed": n_indexed.astype(np.int64),
+        "indexed_fraction": indexed_fraction,
+        "n_patterns": np.bincount(patterns["step"], minlength=n_steps).astype(np.int64),
+        "n_predicted": per_step(patterns["n_predicted"]),
+        "n_predicted_on_detector": per_step(patterns["n_predicted_on_detector"]),
+        "n_matched": per_step(patterns["n_matched"]),
+        "n_missing": per_step(patterns["n_missing"]),
+        "patterns": patterns,
+    }
+
+
+def _blocks(rows: np.ndarray, size: int):
+    """Split an index array into consecutive pieces of at most ``size``."""
+    for start in range(0, len(rows), size):
+        yield rows[start : start + size]
+
+
+def _step_detector_index(store: PeakStore, geometry: BeamlineGeometry) -> np.ndarray:
+    """Per-step index into ``geometry.detectors`` as chosen by :func:`build_step_overlay` (-1: none)."""
+    if not geometry.detectors:
+        return np.full(len(store), -1, dtype=np.int64)
+    lookup = []
+    # Trailing entry serves code -1 (no <detectorID>).
+    for detector_id in [str(value) for value in store.detector_id.categories] + [""]:
+        detector = geometry.detector_by_id(detector_id)
+        lookup.append(0 if detector is None else geometry.detectors.index(detector))
+    return np.asarray(lookup, dtype=np.int64)[store.detector_id.codes]
+
+
+def _step_roi_arrays(store: PeakStore, nx: np.ndarray, ny: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Per-step ROI origin, binning and on-chip extent as ``(S, 2)`` arrays."""
+    table = store.roi
+    codes = np.column_stack([table.present] + [column.codes for column in table.columns.values()])
+    _, first, inverse = np.unique(codes, axis=0, return_index=True, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    rois = []
+    for step in first:
+        attrib = table.get(step)
+        rois.append(ROI() if attrib is None else ROI.from_attrib(attrib))
+    start = np.array([[roi.startx, roi.starty] for roi in rois], dtype=float).reshape(-1, 2)[inverse]
+    group = np.array([[roi.groupx, roi.groupy] for roi in rois], dtype=float).reshape(-1, 2)[inverse]
+    end = np.array([[roi.endx, roi.endy] for roi in rois], dtype=float).reshape(-1, 2)[inverse]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        limit = np.where(end != 0, (end - start) / group, np.column_stack([nx, ny]))
+    return start, group, limit
+
+
+def _indexed_table_rows(hkl: RaggedColumn, table: _HklCandidateTable, sorted_keys: np.ndarray) -> np.ndarray:
+    """``(B, M)`` mask of the candidate-table rows indexed by each of ``B`` patterns."""
+    indexed = np.zeros((len(hkl), len(table.hkl)), dtype=bool)
+    if len(hkl.values) == 0:
+        return indexed
+    pattern = np.repeat(np.arange(len(hkl)), hkl.lengths)
+    keys = _hkl_keys(hkl.values)
+    position = np.minimum(np.searchsorted(sorted_keys, keys), len(sorted_keys) - 1)
+    found = sorted_keys[position] == keys
+    indexed[pattern[found], table.key_order[position[found]]] = True
+    return indexed
+
+
+def _nan_to_int(values: np.ndarray) -> np.ndarray:
+    """NaN-for-missing float column as ints (missing -> 0)."""
+    return np.nan_to_num(np.asarray(values, dtype=float), nan=0.0).astype(np.int64)
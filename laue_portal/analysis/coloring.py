@@ -14,6 +14,10 @@ Utility_JZT.ipf).  Zero Dash/Plotly dependencies.
 
 import numpy as np
 
+# ``plotly_marker_colors`` switches to palette indices once each distinct
+# color is shared by this many points on average.
+_INDEXED_COLORS_MIN_REPEAT = 4
+
 
 def _round_significant(value, digits):
     """Round ``value`` to ``digits`` significant digits."""
@@ -50,57 +54,53 @@ def cubic_ipf_color(hkl):
     hkl = np.asarray(hkl, dtype=float)
     single = hkl.ndim == 1
 
-    if single:
-        hkl = hkl.reshape(1, 3)
-
-    rgb = np.zeros((len(hkl), 3))
-
-    for i in range(len(hkl)):
-        rgb[i] = _ipf_single(hkl[i])
+    rgb = _ipf_rgb(hkl.reshape(-1, 3))
 
     if single:
         return rgb[0]
     return rgb
 
 
-def _ipf_single(vec):
-    """Compute IPF color for a single hkl direction."""
-    # Handle zero / NaN
-    if np.any(np.isnan(vec)):
-        return np.array([np.nan, np.nan, np.nan])
-
-    norm = np.linalg.norm(vec)
-    if norm < 1e-12:
-        return np.array([0.0, 0.0, 0.0])  # black
-
-    # Step 1: fold into positive octant (cubic 8-fold mirror)
-    v = np.abs(vec)
-
-    # Step 2: sort ascending to reduce permutations (cubic 6-fold permutation)
-    # Result: 0 <= v[0] <= v[1] <= v[2]
-    v = np.sort(v)
-
-    # Step 3: normalize to unit length
-    v = v / np.linalg.norm(v)
-
-    # Step 4: triangle vertex directions (normalized)
-    p001 = np.array([0.0, 0.0, 1.0])
-    p011 = np.array([0.0, 1.0 / np.sqrt(2.0), 1.0 / np.sqrt(2.0)])
-    p111 = np.array([1.0 / np.sqrt(3.0), 1.0 / np.sqrt(3.0), 1.0 / np.sqrt(3.0)])
-
-    # Step 5: barycentric decomposition
-    poles = np.column_stack([p001, p011, p111])  # 3x3
-    coefs = np.linalg.solve(poles, v)  # 3 coefficients
-    coefs = np.maximum(coefs, 0.0)  # clamp negatives
+# Triangle vertex directions (normalized) as columns: (001), (011), (111).
+_IPF_POLES = np.column_stack(
+    [
+        [0.0, 0.0, 1.0],
+        [0.0, 1.0 / np.sqrt(2.0), 1.0 / np.sqrt(2.0)],
+        [1.0 / np.sqrt(3.0), 1.0 / np.sqrt(3.0), 1.0 / np.sqrt(3.0)],
+    ]
+)
+
+
+def _ipf_rgb(vecs):
+    """IPF colors for an (N, 3) array of directions: NaN rows -> NaN, zero rows -> black."""
+    rgb = np.zeros((len(vecs), 3))
+    nan_rows = np.any(np.isnan(vecs), axis=1)
+    rgb[nan_rows] = np.nan
+
+    norms = np.linalg.norm(vecs, axis=1)
+    rows = np.flatnonzero(~nan_rows & (norms >= 1e-12))
+    if len(rows) == 0:
+        return rgb
+
+    # Fold into the positive octant (cubic 8-fold mirror), then sort
+    # ascending (cubic 6-fold permutation): 0 <= v[0] <= v[1] <= v[2].
+    v = np.sort(np.abs(vecs[rows]), axis=1)
+    v /= np.linalg.norm(v, axis=1, keepdims=True)
+
+    # Barycentric decomposition against the triangle vertices, clamping
+    # negatives; R = (001), G = (011), B = (111) coefficient.
+    coefs = np.maximum(np.linalg.solve(_IPF_POLES, v.T).T, 0.0)
+
+    # Saturate so the max channel = 1.0 (black when all coefficients vanish).
+    max_c = np.max(coefs, axis=1)
+    saturated = max_c >= 1e-12
+    rgb[rows[saturated]] = coefs[saturated] / max_c[saturated, None]
+    return rgb
 
-    # Step 6: saturate so max channel = 1.0
-    max_c = np.max(coefs)
-    if max_c < 1e-12:
-        return np.array([0.0, 0.0, 0.0])
 
-    rgb = coefs / max_c
-    # R = coef for (001), G = coef for (011), B = coef for (111)
-    return rgb
+def _ipf_single(vec):
+    """Compute IPF color for a single hkl direction."""
+    return _ipf_rgb(np.asarray(vec, dtype=float).reshape(1, 3))[0]
 
 
 # ===================================================================
@@ -155,41 +155,25 @@ def rodrigues_rgb(rodrigues_vec, max_angle_deg=None):
         if not np.isfinite(max_angle_deg) or max_angle_deg <= 1e-12:
             max_angle_deg = 45.0
 
-    rgb = np.zeros((N, 3))
-
-    for i in range(N):
-        length = lengths[i]
-        if length < 1e-12:
-            continue  # black (0,0,0)
-
-        axis = rodrigues_vec[i] / length
-        angle = angles_deg[i]
-        scaled = axis * (angle / max_angle_deg)
-        scaled = np.clip(scaled, -1.0, 1.0)
-
-        r, g, b = 0.0, 0.0, 0.0
-
-        cx, cy, cz = scaled
-
-        if cx > 0:
-            r += cx
-        else:
-            g += abs(cx) / 2.0
-            b += abs(cx) / 2.0
-
-        if cy > 0:
-            g += cy
-        else:
-            r += abs(cy) / 2.0
-            b += abs(cy) / 2.0
-
-        if cz > 0:
-            b += cz
-        else:
-            r += abs(cz) / 2.0
-            g += abs(cz) / 2.0
-
-        rgb[i] = np.clip([r, g, b], 0.0, 1.0)
+    # Zero rotation stays black (0,0,0); NaN vectors propagate to NaN.
+    scaled = np.zeros((N, 3))
+    rotated = ~(lengths < 1e-12)
+    axes = rodrigues_vec[rotated] / lengths[rotated, None]
+    scaled[rotated] = np.clip(axes * (angles_deg[rotated, None] / max_angle_deg), -1.0, 1.0)
+
+    # A positive component feeds its own channel (+X -> R); a negative one
+    # is split evenly between the other two (-X -> G + B, i.e. cyan).
+    positive = scaled > 0
+    own = np.where(positive, scaled, 0.0)
+    split = np.where(positive, 0.0, np.abs(scaled) / 2.0)
+    rgb = np.column_stack(
+        [
+            own[:, 0] + split[:, 1] + split[:, 2],
+            split[:, 0] + own[:, 1] + split[:, 2],
+            split[:, 0] + split[:, 1] + own[:, 2],
+        ]
+    )
+    rgb = np.clip(rgb, 0.0, 1.0)
 
     if single:
         return rgb[0]
@@ -227,47 +211,44 @@ def hsv_wheel_color(dx, dy, rmax=1.0):
         dx = dx.reshape(1)
         dy = dy.reshape(1)
 
-    N = len(dx)
-    rgb = np.ones((N, 3))  # default white
-
-    for i in range(N):
-        x, y = dx[i], dy[i]
-        r = np.sqrt(x**2 + y**2)
+    rgb = np.ones((len(dx), 3))  # default white at the center
+    r = np.sqrt(dx**2 + dy**2)
+    off_center = ~(r < 1e-12)
 
-        if r < 1e-12:
-            continue  # white (1, 1, 1)
-
-        saturation = min(1.0, r / rmax)
-        hue = np.degrees(np.arctan2(y, x)) % 360.0
-
-        # HSV to RGB (6-sector conversion)
-        rgb[i] = _hsv_to_rgb(hue, saturation, 1.0)
+    saturation = np.minimum(1.0, r[off_center] / rmax)
+    hue = np.degrees(np.arctan2(dy[off_center], dx[off_center])) % 360.0
+    rgb[off_center] = _hsv_to_rgb(hue, saturation, 1.0)
 
     if scalar:
         return rgb[0]
     return rgb
 
 
+# Channel sources per 60-degree hue sector; columns index (v, p, q, t).
+_HSV_SECTOR_CHANNELS = np.array(
+    [
+        [0, 3, 1],  # (v, t, p)
+        [2, 0, 1],  # (q, v, p)
+        [1, 0, 3],  # (p, v, t)
+        [1, 2, 0],  # (p, q, v)
+        [3, 1, 0],  # (t, p, v)
+        [0, 1, 2],  # (v, p, q)
+    ]
+)
+
+
 def _hsv_to_rgb(h, s, v):
-    """Standard HSV to RGB conversion."""
-    sector = int(h / 60.0) % 6
+    """Standard HSV to RGB conversion (6-sector), for scalars or arrays."""
+    h = np.asarray(h, dtype=float)
+    s = np.asarray(s, dtype=float)
+    sector = np.floor(h / 60.0).astype(int) % 6
     f = h / 60.0 - np.floor(h / 60.0)
     p = v * (1.0 - s)
     q = v * (1.0 - f * s)
     t = v * (1.0 - (1.0 - f) * s)
 
-    if sector == 0:
-        return np.array([v, t, p])
-    elif sector == 1:
-        return np.array([q, v, p])
-    elif sector == 2:
-        return np.array([p, v, t])
-    elif sector == 3:
-        return np.array([p, q, v])
-    elif sector == 4:
-        return np.array([t, p, v])
-    else:  # sector == 5
-        return np.array([v, p, q])
+    values = np.stack(np.broadcast_arrays(np.full_like(f, v), p, q, t), axis=-1)
+    return np.take_along_axis(values, _HSV_SECTOR_CHANNELS[sector], axis=-1)
 
 
 # ===================================================================
@@ -297,29 +278,27 @@ def make_cubic_ipf_triangle(resolution=256):
 
     image = np.zeros((resolution, resolution, 4), dtype=np.uint8)
 
-    for j in range(resolution):
-        for i in range(resolution):
-            # Map pixel to stereographic coordinates
-            x = i / (resolution - 1) * x_max
-            y = (resolution - 1 - j) / (resolution - 1) * y_max  # y increases upward
-
-            # Only fill inside the triangle: y <= x
-            if y > x + 1e-6:
-                continue
+    # Map pixels to stereographic coordinates (y increases upward)
+    steps = np.arange(resolution)
+    x = (steps / (resolution - 1) * x_max)[None, :]
+    y = ((resolution - 1 - steps) / (resolution - 1) * y_max)[:, None]
+    x, y = np.broadcast_arrays(x, y)
 
-            # Inverse stereographic projection to get hkl from (x, y)
-            denom = 1.0 + x**2 + y**2
-            h = 2.0 * x / denom
-            k = 2.0 * y / denom
-            l = (1.0 - x**2 - y**2) / denom
+    # Only fill inside the triangle: y <= x
+    inside = ~(y > x + 1e-6)
+    x = x[inside]
+    y = y[inside]
 
-            rgb = _ipf_single(np.array([h, k, l]))
+    # Inverse stereographic projection to get hkl from (x, y)
+    denom = 1.0 + x**2 + y**2
+    hkl = np.column_stack([2.0 * x / denom, 2.0 * y / denom, (1.0 - x**2 - y**2) / denom])
 
-            if not np.any(np.isnan(rgb)):
-                image[j, i, 0] = int(np.clip(rgb[0] * 255, 0, 255))
-                image[j, i, 1] = int(np.clip(rgb[1] * 255, 0, 255))
-                image[j, i, 2] = int(np.clip(rgb[2] * 255, 0, 255))
-                image[j, i, 3] = 255
+    rgb = _ipf_rgb(hkl)
+    finite = ~np.any(np.isnan(rgb), axis=1)
+    pixels = np.zeros((len(rgb), 4), dtype=np.uint8)
+    pixels[finite, :3] = rgb_to_uint8(rgb[finite])
+    pixels[finite, 3] = 255
+    image[inside] = pixels
 
     return image
 
@@ -341,19 +320,14 @@ def make_color_hexagon(resolution=512):
     image = np.zeros((resolution, resolution, 4), dtype=np.uint8)
     center = (resolution - 1) / 2.0
 
-    for j in range(resolution):
-        for i in range(resolution):
-            x = (i - center) / center  # map to [-1, 1]
-            y = (center - j) / center  # y increases upward
+    steps = np.arange(resolution)
+    x = ((steps - center) / center)[None, :]  # map to [-1, 1]
+    y = ((center - steps) / center)[:, None]  # y increases upward
+    x, y = np.broadcast_arrays(x, y)
 
-            if x**2 + y**2 > 1.0:
-                continue  # outside circle
-
-            rgb = hsv_wheel_color(x, y, rmax=1.0)
-            image[j, i, 0] = int(np.clip(rgb[0] * 255, 0, 255))
-            image[j, i, 1] = int(np.clip(rgb[1] * 255, 0, 255))
-            image[j, i, 2] = int(np.clip(rgb[2] * 255, 0, 255))
-            image[j, i, 3] = 255
+    inside = ~(x**2 + y**2 > 1.0)
+    image[inside, :3] = rgb_to_uint8(hsv_wheel_color(x[inside], y[inside], rmax=1.0))
+    image[inside, 3] = 255
 
     return image
 
@@ -377,15 +351,8 @@ def batch_ipf_colors(crystal_directions):
     ndarray (N, 3)
         RGB values in [0, 1].  NaN rows produce [0.5, 0.5, 0.5] (gray).
     """
-    N = len(crystal_directions)
-    rgb = np.full((N, 3), 0.5)  # default gray for invalid
-
-    for i in range(N):
-        d = crystal_directions[i]
-        if np.any(np.isnan(d)):
-            continue
-        rgb[i] = _ipf_single(d)
-
+    rgb = _ipf_rgb(np.asarray(crystal_directions, dtype=float).reshape(-1, 3))
+    rgb[np.any(np.isnan(rgb), axis=1)] = 0.5  # gray for invalid
     return rgb
 
 
@@ -424,24 +391,127 @@ def rgb_to_plotly_colors(rgb_array, alpha=None):
     list of str
         Plotly-compatible color strings.
     """
-    colors = []
-    if alpha is None:
-        alpha_vals = None
-    else:
-        alpha_vals = np.asarray(alpha, dtype=float)
-        if alpha_vals.ndim == 0:
-            alpha_vals = np.full(len(rgb_array), float(alpha_vals))
-
-    for i in range(len(rgb_array)):
-        r = int(np.clip(rgb_array[i, 0] * 255, 0, 255))
-        g = int(np.clip(rgb_array[i, 1] * 255, 0, 255))
-        b = int(np.clip(rgb_array[i, 2] * 255, 0, 255))
+    indices, palette = indexed_colors(rgb_array, alpha=alpha)
+    return np.asarray(palette, dtype=object)[indices].tolist()
+
+
+def rgb_to_uint8(rgb_array):
+    """
+    Quantize RGB values in [0, 1] to uint8 channels (truncating, clamped).
+
+    Parameters
+    ----------
+    rgb_array : ndarray (..., 3)
+        RGB values in [0, 1].  NaN maps to 0.
+
+    Returns
+    -------
+    ndarray (..., 3) of uint8
+    """
+    scaled = np.clip(np.nan_to_num(np.asarray(rgb_array, dtype=float) * 255, nan=0.0), 0, 255)
+    return scaled.astype(np.uint8)
+
+
+def indexed_colors(rgb_array, alpha=None):
+    """
+    Reduce per-point RGB(A) colors to a palette of distinct Plotly colors.
+
+    Colors are quantized to 8 bits per channel exactly as
+    :func:`rgb_to_plotly_colors` formats them, so
+    ``palette[indices[i]]`` is the string that function yields for point
+    ``i``.
+
+    Parameters
+    ----------
+    rgb_array : ndarray (N, 3)
+        RGB values in [0, 1].
+    alpha : float or ndarray (N,), optional
+        If supplied, palette entries are ``rgba(r,g,b,a)`` strings.
+
+    Returns
+    -------
+    indices : ndarray (N,) of uint16 or uint32
+        Palette index per point.
+    palette : list of str
+        Distinct color strings, in ascending packed-RGB order.
+    """
+    channels = rgb_to_uint8(np.asarray(rgb_array, dtype=float).reshape(-1, 3)).astype(np.int64)
+    keys = (channels[:, 0] << 16) | (channels[:, 1] << 8) | channels[:, 2]
+
+    alpha_vals = None
+    if alpha is not None:
+        alpha_vals = np.clip(np.broadcast_to(np.asarray(alpha, dtype=float), keys.shape), 0.0, 1.0)
+        alpha_levels, alpha_index = np.unique(alpha_vals, return_inverse=True)
+        keys = keys * len(alpha_levels) + alpha_index
+
+    unique_keys, first, indices = np.unique(keys, return_index=True, return_inverse=True)
+    palette = []
+    for row in first:
+        r, g, b = channels[row]
         if alpha_vals is None:
-            colors.append(f"rgb({r},{g},{b})")
+            palette.append(f"rgb({r},{g},{b})")
         else:
-            a = float(np.clip(alpha_vals[i], 0.0, 1.0))
-            colors.append(f"rgba({r},{g},{b},{a:g})")
-    return colors
+            palette.append(f"rgba({r},{g},{b},{float(alpha_vals[row]):g})")
+
+    dtype = np.uint16 if len(unique_keys) <= np.iinfo(np.uint16).max + 1 else np.uint32
+    return indices.reshape(-1).astype(dtype), palette
+
+
+def palette_colorscale(palette):
+    """
+    Plotly colorscale that maps integer value ``k`` to ``palette[k]``.
+
+    Use with ``cmin=0`` and ``cmax=max(len(palette) - 1, 1)``; every stop
+    sits exactly on an integer, so no color is ever interpolated.
+
+    Parameters
+    ----------
+    palette : list of str
+        Plotly color strings.
+
+    Returns
+    -------
+    list of [float, str]
+    """
+    if len(palette) == 1:
+        return [[0.0, palette[0]], [1.0, palette[0]]]
+    last = len(palette) - 1
+    return [[k / last, color] for k, color in enumerate(palette)]
+
+
+def plotly_marker_colors(rgb_array, alpha=None):
+    """
+    Marker color properties for per-point RGB(A) colors.
+
+    When colors repeat (at most one distinct color per
+    ``_INDEXED_COLORS_MIN_REPEAT`` points) the marker carries palette
+    indices with an exact :func:`palette_colorscale`, which is far smaller
+    to serialize than one string per point; otherwise it falls back to
+    the per-point strings of :func:`rgb_to_plotly_colors`.
+
+    Parameters
+    ----------
+    rgb_array : ndarray (N, 3)
+        RGB values in [0, 1].
+    alpha : float or ndarray (N,), optional
+        Per-point opacity, as for :func:`rgb_to_plotly_colors`.
+
+    Returns
+    -------
+    dict
+        Keys to merge into a Plotly marker dict: ``color`` and, in the
+        indexed form, ``colorscale``, ``cmin``, ``cmax`` and ``showscale``.
+    """
+    indices, palette = indexed_colors(rgb_array, alpha=alpha)
+    if len(palette) * _INDEXED_COLORS_MIN_REPEAT > len(indices):
+        return {"color": np.asarray(palette, dtype=object)[indices].tolist()}
+    return {
+        "color": indices,
+        "colorscale": palette_colorscale(palette),
+        "cmin": 0,
+        "cmax": max(len(palette) - 1, 1),
+        "showscale": False,
+    }
 
 
 # ===================================================================
@@ -0,0 +1,228 @@
+"""
+In-process memoisation of arrays derived from a parsed indexing XML.
+
+``parse_indexing_xml`` already caches the parsed dict, but every Dash
+callback that needs orientations, crystal directions, Rodrigues vectors
+or pole figure points used to recompute them from the reciprocal
+lattices.  :func:`cached_derived` keeps those results keyed on
+``(xml path, mtime, quantity name, parameters)`` so that callbacks fired
+by the same control change share one computation; the
+``cached_orientations`` / ``cached_crystal_directions`` /
+``cached_rodrigues`` helpers (and ``projection.pole_figure_points_for_xml``)
+name the intermediates the visualisations share.
+
+Entries are evicted least-recently-used once the cached arrays exceed a
+byte budget (``LAUE_DERIVED_CACHE_MB``, default 256 MB; ``0`` disables
+the cache).  Cached arrays are marked read-only because they are shared.
+A miss falls through to the cross-process cache of
+:mod:`~laue_portal.analysis.shared_cache`, so other workers reuse the
+result too.
+
+Zero Dash / Plotly dependencies.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+import numpy as np
+
+from laue_portal.analysis import shared_cache
+
+_DEFAULT_MAX_MB = 256
+
+
+class DerivedCache:
+    """
+    LRU mapping bounded by the total ``nbytes`` of the cached arrays.
+
+    Parameters
+    ----------
+    max_bytes : int
+        Byte budget.  A value larger than the whole budget is returned but
+        never stored.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = int(max_bytes)
+        self._entries: OrderedDict[Hashable, tuple[Any, int]] = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def nbytes(self) -> int:
+        """Total size of the cached arrays."""
+        return self._nbytes
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Return the value cached under ``key``, computing and storing it on a miss."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry[0]
+
+        # Compute outside the lock: a concurrent miss on the same key only
+        # costs a duplicate computation, never a wrong result.
+        value = _freeze_arrays(compute())
+        size = _value_nbytes(value)
+        if size > self.max_bytes:
+            return value
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                return self._entries[key][0]
+            self._entries[key] = (value, size)
+            self._nbytes += size
+            while self._nbytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._nbytes -= evicted
+        return value
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+
+def _default_max_bytes() -> int:
+    try:
+        max_mb = float(os.environ.get("LAUE_DERIVED_CACHE_MB", _DEFAULT_MAX_MB))
+    except ValueError:
+        max_mb = _DEFAULT_MAX_MB
+    return int(max(max_mb, 0.0) * 1024 * 1024)
+
+
+_CACHE = DerivedCache(_default_max_bytes())
+
+
+def get_cache() -> DerivedCache:
+    """Return the process-wide derived-quantity cache."""
+    return _CACHE
+
+
+def cached_derived(
+    xml_path: Optional[str],
+    name: str,
+    params: Any,
+    compute: Callable[[], Any],
+) -> Any:
+    """
+    Memoise ``compute()`` for the XML at ``xml_path``.
+
+    Parameters
+    ----------
+    xml_path : str or None
+        XML the quantity is derived from.  ``None`` (data that did not
+        come from a file) or an unreadable path computes without caching.
+    name : str
+        Name of the derived quantity, e.g. ``"orientations"``.
+    params : object
+        Parameters the quantity depends on.  Arrays, lists, tuples, dicts
+        and scalars are accepted and converted to a hashable key.
+    compute : callable
+        Zero-argument function producing the value: an ndarray, or a
+        tuple / list / dict of ndarrays and scalars.
+
+    Returns
+    -------
+    object
+        The (possibly cached) value.  Cached arrays are read-only.
+    """
+    if xml_path is None:
+        return compute()
+    try:
+        mtime_ns = os.stat(xml_path).st_mtime_ns
+    except OSError:
+        return compute()
+    key = (os.path.abspath(xml_path), mtime_ns, name, _freeze_params(params))
+    return _CACHE.get_or_compute(key, lambda: shared_cache.get_or_compute(("derived", *key), compute))
+
+
+def cached_orientations(xml_path: Optional[str], parsed: dict) -> np.ndarray:
+    """:func:`~laue_portal.analysis.orientation.batch_orientations` of ``parsed``, memoised."""
+    from laue_portal.analysis.orientation import batch_orientations
+
+    return cached_derived(
+        xml_path,
+        "orientations",
+        None,
+        lambda: batch_orientations(parsed["recip_lattices"], parsed["lattice_params"]),
+    )
+
+
+def cached_crystal_directions(xml_path: Optional[str], parsed: dict, normal: Optional[np.ndarray]) -> np.ndarray:
+    """:func:`~laue_portal.analysis.orientation.batch_crystal_directions` along ``normal``, memoised."""
+    from laue_portal.analysis.orientation import batch_crystal_directions
+
+    return cached_derived(
+        xml_path,
+        "crystal_directions",
+        normal,
+        lambda: batch_crystal_directions(parsed["recip_lattices"], normal=normal),
+    )
+
+
+def cached_rodrigues(
+    xml_path: Optional[str],
+    parsed: dict,
+    symmetry_ops: Optional[np.ndarray] = None,
+    reference_index: Optional[int] = None,
+    reference_recip: Optional[np.ndarray] = None,
+) -> tuple[np.ndarray, np.ndarray]:
+    """``(rodrigues, valid)`` from :func:`~laue_portal.analysis.orientation.batch_rodrigues`, memoised."""
+    from laue_portal.analysis.orientation import batch_rodrigues
+
+    return cached_derived(
+        xml_path,
+        "rodrigues",
+        (symmetry_ops, reference_index, reference_recip),
+        lambda: batch_rodrigues(
+            parsed["recip_lattices"],
+            parsed["lattice_params"],
+            symmetry_ops=symmetry_ops,
+            reference_index=reference_index,
+            reference_recip=reference_recip,
+            return_valid=True,
+        ),
+    )
+
+
+def _freeze_params(value: Any) -> Hashable:
+    """Convert ``value`` to a hashable key, keeping array shapes."""
+    if isinstance(value, np.ndarray):
+        return ("ndarray", value.shape, value.dtype.str, value.tobytes())
+    if isinstance(value, dict):
+        return ("dict", tuple(sorted((k, _freeze_params(v)) for k, v in value.items())))
+    if isinstance(value, (list, tuple)):
+        return (type(value).__name__, tuple(_freeze_params(v) for v in value))
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _freeze_arrays(value: Any) -> Any:
+    """Mark the arrays of a cached value read-only (one container level deep)."""
+    items = value.values() if isinstance(value, dict) else value if isinstance(value, (list, tuple)) else (value,)
+    for item in items:
+        if isinstance(item, np.ndarray):
+            item.flags.writeable = False
+    return value
+
+
+def _value_nbytes(value: Any) -> int:
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sum(_value_nbytes(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(_value_nbytes(v) for v in value)
+    return 0
@@ -5,17 +5,39 @@ practice that value may be absolute, relative to the indexing output folder,
 or relative to the original data folder stored on the PeakIndex record.  This
 module resolves those common locations and loads a 2-D HDF5 dataset for use as
 an image background.
+
+Loaded frames are kept in a compact dtype (``uint16`` when the values fit,
+``float32`` otherwise) together with a multi-resolution pyramid: each level
+halves the previous one with a 2x2 max (so isolated Laue spots survive
+downsampling) until it fits in ``_PYRAMID_MIN_SIZE`` pixels.  The pyramid and
+the 1 / 99.9 percentile contrast limits are computed once per (file, mtime)
+and kept in :mod:`laue_portal.analysis.shared_cache`, so redraws only crop
+and ship the level that matches the current zoom
+(:meth:`DetectorImage.view`).
+
+Decoded pyramids are also kept in an in-process LRU bounded by bytes
+(``LAUE_DETECTOR_IMAGE_CACHE_MB``, default 512 MB; ``0`` disables it), so
+revisiting a step neither reopens the HDF5 file nor reads the shared
+cache.  :func:`prefetch_step_images` warms that LRU with the images of
+the steps around the one on screen from a background thread.
 """
 
 from __future__ import annotations
 
-from dataclasses import dataclass
+import itertools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Iterable
+from typing import Callable, Iterable, Iterator
 
 import h5py
 import numpy as np
 
+from laue_portal.analysis import shared_cache
+from laue_portal.analysis.derived_cache import DerivedCache
+
 _DEFAULT_DATASETS = (
     "/entry1/data/data",
     "entry1/data/data",
@@ -26,15 +48,85 @@ _DEFAULT_DATASETS = (
 )
 
 
+# Coarsest pyramid level: the halving stops once both sides fit in this.
+_PYRAMID_MIN_SIZE = 256
+_PERCENTILES = (1.0, 99.9)
+_DEFAULT_CACHE_MB = 512
+_DEFAULT_PREFETCH_STEPS = 2
+# Steps examined in each direction when looking for indexed neighbours.
+_PREFETCH_MAX_SCAN = 64
+
+
 @dataclass
 class DetectorImage:
-    """Loaded detector image and provenance metadata."""
+    """Loaded detector image and provenance metadata.
+
+    ``levels[k]`` is the image binned ``2**k`` x ``2**k`` (2x2 max per
+    halving); ``levels[0]`` is ``data``.
+    """
 
     data: np.ndarray
     path: str
     dataset: str
     vmin: float
     vmax: float
+    levels: tuple[np.ndarray, ...] = field(default=())
+
+    def __post_init__(self) -> None:
+        if not self.levels:
+            self.levels = tuple(build_pyramid(self.data))
+
+    def view(
+        self,
+        x_range: tuple[float, float] | None = None,
+        y_range: tuple[float, float] | None = None,
+        max_pixels: int = 1024,
+        margin: float = 0.25,
+    ) -> tuple[np.ndarray, float, float, int]:
+        """
+        Crop of the coarsest pyramid level that still resolves the viewport.
+
+        Parameters
+        ----------
+        x_range, y_range : (float, float) or None
+            Visible extent in full-resolution pixel coordinates (either
+            order).  ``None`` means the whole image along that axis.
+        max_pixels : int
+            Display budget: the level is chosen so that the visible extent
+            spans at most this many of its pixels along each axis.
+        margin : float
+            Extra fraction of the visible extent included on every side so
+            that small pans do not expose an empty border.
+
+        Returns
+        -------
+        tile : ndarray (h, w)
+            Pixels of the chosen level.
+        x0, y0 : float
+            Full-resolution coordinates of the centre of ``tile[0, 0]``.
+        step : int
+            Full-resolution pixels per tile pixel (``2**level``).
+        """
+        ny, nx = self.data.shape
+        x_lo, x_hi = _clip_range(x_range, nx)
+        y_lo, y_hi = _clip_range(y_range, ny)
+        extent = max(x_hi - x_lo, y_hi - y_lo, 1.0)
+        level = 0
+        while level + 1 < len(self.levels) and extent / 2**level > max_pixels:
+            level += 1
+        step = 2**level
+        tile = self.levels[level]
+        pad_x = margin * (x_hi - x_lo)
+        pad_y = margin * (y_hi - y_lo)
+        c0 = max(int(np.floor((x_lo - pad_x) / step)), 0)
+        c1 = min(int(np.ceil((x_hi + pad_x) / step)) + 1, tile.shape[1])
+        r0 = max(int(np.floor((y_lo - pad_y) / step)), 0)
+        r1 = min(int(np.ceil((y_hi + pad_y) / step)) + 1, tile.shape[0])
+        # Keep at least one pixel when the viewport lies off the image.
+        c0, r0 = min(c0, tile.shape[1] - 1), min(r0, tile.shape[0] - 1)
+        c1, r1 = max(c1, c0 + 1), max(r1, r0 + 1)
+        offset = (step - 1) / 2.0
+        return tile[r0:r1, c0:c1], c0 * step + offset, r0 * step + offset, step
 
 
 @dataclass
@@ -87,35 +179,237 @@ def load_detector_image(
         )
 
     try:
-        data, dataset = _read_hdf5_image(image_path, dataset_paths)
+        cached = _load_pyramid(image_path, tuple(dataset_paths))
     except Exception as exc:
         return DetectorImageResult(
             warning=f"Could not load detector image {image_path}: {exc}",
             attempted_paths=attempted,
         )
 
-    if data.ndim != 2:
+    levels = cached["levels"]
+    if levels[0].ndim != 2:
         return DetectorImageResult(
-            warning=f"Detector image dataset {dataset} in {image_path} is {data.ndim}D, expected 2D.",
+            warning=f"Detector image dataset {cached['dataset']} in {image_path} is {levels[0].ndim}D, expected 2D.",
             attempted_paths=attempted,
         )
 
-    finite = data[np.isfinite(data)]
-    if finite.size:
-        vmin = float(np.nanpercentile(finite, 1.0))
-        vmax = float(np.nanpercentile(finite, 99.9))
-        if not np.isfinite(vmin) or not np.isfinite(vmax) or vmin == vmax:
-            vmin = float(np.nanmin(finite))
-            vmax = float(np.nanmax(finite))
-    else:
-        vmin, vmax = 0.0, 1.0
-
     return DetectorImageResult(
-        image=DetectorImage(data=data, path=str(image_path), dataset=dataset, vmin=vmin, vmax=vmax),
+        image=DetectorImage(
+            data=levels[0],
+            path=str(image_path),
+            dataset=cached["dataset"],
+            vmin=cached["vmin"],
+            vmax=cached["vmax"],
+            levels=tuple(levels),
+        ),
         attempted_paths=attempted,
     )
 
 
+def prefetch_step_images(
+    xml_path: str,
+    step: int,
+    count: int | None = None,
+    *,
+    data_folder: str | None = None,
+    root_path: str | None = None,
+    dataset_paths: Iterable[str] = _DEFAULT_DATASETS,
+) -> None:
+    """Load the detector images around ``step`` of ``xml_path`` in the background.
+
+    The ``count`` next and previous indexed steps (as visited by "Jump to
+    next indexed step"; plain neighbours when every step is indexed) are
+    loaded nearest first into the in-process LRU and the shared cache, so a
+    later :func:`load_detector_image` for them returns immediately.  The
+    neighbours are found by parsing single steps through the file's step
+    index (at most 64 each way), never the whole file.
+    ``count`` defaults to ``LAUE_DETECTOR_PREFETCH_STEPS`` (2; ``0``
+    disables prefetching).  A newer call supersedes the images of an older
+    one that have not started loading yet.  Unreadable steps and images
+    are skipped silently.
+    """
+    global _prefetch_generation, _prefetch_executor
+    count = _default_prefetch_count() if count is None else int(count)
+    if count <= 0:
+        return
+    with _prefetch_lock:
+        _prefetch_generation += 1
+        if _prefetch_executor is None:
+            _prefetch_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="detector-prefetch")
+        _prefetch_executor.submit(
+            _prefetch_worker,
+            _prefetch_generation,
+            str(xml_path),
+            int(step),
+            count,
+            {"data_folder": data_folder, "root_path": root_path, "dataset_paths": tuple(dataset_paths)},
+        )
+
+
+def neighbour_indexed_steps(
+    is_indexed: Callable[[int], bool], n_steps: int, step: int, count: int, max_scan: int = _PREFETCH_MAX_SCAN
+) -> list[int]:
+    """
+    Up to ``count`` indexed steps after and before ``step``, nearest first.
+
+    Steps wrap around the scan like "Jump to next indexed step"; the
+    result alternates next / previous and never contains ``step`` itself.
+    ``is_indexed(i)`` is called lazily, at most once per step, and each
+    direction gives up after ``max_scan`` steps.
+    """
+    checked: dict[int, bool] = {}
+
+    def indexed(i: int) -> bool:
+        if i not in checked:
+            checked[i] = bool(is_indexed(i))
+        return checked[i]
+
+    def walk(direction: int) -> Iterator[int]:
+        for offset in range(1, min(n_steps, max_scan + 1)):
+            candidate = (step + direction * offset) % n_steps
+            if indexed(candidate):
+                yield candidate
+
+    if count <= 0 or n_steps <= 1:
+        return []
+    out: list[int] = []
+    for pair in itertools.islice(itertools.zip_longest(walk(1), walk(-1)), count):
+        for candidate in pair:
+            if candidate is not None and candidate not in out:
+                out.append(candidate)
+    return out
+
+
+def _prefetch_worker(generation, xml_path, step, count, load_kwargs) -> None:
+    # Only single steps are parsed (through the step index): a full parse
+    # here would cost seconds on a cold cache and hold the GIL meanwhile.
+    from laue_portal.analysis.step_index import get_step_index
+    from laue_portal.analysis.xml_parser import get_step_peaks, parse_indexing_step
+
+    step_peaks = {}
+
+    def is_indexed(i: int) -> bool:
+        if generation != _prefetch_generation:
+            raise _PrefetchSuperseded
+        try:
+            parsed = parse_indexing_step(xml_path, i)
+        except (IndexError, ValueError, OSError):
+            return False
+        step_peaks[i] = get_step_peaks(parsed, 0)
+        return step_peaks[i] is not None and parsed["n_indexed"][0] > 0
+
+    try:
+        steps = neighbour_indexed_steps(is_indexed, len(get_step_index(xml_path)), step, count)
+    except (OSError, _PrefetchSuperseded):
+        return
+    for neighbour in steps:
+        if generation != _prefetch_generation:
+            return
+        load_detector_image(step_peaks[neighbour].get("input_image"), xml_path=xml_path, **load_kwargs)
+
+
+class _PrefetchSuperseded(Exception):
+    """A newer :func:`prefetch_step_images` call replaced this one."""
+
+
+def build_pyramid(data: np.ndarray, min_size: int = _PYRAMID_MIN_SIZE) -> list[np.ndarray]:
+    """
+    Halve ``data`` with a 2x2 max until both sides fit in ``min_size``.
+
+    NaN pixels are ignored by the max (``np.fmax``); odd edges are padded by
+    repeating the last row / column.
+    """
+    levels = [data]
+    while max(levels[-1].shape) > min_size:
+        level = levels[-1]
+        pad = ((0, level.shape[0] % 2), (0, level.shape[1] % 2))
+        if any(p for _, p in pad):
+            level = np.pad(level, pad, mode="edge")
+        levels.append(
+            np.fmax(np.fmax(level[0::2, 0::2], level[1::2, 0::2]), np.fmax(level[0::2, 1::2], level[1::2, 1::2]))
+        )
+    return levels
+
+
+def image_contrast_limits(data: np.ndarray) -> tuple[float, float]:
+    """
+    Default display range: the 1st and 99.9th percentiles of the finite pixels.
+
+    Falls back to the finite min / max when the percentiles coincide, and
+    to ``(0, 1)`` for an image without finite pixels.  Integer images are
+    ranked with a histogram instead of a sort.
+    """
+    if np.issubdtype(data.dtype, np.integer):
+        finite = data.ravel()
+    else:
+        finite = data[np.isfinite(data)]
+    if not finite.size:
+        return 0.0, 1.0
+    if np.issubdtype(finite.dtype, np.integer):
+        lo, hi = _integer_percentiles(finite, _PERCENTILES)
+    else:
+        lo, hi = (float(v) for v in np.percentile(finite, _PERCENTILES))
+    if lo == hi:
+        lo, hi = float(finite.min()), float(finite.max())
+    return lo, hi
+
+
+def _integer_percentiles(values: np.ndarray, qs) -> list[float]:
+    """``np.percentile(values, qs)`` (linear method) from a histogram of ``values``."""
+    base = int(values.min())
+    cumulative = np.cumsum(np.bincount((values - base).astype(np.intp, copy=False)))
+    n = len(values)
+    out = []
+    for q in qs:
+        rank = q / 100.0 * (n - 1)
+        lo = int(np.floor(rank))
+        hi = min(lo + 1, n - 1)
+        v_lo, v_hi = (int(np.searchsorted(cumulative, r, side="right")) + base for r in (lo, hi))
+        out.append(v_lo + (v_hi - v_lo) * (rank - lo))
+    return out
+
+
+def _load_pyramid(image_path: Path, dataset_paths: tuple[str, ...]) -> dict:
+    """Pyramid and contrast limits of one image, cached on (path, mtime, datasets)."""
+
+    def compute():
+        data, dataset = _read_hdf5_image(image_path, dataset_paths)
+        vmin, vmax = image_contrast_limits(data) if data.ndim == 2 else (0.0, 1.0)
+        levels = build_pyramid(data) if data.ndim == 2 else [data]
+        return {"levels": levels, "dataset": dataset, "vmin": vmin, "vmax": vmax}
+
+    key = ("detector_image", os.path.abspath(image_path), os.stat(image_path).st_mtime_ns, dataset_paths)
+    return _IMAGE_CACHE.get_or_compute(key, lambda: shared_cache.get_or_compute(key, compute))
+
+
+def _default_cache_bytes() -> int:
+    try:
+        max_mb = float(os.environ.get("LAUE_DETECTOR_IMAGE_CACHE_MB", _DEFAULT_CACHE_MB))
+    except ValueError:
+        max_mb = _DEFAULT_CACHE_MB
+    return int(max(max_mb, 0.0) * 1024 * 1024)
+
+
+def _default_prefetch_count() -> int:
+    try:
+        return int(os.environ.get("LAUE_DETECTOR_PREFETCH_STEPS", _DEFAULT_PREFETCH_STEPS))
+    except ValueError:
+        return _DEFAULT_PREFETCH_STEPS
+
+
+_IMAGE_CACHE = DerivedCache(_default_cache_bytes())
+_prefetch_lock = threading.Lock()
+_prefetch_generation = 0
+_prefetch_executor: ThreadPoolExecutor | None = None
+
+
+def _clip_range(value_range, size: int) -> tuple[float, float]:
+    if value_range is None:
+        return 0.0, float(size)
+    lo, hi = sorted(float(v) for v in value_range)
+    return max(lo, 0.0), min(max(hi, 0.0), float(size))
+
+
 def _candidate_paths(
     input_image: str,
     *,
@@ -155,24 +449,23 @@ def _read_hdf5_image(path: Path, dataset_paths: Iterable[str]) -> tuple[np.ndarr
             if not key:
                 continue
             lookup = key[1:] if key.startswith("/") else key
-            if lookup in h5:
-                data = np.asarray(h5[lookup][()])
-                return _coerce_image_2d(data), key
+            if lookup in h5 and isinstance(h5[lookup], h5py.Dataset):
+                return _read_first_frame(h5[lookup]), key
 
-        found = _first_2d_dataset(h5)
-        if found is not None:
-            dataset, data = found
-            return _coerce_image_2d(data), dataset
+        dataset = _first_2d_dataset(h5)
+        if dataset is not None:
+            return _read_first_frame(h5[dataset]), dataset
 
         raise KeyError("no 2-D detector image dataset found")
 
 
-def _first_2d_dataset(group, prefix: str = "") -> tuple[str, np.ndarray] | None:
+def _first_2d_dataset(group, prefix: str = "") -> str | None:
+    """Path of the first numeric dataset with at least 2 dimensions (metadata only, no data read)."""
     for name, item in group.items():
         path = f"{prefix}/{name}"
         if isinstance(item, h5py.Dataset):
-            if item.ndim >= 2:
-                return path, np.asarray(item[()])
+            if item.ndim >= 2 and item.dtype.kind in "biuf":
+                return path
         elif isinstance(item, h5py.Group):
             found = _first_2d_dataset(item, path)
             if found is not None:
@@ -180,10 +473,30 @@ def _first_2d_dataset(group, prefix: str = "") -> tuple[str, np.ndarray] | None:
     return None
 
 
+def _read_first_frame(dataset: h5py.Dataset) -> np.ndarray:
+    """
+    First 2-D frame of ``dataset`` in the compact dtype of :func:`_coerce_image_2d`.
+
+    Only that hyperslab is read from stacks, and small unsigned / float
+    datasets are converted by HDF5 while reading, so no full-size
+    intermediate copy is made.
+    """
+    selection = (0,) * max(dataset.ndim - 2, 0) + (Ellipsis,)
+    kind, itemsize = dataset.dtype.kind, dataset.dtype.itemsize
+    if kind == "b" or (kind == "u" and itemsize <= 2):
+        return dataset.astype(np.uint16)[selection]
+    if kind == "f":
+        return dataset.astype(np.float32)[selection]
+    return _coerce_image_2d(dataset[selection])
+
+
 def _coerce_image_2d(data: np.ndarray) -> np.ndarray:
+    """``data`` as ``uint16`` when the values fit, else ``float32``."""
     data = np.asarray(data)
-    while data.ndim > 2:
-        data = data[0]
-    if not np.issubdtype(data.dtype, np.number):
+    if data.dtype == np.bool_:
+        return data.astype(np.uint16)
+    if not np.issubdtype(data.dtype, np.number) or np.issubdtype(data.dtype, np.complexfloating):
         raise TypeError(f"detector dataset has non-numeric dtype {data.dtype}")
-    return data.astype(float, copy=False)
+    if np.issubdtype(data.dtype, np.integer) and data.size and data.min() >= 0 and data.max() <= 65535:
+        return data.astype(np.uint16, copy=False)
+    return data.astype(np.float32, copy=False)
@@ -29,11 +29,14 @@ from __future__ import annotations
 import functools
 import os
 import xml.etree.ElementTree as ET
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
 from typing import List, Optional
 
 import numpy as np
 
+from laue_portal.analysis import shared_cache
+from laue_portal.analysis.step_index import get_step_index, read_step
+
 # ---------------------------------------------------------------------------
 # Data classes
 # ---------------------------------------------------------------------------
@@ -196,16 +199,43 @@ def _text_of(parent, name: str) -> Optional[str]:
 
 @functools.lru_cache(maxsize=8)
 def _cached_parse_geometry(path: str, mtime_ns: int) -> BeamlineGeometry:
-    """LRU-cached implementation; ``mtime_ns`` is purely a cache key."""
-    return _parse_geometry_xml_impl(path)
+    """LRU-cached implementation; ``mtime_ns`` is purely a cache key.
+
+    A miss goes through the cross-process ``shared_cache`` so that other
+    workers reuse the parse.
+    """
+    data = shared_cache.get_or_compute(
+        ("parse_geometry_xml", os.path.abspath(path), mtime_ns),
+        lambda: _geometry_to_dict(_parse_geometry_xml_impl(path)),
+    )
+    return _geometry_from_dict(data)
+
+
+def _geometry_to_dict(geometry: BeamlineGeometry) -> dict:
+    """Plain dict of arrays and scalars for the shared cache (``rho`` is derived)."""
+    return {
+        "detectors": [{f.name: getattr(d, f.name) for f in fields(d) if f.name != "rho"} for d in geometry.detectors],
+        "sample_origin": geometry.sample_origin,
+        "sample_R": geometry.sample_R,
+    }
+
+
+def _geometry_from_dict(data: dict) -> BeamlineGeometry:
+    # Copy the (read-only, possibly memory-mapped) cached arrays.
+    return BeamlineGeometry(
+        detectors=[DetectorGeometry(**{**d, "R": np.array(d["R"]), "P": np.array(d["P"])}) for d in data["detectors"]],
+        sample_origin=np.array(data["sample_origin"], dtype=float),
+        sample_R=np.array(data["sample_R"], dtype=float),
+    )
 
 
 def parse_geometry_xml(xml_path: str) -> BeamlineGeometry:
     """
     Parse a LaueGo ``geoN_*.xml`` file into a :class:`BeamlineGeometry`.
 
-    Cached in-process on ``(path, mtime)`` so multiple visualisation
-    callbacks pointing at the same geometry only pay the parse cost once.
+    Cached on ``(path, mtime)``, in-process and in the cross-process
+    ``shared_cache``, so multiple visualisation callbacks and workers
+    pointing at the same geometry only pay the parse cost once.
 
     Parameters
     ----------
@@ -288,29 +318,22 @@ def _parse_geometry_xml_impl(xml_path: str) -> BeamlineGeometry:
 
 def extract_geo_paths_from_indexing_xml(indexed_xml_path: str) -> List[str]:
     """
-    Read the ``<geoFile>`` paths embedded in an indexed (AllSteps) XML.
+    Read the ``<geoFile>`` path embedded in an indexed (AllSteps) XML.
 
     LaueGo's indexer copies the geometry file path into every ``<detector>``
     block, so we can usually resolve the geometry without consulting the
-    database.  Returns the unique non-empty paths in encounter order.
+    database.  Only the first ``<geoFile>`` is read: the step holding it
+    is found through the byte-offset step index (shared with
+    ``xml_parser.parse_indexing_step``) and parsed on its own.  Returns a
+    one-element list, or an empty list if the XML has no ``<geoFile>``.
     """
-    out: List[str] = []
-    seen = set()
-    # Pull-parse so we don't have to load 10+ MB into ET for the few
-    # bytes we need.  But for simplicity we just walk the tree; the
-    # caller can cache the parsed result via parse_indexing_xml.
-    tree = ET.parse(indexed_xml_path)
-    root = tree.getroot()
-    for step in root.findall("step"):
-        for det in step.findall("detector"):
-            geo_el = det.find("geoFile")
-            if geo_el is None or not geo_el.text:
-                continue
-            path = geo_el.text.strip()
-            if path and path not in seen:
-                seen.add(path)
-                out.append(path)
-    return out
+    index = get_step_index(indexed_xml_path)
+    if index.geo_step < 0:
+        return []
+    step = read_step(indexed_xml_path, index.geo_step, index)
+    geo_el = step.find(".//geoFile")
+    path = geo_el.text.strip() if geo_el is not None and geo_el.text else ""
+    return [path] if path else []
 
 
 def resolve_geometry_for_indexing(
@@ -336,7 +359,7 @@ def resolve_geometry_for_indexing(
         candidates.append(str(db_geo_file))
     try:
         candidates.extend(extract_geo_paths_from_indexing_xml(indexed_xml_path))
-    except (ET.ParseError, OSError):
+    except (ET.ParseError, OSError, ValueError):
         # If the indexed XML itself is unreadable, fall through with
         # only the DB candidate (which already failed os.path.isfile or
         # we'll just return None below).
@@ -10,8 +10,6 @@ microGeometryN.ipf, GrainMath.ipf, PoleFigure.ipf).  Zero Dash/Plotly
 dependencies.
 """
 
-from itertools import combinations
-
 import numpy as np
 
 # 34ID-E convention: sample surface at 45 degrees to beam
@@ -174,6 +172,58 @@ def crystal_direction_along_normal(recip_lattice, normal=None):
 # ---------------------------------------------------------------------------
 
 
+def batch_orientation_kernel(
+    recip_lattices,
+    lattice_params,
+    normal=None,
+    symmetry_ops=None,
+    reference_index=None,
+    reference_recip=None,
+):
+    """
+    Crystal directions, orientations and Rodrigues vectors in one pass.
+
+    Array-native equivalent of :func:`batch_crystal_directions`,
+    :func:`batch_orientations` and :func:`batch_rodrigues` (which wrap it):
+    invalid steps are masked once, the stacked ``(N, 3, 3)`` lattices are
+    inverted in one batched call, and symmetry reduction evaluates all
+    ``(M, 3, 3)`` operations for all steps as one matrix product.
+
+    Parameters
+    ----------
+    recip_lattices : ndarray (N, 3, 3)
+        Array of reciprocal lattice matrices.
+    lattice_params : ndarray (6,)
+        Lattice parameters: a, b, c, alpha, beta, gamma.
+    normal : ndarray (3,), optional
+        Sample surface normal for the crystal directions.
+    symmetry_ops, reference_index, reference_recip :
+        As for :func:`batch_rodrigues`.
+
+    Returns
+    -------
+    dict
+        ``valid`` : ndarray (N,) bool -- steps with a usable lattice
+        ``directions`` : ndarray (N, 3) -- as :func:`batch_crystal_directions`
+        ``orientations`` : ndarray (N, 3, 3) -- as :func:`batch_orientations`
+        ``rodrigues`` : ndarray (N, 3) -- as :func:`batch_rodrigues`
+        ``rodrigues_valid`` : ndarray (N,) bool -- its ``return_valid`` mask
+    """
+    recip_lattices = np.asarray(recip_lattices, dtype=float).reshape(-1, 3, 3)
+    valid = _valid_recip_mask(recip_lattices)
+    orientations = _batch_orientations(recip_lattices, valid, lattice_params)
+    rodrigues, rodrigues_valid = _batch_rodrigues(
+        recip_lattices, valid, orientations, lattice_params, symmetry_ops, reference_index, reference_recip
+    )
+    return {
+        "valid": valid,
+        "directions": _batch_crystal_directions(recip_lattices, valid, normal),
+        "orientations": orientations,
+        "rodrigues": rodrigues,
+        "rodrigues_valid": rodrigues_valid,
+    }
+
+
 def batch_crystal_directions(recip_lattices, normal=None):
     """
     Compute crystal directions for an array of reciprocal lattice matrices.
@@ -190,23 +240,8 @@ def batch_crystal_directions(recip_lattices, normal=None):
     ndarray (N, 3)
         Crystal directions (unit vectors), NaN rows where inversion fails.
     """
-    if normal is None:
-        normal = _DEFAULT_NORMAL
-
-    N = len(recip_lattices)
-    directions = np.full((N, 3), np.nan)
-
-    for i in range(N):
-        rl = recip_lattices[i]
-        # Skip if all zeros or contains NaN (no indexing data for this step)
-        if np.any(np.isnan(rl)) or np.allclose(rl, 0.0):
-            continue
-        try:
-            directions[i] = crystal_direction_along_normal(rl, normal)
-        except np.linalg.LinAlgError:
-            continue
-
-    return directions
+    recip_lattices = np.asarray(recip_lattices, dtype=float).reshape(-1, 3, 3)
+    return _batch_crystal_directions(recip_lattices, _valid_recip_mask(recip_lattices), normal)
 
 
 def batch_orientations(recip_lattices, lattice_params):
@@ -225,21 +260,8 @@ def batch_orientations(recip_lattices, lattice_params):
     ndarray (N, 3, 3)
         Orientation matrices, identity where computation fails.
     """
-    ref_recip = lattice_params_to_reciprocal(*lattice_params)
-    N = len(recip_lattices)
-    orientations = np.tile(np.eye(3), (N, 1, 1))
-
-    for i in range(N):
-        rl = recip_lattices[i]
-        # Skip if all zeros or contains NaN (no indexing data for this step)
-        if np.any(np.isnan(rl)) or np.allclose(rl, 0.0):
-            continue
-        try:
-            orientations[i] = recip_to_orientation(rl, ref_recip)
-        except np.linalg.LinAlgError:
-            continue
-
-    return orientations
+    recip_lattices = np.asarray(recip_lattices, dtype=float).reshape(-1, 3, 3)
+    return _batch_orientations(recip_lattices, _valid_recip_mask(recip_lattices), lattice_params)
 
 
 def batch_rodrigues(
@@ -279,15 +301,99 @@ def batch_rodrigues(
         Rodrigues vectors, zeros where computation fails.  If
         ``return_valid`` is True, returns ``(rodrigues, valid_mask)``.
     """
-    orientations = batch_orientations(recip_lattices, lattice_params)
+    recip_lattices = np.asarray(recip_lattices, dtype=float).reshape(-1, 3, 3)
+    valid = _valid_recip_mask(recip_lattices)
+    orientations = _batch_orientations(recip_lattices, valid, lattice_params)
+    rodrigues, rodrigues_valid = _batch_rodrigues(
+        recip_lattices, valid, orientations, lattice_params, symmetry_ops, reference_index, reference_recip
+    )
+    if return_valid:
+        return rodrigues, rodrigues_valid
+    return rodrigues
+
+
+def _is_valid_recip(rl):
+    """True unless the lattice has NaNs or is all zeros (no indexing data for this step)."""
+    return not (np.any(np.isnan(rl)) or np.allclose(rl, 0.0))
+
+
+def _valid_recip_mask(recip_lattices):
+    """Vectorised :func:`_is_valid_recip` over ``(N, 3, 3)`` lattices."""
+    # np.allclose(rl, 0.0) with its default atol: every |element| <= 1e-8.
+    has_nan = np.any(np.isnan(recip_lattices), axis=(1, 2))
+    all_zero = np.all(np.abs(recip_lattices) <= 1e-8, axis=(1, 2))
+    return ~has_nan & ~all_zero
+
+
+def _batch_inverse(matrices):
+    """
+    Invert stacked ``(n, 3, 3)`` matrices; NaN where a matrix is singular.
+
+    One batched LAPACK call in the common case; a singular matrix makes the
+    batched call fail, so only then are the matrices inverted one by one.
+    """
+    try:
+        return np.linalg.inv(matrices)
+    except np.linalg.LinAlgError:
+        inverses = np.full(matrices.shape, np.nan)
+        for i, matrix in enumerate(matrices):
+            try:
+                inverses[i] = np.linalg.inv(matrix)
+            except np.linalg.LinAlgError:
+                continue
+        return inverses
+
+
+def _batch_crystal_directions(recip_lattices, valid, normal=None):
+    """Array form of :func:`crystal_direction_along_normal` for the ``valid`` steps."""
+    if normal is None:
+        normal = _DEFAULT_NORMAL
+    normal = np.asarray(normal, dtype=float)
+
+    directions = np.full((len(recip_lattices), 3), np.nan)
+    if not np.any(valid):
+        return directions
+
+    # Same row -> column transpose as crystal_direction_along_normal.
+    hkl = _batch_inverse(np.swapaxes(recip_lattices[valid], 1, 2)) @ normal
+    norm = np.linalg.norm(hkl, axis=1)
+    unit = np.zeros_like(hkl)
+    # Singular lattices (NaN) and vanishing directions stay at zero.
+    ok = norm >= 1e-12
+    unit[ok] = hkl[ok] / norm[ok, None]
+    directions[valid] = unit
+    return directions
+
+
+def _batch_orientations(recip_lattices, valid, lattice_params):
+    """Array form of :func:`recip_to_orientation` for the ``valid`` steps; identity elsewhere."""
+    orientations = np.tile(np.eye(3), (len(recip_lattices), 1, 1))
+    ref_recip = lattice_params_to_reciprocal(*lattice_params)
+    try:
+        ref_inv = np.linalg.inv(ref_recip.T)
+    except np.linalg.LinAlgError:
+        return orientations
+    orientations[valid] = np.swapaxes(recip_lattices[valid], 1, 2) @ ref_inv
+    return orientations
+
+
+def _batch_rodrigues(
+    recip_lattices,
+    valid,
+    orientations,
+    lattice_params,
+    symmetry_ops=None,
+    reference_index=None,
+    reference_recip=None,
+):
+    """Rodrigues vectors and their validity mask, as returned by :func:`batch_rodrigues`."""
     N = len(orientations)
     rodrigues = np.zeros((N, 3))
-    valid = np.zeros(N, dtype=bool)
 
     ref_orientation = None
     if reference_recip is not None:
         ref_rl = np.asarray(reference_recip, dtype=float)
-        if ref_rl.shape == (3, 3) and not (np.any(np.isnan(ref_rl)) or np.allclose(ref_rl, 0.0)):
+        if ref_rl.shape == (3, 3) and _is_valid_recip(ref_rl):
             try:
                 ref_recip = lattice_params_to_reciprocal(*lattice_params)
                 ref_orientation = recip_to_orientation(ref_rl, ref_recip)
@@ -299,29 +405,48 @@ def batch_rodrigues(
             ref_idx = int(reference_index)
         except (TypeError, ValueError):
             ref_idx = -1
-        if 0 <= ref_idx < N:
-            ref_rl = recip_lattices[ref_idx]
-            if not (np.any(np.isnan(ref_rl)) or np.allclose(ref_rl, 0.0)):
-                ref_orientation = orientations[ref_idx]
+        if 0 <= ref_idx < N and valid[ref_idx]:
+            ref_orientation = orientations[ref_idx]
 
-    for i in range(N):
-        rl = recip_lattices[i]
-        if np.any(np.isnan(rl)) or np.allclose(rl, 0.0):
-            continue
+    # Right-hand factor applied to every orientation: S.T @ inv(reference)
+    # for each symmetry op, or just inv(reference).
+    try:
+        ref_inv = np.eye(3) if ref_orientation is None else np.linalg.inv(ref_orientation)
+    except np.linalg.LinAlgError:
+        return rodrigues, np.zeros(N, dtype=bool)
+    if symmetry_ops is None and ref_orientation is None:
+        right = None
+    elif symmetry_ops is None:
+        right = ref_inv[None]
+    else:
+        right = np.swapaxes(np.asarray(symmetry_ops, dtype=float), 1, 2) @ ref_inv
 
-        try:
-            R = orientations[i]
-            if symmetry_ops is not None:
-                R = symmetry_reduce_orientation(R, reference=ref_orientation, symmetry_ops=symmetry_ops)
-            elif ref_orientation is not None:
-                R = R @ np.linalg.inv(ref_orientation)
-            rodrigues[i] = orientation_to_rodrigues(R)
-            valid[i] = True
-        except np.linalg.LinAlgError:
-            continue
+    R = orientations[valid]
+    if right is not None and len(R):
+        # trace(R @ M) = R.ravel() @ M.T.ravel(): all candidate traces in
+        # one product; the largest trace is the smallest rotation.
+        traces = R.reshape(-1, 9) @ np.swapaxes(right, 1, 2).reshape(len(right), 9).T
+        R = R @ right[np.argmax(traces, axis=1)]
+    rodrigues[valid] = _rodrigues_vectors(R)
+    return rodrigues, valid.copy()
 
-    if return_valid:
-        return rodrigues, valid
+
+def _rodrigues_vectors(R):
+    """Array form of :func:`orientation_to_rodrigues` for stacked ``(n, 3, 3)`` rotations."""
+    trace = R[:, 0, 0] + R[:, 1, 1] + R[:, 2, 2]
+    angle = np.arccos(np.clip((trace - 1.0) / 2.0, -1.0, 1.0))
+    axis = np.stack(
+        [
+            R[:, 2, 1] - R[:, 1, 2],
+            R[:, 0, 2] - R[:, 2, 0],
+            R[:, 1, 0] - R[:, 0, 1],
+        ],
+        axis=1,
+    )
+    axis_norm = np.linalg.norm(axis, axis=1)
+    ok = (angle >= 1e-12) & (axis_norm >= 1e-12)
+    rodrigues = np.zeros((len(R), 3))
+    rodrigues[ok] = axis[ok] / axis_norm[ok, None] * np.tan(angle[ok] / 2.0)[:, None]
     return rodrigues
 
 
@@ -418,6 +543,13 @@ HEXAGONAL_SYMMETRY_OPS = _make_hexagonal_symmetry_ops()
 # Stacked as (24, 3, 3) for batch matmul.
 _SYM_OPS_T = np.array([s.T for s in CUBIC_SYMMETRY_OPS])
 
+# Grains per block in the batched misorientation kernels; the (block, 24)
+# float64 trace temporaries stay around 12 MB.
+_MISORIENTATION_BLOCK = 65536
+# Pairs per block in pairwise_misorientation; the (block, 24, 9) float64
+# temporaries stay around 50 MB.
+_PAIR_BLOCK = 32768
+
 
 def symmetry_ops_for_space_group(space_group):
     """
@@ -526,8 +658,9 @@ def misorientation_from_reference(orientations, ref_index, symmetry_reduce=True)
     Ports the inner loop of Igor's ``ProcessLoadedXMLfile``
     (xmlMultiIndex.ipf:4193-4241) combined with ``makeRGBJZT``.
 
-    Complexity is O(N * 24) -- linear in the number of grains, fully
-    vectorized across symmetry operations.
+    Complexity is O(N * 24), fully batched: the traces of all 24 symmetry
+    candidates come from one ``(n, 9) @ (9, 24)`` product per block of
+    ``_MISORIENTATION_BLOCK`` grains, which caps memory.
 
     Parameters
     ----------
@@ -545,9 +678,9 @@ def misorientation_from_reference(orientations, ref_index, symmetry_reduce=True)
             reference grain.  The reference grain itself has [0, 0, 0].
         ``angles`` : ndarray (N,) -- misorientation angles in degrees.
     """
+    orientations = np.asarray(orientations, dtype=float)
     N = len(orientations)
-    R_ref = orientations[ref_index]
-    R_ref_inv = np.linalg.inv(R_ref)
+    R_ref_inv = np.linalg.inv(orientations[ref_index])
 
     rodrigues = np.zeros((N, 3))
     angles = np.zeros(N)
@@ -555,58 +688,26 @@ def misorientation_from_reference(orientations, ref_index, symmetry_reduce=True)
     if symmetry_reduce:
         # Pre-compute all 24 symmetry-equivalent inverses of the reference:
         #   S.T @ R_ref_inv  for each symmetry op S  -> shape (24, 3, 3)
-        sym_ref_inv = _SYM_OPS_T @ R_ref_inv  # (24, 3, 3)
-
-        for i in range(N):
-            if i == ref_index:
-                continue  # stays at zero
-
-            # C_all[s] = R_i @ sym_ref_inv[s]  ->  (24, 3, 3)
-            C_all = orientations[i] @ sym_ref_inv  # (24, 3, 3)
-            traces = C_all[:, 0, 0] + C_all[:, 1, 1] + C_all[:, 2, 2]
-            all_angles = np.degrees(np.arccos(np.clip((traces - 1.0) / 2.0, -1.0, 1.0)))
-            best = int(np.argmin(all_angles))
-            angle = all_angles[best]
-            angles[i] = angle
-
-            if angle < 1e-12:
-                continue
-
-            C = C_all[best]
-            axis = np.array(
-                [
-                    C[1, 2] - C[2, 1],
-                    C[2, 0] - C[0, 2],
-                    C[0, 1] - C[1, 0],
-                ]
-            )
-            axis_norm = np.linalg.norm(axis)
-            if axis_norm < 1e-12:
-                continue
-            axis /= axis_norm
-            rodrigues[i] = axis * np.tan(np.radians(angle) / 2.0)
+        right = _SYM_OPS_T @ R_ref_inv
     else:
-        for i in range(N):
-            if i == ref_index:
-                continue
-            C = orientations[i] @ R_ref_inv
-            trace = C[0, 0] + C[1, 1] + C[2, 2]
-            angle = np.degrees(np.arccos(np.clip((trace - 1.0) / 2.0, -1.0, 1.0)))
-            angles[i] = angle
-            if angle < 1e-12:
-                continue
-            axis = np.array(
-                [
-                    C[1, 2] - C[2, 1],
-                    C[2, 0] - C[0, 2],
-                    C[0, 1] - C[1, 0],
-                ]
-            )
-            axis_norm = np.linalg.norm(axis)
-            if axis_norm < 1e-12:
-                continue
-            axis /= axis_norm
-            rodrigues[i] = axis * np.tan(np.radians(angle) / 2.0)
+        right = R_ref_inv[None]
+
+    # trace(R_n @ right[s]) = sum_ij R_n[i, j] * right[s][j, i], so all
+    # (n, 24) traces are one matmul and only the best product is formed.
+    right_t_flat = np.swapaxes(right, 1, 2).reshape(len(right), 9).T
+    for start in range(0, N, _MISORIENTATION_BLOCK):
+        block = slice(start, min(start + _MISORIENTATION_BLOCK, N))
+        R = orientations[block]
+        traces = R.reshape(-1, 9) @ right_t_flat
+        all_angles = np.degrees(np.arccos(np.clip((traces - 1.0) / 2.0, -1.0, 1.0)))
+        best = np.argmin(all_angles, axis=1)
+        angles[block] = all_angles[np.arange(len(best)), best]
+        rodrigues[block] = _misorientation_rodrigues(R @ right[best], angles[block])
+
+    # The reference grain stays exactly at zero.
+    mask = np.arange(N) == ref_index
+    angles[mask] = 0.0
+    rodrigues[mask] = 0.0
 
     return {
         "rodrigues": rodrigues,
@@ -614,10 +715,43 @@ def misorientation_from_reference(orientations, ref_index, symmetry_reduce=True)
     }
 
 
-def pairwise_misorientation(orientations, indices=None, symmetry_reduce=True):
+def _misorientation_rodrigues(C, angles):
+    """
+    Rodrigues vectors of stacked misorientation matrices ``C`` (n, 3, 3).
+
+    ``angles`` are the rotation angles in degrees.  Rows with a vanishing
+    angle or rotation axis are zero.
+    """
+    axis = np.stack(
+        [
+            C[:, 1, 2] - C[:, 2, 1],
+            C[:, 2, 0] - C[:, 0, 2],
+            C[:, 0, 1] - C[:, 1, 0],
+        ],
+        axis=1,
+    )
+    axis_norm = np.linalg.norm(axis, axis=1)
+    ok = (angles >= 1e-12) & (axis_norm >= 1e-12)
+    rodrigues = np.zeros((len(C), 3))
+    rodrigues[ok] = axis[ok] / axis_norm[ok, None] * np.tan(np.radians(angles[ok]) / 2.0)[:, None]
+    return rodrigues
+
+
+def pairwise_misorientation(
+    orientations,
+    indices=None,
+    symmetry_reduce=True,
+    positions=None,
+    neighbor_radius=None,
+):
     """
     Compute pairwise misorientation angles for a subset of grains.
 
+    By default every pair of the subset is compared.  With ``positions``
+    only spatial neighbours are compared, which is the pair set behind
+    kernel-average-misorientation and grain-boundary maps and scales to
+    whole scans.
+
     Parameters
     ----------
     orientations : ndarray (N, 3, 3)
@@ -626,6 +760,15 @@ def pairwise_misorientation(orientations, indices=None, symmetry_reduce=True):
         Subset of grain indices to compare.  If None, use all.
     symmetry_reduce : bool
         Apply cubic symmetry reduction (default True).
+    positions : ndarray (N, 3), optional
+        Sample positions (``parsed["positions"]``).  When given, only pairs
+        closer than ``neighbor_radius`` are compared, found with a KD-tree.
+        Grains with non-finite positions have no neighbours.
+    neighbor_radius : float, optional
+        Neighbour cut-off in the units of ``positions``.  Defaults to just
+        over the median nearest-neighbour spacing, i.e. the adjacent points
+        of a regular scan grid; pass it explicitly for grids whose steps
+        differ between axes.
 
     Returns
     -------
@@ -634,36 +777,108 @@ def pairwise_misorientation(orientations, indices=None, symmetry_reduce=True):
         ``mean`` : float -- mean misorientation angle
         ``min`` : float -- minimum pairwise angle
         ``max`` : float -- maximum pairwise angle
-        ``pairs`` : list of (i, j) -- grain index pairs
+        ``pairs`` : ndarray (P, 2) of int -- grain index pairs, row k for
+        ``angles[k]``
     """
     if indices is None:
         indices = np.arange(len(orientations))
     else:
         indices = np.asarray(indices)
 
-    if len(indices) < 2:
+    subset = np.asarray(orientations, dtype=float)[indices]
+    if positions is None:
+        first, second = np.triu_indices(len(indices), k=1)
+    else:
+        first, second = _neighbor_pairs(np.asarray(positions, dtype=float)[indices], neighbor_radius)
+
+    if len(first) == 0:
         return {
             "angles": np.array([]),
             "mean": 0.0,
             "min": 0.0,
             "max": 0.0,
-            "pairs": [],
+            "pairs": np.empty((0, 2), dtype=indices.dtype),
         }
 
-    pairs = list(combinations(indices, 2))
-    angles = np.empty(len(pairs))
-
-    for k, (i, j) in enumerate(pairs):
-        angles[k] = misorientation_angle(
-            orientations[i],
-            orientations[j],
-            symmetry_reduce=symmetry_reduce,
-        )
+    left, right = _pair_trace_factors(subset, symmetry_reduce)
+    if positions is None:
+        traces = _all_pair_traces(left, right)
+    else:
+        traces = _listed_pair_traces(left, right, first, second)
+    angles = np.degrees(np.arccos(np.clip((traces - 1.0) / 2.0, -1.0, 1.0)))
 
     return {
         "angles": angles,
         "mean": float(np.mean(angles)),
         "min": float(np.min(angles)),
         "max": float(np.max(angles)),
-        "pairs": pairs,
+        "pairs": np.column_stack((indices[first], indices[second])),
     }
+
+
+def _pair_trace_factors(orientations, symmetry_reduce):
+    """
+    Flattened factors for pairwise misorientation traces.
+
+    As in :func:`misorientation_angle`, the candidates for a pair are
+    ``R_i @ S.T @ inv(R_j)`` and the largest trace gives the smallest angle.
+    ``trace(R_i @ M) = R_i.ravel() @ M.T.ravel()``, so with ``left`` (N, 9)
+    and ``right`` (N, S, 9) every candidate trace is an inner product.
+    Each grain is inverted once instead of once per pair.
+    """
+    ops_t = _SYM_OPS_T if symmetry_reduce else np.eye(3)[None]
+    products = ops_t[None] @ np.linalg.inv(orientations)[:, None]
+    right = np.swapaxes(products, 2, 3).reshape(len(orientations), len(ops_t), 9)
+    return orientations.reshape(-1, 9), right
+
+
+def _all_pair_traces(left, right):
+    """Best candidate trace of every pair ``i < j``, in ``combinations`` order."""
+    n, n_ops, _ = right.shape
+    # Operation-major columns, so the max over operations reduces
+    # contiguous (rows, n) slabs.
+    right_flat = np.swapaxes(right, 0, 1).reshape(n_ops * n, 9).T
+    rows_per_block = max(1, _PAIR_BLOCK // max(1, n))
+    traces = []
+    for start in range(0, n, rows_per_block):
+        rows = np.arange(start, min(start + rows_per_block, n))
+        best = (left[rows] @ right_flat).reshape(len(rows), n_ops, n).max(axis=1)
+        traces.append(best[np.arange(n)[None, :] > rows[:, None]])
+    return np.concatenate(traces)
+
+
+def _listed_pair_traces(left, right, first, second):
+    """Best candidate trace of each listed pair ``(first[k], second[k])``."""
+    traces = np.empty(len(first))
+    for start in range(0, len(first), _PAIR_BLOCK):
+        block = slice(start, start + _PAIR_BLOCK)
+        traces[block] = np.einsum("pk,psk->ps", left[first[block]], right[second[block]]).max(axis=1)
+    return traces
+
+
+def _neighbor_pairs(positions, radius=None):
+    """
+    Index pairs ``(first, second)``, ``first < second``, of points closer
+    than ``radius`` (default: 1.01x the median nearest-neighbour spacing).
+    """
+    from scipy.spatial import KDTree
+
+    finite = np.flatnonzero(np.all(np.isfinite(positions), axis=1))
+    empty = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))
+    if len(finite) < 2:
+        return empty
+
+    tree = KDTree(positions[finite])
+    if radius is None:
+        spacing, _ = tree.query(positions[finite], k=2)
+        nonzero = spacing[:, 1][spacing[:, 1] > 0]
+        if not len(nonzero):
+            return empty
+        radius = 1.01 * float(np.median(nonzero))
+
+    pairs = tree.query_pairs(float(radius), output_type="ndarray")
+    if not len(pairs):
+        return empty
+    first, second = np.sort(finite[pairs], axis=1).T
+    order = np.lexsort((second, first))
+    return first[order], second[order]
@@ -0,0 +1,327 @@
+"""
+Persistent HDF5 sidecar cache for :func:`parse_indexing_xml` results.
+
+The first parse of an AllSteps XML writes every array of the parsed dict,
+including the columnar :class:`~laue_portal.analysis.peak_store.PeakStore`,
+to a ``<xml name>.<hash>.peaks.h5`` sidecar.  Later loads -- in any
+process -- validate the sidecar against the XML's path, mtime and size and
+memory-map its arrays instead of touching the XML, so a restart or an
+``lru_cache`` eviction no longer costs a full re-parse.
+
+Sidecars go to a per-user cache directory (``$XDG_CACHE_HOME`` or
+``~/.cache``, under ``laue_portal/parse_cache``), falling back to one
+under the system temporary directory when that is not writable, so the
+data directories are never written to by default.  Two environment
+variables control the behaviour:
+
+- ``LAUE_PARSE_CACHE_DIR``: write sidecars to this directory instead, or,
+  set to ``adjacent``, next to the XML as ``<xml>.peaks.h5``.
+- ``LAUE_PARSE_CACHE=0``: disable the sidecar cache entirely.
+
+Whatever the settings, a sidecar next to the XML is always looked for: the
+processing workers write the results store of a merged XML there (see
+:func:`adjacent_path`), where every viewer process can find it.
+
+Zero Dash / Plotly dependencies.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+import h5py
+import numpy as np
+
+from laue_portal.analysis.peak_store import AttributeTable, PeakStore, RaggedColumn, StringColumn
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+SIDECAR_SUFFIX = ".peaks.h5"
+# ``LAUE_PARSE_CACHE_DIR`` value that puts sidecars next to their XML.
+ADJACENT = "adjacent"
+
+# Step-level arrays of the parsed dict; loaded eagerly (they are small).
+_STEP_ARRAYS = (
+    "positions",
+    "positions_hf",
+    "depths",
+    "energies",
+    "scan_nums",
+    "n_patterns",
+    "recip_lattices",
+    "rms_errors",
+    "goodnesses",
+    "n_indexed",
+    "lattice_params",
+)
+
+_NODE_TYPES = {cls.__name__: cls for cls in (PeakStore, RaggedColumn, StringColumn, AttributeTable)}
+
+
+def cache_enabled() -> bool:
+    return os.environ.get("LAUE_PARSE_CACHE", "1").lower() not in {"0", "false", "no"}
+
+
+def sidecar_path(xml_path: str) -> Path:
+    """Return the preferred sidecar location for ``xml_path``."""
+    cache_dir = os.environ.get("LAUE_PARSE_CACHE_DIR")
+    if cache_dir == ADJACENT:
+        return adjacent_path(xml_path)
+    if cache_dir:
+        return _hashed_path(Path(cache_dir), xml_path)
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return _hashed_path(Path(cache_home) / "laue_portal" / "parse_cache", xml_path)
+
+
+def sidecar_paths(xml_path: str) -> list[Path]:
+    """Every location a sidecar of ``xml_path`` may be found at, preferred first."""
+    paths = [*_write_paths(xml_path), adjacent_path(xml_path)]
+    return list(dict.fromkeys(paths))
+
+
+def adjacent_path(xml_path: str) -> Path:
+    """The ``<xml>.peaks.h5`` sidecar location next to ``xml_path``."""
+    return Path(f"{xml_path}{SIDECAR_SUFFIX}")
+
+
+def _write_paths(xml_path: str) -> list[Path]:
+    return list(dict.fromkeys([sidecar_path(xml_path), _fallback_path(xml_path)]))
+
+
+def _fallback_path(xml_path: str) -> Path:
+    return _hashed_path(Path(tempfile.gettempdir()) / f"laue_portal_cache_{os.getuid()}", xml_path)
+
+
+def _hashed_path(cache_dir: Path, xml_path: str) -> Path:
+    digest = hashlib.sha1(os.path.abspath(xml_path).encode()).hexdigest()[:16]
+    return cache_dir / f"{Path(xml_path).name}.{digest}{SIDECAR_SUFFIX}"
+
+
+def _source_key(xml_path: str, stat: os.stat_result) -> dict:
+    return {
+        "format_version": FORMAT_VERSION,
+        "source_path": os.path.abspath(xml_path),
+        "source_mtime_ns": int(stat.st_mtime_ns),
+        "source_size": int(stat.st_size),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+
+def read_sidecar(xml_path: str, stat: os.stat_result) -> Optional[dict]:
+    """
+    Load a parsed dict from a valid sidecar of ``xml_path``.
+
+    Returns ``None`` when no sidecar exists or it was written for a
+    different version of the XML (path, mtime or size mismatch).
+    """
+    key = _source_key(xml_path, stat)
+    for path in sidecar_paths(xml_path):
+        if not path.is_file():
+            continue
+        try:
+            parsed = _read(path, key)
+        except (OSError, KeyError, ValueError) as exc:
+            logger.warning(f"Ignoring unreadable parse cache {path}: {exc}")
+            continue
+        if parsed is not None:
+            return parsed
+    return None
+
+
+def write_sidecar(parsed: dict, xml_path: str, stat: os.stat_result, path: Optional[Path] = None) -> Optional[Path]:
+    """
+    Write ``parsed`` to the sidecar of ``xml_path``.
+
+    The file is written to a temporary name and atomically renamed, so a
+    concurrent reader never sees a partial sidecar.  ``path`` forces the
+    location (it must be one :func:`sidecar_paths` lists); by default the
+    preferred writable location is used.  Returns the path written, or
+    ``None`` if no location was writable.
+    """
+    key = _source_key(xml_path, stat)
+    for target in [path] if path is not None else _write_paths(xml_path):
+        try:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(prefix=f".{target.name}.", suffix=".tmp", dir=target.parent)
+            os.close(fd)
+        except OSError:
+            continue
+        try:
+            _write(Path(tmp), parsed, key)
+            os.chmod(tmp, 0o644)  # mkstemp creates 0600; other workers must read it
+            os.replace(tmp, target)
+            return target
+        except OSError as exc:
+            logger.warning(f"Could not write parse cache {target}: {exc}")
+            _unlink_quietly(tmp)
+    return None
+
+
+def write_store(path: str, parsed: dict) -> None:
+    """
+    Write ``parsed`` to a standalone ``.npz`` file not tied to any XML.
+
+    Used for the small per-append pieces of an incremental merge, which
+    are read back in bulk: a flat archive loads far faster than an HDF5
+    group tree and, unlike pickle, never executes code on load.
+    """
+    arrays = {}
+    nodes = {}
+    _flatten_node("store", parsed["_steps"], arrays, nodes)
+    for name in _STEP_ARRAYS:
+        arrays[f"steps/{name}"] = np.asarray(parsed[name])
+    meta = {
+        "format_version": FORMAT_VERSION,
+        "space_group": int(parsed["space_group"]),
+        "structure_desc": parsed["structure_desc"],
+        "atoms": parsed["atoms"],
+        "nodes": nodes,
+    }
+    arrays["meta"] = np.array(json.dumps(meta))
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=path.parent)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(tmp, path)
+    except BaseException:
+        _unlink_quietly(tmp)
+        raise
+
+
+def read_store(path: str) -> Optional[dict]:
+    """Load a store written by :func:`write_store` (``None`` if incompatible)."""
+    with np.load(path, allow_pickle=False) as archive:
+        meta = json.loads(str(archive["meta"]))
+        if meta["format_version"] != FORMAT_VERSION:
+            return None
+        arrays = {name: archive[name] for name in archive.files}
+    parsed = {name: arrays[f"steps/{name}"] for name in _STEP_ARRAYS}
+    parsed["space_group"] = meta["space_group"]
+    parsed["structure_desc"] = meta["structure_desc"]
+    parsed["atoms"] = [{**atom, "xyz": tuple(atom["xyz"])} for atom in meta["atoms"]]
+    parsed["_steps"] = _unflatten_node("store", arrays, meta["nodes"])
+    return parsed
+
+
+def _flatten_node(name: str, value, arrays: dict, nodes: dict) -> None:
+    """Flatten a node tree into ``/``-joined array names plus a table of group nodes."""
+    if isinstance(value, np.ndarray):
+        if value.dtype == object:
+            nodes[name] = {"type": "str"}
+            value = value.astype(str)
+        arrays[name] = value
+        return
+    if dataclasses.is_dataclass(value):
+        node_type = type(value).__name__
+        items = [(f.name, getattr(value, f.name)) for f in dataclasses.fields(value)]
+    else:
+        node_type = "dict"
+        items = list(value.items())
+    nodes[name] = {"type": node_type, "children": [child_name for child_name, _ in items]}
+    for child_name, child in items:
+        _flatten_node(f"{name}/{child_name}", child, arrays, nodes)
+
+
+def _unflatten_node(name: str, arrays: dict, nodes: dict):
+    node = nodes.get(name)
+    if node is None:
+        return arrays[name]
+    if node["type"] == "str":
+        values = np.empty(arrays[name].shape, dtype=object)
+        values[...] = arrays[name].tolist()
+        return values
+    children = {child: _unflatten_node(f"{name}/{child}", arrays, nodes) for child in node["children"]}
+    if node["type"] == "dict":
+        return children
+    return _NODE_TYPES[node["type"]](**children)
+
+
+# ---------------------------------------------------------------------------
+# HDF5 layout
+# ---------------------------------------------------------------------------
+
+
+def _write(path: Path, parsed: dict, key: dict) -> None:
+    with h5py.File(path, "w") as h5:
+        h5.attrs.update(key)
+        h5.attrs["space_group"] = int(parsed["space_group"])
+        h5.attrs["structure_desc"] = parsed["structure_desc"]
+        h5.attrs["atoms"] = json.dumps(parsed["atoms"])
+        steps = h5.create_group("steps")
+        for name in _STEP_ARRAYS:
+            steps.create_dataset(name, data=np.asarray(parsed[name]))
+        _write_node(h5, "store", parsed["_steps"])
+
+
+def _read(path: Path, key: dict) -> Optional[dict]:
+    with h5py.File(path, "r") as h5:
+        if any(h5.attrs.get(name) != value for name, value in key.items()):
+            return None
+        parsed = {name: h5["steps"][name][()] for name in _STEP_ARRAYS}
+        parsed["space_group"] = int(h5.attrs["space_group"])
+        parsed["structure_desc"] = str(h5.attrs["structure_desc"])
+        parsed["atoms"] = [{**atom, "xyz": tuple(atom["xyz"])} for atom in json.loads(h5.attrs["atoms"])]
+        parsed["_steps"] = _read_node(h5["store"], path)
+    return parsed
+
+
+def _write_node(parent: h5py.Group, name: str, value) -> None:
+    """Recursively write arrays, dicts of arrays and peak-store dataclasses."""
+    if isinstance(value, np.ndarray):
+        dtype = h5py.string_dtype() if value.dtype == object else None
+        parent.create_dataset(name, data=value, dtype=dtype)
+        return
+    group = parent.create_group(name, track_order=True)
+    if dataclasses.is_dataclass(value):
+        group.attrs["node_type"] = type(value).__name__
+        items = ((f.name, getattr(value, f.name)) for f in dataclasses.fields(value))
+    else:
+        group.attrs["node_type"] = "dict"
+        items = value.items()
+    for child_name, child in items:
+        _write_node(group, child_name, child)
+
+
+def _read_node(node, path: Path):
+    if isinstance(node, h5py.Dataset):
+        return _map_dataset(node, path)
+    children = {name: _read_node(child, path) for name, child in node.items()}
+    node_type = node.attrs["node_type"]
+    if node_type == "dict":
+        return children
+    return _NODE_TYPES[node_type](**children)
+
+
+def _map_dataset(dset: h5py.Dataset, path: Path) -> np.ndarray:
+    """Memory-map a contiguous numeric dataset; read anything else eagerly."""
+    if h5py.check_string_dtype(dset.dtype) is not None:
+        values = np.empty(dset.shape, dtype=object)
+        values[...] = dset.asstr()[()]
+        return values
+    offset = dset.id.get_offset()
+    if offset is None or dset.chunks is not None or dset.size == 0:
+        return dset[()]
+    # A plain ndarray view; the memmap stays alive as its base.
+    return np.memmap(path, mode="r", dtype=dset.dtype, offset=offset, shape=dset.shape).view(np.ndarray)
+
+
+def _unlink_quietly(path) -> None:
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
@@ -0,0 +1,110 @@
+"""
+Read access to AllSteps XML files that are still being appended to.
+
+The partial merge of a running peakindexing job
+(:mod:`laue_portal.processing.xml_merge`) grows in place: each chunk
+writes its steps after the last published one and then publishes the new
+end of the document by atomically replacing ``<xml>.published``, a small
+text file holding that byte offset.  Rewriting the whole document per
+chunk would cost O(chunks x size) I/O.
+
+:func:`open_indexing_xml` is how the viewer opens any indexing XML.  For a
+file with a ``.published`` marker it returns the bytes up to the
+published end followed by the closing ``</AllSteps>``, so a read that
+overlaps an append never sees a half-written step.  Other files are
+opened as they are.  The writer bumps the XML's mtime after every
+publish, so caches keyed on (path, mtime) pick up each new version.
+
+Zero Dash / Plotly dependencies.
+"""
+
+from __future__ import annotations
+
+import io
+import os
+import time
+from typing import BinaryIO, Optional
+
+PUBLISHED_SUFFIX = ".published"
+XML_FOOTER = b"\n</AllSteps>"
+
+
+def published_path(xml_path: str) -> str:
+    """Path of the marker holding the published end of ``xml_path``."""
+    return f"{xml_path}{PUBLISHED_SUFFIX}"
+
+
+def published_end(xml_path: str) -> Optional[int]:
+    """Published end (bytes) of ``xml_path``, or ``None`` if it has no marker."""
+    try:
+        with open(published_path(xml_path), encoding="ascii") as f:
+            return int(f.read())
+    except (OSError, ValueError):
+        return None
+
+
+def publish_end(xml_path: str, end: int) -> None:
+    """
+    Atomically publish ``end`` as the readable length of ``xml_path``.
+
+    The XML's mtime is then moved forward, so a reader that cached the
+    previous version under the mtime of the in-place write reloads.
+    """
+    marker = published_path(xml_path)
+    tmp_path = f"{marker}.tmp"
+    with open(tmp_path, "w", encoding="ascii") as f:
+        f.write(str(int(end)))
+    os.replace(tmp_path, marker)
+    try:
+        stat = os.stat(xml_path)
+    except FileNotFoundError:
+        return
+    os.utime(xml_path, ns=(stat.st_atime_ns, max(time.time_ns(), stat.st_mtime_ns + 1)))
+
+
+def open_indexing_xml(xml_path: str) -> BinaryIO:
+    """Open ``xml_path`` for binary reading, limited to its published end if it has one."""
+    end = published_end(xml_path)
+    if end is None:
+        return open(xml_path, "rb")
+    return io.BufferedReader(_PublishedReader(open(xml_path, "rb"), end))
+
+
+class _PublishedReader(io.RawIOBase):
+    """``file[:end]`` followed by :data:`XML_FOOTER`, seekable."""
+
+    def __init__(self, file: BinaryIO, end: int):
+        self._file = file
+        self._end = end
+        self._size = end + len(XML_FOOTER)
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: self._size}[whence]
+        self._pos = max(base + offset, 0)
+        return self._pos
+
+    def readinto(self, buffer) -> int:
+        view = memoryview(buffer).cast("B")
+        if self._pos < self._end:
+            self._file.seek(self._pos)
+            n = self._file.readinto(view[: min(len(view), self._end - self._pos)])
+        else:
+            chunk = XML_FOOTER[self._pos - self._end : self._pos - self._end + len(view)]
+            n = len(chunk)
+            view[:n] = chunk
+        self._pos += n
+        return n
+
+    def close(self) -> None:
+        self._file.close()
+        super().close()
@@ -0,0 +1,436 @@
+"""
+Columnar storage for the per-step peak data of an AllSteps XML.
+
+:func:`laue_portal.analysis.xml_parser.parse_indexing_xml` used to keep
+every ``<detector>`` / ``<indexing>`` Element alive so that
+``get_step_peaks`` could re-read it on demand.  For 50k-step area scans
+that DOM costs several GB per process.  :class:`PeakStore` holds the same
+information as flat numpy arrays instead:
+
+- ragged per-step and per-pattern arrays are stored as one concatenated
+  ``values`` array plus an ``offsets`` array (:class:`RaggedColumn`);
+- repeated strings (image names, detector IDs, XML attributes) are
+  dictionary-encoded as integer codes into a small category table
+  (:class:`StringColumn`, :class:`AttributeTable`).
+
+Zero Dash / Plotly dependencies.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import numpy as np
+
+# ``<peaksXY>`` children stored per step, keyed by their XML tag.
+PEAK_COLUMNS = (
+    "Xpixel",
+    "Ypixel",
+    "Qx",
+    "Qy",
+    "Qz",
+    "Intens",
+    "Integral",
+    "hwhmX",
+    "hwhmY",
+    "tilt",
+    "chisq",
+)
+
+
+# ---------------------------------------------------------------------------
+# Column types
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class RaggedColumn:
+    """
+    Variable-length rows packed into one array.
+
+    Row ``i`` is ``values[offsets[i]:offsets[i + 1]]``.  ``present[i]`` is
+    False where the source XML had no such element, so callers can tell a
+    missing array (``None``) apart from an empty one.
+    """
+
+    values: np.ndarray
+    offsets: np.ndarray
+    present: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.present)
+
+    def get(self, index: int) -> Optional[np.ndarray]:
+        """Return row ``index`` (a view into ``values``) or ``None``."""
+        if not self.present[index]:
+            return None
+        return self.values[self.offsets[index] : self.offsets[index + 1]]
+
+    @property
+    def lengths(self) -> np.ndarray:
+        return np.diff(self.offsets)
+
+    @classmethod
+    def from_rows(cls, rows: List[Optional[np.ndarray]], dtype=float, row_shape=()) -> "RaggedColumn":
+        """Pack a list of arrays (or ``None``) into a :class:`RaggedColumn`."""
+        present = np.array([r is not None for r in rows], dtype=bool)
+        lengths = np.array([0 if r is None else len(r) for r in rows], dtype=np.int64)
+        offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        chunks = [np.asarray(r, dtype=dtype).reshape((-1,) + tuple(row_shape)) for r in rows if r is not None]
+        if chunks:
+            values = np.concatenate(chunks)
+        else:
+            values = np.zeros((0,) + tuple(row_shape), dtype=dtype)
+        return cls(values=values, offsets=offsets, present=present)
+
+    @classmethod
+    def concat(cls, columns: List["RaggedColumn"]) -> "RaggedColumn":
+        """Stack columns row-wise (all must share dtype and row shape)."""
+        offsets = [np.zeros(1, dtype=np.int64)]
+        base = 0
+        for column in columns:
+            offsets.append(column.offsets[1:] + base)
+            base += int(column.offsets[-1])
+        return cls(
+            values=np.concatenate([column.values for column in columns]),
+            offsets=np.concatenate(offsets),
+            present=np.concatenate([column.present for column in columns]),
+        )
+
+    def take(self, rows: np.ndarray) -> "RaggedColumn":
+        """Return a new column holding ``rows`` (an index array) in that order."""
+        rows = np.asarray(rows, dtype=np.int64)
+        lengths = self.lengths[rows]
+        offsets = np.zeros(len(rows) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        # Source index of every packed value: its row start plus its position in the row.
+        within = np.arange(offsets[-1], dtype=np.int64) - np.repeat(offsets[:-1], lengths)
+        source = np.repeat(self.offsets[rows], lengths) + within
+        return type(self)(values=self.values[source], offsets=offsets, present=self.present[rows])
+
+
+@dataclass
+class StringColumn:
+    """Dictionary-encoded optional strings; code ``-1`` means ``None``."""
+
+    categories: np.ndarray
+    codes: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def get(self, index: int) -> Optional[str]:
+        code = self.codes[index]
+        if code < 0:
+            return None
+        return str(self.categories[code])
+
+    @classmethod
+    def from_values(cls, values: List[Optional[str]]) -> "StringColumn":
+        lookup: Dict[str, int] = {}
+        codes = np.full(len(values), -1, dtype=np.int32)
+        for i, value in enumerate(values):
+            if value is None:
+                continue
+            code = lookup.get(value)
+            if code is None:
+                code = lookup[value] = len(lookup)
+            codes[i] = code
+        categories = np.empty(len(lookup), dtype=object)
+        categories[:] = list(lookup)
+        return cls(categories=categories, codes=codes)
+
+    @classmethod
+    def concat(cls, columns: List["StringColumn"]) -> "StringColumn":
+        """Stack columns row-wise, merging their category tables."""
+        lookup: Dict[str, int] = {}
+        codes = []
+        for column in columns:
+            remap = np.array(
+                [lookup.setdefault(str(value), len(lookup)) for value in column.categories] + [-1], dtype=np.int32
+            )
+            # Code -1 (None) indexes the trailing -1 of ``remap``.
+            codes.append(remap[column.codes])
+        categories = np.empty(len(lookup), dtype=object)
+        categories[:] = list(lookup)
+        return cls(categories=categories, codes=np.concatenate(codes) if codes else np.zeros(0, dtype=np.int32))
+
+    def take(self, rows: np.ndarray) -> "StringColumn":
+        return type(self)(categories=self.categories, codes=self.codes[rows])
+
+
+@dataclass
+class AttributeTable:
+    """
+    Optional XML attribute dicts, one per row, stored column-wise.
+
+    ``present[i]`` is False where the element itself was absent (the
+    row reads back as ``None``); an attribute missing from a present
+    element is simply left out of that row's dict.
+    """
+
+    columns: Dict[str, StringColumn]
+    present: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.present)
+
+    def get(self, index: int) -> Optional[dict]:
+        if not self.present[index]:
+            return None
+        row = {}
+        for key, column in self.columns.items():
+            value = column.get(index)
+            if value is not None:
+                row[key] = value
+        return row
+
+    def column(self, key: str) -> StringColumn:
+        """Return one attribute column (all ``None`` if never seen)."""
+        column = self.columns.get(key)
+        if column is None:
+            return StringColumn.from_values([None] * len(self))
+        return column
+
+    @classmethod
+    def from_rows(cls, rows: List[Optional[dict]]) -> "AttributeTable":
+        keys: Dict[str, None] = {}
+        for row in rows:
+            if row:
+                keys.update(dict.fromkeys(row))
+        columns = {
+            key: StringColumn.from_values([None if row is None else row.get(key) for row in rows]) for key in keys
+        }
+        present = np.array([row is not None for row in rows], dtype=bool)
+        return cls(columns=columns, present=present)
+
+    @classmethod
+    def concat(cls, tables: List["AttributeTable"]) -> "AttributeTable":
+        """Stack tables row-wise; keys missing from a table read back as absent."""
+        keys: Dict[str, None] = {}
+        for table in tables:
+            keys.update(dict.fromkeys(table.columns))
+        columns = {key: StringColumn.concat([table.column(key) for table in tables]) for key in keys}
+        return cls(columns=columns, present=np.concatenate([table.present for table in tables]))
+
+    def take(self, rows: np.ndarray) -> "AttributeTable":
+        return type(self)(
+            columns={key: column.take(rows) for key, column in self.columns.items()},
+            present=self.present[rows],
+        )
+
+
+# ---------------------------------------------------------------------------
+# Store
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class PeakStore:
+    """
+    Per-step peak and per-pattern indexing data for one AllSteps XML.
+
+    Step-level fields have one row per ``<step>``; pattern-level fields
+    have one row per ``<pattern>``, with ``pattern_offsets`` mapping step
+    ``i`` to pattern rows ``pattern_offsets[i]:pattern_offsets[i + 1]``.
+    Numeric pattern attributes are float arrays with NaN for "missing".
+    """
+
+    # Per step -----------------------------------------------------------
+    has_peaks: np.ndarray  # <detector><peaksXY> present
+    n_peaks: np.ndarray  # <peaksXY Npeaks=...>
+    peak_attrs: AttributeTable  # <peaksXY> attributes
+    peaks: Dict[str, RaggedColumn]  # keyed by PEAK_COLUMNS tag
+    input_image: StringColumn
+    detector_id: StringColumn
+    roi: AttributeTable  # <detector><ROI> attributes
+    indexing_attrs: AttributeTable  # <indexing> attributes; absent rows = not indexed
+    pattern_offsets: np.ndarray
+
+    # Per pattern --------------------------------------------------------
+    pattern_num: np.ndarray
+    rms_error: np.ndarray
+    goodness: np.ndarray
+    n_indexed: np.ndarray
+    has_recip: np.ndarray
+    recip_lattice: np.ndarray  # (P, 3, 3), rows a*, b*, c*
+    hkl: RaggedColumn  # (K, 3) int rows per pattern
+    peak_index: RaggedColumn  # PkIndex per pattern
+
+    def __len__(self) -> int:
+        return len(self.has_peaks)
+
+    @property
+    def n_patterns_total(self) -> int:
+        return int(self.pattern_offsets[-1])
+
+    def pattern_rows(self, step_index: int) -> range:
+        """Pattern-row indices belonging to ``step_index``."""
+        return range(int(self.pattern_offsets[step_index]), int(self.pattern_offsets[step_index + 1]))
+
+    def peak_column(self, tag: str, step_index: int) -> Optional[np.ndarray]:
+        """Return one ``<peaksXY>`` child array for a step, or ``None``."""
+        column = self.peaks.get(tag)
+        if column is None:
+            return None
+        return column.get(step_index)
+
+    @classmethod
+    def concat(cls, stores: List["PeakStore"]) -> "PeakStore":
+        """Stack the steps of several stores, in order, into one store."""
+        pattern_offsets = [np.zeros(1, dtype=np.int64)]
+        base = 0
+        for store in stores:
+            pattern_offsets.append(store.pattern_offsets[1:] + base)
+            base += store.n_patterns_total
+
+        def stack(name):
+            return np.concatenate([getattr(store, name) for store in stores])
+
+        return cls(
+            has_peaks=stack("has_peaks"),
+            n_peaks=stack("n_peaks"),
+            peak_attrs=AttributeTable.concat([store.peak_attrs for store in stores]),
+            peaks={tag: RaggedColumn.concat([store.peaks[tag] for store in stores]) for tag in stores[0].peaks},
+            input_image=StringColumn.concat([store.input_image for store in stores]),
+            detector_id=StringColumn.concat([store.detector_id for store in stores]),
+            roi=AttributeTable.concat([store.roi for store in stores]),
+            indexing_attrs=AttributeTable.concat([store.indexing_attrs for store in stores]),
+            pattern_offsets=np.concatenate(pattern_offsets),
+            pattern_num=stack("pattern_num"),
+            rms_error=stack("rms_error"),
+            goodness=stack("goodness"),
+            n_indexed=stack("n_indexed"),
+            has_recip=stack("has_recip"),
+            recip_lattice=stack("recip_lattice"),
+            hkl=RaggedColumn.concat([store.hkl for store in stores]),
+            peak_index=RaggedColumn.concat([store.peak_index for store in stores]),
+        )
+
+    def take(self, steps: np.ndarray) -> "PeakStore":
+        """Return a new store holding ``steps`` (an index array) in that order."""
+        steps = np.asarray(steps, dtype=np.int64)
+        # Pattern rows follow their steps; reuse the ragged gather on a row-number column.
+        pattern_rows = RaggedColumn(
+            values=np.arange(self.n_patterns_total, dtype=np.int64),
+            offsets=self.pattern_offsets,
+            present=np.ones(len(self), dtype=bool),
+        ).take(steps)
+        rows = pattern_rows.values
+        return type(self)(
+            has_peaks=self.has_peaks[steps],
+            n_peaks=self.n_peaks[steps],
+            peak_attrs=self.peak_attrs.take(steps),
+            peaks={tag: column.take(steps) for tag, column in self.peaks.items()},
+            input_image=self.input_image.take(steps),
+            detector_id=self.detector_id.take(steps),
+            roi=self.roi.take(steps),
+            indexing_attrs=self.indexing_attrs.take(steps),
+            pattern_offsets=pattern_rows.offsets,
+            pattern_num=self.pattern_num[rows],
+            rms_error=self.rms_error[rows],
+            goodness=self.goodness[rows],
+            n_indexed=self.n_indexed[rows],
+            has_recip=self.has_recip[rows],
+            recip_lattice=self.recip_lattice[rows],
+            hkl=self.hkl.take(rows),
+            peak_index=self.peak_index.take(rows),
+        )
+
+
+@dataclass
+class PeakStoreBuilder:
+    """Accumulate steps one at a time, then pack them into a :class:`PeakStore`."""
+
+    _has_peaks: List[bool] = field(default_factory=list)
+    _n_peaks: List[int] = field(default_factory=list)
+    _peak_attrs: List[Optional[dict]] = field(default_factory=list)
+    _peaks: Dict[str, List[Optional[np.ndarray]]] = field(default_factory=lambda: {tag: [] for tag in PEAK_COLUMNS})
+    _input_image: List[Optional[str]] = field(default_factory=list)
+    _detector_id: List[Optional[str]] = field(default_factory=list)
+    _roi: List[Optional[dict]] = field(default_factory=list)
+    _indexing_attrs: List[Optional[dict]] = field(default_factory=list)
+    _n_patterns: List[int] = field(default_factory=list)
+    _pattern_scalars: List[tuple] = field(default_factory=list)
+    _recip: List[Optional[np.ndarray]] = field(default_factory=list)
+    _hkl: List[Optional[np.ndarray]] = field(default_factory=list)
+    _peak_index: List[Optional[np.ndarray]] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self._has_peaks)
+
+    def add_step(
+        self,
+        *,
+        peak_attrs: Optional[dict] = None,
+        peaks: Optional[Dict[str, Optional[np.ndarray]]] = None,
+        input_image: Optional[str] = None,
+        detector_id: Optional[str] = None,
+        roi: Optional[dict] = None,
+        indexing_attrs: Optional[dict] = None,
+        patterns: Optional[List[dict]] = None,
+    ) -> None:
+        """
+        Append one step.
+
+        ``peak_attrs`` is ``None`` when the step has no ``<peaksXY>``.
+        Each entry of ``patterns`` is a dict with float ``num``,
+        ``rms_error``, ``goodness``, ``n_indexed`` (NaN when missing) and
+        optional ``recip_lattice`` (3, 3), ``hkl`` (K, 3) and
+        ``peak_indices`` (K,) arrays.
+        """
+        peaks = peaks or {}
+        patterns = patterns or []
+        self._has_peaks.append(peak_attrs is not None)
+        self._n_peaks.append(_int_or_zero((peak_attrs or {}).get("Npeaks")))
+        self._peak_attrs.append(peak_attrs)
+        for tag in PEAK_COLUMNS:
+            self._peaks[tag].append(peaks.get(tag))
+        self._input_image.append(input_image)
+        self._detector_id.append(detector_id)
+        self._roi.append(roi)
+        self._indexing_attrs.append(indexing_attrs)
+        self._n_patterns.append(len(patterns))
+        for pat in patterns:
+            self._pattern_scalars.append((pat["num"], pat["rms_error"], pat["goodness"], pat["n_indexed"]))
+            self._recip.append(pat.get("recip_lattice"))
+            self._hkl.append(pat.get("hkl"))
+            self._peak_index.append(pat.get("peak_indices"))
+
+    def build(self) -> PeakStore:
+        pattern_offsets = np.zeros(len(self._n_patterns) + 1, dtype=np.int64)
+        np.cumsum(self._n_patterns, out=pattern_offsets[1:])
+        scalars = np.array(self._pattern_scalars, dtype=float).reshape(-1, 4)
+        has_recip = np.array([r is not None for r in self._recip], dtype=bool)
+        recip = np.full((len(self._recip), 3, 3), np.nan)
+        for i, r in enumerate(self._recip):
+            if r is not None:
+                recip[i] = r
+        return PeakStore(
+            has_peaks=np.array(self._has_peaks, dtype=bool),
+            n_peaks=np.array(self._n_peaks, dtype=np.int64),
+            peak_attrs=AttributeTable.from_rows(self._peak_attrs),
+            peaks={tag: RaggedColumn.from_rows(rows) for tag, rows in self._peaks.items()},
+            input_image=StringColumn.from_values(self._input_image),
+            detector_id=StringColumn.from_values(self._detector_id),
+            roi=AttributeTable.from_rows(self._roi),
+            indexing_attrs=AttributeTable.from_rows(self._indexing_attrs),
+            pattern_offsets=pattern_offsets,
+            pattern_num=scalars[:, 0].copy(),
+            rms_error=scalars[:, 1].copy(),
+            goodness=scalars[:, 2].copy(),
+            n_indexed=scalars[:, 3].copy(),
+            has_recip=has_recip,
+            recip_lattice=recip,
+            hkl=RaggedColumn.from_rows(self._hkl, dtype=np.int64, row_shape=(3,)),
+            peak_index=RaggedColumn.from_rows(self._peak_index, dtype=np.int64),
+        )
+
+
+def _int_or_zero(value) -> int:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
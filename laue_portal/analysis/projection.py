@@ -7,6 +7,12 @@ xmlMultiIndex.ipf).  Zero Dash/Plotly dependencies.
 
 import numpy as np
 
+from laue_portal.analysis.derived_cache import cached_derived
+
+# Grains per broadcast block in ``pole_figure_points`` (bounds the
+# (grains, poles, 3) intermediate to a few tens of MB for {321}).
+_POLE_BLOCK_GRAINS = 16384
+
 # 34ID-E surface coordinate system (default)
 _DEFAULT_NORMAL = np.array([0.0, 1.0 / np.sqrt(2.0), -1.0 / np.sqrt(2.0)])
 _DEFAULT_ROLL = np.array([0.0, -1.0 / np.sqrt(2.0), -1.0 / np.sqrt(2.0)])
@@ -170,64 +176,140 @@ def pole_figure_points(recip_lattices, hkl_family, surface_normal=None, surface_
     grain_indices : ndarray (M,) int
         Which grain each point belongs to.
     """
-    if surface_normal is None:
-        normal = _DEFAULT_NORMAL
-    else:
-        normal = np.asarray(surface_normal, dtype=float)
-    normal = normal / np.linalg.norm(normal)
+    normal, roll, tilt = _resolve_surface_frame(surface_normal, surface_roll, surface_tilt)
+    recip_lattices = np.asarray(recip_lattices, dtype=float).reshape(-1, 3, 3)
+    family = np.asarray(hkl_family, dtype=float).reshape(-1, 3)
 
-    roll = _DEFAULT_ROLL if surface_roll is None else np.asarray(surface_roll, dtype=float)
-    tilt = _DEFAULT_TILT if surface_tilt is None else np.asarray(surface_tilt, dtype=float)
-
-    all_x = []
-    all_y = []
+    all_points = []
     all_grains = []
-
-    for i, gm in enumerate(recip_lattices):
-        for pole_dir in hkl_family:
-            # Transform pole to lab frame using reciprocal lattice
-            # directly, matching Igor's: MatrixOp vec3 = gmi x vec3
-            # Python stores a*,b*,c* as rows, so gm.T @ hkl gives
-            # q = a*·h + b*·k + c*·l  (the lab-frame Q-vector).
-            vec = gm.T @ pole_dir
-            vec_norm = np.linalg.norm(vec)
-            if vec_norm < 1e-12:
-                continue
-            vec = vec / vec_norm
-
-            # Upper hemisphere only (matching Igor Pro's MakePolePoints).
-            # For centrosymmetric crystals every pole direction has an
-            # antipodal partner already in the hkl family, so the upper-
-            # hemisphere version is always present via that partner.
-            dot_normal = np.dot(vec, normal)
-            if dot_normal < 0:
-                continue
-
-            # Stereographic projection
-            sin_theta = np.sqrt(1.0 - np.clip(dot_normal, 0, 1) ** 2)
-            r = sin_theta / (1.0 + dot_normal) if (1.0 + dot_normal) > 1e-12 else 0.0
-
-            # Project to 2D
-            x_comp = np.dot(vec, tilt)
-            y_comp = np.dot(vec, roll)
-            phi = np.arctan2(y_comp, x_comp)
-
-            x = r * np.cos(phi)
-            y = r * np.sin(phi)
-
-            all_x.append(x)
-            all_y.append(y)
-            all_grains.append(i)
-
-    if len(all_x) == 0:
+    for start in range(0, len(recip_lattices), _POLE_BLOCK_GRAINS):
+        block = recip_lattices[start : start + _POLE_BLOCK_GRAINS]
+
+        # Transform poles to the lab frame using the reciprocal lattice
+        # directly, matching Igor's: MatrixOp vec3 = gmi x vec3.  Python
+        # stores a*,b*,c* as rows, so gm.T @ hkl gives
+        # q = a*·h + b*·k + c*·l  (the lab-frame Q-vector); for the whole
+        # block that is family @ gm -> (grains, poles, 3).
+        vecs = family @ block
+        norms = np.linalg.norm(vecs, axis=2)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            vecs = vecs / norms[..., None]
+        dot_normal = vecs @ normal
+
+        # Upper hemisphere only (matching Igor Pro's MakePolePoints).
+        # For centrosymmetric crystals every pole direction has an
+        # antipodal partner already in the hkl family, so the upper-
+        # hemisphere version is always present via that partner.  Grains
+        # with NaN lattices are kept (as NaN points) for callers to filter.
+        keep = ~(norms < 1e-12) & ~(dot_normal < 0)
+        grains, poles = np.nonzero(keep)
+        vecs = vecs[grains, poles]
+        dot_normal = dot_normal[grains, poles]
+
+        # Stereographic projection
+        sin_theta = np.sqrt(1.0 - np.clip(dot_normal, 0, 1) ** 2)
+        r = sin_theta / (1.0 + dot_normal)
+
+        # Project to 2D
+        phi = np.arctan2(vecs @ roll, vecs @ tilt)
+        all_points.append(np.column_stack([r * np.cos(phi), r * np.sin(phi)]))
+        all_grains.append(grains + start)
+
+    if sum(len(g) for g in all_grains) == 0:
         return np.empty((0, 2)), np.empty(0, dtype=int)
 
-    points = np.column_stack([all_x, all_y])
-    grain_indices = np.array(all_grains, dtype=int)
+    points = np.concatenate(all_points)
+    grain_indices = np.concatenate(all_grains).astype(int)
 
     return points, grain_indices
 
 
+def pole_figure_points_for_xml(xml_path, hkl_family, surface_normal=None, surface_roll=None, surface_tilt=None):
+    """
+    :func:`pole_figure_points` for the reciprocal lattices of an XML file.
+
+    Results are memoised in the derived-quantity cache (see
+    ``laue_portal.analysis.derived_cache``) on (path, mtime, family,
+    surface frame), so redraws that only change styling (marker size,
+    color scheme, color center) reuse the projection.  The returned
+    arrays are read-only.
+
+    Parameters
+    ----------
+    xml_path : str
+        Path to the AllSteps XML file (see ``xml_parser.parse_indexing_xml``).
+    hkl_family, surface_normal, surface_roll, surface_tilt :
+        As for :func:`pole_figure_points`.
+
+    Returns
+    -------
+    points : ndarray (M, 2)
+    grain_indices : ndarray (M,) int
+    """
+    from laue_portal.analysis.xml_parser import parse_indexing_xml
+
+    xml_path = str(xml_path)
+    normal, roll, tilt = _resolve_surface_frame(surface_normal, surface_roll, surface_tilt)
+    family = np.asarray(hkl_family, dtype=float).reshape(-1, 3)
+    return cached_derived(
+        xml_path,
+        "pole_figure_points",
+        (family, normal, roll, tilt),
+        lambda: pole_figure_points(
+            parse_indexing_xml(xml_path)["recip_lattices"],
+            family,
+            surface_normal=normal,
+            surface_roll=roll,
+            surface_tilt=tilt,
+        ),
+    )
+
+
+def closest_pole_offsets(points, grain_indices, n_grains, center_xy=(0.0, 0.0)):
+    """
+    Offset of each grain's pole closest to a center on the pole figure.
+
+    Vectorised form of LaueGo's per-grain search in ``MakePolePoints``
+    (ties go to the first pole in ``points`` order).
+
+    Parameters
+    ----------
+    points : ndarray (M, 2)
+        Finite pole figure points (see :func:`pole_figure_points`).
+    grain_indices : ndarray (M,) int
+        Grain of each point.
+    n_grains : int
+        Number of grains.
+    center_xy : tuple of float
+        ``(x0, y0)`` center.
+
+    Returns
+    -------
+    ndarray (n_grains, 2)
+        ``(dx, dy)`` from the center to the closest pole; NaN for grains
+        without any point.
+    """
+    center = np.asarray(center_xy, dtype=float)
+    offsets = np.full((n_grains, 2), np.nan)
+    if len(points) == 0:
+        return offsets
+    deltas = np.asarray(points, dtype=float) - center
+    dists = np.sum(deltas**2, axis=1)
+    order = np.lexsort((dists, grain_indices))
+    grains, first = np.unique(np.asarray(grain_indices)[order], return_index=True)
+    offsets[grains] = deltas[order[first]]
+    return offsets
+
+
+def _resolve_surface_frame(surface_normal, surface_roll, surface_tilt):
+    """Surface ``(normal, roll, tilt)`` with 34ID-E defaults; the normal is normalized."""
+    normal = _DEFAULT_NORMAL if surface_normal is None else np.asarray(surface_normal, dtype=float)
+    normal = normal / np.linalg.norm(normal)
+    roll = _DEFAULT_ROLL if surface_roll is None else np.asarray(surface_roll, dtype=float)
+    tilt = _DEFAULT_TILT if surface_tilt is None else np.asarray(surface_tilt, dtype=float)
+    return normal, roll, tilt
+
+
 # ===================================================================
 # Cubic {hkl} Family Generation
 # ===================================================================
@@ -0,0 +1,191 @@
+"""
+Random access to the ``results.h5`` of a wire reconstruction.
+
+The reconstruction page used to re-open ``results.h5`` on every click,
+load the whole ``ind`` (pixel index) dataset, scan it with ``np.where``
+for the clicked pixel and then read that row of ``lau`` -- leaking the
+file handle each time.  :func:`open_results` instead keeps one read-only
+:class:`ReconResults` per file version in a small process-wide pool
+(least recently used handles are closed once there are more than
+``LAUE_RECON_RESULTS_HANDLES``, default 8).  The first lookup builds a
+dense ``(x, y) -> row`` map of the pixel index, after which a lineout is
+one single-row hyperslab read of ``lau``; in files written by
+:mod:`~laue_portal.recon.results_writer` that decompresses only the
+chunks holding that pixel.
+
+The same file holds the images the page displays (see
+:func:`~laue_portal.recon.results_writer.write_depth_stacks`): the
+depth-integrated image and depth-binned stacks, of which the depth slider
+reads one slice at a time.
+
+Zero Dash / Plotly dependencies.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+import h5py
+import numpy as np
+
+try:  # registers the Blosc/LZ4 filter of LAUE_RECON_COMPRESSION=lz4 files
+    import hdf5plugin  # noqa: F401
+except ImportError:
+    pass
+
+RESULTS_FILENAME = "results.h5"
+IMAGES_GROUP = "images"
+INTEGRATED_IMAGE = "integrated"
+
+_DEFAULT_MAX_HANDLES = 8
+# Rows of ``ind`` read per block while building the pixel map.
+_IND_BLOCK_ROWS = 1 << 20
+
+
+class ReconResults:
+    """
+    One open ``results.h5`` with a lazily built pixel -> row lookup.
+
+    Parameters
+    ----------
+    path : str
+        The HDF5 file.  It is opened read-only until :meth:`close`.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = h5py.File(path, "r")
+        self._pixel_rows: Optional[np.ndarray] = None
+        self._lock = threading.Lock()
+
+    def read(self, key: str, selection=None) -> np.ndarray:
+        """Read dataset ``key``, whole or at ``selection`` (any h5py selection)."""
+        dataset = self._file[key]
+        return dataset[()] if selection is None else dataset[selection]
+
+    @property
+    def pixel_rows(self) -> np.ndarray:
+        """
+        Dense 2-D map from pixel ``(x, y)`` of ``ind`` to its row, ``-1`` where absent.
+
+        A pixel listed more than once maps to its first row.
+        """
+        if self._pixel_rows is None:
+            with self._lock:
+                if self._pixel_rows is None:
+                    self._pixel_rows = _build_pixel_rows(self._file["ind"])
+        return self._pixel_rows
+
+    def row_of(self, x: int, y: int) -> Optional[int]:
+        """Row of pixel ``(x, y)`` in the per-pixel datasets, or ``None``."""
+        rows = self.pixel_rows
+        if not (0 <= x < rows.shape[0] and 0 <= y < rows.shape[1]):
+            return None
+        row = int(rows[x, y])
+        return row if row >= 0 else None
+
+    def lineout(self, x: int, y: int, key: str = "lau") -> Optional[np.ndarray]:
+        """Row of ``key`` (the depth profile) for pixel ``(x, y)``, or ``None``."""
+        row = self.row_of(x, y)
+        if row is None:
+            return None
+        return self._file[key][row]
+
+    def integrated_image(self) -> Optional[np.ndarray]:
+        """Depth-integrated detector image, or ``None`` if the file has no images."""
+        name = f"{IMAGES_GROUP}/{INTEGRATED_IMAGE}"
+        return self._file[name][()] if name in self._file else None
+
+    def depth_bin_widths(self) -> list[float]:
+        """Bin widths (um) of the depth-binned image stacks, finest first."""
+        group = self._file.get(IMAGES_GROUP)
+        if group is None:
+            return []
+        return sorted(float(d.attrs["bin_width"]) for d in group.values() if "bin_width" in d.attrs)
+
+    def depth_centres(self, bin_width: float) -> np.ndarray:
+        """Centre depth (um) of every slice of the ``bin_width`` stack."""
+        return self._file[depth_stack_name(bin_width)].attrs["depth"]
+
+    def depth_image(self, bin_width: float, index: int) -> np.ndarray:
+        """Slice ``index`` (clipped to the stack) of the ``bin_width`` stack."""
+        stack = self._file[depth_stack_name(bin_width)]
+        return stack[int(np.clip(index, 0, stack.shape[0] - 1))]
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def depth_stack_name(bin_width: float) -> str:
+    """Dataset holding the image stack binned to ``bin_width`` um."""
+    return f"{IMAGES_GROUP}/depth_{float(bin_width):g}um"
+
+
+def open_results(output_dir, results_filename: str = RESULTS_FILENAME) -> ReconResults:
+    """
+    Return the pooled :class:`ReconResults` of ``output_dir / results_filename``.
+
+    Handles are keyed on (path, mtime), so a rewritten file is reopened.
+
+    Raises
+    ------
+    OSError
+        If the file does not exist or is not HDF5.
+    """
+    path = os.path.abspath(Path(output_dir) / results_filename)
+    key = (path, os.stat(path).st_mtime_ns)
+    with _pool_lock:
+        results = _pool.get(key)
+        if results is not None:
+            _pool.move_to_end(key)
+            return results
+    results = ReconResults(path)
+    with _pool_lock:
+        if key in _pool:
+            results.close()
+            return _pool[key]
+        _pool[key] = results
+        while len(_pool) > _max_handles():
+            _, evicted = _pool.popitem(last=False)
+            evicted.close()
+    return results
+
+
+def close_all() -> None:
+    """Close every pooled handle."""
+    with _pool_lock:
+        while _pool:
+            _, results = _pool.popitem()
+            results.close()
+
+
+_pool: OrderedDict[tuple[str, int], ReconResults] = OrderedDict()
+_pool_lock = threading.Lock()
+
+
+def _max_handles() -> int:
+    try:
+        return max(int(os.environ.get("LAUE_RECON_RESULTS_HANDLES", _DEFAULT_MAX_HANDLES)), 1)
+    except ValueError:
+        return _DEFAULT_MAX_HANDLES
+
+
+def _build_pixel_rows(ind: h5py.Dataset) -> np.ndarray:
+    """Read ``ind`` (N, 2) block by block into a dense first-row map."""
+    blocks = [ind[start : start + _IND_BLOCK_ROWS, :2] for start in range(0, ind.shape[0], _IND_BLOCK_ROWS)]
+    pixels = np.concatenate(blocks).astype(np.int64) if blocks else np.zeros((0, 2), dtype=np.int64)
+    rows = np.flatnonzero((pixels >= 0).all(axis=1))
+    pixels = pixels[rows]
+    shape = tuple(int(n) + 1 for n in pixels.max(axis=0)) if len(rows) else (0, 0)
+    linear = np.ravel_multi_index((pixels[:, 0], pixels[:, 1]), shape)
+    # ``np.unique`` keeps the first occurrence, as ``np.where(...)[0][0]`` did.
+    linear, first = np.unique(linear, return_index=True)
+    dtype = np.int32 if ind.shape[0] < np.iinfo(np.int32).max else np.int64
+    pixel_rows = np.full(shape, -1, dtype=dtype)
+    pixel_rows.flat[linear] = rows[first]
+    pixel_rows.flags.writeable = False
+    return pixel_rows
@@ -0,0 +1,555 @@
+"""
+Cross-process cache for parsed geometry and derived arrays.
+
+The in-process caches (``functools.lru_cache`` in ``xml_parser`` /
+``geometry`` and :mod:`~laue_portal.analysis.derived_cache`) are private
+to one Dash worker, so under a multi-worker Gunicorn deployment every
+worker repeats the same computation.  This module adds a shared second
+level behind them, selected with ``LAUE_SHARED_CACHE``:
+
+- ``disk`` (default): one file per entry under ``LAUE_SHARED_CACHE_DIR``
+  (default: a per-user directory under the system temp dir).  Arrays are
+  memory-mapped on load, so workers share the pages instead of copying.
+- ``redis``: entries live in the Redis instance the job queue already
+  uses (``processing.queue.core.redis_conn``).
+- ``none``: no shared cache; per-key locks become no-ops.
+
+Both backends bound their total size (``LAUE_SHARED_CACHE_MB``, default
+2048), evicting least-recently-used entries once a running byte total
+exceeds it, and expire entries unused for ``LAUE_SHARED_CACHE_TTL``
+seconds (default one day; ``0`` keeps them until evicted).  :meth:`SharedCache.get_or_compute` holds a per-key lock (an
+``flock`` on disk, a Redis lock otherwise) around a miss, so two workers
+never compute the same entry at once: the second one waits and then loads
+what the first stored.  The same lock guards the HDF5 sidecar written by
+``parse_indexing_xml`` (see :func:`key_lock`).
+
+Values are ndarrays (numeric dtypes) or tuples / lists / str-keyed dicts
+of ndarrays and JSON scalars.  Anything else is computed but not stored.
+Loaded arrays are read-only.
+
+Zero Dash / Plotly dependencies.
+"""
+
+from __future__ import annotations
+
+import fcntl
+import hashlib
+import io
+import json
+import logging
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Hashable, Optional
+
+import numpy as np
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 1
+ENTRY_SUFFIX = ".entry"
+
+_MAGIC = b"LAUESHC1"
+_ALIGN = 64
+_DEFAULT_MAX_MB = 2048
+_DEFAULT_TTL_S = 86400
+_DEFAULT_LOCK_TIMEOUT_S = 600
+# Least recently used Redis entries examined per eviction round trip.
+_EVICT_BATCH = 64
+
+
+class SharedCache:
+    """
+    Base class of the shared cache backends; also the ``none`` backend.
+
+    Subclasses implement :meth:`get`, :meth:`set`, :meth:`lock` and
+    :meth:`clear` on string keys produced by :func:`cache_key`.
+    """
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the value stored under ``key``, or ``None`` on a miss."""
+        return None
+
+    def set(self, key: str, value: Any) -> None:
+        """Store ``value`` under ``key`` (silently skipped if it cannot be stored)."""
+
+    @contextmanager
+    def lock(self, key: str):
+        """Hold the cross-process lock of ``key``."""
+        yield
+
+    def clear(self) -> None:
+        """Drop every entry."""
+
+    def get_or_compute(self, key: str, compute: Callable[[], Any]) -> Any:
+        """
+        Return the value stored under ``key``, computing and storing it on a miss.
+
+        The miss path runs under :meth:`lock`, and the entry is looked up
+        again once the lock is held, so concurrent misses compute once.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+        with self.lock(key):
+            value = self.get(key)
+            if value is None:
+                value = compute()
+                self.set(key, value)
+        return value
+
+
+class DiskCache(SharedCache):
+    """
+    One file per entry in ``directory``, memory-mapped on load.
+
+    Parameters
+    ----------
+    directory : str or Path
+        Cache directory (created on first write).
+    max_bytes : int
+        Total size budget of the entry files.
+    ttl : float
+        Seconds since last use after which an entry expires; ``0`` disables
+        expiry.
+    """
+
+    def __init__(self, directory, max_bytes: int, ttl: float = 0):
+        self.directory = Path(directory)
+        self.max_bytes = int(max_bytes)
+        self.ttl = float(ttl)
+        # Bytes in the directory as of the last sweep plus this process's
+        # writes since; ``None`` until the first sweep.
+        self._total: Optional[int] = None
+        self._last_sweep = 0.0
+        self._total_lock = threading.Lock()
+
+    def _path(self, key: str, suffix: str = ENTRY_SUFFIX) -> Path:
+        return self.directory / f"{key}{suffix}"
+
+    def get(self, key: str) -> Optional[Any]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                if self.ttl and time.time() - os.fstat(f.fileno()).st_mtime > self.ttl:
+                    _unlink_quietly(path)
+                    return None
+                # The arrays keep the mapping alive after the file is closed.
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            value = decode(buffer)
+            os.utime(path)  # mtime records the last use, for LRU eviction
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as exc:
+            logger.warning(f"Dropping unreadable shared cache entry {path}: {exc}")
+            _unlink_quietly(path)
+            return None
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        try:
+            header, arrays = encode(value)
+        except TypeError:
+            return
+        if blob_nbytes(header, arrays) > self.max_bytes:
+            return
+        path = self._path(key)
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", suffix=".tmp", dir=self.directory)
+        except OSError as exc:
+            logger.warning(f"Could not write shared cache entry {path}: {exc}")
+            return
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write_blob(f, header, arrays)
+            size = os.path.getsize(tmp)
+            os.chmod(tmp, 0o644)  # mkstemp creates 0600; other workers must read it
+            replaced = _size_or_zero(path)
+            os.replace(tmp, path)
+        except OSError as exc:
+            logger.warning(f"Could not write shared cache entry {path}: {exc}")
+            _unlink_quietly(tmp)
+            return
+        with self._total_lock:
+            if self._total is not None:
+                self._total += size - replaced
+            over_budget = self._total is None or self._total > self.max_bytes
+            expiry_due = bool(self.ttl) and time.time() - self._last_sweep > self.ttl
+        if over_budget or expiry_due:
+            self._evict()
+
+    @contextmanager
+    def lock(self, key: str):
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            lock_file = open(self._path(key, ".lock"), "a")
+        except OSError as exc:
+            logger.warning(f"Computing {key} without a shared cache lock: {exc}")
+            lock_file = None
+        if lock_file is None:
+            yield
+            return
+        with lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def clear(self) -> None:
+        for entry in self._entries():
+            self._remove(entry.path)
+        with self._total_lock:
+            self._total = 0
+
+    def _remove(self, entry_path: str) -> None:
+        """Delete an entry and its lock file."""
+        _unlink_quietly(entry_path)
+        # A worker still waiting on the old lock file may then compute the
+        # entry alongside a new one; entries are replaced atomically, so
+        # that only costs the duplicate work.
+        _unlink_quietly(entry_path[: -len(ENTRY_SUFFIX)] + ".lock")
+
+    def _entries(self):
+        try:
+            return [entry for entry in os.scandir(self.directory) if entry.name.endswith(ENTRY_SUFFIX)]
+        except OSError:
+            return []
+
+    def _evict(self) -> None:
+        """
+        Sweep the directory: drop expired entries, then the least recently used until within budget.
+
+        :meth:`set` only sweeps when its running total exceeds the budget
+        (or, with a TTL, once per TTL), not on every write.
+        """
+        now = time.time()
+        entries = []
+        for entry in self._entries():
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            if self.ttl and now - stat.st_mtime > self.ttl:
+                self._remove(entry.path)
+            else:
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+        with self._total_lock:
+            self._total = total
+            self._last_sweep = now
+
+
+class RedisCache(SharedCache):
+    """
+    Entries stored in Redis, with a sorted set recording last use for LRU.
+
+    Parameters
+    ----------
+    conn : redis.Redis
+        Connection (``decode_responses=False``).
+    max_bytes : int
+        Total size budget of the stored entries.
+    ttl : float
+        Seconds since last use after which Redis expires an entry; ``0``
+        disables expiry.
+    lock_timeout : float
+        Lifetime of a per-key lock (so a crashed worker cannot hold it
+        forever) and the longest a worker waits for one.
+    prefix : str
+        Key namespace.
+    """
+
+    def __init__(
+        self,
+        conn,
+        max_bytes: int,
+        ttl: float = 0,
+        lock_timeout: float = _DEFAULT_LOCK_TIMEOUT_S,
+        prefix: str = "laue:cache:",
+    ):
+        self.conn = conn
+        self.max_bytes = int(max_bytes)
+        self.ttl = int(ttl) or None
+        self.lock_timeout = float(lock_timeout)
+        self.prefix = prefix
+        self._index_key = f"{prefix}lru"
+        self._sizes_key = f"{prefix}sizes"
+        # Running sum of the sizes table, so a write need not read it all.
+        self._total_key = f"{prefix}bytes"
+        self._total_seeded = False
+
+    def get(self, key: str) -> Optional[Any]:
+        try:
+            blob = self.conn.get(self.prefix + key)
+            if blob is None:
+                return None
+            pipe = self.conn.pipeline()
+            if self.ttl:
+                pipe.expire(self.prefix + key, self.ttl)
+            pipe.zadd(self._index_key, {key: time.time()})
+            pipe.execute()
+        except RedisError as exc:
+            logger.warning(f"Shared cache read failed for {key}: {exc}")
+            return None
+        try:
+            return decode(blob)
+        except ValueError as exc:
+            logger.warning(f"Ignoring unreadable shared cache entry {key}: {exc}")
+            return None
+
+    def set(self, key: str, value: Any) -> None:
+        try:
+            header, arrays = encode(value)
+        except TypeError:
+            return
+        if blob_nbytes(header, arrays) > self.max_bytes:
+            return
+        buffer = io.BytesIO()
+        write_blob(buffer, header, arrays)
+        blob = buffer.getvalue()
+        try:
+            if not self._total_seeded:
+                # Caches written before the running total existed.
+                self.conn.setnx(self._total_key, sum(int(size) for size in self.conn.hvals(self._sizes_key)))
+                self._total_seeded = True
+            replaced = int(self.conn.hget(self._sizes_key, key) or 0)
+            pipe = self.conn.pipeline()
+            pipe.set(self.prefix + key, blob, ex=self.ttl)
+            pipe.hset(self._sizes_key, key, len(blob))
+            pipe.zadd(self._index_key, {key: time.time()})
+            pipe.execute()
+            total = int(self.conn.incrby(self._total_key, len(blob) - replaced))
+            if total > self.max_bytes:
+                self._evict(total)
+        except RedisError as exc:
+            logger.warning(f"Shared cache write failed for {key}: {exc}")
+
+    @contextmanager
+    def lock(self, key: str):
+        lock = self.conn.lock(f"{self.prefix}lock:{key}", timeout=self.lock_timeout, blocking_timeout=self.lock_timeout)
+        try:
+            acquired = lock.acquire()
+        except RedisError as exc:
+            logger.warning(f"Computing {key} without a shared cache lock: {exc}")
+            acquired = False
+        try:
+            yield
+        finally:
+            if acquired:
+                try:
+                    lock.release()
+                except RedisError:
+                    pass  # expired while held; nothing to release
+
+    def clear(self) -> None:
+        try:
+            keys = [self.prefix + key.decode() for key in self.conn.zrange(self._index_key, 0, -1)]
+            self.conn.delete(*keys, self._index_key, self._sizes_key, self._total_key)
+        except RedisError as exc:
+            logger.warning(f"Could not clear the shared cache: {exc}")
+
+    def _evict(self, total: int) -> None:
+        """Drop least recently used entries, a batch at a time, until ``total`` is within budget.
+
+        Entries Redis already expired keep their accounting until they
+        reach the old end of the index, where they are dropped first.
+        """
+        while total > self.max_bytes:
+            keys = self.conn.zrange(self._index_key, 0, _EVICT_BATCH - 1)
+            if not keys:
+                break
+            victims, freed = [], 0
+            for key, size in zip(keys, self.conn.hmget(self._sizes_key, keys), strict=True):
+                if total - freed <= self.max_bytes:
+                    break
+                victims.append(key)
+                freed += int(size or 0)
+            pipe = self.conn.pipeline()
+            pipe.delete(*(self.prefix + key.decode() for key in victims))
+            pipe.hdel(self._sizes_key, *victims)
+            pipe.zrem(self._index_key, *victims)
+            pipe.execute()
+            total = int(self.conn.incrby(self._total_key, -freed))
+
+
+# ---------------------------------------------------------------------------
+# Configuration
+# ---------------------------------------------------------------------------
+
+_BACKEND: Optional[SharedCache] = None
+
+
+def _env_number(name: str, default: float) -> float:
+    try:
+        return max(float(os.environ.get(name, default)), 0.0)
+    except ValueError:
+        return default
+
+
+def _backend_from_env() -> SharedCache:
+    kind = os.environ.get("LAUE_SHARED_CACHE", "disk").lower()
+    max_bytes = int(_env_number("LAUE_SHARED_CACHE_MB", _DEFAULT_MAX_MB) * 1024 * 1024)
+    ttl = _env_number("LAUE_SHARED_CACHE_TTL", _DEFAULT_TTL_S)
+    if kind == "disk":
+        directory = os.environ.get("LAUE_SHARED_CACHE_DIR") or (
+            Path(tempfile.gettempdir()) / f"laue_portal_cache_{os.getuid()}" / "shared"
+        )
+        return DiskCache(directory, max_bytes=max_bytes, ttl=ttl)
+    if kind == "redis":
+        from laue_portal.processing.queue.core import redis_conn
+
+        lock_timeout = _env_number("LAUE_SHARED_CACHE_LOCK_TIMEOUT", _DEFAULT_LOCK_TIMEOUT_S)
+        return RedisCache(redis_conn, max_bytes=max_bytes, ttl=ttl, lock_timeout=lock_timeout)
+    if kind not in {"none", "0", "false", "no"}:
+        logger.warning(f"Unknown LAUE_SHARED_CACHE={kind!r}; shared cache disabled")
+    return SharedCache()
+
+
+def get_backend() -> SharedCache:
+    """Return the process-wide shared cache, configured from the environment on first use."""
+    global _BACKEND
+    if _BACKEND is None:
+        _BACKEND = _backend_from_env()
+    return _BACKEND
+
+
+def set_backend(backend: Optional[SharedCache]) -> None:
+    """Replace the shared cache (``None`` re-reads the environment on next use)."""
+    global _BACKEND
+    _BACKEND = backend
+
+
+def cache_key(key: Hashable) -> str:
+    """Stable, process-independent string key for a hashable key of builtins."""
+    return hashlib.sha1(repr((FORMAT_VERSION, key)).encode()).hexdigest()
+
+
+def get_or_compute(key: Hashable, compute: Callable[[], Any]) -> Any:
+    """:meth:`SharedCache.get_or_compute` of the configured backend."""
+    return get_backend().get_or_compute(cache_key(key), compute)
+
+
+def key_lock(key: Hashable):
+    """Context manager holding the configured backend's lock for ``key``."""
+    return get_backend().lock(cache_key(key))
+
+
+# ---------------------------------------------------------------------------
+# Serialisation
+# ---------------------------------------------------------------------------
+# An entry is _MAGIC, the header length (uint64 LE), a JSON header with the
+# value layout and array descriptors, then each array's raw bytes at
+# _ALIGN-aligned offsets so that loads can wrap the buffer without copying.
+
+
+def encode(value: Any) -> tuple[bytes, list[np.ndarray]]:
+    """Split ``value`` into a JSON header and its arrays (``TypeError`` if unsupported)."""
+    arrays: list[np.ndarray] = []
+    layout = _layout(value, arrays)
+    descriptors = []
+    offset = 0
+    for array in arrays:
+        descriptors.append({"dtype": array.dtype.str, "shape": list(array.shape), "offset": offset})
+        offset = _align(offset + array.nbytes)
+    header = json.dumps({"layout": layout, "arrays": descriptors}).encode()
+    return header, arrays
+
+
+def blob_nbytes(header: bytes, arrays: list[np.ndarray]) -> int:
+    """Size of the entry :func:`write_blob` produces."""
+    data_start = _align(len(_MAGIC) + 8 + len(header))
+    return data_start + sum(_align(array.nbytes) for array in arrays)
+
+
+def write_blob(f, header: bytes, arrays: list[np.ndarray]) -> None:
+    """Write an entry to the binary file object ``f``."""
+    prefix = _MAGIC + struct.pack("<Q", len(header)) + header
+    f.write(prefix + b"\0" * (_align(len(prefix)) - len(prefix)))
+    for array in arrays:
+        f.write(array.tobytes())
+        f.write(b"\0" * (_align(array.nbytes) - array.nbytes))
+
+
+def decode(buffer) -> Any:
+    """Rebuild a value from an entry held in ``buffer`` (bytes or mmap), without copying arrays."""
+    if bytes(buffer[: len(_MAGIC)]) != _MAGIC:
+        raise ValueError("not a shared cache entry")
+    (header_len,) = struct.unpack_from("<Q", buffer, len(_MAGIC))
+    start = len(_MAGIC) + 8
+    header = json.loads(bytes(buffer[start : start + header_len]))
+    data_start = _align(start + header_len)
+    arrays = []
+    for desc in header["arrays"]:
+        shape = tuple(desc["shape"])
+        if 0 in shape:
+            array = np.empty(shape, dtype=desc["dtype"])
+            array.flags.writeable = False
+        else:
+            array = np.ndarray(shape, dtype=desc["dtype"], buffer=buffer, offset=data_start + desc["offset"])
+        arrays.append(array)
+    return _rebuild(header["layout"], arrays)
+
+
+def _align(n: int) -> int:
+    return -(-n // _ALIGN) * _ALIGN
+
+
+def _layout(value: Any, arrays: list) -> dict:
+    if isinstance(value, np.ndarray):
+        if value.dtype.hasobject:
+            raise TypeError("object arrays cannot be cached")
+        arrays.append(np.ascontiguousarray(value))
+        return {"array": len(arrays) - 1}
+    if isinstance(value, tuple):
+        return {"tuple": [_layout(v, arrays) for v in value]}
+    if isinstance(value, list):
+        return {"list": [_layout(v, arrays) for v in value]}
+    if isinstance(value, dict):
+        if not all(isinstance(k, str) for k in value):
+            raise TypeError("only str-keyed dicts can be cached")
+        return {"dict": {k: _layout(v, arrays) for k, v in value.items()}}
+    if isinstance(value, np.generic):
+        value = value.item()
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return {"value": value}
+    raise TypeError(f"{type(value).__name__} values cannot be cached")
+
+
+def _rebuild(layout: dict, arrays: list) -> Any:
+    (kind, content) = next(iter(layout.items()))
+    if kind == "array":
+        return arrays[content]
+    if kind == "tuple":
+        return tuple(_rebuild(v, arrays) for v in content)
+    if kind == "list":
+        return [_rebuild(v, arrays) for v in content]
+    if kind == "dict":
+        return {k: _rebuild(v, arrays) for k, v in content.items()}
+    return content
+
+
+def _unlink_quietly(path) -> None:
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+def _size_or_zero(path) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
@@ -0,0 +1,162 @@
+"""
+Byte-offset index of the ``<step>`` elements of an AllSteps XML.
+
+Views that need a single step (the detector view) used to parse the whole
+file, and ``extract_geo_paths_from_indexing_xml`` parsed it a second time
+just to read one ``<geoFile>``.  :func:`get_step_index` scans the raw
+bytes once per file version -- no XML parsing -- and records where every
+``<step>`` starts and ends, plus which step holds the first ``<xtl>``
+(the crystal header) and the first ``<geoFile>``.  :func:`read_step`
+then seeks straight to one step and parses only its bytes.
+
+The index is cached in-process and in the cross-process
+:mod:`~laue_portal.analysis.shared_cache` on (path, mtime).
+
+Zero Dash / Plotly dependencies.
+"""
+
+from __future__ import annotations
+
+import functools
+import os
+import re
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass
+
+import numpy as np
+
+from laue_portal.analysis import shared_cache
+from laue_portal.analysis.partial_xml import open_indexing_xml
+
+_BLOCK_BYTES = 16 * 1024 * 1024
+
+# Opening ``<step>`` / ``<xtl>`` / ``<geoFile>`` tags and closing ``</step>``.
+_TAG_RE = re.compile(rb"<(step|xtl|geoFile)(?=[\s/>])|</step\s*>")
+# Longest prefix of a tag that can straddle a block boundary undetected.
+_TAG_OVERLAP = 64
+
+
+@dataclass
+class StepIndex:
+    """
+    Byte ranges of the ``<step>`` elements of one XML, in document order.
+
+    Step ``i`` is ``file[starts[i]:ends[i]]``.  ``header_step`` and
+    ``geo_step`` are the first steps containing an ``<xtl>`` /
+    ``<geoFile>`` element, or ``-1`` if there is none.
+    """
+
+    starts: np.ndarray
+    ends: np.ndarray
+    header_step: int = -1
+    geo_step: int = -1
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+
+def build_step_index(xml_path: str) -> StepIndex:
+    """
+    Scan ``xml_path`` for ``<step>`` elements without parsing it.
+
+    Raises
+    ------
+    ValueError
+        If the ``<step>`` / ``</step>`` tags are unbalanced.
+    """
+    starts, ends = [], []
+    header_step = geo_step = -1
+    open_step = False
+    with open_indexing_xml(xml_path) as f:
+        offset = 0  # file offset of buf[0]
+        buf = b""
+        while True:
+            block = f.read(_BLOCK_BYTES)
+            buf += block
+            # Matches starting in the last _TAG_OVERLAP bytes are re-scanned
+            # with the next block, unless this is the end of the file.
+            limit = len(buf) if not block else max(len(buf) - _TAG_OVERLAP, 0)
+            for match in _TAG_RE.finditer(buf):
+                if match.start() >= limit:
+                    break
+                tag = match.group(1)
+                if tag == b"step":
+                    if open_step:
+                        raise ValueError(f"Nested <step> at byte {offset + match.start()} in {xml_path}")
+                    starts.append(offset + match.start())
+                    open_step = True
+                elif tag is None:
+                    if not open_step:
+                        raise ValueError(f"Unmatched </step> at byte {offset + match.start()} in {xml_path}")
+                    ends.append(offset + match.end())
+                    open_step = False
+                elif open_step:
+                    if tag == b"xtl" and header_step < 0:
+                        header_step = len(starts) - 1
+                    elif tag == b"geoFile" and geo_step < 0:
+                        geo_step = len(starts) - 1
+            if not block:
+                break
+            buf = buf[limit:]
+            offset += limit
+    if open_step:
+        raise ValueError(f"Unterminated <step> in {xml_path}")
+    return StepIndex(
+        starts=np.array(starts, dtype=np.int64),
+        ends=np.array(ends, dtype=np.int64),
+        header_step=header_step,
+        geo_step=geo_step,
+    )
+
+
+@functools.lru_cache(maxsize=8)
+def _cached_step_index(xml_path: str, mtime_ns: int) -> StepIndex:
+    """LRU-cached index; ``mtime_ns`` is purely a cache key."""
+    fields = shared_cache.get_or_compute(
+        ("step_index", os.path.abspath(xml_path), mtime_ns),
+        lambda: vars(build_step_index(xml_path)),
+    )
+    return StepIndex(**fields)
+
+
+def get_step_index(xml_path: str) -> StepIndex:
+    """Return the (cached) :class:`StepIndex` of ``xml_path``."""
+    xml_path = str(xml_path)
+    try:
+        mtime_ns = os.stat(xml_path).st_mtime_ns
+    except OSError:
+        return build_step_index(xml_path)
+    return _cached_step_index(xml_path, mtime_ns)
+
+
+def read_step(xml_path: str, step_index: int, index: StepIndex | None = None) -> ET.Element:
+    """
+    Parse only step ``step_index`` of ``xml_path``.
+
+    Parameters
+    ----------
+    xml_path : str
+        Path to the AllSteps XML file.
+    step_index : int
+        0-based step number, as in ``parse_indexing_xml``.
+    index : StepIndex, optional
+        Index to use instead of :func:`get_step_index`.
+
+    Returns
+    -------
+    xml.etree.ElementTree.Element
+        The ``<step>`` element.
+
+    Raises
+    ------
+    IndexError
+        If the file has no such step.
+    """
+    if index is None:
+        index = get_step_index(xml_path)
+    if not 0 <= step_index < len(index):
+        raise IndexError(f"Step {step_index} out of range for {xml_path} ({len(index)} steps)")
+    start = int(index.starts[step_index])
+    with open_indexing_xml(xml_path) as f:
+        f.seek(start)
+        return ET.fromstring(f.read(int(index.ends[step_index]) - start))
@@ -0,0 +1,210 @@
+"""
+Columnar query layer behind the indexed-peak and pattern tables.
+
+The tables used to ship one dict per row to the browser as AG Grid
+``rowData`` -- millions of rows for a full scan.  They now use AG Grid's
+infinite row model: the browser asks for one block of rows at a time
+(``getRowsRequest``) and :func:`query_rows` answers it from a
+:class:`pandas.DataFrame` of the table, applying the grid's filter and
+sort models on the server.
+
+Frames are cached per (XML path, mtime, table), and the filtered / sorted
+row order per (frame, filter model, sort model), so paging through a
+result only slices it.
+
+Zero Dash / Plotly dependencies.
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import os
+from typing import Any, Callable
+
+import numpy as np
+import pandas as pd
+
+from laue_portal.analysis.xml_parser import frame_records, indexed_peaks_frame, parse_indexing_xml, patterns_frame
+
+PEAK_TABLE = "peaks"
+PATTERN_TABLE = "patterns"
+
+# Cap on one block; AG Grid asks for ``cacheBlockSize`` rows at a time.
+_MAX_BLOCK_ROWS = 1000
+
+
+def table_frame(xml_path: str, table: str) -> pd.DataFrame:
+    """
+    Return the (cached) DataFrame of ``table`` for the XML at ``xml_path``.
+
+    Parameters
+    ----------
+    xml_path : str
+        Indexed AllSteps XML.
+    table : {"peaks", "patterns"}
+        :data:`PEAK_TABLE` (one row per indexed peak,
+        :func:`~laue_portal.analysis.xml_parser.indexed_peaks_frame`) or
+        :data:`PATTERN_TABLE` (one row per pattern,
+        :func:`~laue_portal.analysis.xml_parser.patterns_frame`).
+    """
+    return _cached_frame(*_frame_key(xml_path, table))
+
+
+def query_rows(xml_path: str, table: str, request: dict | None) -> dict:
+    """
+    Answer an AG Grid infinite row model ``getRowsRequest``.
+
+    Parameters
+    ----------
+    xml_path, table
+        As for :func:`table_frame`.
+    request : dict or None
+        ``{"startRow", "endRow", "sortModel", "filterModel"}`` as sent by
+        the grid.  ``None`` requests the first block, unfiltered.
+
+    Returns
+    -------
+    dict
+        ``{"rowData": [...], "rowCount": n}`` where ``n`` is the number of
+        rows matching the filter model; missing values are ``None``.
+    """
+    request = request or {}
+    # One stat for both lookups, so the row order always belongs to this frame
+    # even if the XML is replaced in between (e.g. a partial merge append).
+    key = _frame_key(xml_path, table)
+    frame = _cached_frame(*key)
+    order = _cached_order(
+        *key,
+        json.dumps(request.get("filterModel") or {}, sort_keys=True),
+        json.dumps(request.get("sortModel") or []),
+    )
+    start = max(int(request.get("startRow") or 0), 0)
+    end = int(request.get("endRow") or start + 100)
+    end = min(end, start + _MAX_BLOCK_ROWS, len(order))
+    return {"rowData": frame_records(frame.iloc[order[start:end]]), "rowCount": int(len(order))}
+
+
+def filter_mask(frame: pd.DataFrame, filter_model: dict | None) -> np.ndarray:
+    """Boolean row mask of an AG Grid ``filterModel`` (unknown columns are ignored)."""
+    mask = np.ones(len(frame), dtype=bool)
+    for column, model in (filter_model or {}).items():
+        if column in frame.columns:
+            mask &= _column_mask(frame[column], model)
+    return mask
+
+
+def sorted_positions(frame: pd.DataFrame, sort_model: list | None, positions: np.ndarray) -> np.ndarray:
+    """``positions`` ordered by an AG Grid ``sortModel`` (stable; missing values last)."""
+    sort_model = [s for s in (sort_model or []) if s.get("colId") in frame.columns]
+    if not sort_model or not len(positions):
+        return positions
+    subset = frame.iloc[positions][[s["colId"] for s in sort_model]]
+    subset = subset.reset_index(drop=True)
+    order = subset.sort_values(
+        by=[s["colId"] for s in sort_model],
+        ascending=[s.get("sort") != "desc" for s in sort_model],
+        kind="stable",
+        na_position="last",
+    ).index.to_numpy()
+    return positions[order]
+
+
+def _peak_frame(xml_path: str) -> pd.DataFrame:
+    return indexed_peaks_frame(parse_indexing_xml(xml_path))
+
+
+def _pattern_frame(xml_path: str) -> pd.DataFrame:
+    return patterns_frame(parse_indexing_xml(xml_path))
+
+
+_TABLE_BUILDERS: dict[str, Callable[[str], pd.DataFrame]] = {
+    PEAK_TABLE: _peak_frame,
+    PATTERN_TABLE: _pattern_frame,
+}
+
+
+def _frame_key(xml_path: str, table: str) -> tuple[str, int, str]:
+    """``(abspath, mtime_ns, table)`` cache key of the current version of ``xml_path``."""
+    if table not in _TABLE_BUILDERS:
+        raise ValueError(f"Unknown table {table!r}")
+    return os.path.abspath(xml_path), os.stat(xml_path).st_mtime_ns, table
+
+
+@functools.lru_cache(maxsize=4)
+def _cached_frame(xml_path: str, mtime_ns: int, table: str) -> pd.DataFrame:
+    """LRU-cached table frame; ``mtime_ns`` is purely a cache key."""
+    return _TABLE_BUILDERS[table](xml_path)
+
+
+@functools.lru_cache(maxsize=32)
+def _cached_order(xml_path: str, mtime_ns: int, table: str, filter_json: str, sort_json: str) -> np.ndarray:
+    """Row positions matching the filter, in sort order (models passed as JSON for hashing)."""
+    frame = _cached_frame(xml_path, mtime_ns, table)
+    positions = np.flatnonzero(filter_mask(frame, json.loads(filter_json)))
+    return sorted_positions(frame, json.loads(sort_json), positions)
+
+
+def _column_mask(column: pd.Series, model: dict) -> np.ndarray:
+    """Mask of one column filter, simple or combined (``conditions`` / ``condition1``)."""
+    conditions = model.get("conditions")
+    if conditions is None and "condition1" in model:
+        conditions = [model["condition1"], model.get("condition2")]
+    if conditions is not None:
+        masks = [_column_mask(column, c) for c in conditions if c]
+        if not masks:
+            return np.ones(len(column), dtype=bool)
+        combine = np.logical_or if str(model.get("operator", "AND")).upper() == "OR" else np.logical_and
+        return functools.reduce(combine, masks)
+
+    kind = model.get("type")
+    missing = column.isna().to_numpy()
+    if kind == "blank":
+        return missing
+    if kind == "notBlank":
+        return ~missing
+    if model.get("filterType") == "text":
+        return _text_mask(column, kind, model.get("filter"), missing)
+    return _number_mask(column, kind, model.get("filter"), model.get("filterTo"), missing)
+
+
+def _number_mask(column: pd.Series, kind: str, value: Any, value_to: Any, missing: np.ndarray) -> np.ndarray:
+    if value is None:
+        return np.ones(len(column), dtype=bool)
+    values = pd.to_numeric(column, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+    value = float(value)
+    with np.errstate(invalid="ignore"):
+        if kind == "equals":
+            return values == value
+        if kind == "notEqual":
+            return (values != value) | missing
+        if kind == "lessThan":
+            return values < value
+        if kind == "lessThanOrEqual":
+            return values <= value
+        if kind == "greaterThan":
+            return values > value
+        if kind == "greaterThanOrEqual":
+            return values >= value
+        if kind == "inRange" and value_to is not None:
+            lo, hi = sorted((value, float(value_to)))
+            return (values > lo) & (values < hi)
+    return np.ones(len(column), dtype=bool)
+
+
+def _text_mask(column: pd.Series, kind: str, value: Any, missing: np.ndarray) -> np.ndarray:
+    if value is None:
+        return np.ones(len(column), dtype=bool)
+    text = column.astype(str).str.lower().where(~missing, "")
+    value = str(value).lower()
+    if kind == "notContains":
+        return ~text.str.contains(value, regex=False).to_numpy() | missing
+    if kind == "equals":
+        return (text == value).to_numpy() & ~missing
+    if kind == "notEqual":
+        return (text != value).to_numpy() | missing
+    if kind == "startsWith":
+        return text.str.startswith(value).to_numpy() & ~missing
+    if kind == "endsWith":
+        return text.str.endswith(value).to_numpy() & ~missing
+    return text.str.contains(value, regex=False).to_numpy() & ~missing
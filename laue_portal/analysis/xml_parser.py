@@ -10,6 +10,12 @@ import os
 import xml.etree.ElementTree as ET
 
 import numpy as np
+import pandas as pd
+
+from laue_portal.analysis import parse_cache, shared_cache
+from laue_portal.analysis.partial_xml import open_indexing_xml
+from laue_portal.analysis.peak_store import PEAK_COLUMNS, PeakStore, PeakStoreBuilder
+from laue_portal.analysis.step_index import get_step_index, read_step
 
 # ---------------------------------------------------------------------------
 # 34ID-E wire-rotation angle (theta_wire)
@@ -44,14 +50,19 @@ import numpy as np
 #   which physical convention applies before reusing this helper.
 _THETA_WIRE_DEFAULT = np.pi / 4.0
 
+_NAN_3X3 = np.full((3, 3), np.nan)
+
 # ---------------------------------------------------------------------------
 # Caching layer
 # ---------------------------------------------------------------------------
-# NOTE: This in-process lru_cache works for single-worker deployments
-# (the current setup).  If Dash is ever run with multiple Gunicorn workers
-# or behind a multi-process load balancer, replace this with a shared cache
-# backend such as flask_caching + diskcache so that all workers share parsed
-# results instead of each maintaining an independent copy.
+# The in-process lru_cache is private to each worker process.  Behind it
+# sits a persistent HDF5 sidecar (``parse_cache``): the first parse writes
+# a ``.peaks.h5`` sidecar to the user's cache directory and later loads -- in any process -- memory-map it
+# instead of re-reading the XML, so workers share one copy of the arrays
+# through the page cache.  A miss is parsed under the per-key lock of the
+# shared cache backend (``shared_cache.key_lock``: an flock or a Redis
+# lock), so several Gunicorn workers opening the same new file wait for
+# one parse instead of each parsing it.
 # ---------------------------------------------------------------------------
 
 
@@ -115,7 +126,24 @@ def _cached_parse(xml_path: str, mtime_ns: int) -> dict:
     to the XML file invalidate stale entries.  It is not read inside
     the function body.
     """
-    return _parse_indexing_xml_impl(xml_path)
+    return _load_or_parse(xml_path)
+
+
+def _load_or_parse(xml_path: str) -> dict:
+    """Load from the on-disk sidecar cache, parsing (and writing it) on a miss."""
+    if not parse_cache.cache_enabled():
+        return _parse_indexing_xml_impl(xml_path)
+    stat = os.stat(xml_path)
+    parsed = parse_cache.read_sidecar(xml_path, stat)
+    if parsed is not None:
+        return parsed
+    with shared_cache.key_lock(("parse_indexing_xml", os.path.abspath(xml_path), stat.st_mtime_ns)):
+        # Another worker may have written the sidecar while we waited.
+        parsed = parse_cache.read_sidecar(xml_path, stat)
+        if parsed is None:
+            parsed = _parse_indexing_xml_impl(xml_path)
+            parse_cache.write_sidecar(parsed, xml_path, stat)
+    return parsed
 
 
 def parse_indexing_xml(xml_path: str) -> dict:
@@ -123,7 +151,9 @@ def parse_indexing_xml(xml_path: str) -> dict:
     Parse an AllSteps XML file into numpy arrays.
 
     Results are cached in-process by (path, mtime) so that multiple
-    Dash callbacks referencing the same file don't re-parse it.
+    Dash callbacks referencing the same file don't re-parse it, and on
+    disk in an HDF5 sidecar (see ``laue_portal.analysis.parse_cache``)
+    so that other processes and restarts can memory-map them instead.
 
     Parameters
     ----------
@@ -151,8 +181,9 @@ def parse_indexing_xml(xml_path: str) -> dict:
         lattice_params : ndarray (6,) -- a, b, c, alpha, beta, gamma
         structure_desc : str
 
-        # Raw per-step peak data stored for detail views:
-        _steps : list[dict] -- raw per-step data for get_step_peaks()
+        # Per-step peak data stored for detail views:
+        _steps : PeakStore -- columnar per-step / per-pattern peak data
+            for get_step_peaks() (see ``laue_portal.analysis.peak_store``)
     """
     xml_path = str(xml_path)
     try:
@@ -163,129 +194,279 @@ def parse_indexing_xml(xml_path: str) -> dict:
     return _cached_parse(xml_path, mtime_ns)
 
 
+def parse_indexing_step(xml_path: str, step_index: int) -> dict:
+    """
+    Parse one step of an AllSteps XML file into a one-step parsed dict.
+
+    Only that step's bytes are parsed: the step is located through the
+    byte-offset index of ``laue_portal.analysis.step_index``, built once
+    per file version.  The crystal header (space group, lattice
+    parameters, atoms) comes from the first step with an ``<xtl>``, as in
+    :func:`parse_indexing_xml`.
+
+    Parameters
+    ----------
+    xml_path : str
+        Path to the AllSteps XML file.
+    step_index : int
+        0-based step number.
+
+    Returns
+    -------
+    dict
+        Same keys as :func:`parse_indexing_xml`, holding the single step
+        at index 0 (e.g. ``get_step_peaks(result, 0)``).
+
+    Raises
+    ------
+    IndexError
+        If the file has no such step.
+    """
+    xml_path = str(xml_path)
+    index = get_step_index(xml_path)
+    accumulator = AllStepsAccumulator()
+    if index.header_step >= 0 and index.header_step != step_index:
+        xtl_el = read_step(xml_path, index.header_step, index).find("indexing/xtl")
+        if xtl_el is not None:
+            accumulator._read_xtl(xtl_el)
+    accumulator.add_step(read_step(xml_path, step_index, index))
+    return accumulator.finish(xml_path)
+
+
 def _parse_indexing_xml_impl(xml_path: str) -> dict:
-    """Uncached implementation of parse_indexing_xml."""
+    """Uncached implementation of parse_indexing_xml.
+
+    Streams the file with ``iterparse`` so that only one ``<step>`` subtree
+    is alive at a time: each finished step is reduced by an
+    :class:`AllStepsAccumulator` and then cleared.  Peak memory is bounded
+    by the largest single step rather than by the size of the whole
+    document.
+    """
     xml_path = str(xml_path)
-    tree = ET.parse(xml_path)
-    root = tree.getroot()
-
-    steps = root.findall("step")
-    n_steps = len(steps)
-
-    if n_steps == 0:
-        raise ValueError(f"No <step> elements found in {xml_path}")
-
-    # Pre-allocate arrays
-    positions = np.full((n_steps, 3), np.nan)
-    depths = np.full(n_steps, np.nan)
-    energies = np.full(n_steps, np.nan)
-    scan_nums = np.zeros(n_steps, dtype=np.int64)
-    n_patterns = np.zeros(n_steps, dtype=np.int32)
-    recip_lattices = np.full((n_steps, 3, 3), np.nan)
-    rms_errors = np.full(n_steps, np.nan)
-    goodnesses = np.full(n_steps, np.nan)
-    n_indexed = np.zeros(n_steps, dtype=np.int32)
-
-    # Crystal structure -- populated from first step that has indexing/xtl
-    space_group = 0
-    lattice_params = np.zeros(6)
-    structure_desc = ""
-    atoms = []
+    accumulator = AllStepsAccumulator()
+    with open_indexing_xml(xml_path) as f:
+        for _event, step in ET.iterparse(f, events=("end",)):
+            if step.tag != "step":
+                continue
+            accumulator.add_step(step)
+            # Drop the finished step's subtree; only an empty shell stays in the root.
+            step.clear()
+    return accumulator.finish(xml_path)
 
-    # Store raw step data for get_step_peaks()
-    step_data_list = []
 
-    for i, step in enumerate(steps):
-        # -- Sample position --
-        positions[i, 0] = _float_text(step, "Xsample")
-        positions[i, 1] = _float_text(step, "Ysample")
-        positions[i, 2] = _float_text(step, "Zsample")
-        depths[i] = _float_text(step, "depth")
+class AllStepsAccumulator:
+    """
+    Incrementally reduce ``<step>`` elements to a ``parse_indexing_xml`` dict.
 
-        # -- Energy --
-        energies[i] = _float_text(step, "energy")
+    Feed finished ``<step>`` Elements to :meth:`add_step` in document order,
+    then call :meth:`finish`.  The elements are not retained, so callers
+    that stream XML (the parser, the processing-side merge) can clear them
+    straight away.
+    """
 
-        # -- Scan number --
+    def __init__(self):
+        self._positions = []
+        self._depths = []
+        self._energies = []
+        self._scan_nums = []
+        self._n_patterns = []
+        self._recip_lattices = []
+        self._rms_errors = []
+        self._goodnesses = []
+        self._n_indexed = []
+
+        # Crystal structure -- populated from first step that has indexing/xtl
+        self._space_group = 0
+        self._lattice_params = np.zeros(6)
+        self._structure_desc = ""
+        self._atoms = []
+
+        self._store = PeakStoreBuilder()
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    def add_step(self, step) -> None:
+        """Reduce one ``<step>`` Element to scalars and columnar peak data."""
+        # -- Sample position, energy, scan number --
+        self._positions.append(
+            (_float_text(step, "Xsample"), _float_text(step, "Ysample"), _float_text(step, "Zsample"))
+        )
+        self._depths.append(_float_text(step, "depth"))
+        self._energies.append(_float_text(step, "energy"))
+        scan_num = 0
         scan_num_text = _text(step, "scanNum")
         if scan_num_text:
             try:
-                scan_nums[i] = int(scan_num_text)
+                scan_num = int(scan_num_text)
             except ValueError:
                 pass
+        self._scan_nums.append(scan_num)
+
+        # -- Detector / measured peaks --
+        detector_el = step.find("detector")
+        peaks_el = detector_el.find("peaksXY") if detector_el is not None else None
+        roi_el = detector_el.find("ROI") if detector_el is not None else None
 
         # -- Indexing results --
         indexing_el = step.find("indexing")
-        step_peaks = {
-            "indexing_el": None,
-            "detector_el": step.find("detector"),
-        }
-
+        patterns = []
+        n_patterns = 0
         if indexing_el is not None:
-            step_peaks["indexing_el"] = indexing_el
-
-            n_pat = int(indexing_el.get("Npatterns", "0"))
-            n_patterns[i] = n_pat
-
-            # Use best (first) pattern
-            patterns = indexing_el.findall("pattern")
-            if patterns:
-                best = patterns[0]
-                rms_errors[i] = float(best.get("rms_error", "nan"))
-                goodnesses[i] = float(best.get("goodness", "nan"))
-                n_indexed[i] = int(best.get("Nindexed", "0"))
-
-                # Reciprocal lattice
-                recip_el = best.find("recip_lattice")
-                if recip_el is not None:
-                    astar = _float_array(recip_el, "astar")
-                    bstar = _float_array(recip_el, "bstar")
-                    cstar = _float_array(recip_el, "cstar")
-                    if astar is not None and bstar is not None and cstar is not None:
-                        recip_lattices[i] = np.array([astar, bstar, cstar])
+            n_patterns = int(indexing_el.get("Npatterns", "0"))
+            patterns = [_pattern_record(pat_el) for pat_el in indexing_el.findall("pattern")]
 
             # Crystal structure (grab once)
-            if space_group == 0:
+            if self._space_group == 0:
                 xtl_el = indexing_el.find("xtl")
                 if xtl_el is not None:
-                    sg_text = _text(xtl_el, "SpaceGroup")
-                    if sg_text:
-                        try:
-                            space_group = int(sg_text)
-                        except ValueError:
-                            pass
-                    lp_text = _text(xtl_el, "latticeParameters")
-                    if lp_text:
-                        lattice_params = np.fromstring(lp_text.strip(), sep=" ")
-                    desc_text = _text(xtl_el, "structureDesc")
-                    if desc_text:
-                        structure_desc = desc_text.strip()
-                    atoms = _parse_xtl_atoms(xtl_el)
-
-        step_data_list.append(step_peaks)
-
-    # Derived wire-frame coordinates (H, F) computed from (Y, Z).
-    # H and F are NOT in the XML -- they are rotated sample-frame axes
-    # (see ``yz_to_hf``).  Computed once here so plot/coloring code can
-    # treat them on equal footing with X/Y/Z.
-    pos_hf = positions_hf(positions)
+                    self._read_xtl(xtl_el)
+
+        # Use best (first) pattern for the step-level arrays
+        self._n_patterns.append(n_patterns)
+        if patterns:
+            best = patterns[0]
+            self._rms_errors.append(best["rms_error"])
+            self._goodnesses.append(best["goodness"])
+            self._n_indexed.append(0 if np.isnan(best["n_indexed"]) else int(best["n_indexed"]))
+            self._recip_lattices.append(best["recip_lattice"] if best["recip_lattice"] is not None else _NAN_3X3)
+        else:
+            self._rms_errors.append(np.nan)
+            self._goodnesses.append(np.nan)
+            self._n_indexed.append(0)
+            self._recip_lattices.append(_NAN_3X3)
+
+        self._store.add_step(
+            peak_attrs=dict(peaks_el.attrib) if peaks_el is not None else None,
+            peaks={tag: _float_array_from_el(peaks_el, tag) for tag in PEAK_COLUMNS} if peaks_el is not None else None,
+            input_image=_text(detector_el, "inputImage") if detector_el is not None else None,
+            detector_id=_text(detector_el, "detectorID") if detector_el is not None else None,
+            roi=dict(roi_el.attrib) if roi_el is not None else None,
+            indexing_attrs=dict(indexing_el.attrib) if indexing_el is not None else None,
+            patterns=patterns,
+        )
 
-    return {
-        "positions": positions,
-        "positions_hf": pos_hf,
-        "depths": depths,
-        "energies": energies,
-        "scan_nums": scan_nums,
-        "n_patterns": n_patterns,
-        "recip_lattices": recip_lattices,
-        "rms_errors": rms_errors,
-        "goodnesses": goodnesses,
-        "n_indexed": n_indexed,
-        "space_group": space_group,
-        "lattice_params": lattice_params,
-        "structure_desc": structure_desc,
-        "atoms": atoms,
-        "_steps": step_data_list,
+    def _read_xtl(self, xtl_el) -> None:
+        sg_text = _text(xtl_el, "SpaceGroup")
+        if sg_text:
+            try:
+                self._space_group = int(sg_text)
+            except ValueError:
+                pass
+        lp_text = _text(xtl_el, "latticeParameters")
+        if lp_text:
+            self._lattice_params = np.fromstring(lp_text.strip(), sep=" ")
+        desc_text = _text(xtl_el, "structureDesc")
+        if desc_text:
+            self._structure_desc = desc_text.strip()
+        self._atoms = _parse_xtl_atoms(xtl_el)
+
+    def finish(self, source: str = "") -> dict:
+        """Pack the accumulated steps into a ``parse_indexing_xml`` dict."""
+        n_steps = len(self)
+        if n_steps == 0:
+            raise ValueError(f"No <step> elements found in {source}")
+
+        positions = np.array(self._positions, dtype=float).reshape(n_steps, 3)
+
+        # Derived wire-frame coordinates (H, F) computed from (Y, Z).
+        # H and F are NOT in the XML -- they are rotated sample-frame axes
+        # (see ``yz_to_hf``).  Computed once here so plot/coloring code can
+        # treat them on equal footing with X/Y/Z.
+        pos_hf = positions_hf(positions)
+
+        return {
+            "positions": positions,
+            "positions_hf": pos_hf,
+            "depths": np.array(self._depths, dtype=float),
+            "energies": np.array(self._energies, dtype=float),
+            "scan_nums": np.array(self._scan_nums, dtype=np.int64),
+            "n_patterns": np.array(self._n_patterns, dtype=np.int32),
+            "recip_lattices": np.array(self._recip_lattices, dtype=float).reshape(n_steps, 3, 3),
+            "rms_errors": np.array(self._rms_errors, dtype=float),
+            "goodnesses": np.array(self._goodnesses, dtype=float),
+            "n_indexed": np.array(self._n_indexed, dtype=np.int32),
+            "space_group": self._space_group,
+            "lattice_params": self._lattice_params,
+            "structure_desc": self._structure_desc,
+            "atoms": self._atoms,
+            "_steps": self._store.build(),
+        }
+
+
+# Per-step arrays of a parsed dict (everything but the crystal header and ``_steps``).
+_STEP_FIELDS = (
+    "positions",
+    "positions_hf",
+    "depths",
+    "energies",
+    "scan_nums",
+    "n_patterns",
+    "recip_lattices",
+    "rms_errors",
+    "goodnesses",
+    "n_indexed",
+)
+
+
+def concat_parsed(parts: list[dict], step_order=None) -> dict:
+    """
+    Combine parsed dicts of consecutive XML pieces into one parsed dict.
+
+    Steps are stacked in ``parts`` order and then, if ``step_order`` (an
+    index array into the stacked steps) is given, selected and reordered
+    by it.  The crystal header comes from the first part that has one,
+    matching :class:`AllStepsAccumulator`, which reads it from the first
+    step with an ``<xtl>``.  Used to assemble the results of an
+    incremental merge without re-parsing any XML.
+    """
+    if not parts:
+        raise ValueError("No parsed parts to combine")
+    header = next((part for part in parts if part["space_group"] != 0), parts[0])
+    combined = {name: np.concatenate([part[name] for part in parts]) for name in _STEP_FIELDS}
+    store = PeakStore.concat([part["_steps"] for part in parts])
+    if step_order is not None:
+        step_order = np.asarray(step_order, dtype=np.int64)
+        combined = {name: values[step_order] for name, values in combined.items()}
+        store = store.take(step_order)
+    combined.update(
+        space_group=header["space_group"],
+        lattice_params=header["lattice_params"],
+        structure_desc=header["structure_desc"],
+        atoms=header["atoms"],
+        _steps=store,
+    )
+    return combined
+
+
+def _pattern_record(pat_el) -> dict:
+    """Reduce one ``<pattern>`` element to the plain values kept by the peak store."""
+    record = {
+        "num": _float_attr(pat_el, "num"),
+        "rms_error": _float_attr(pat_el, "rms_error"),
+        "goodness": _float_attr(pat_el, "goodness"),
+        "n_indexed": _float_attr(pat_el, "Nindexed"),
+        "recip_lattice": None,
+        "hkl": None,
+        "peak_indices": None,
     }
+    recip_el = pat_el.find("recip_lattice")
+    if recip_el is not None:
+        astar = _float_array(recip_el, "astar")
+        bstar = _float_array(recip_el, "bstar")
+        cstar = _float_array(recip_el, "cstar")
+        if all(v is not None and v.size == 3 for v in (astar, bstar, cstar)):
+            record["recip_lattice"] = np.array([astar, bstar, cstar])
+    hkl_el = pat_el.find("hkl_s")
+    if hkl_el is not None:
+        h = _int_array(hkl_el, "h")
+        k = _int_array(hkl_el, "k")
+        l = _int_array(hkl_el, "l")
+        if h is not None and k is not None and l is not None:
+            n = min(len(h), len(k), len(l))
+            record["hkl"] = np.column_stack([h[:n], k[:n], l[:n]])
+        record["peak_indices"] = _int_array(hkl_el, "PkIndex")
+    return record
 
 
 def get_step_peaks(parsed: dict, step_index: int) -> dict | None:
@@ -315,35 +496,21 @@ def get_step_peaks(parsed: dict, step_index: int) -> dict | None:
                 hkl : ndarray (K, 3) -- h, k, l
                 peak_indices : ndarray (K,) -- PkIndex mapping
     """
-    steps = parsed["_steps"]
-    if step_index < 0 or step_index >= len(steps):
+    store = parsed["_steps"]
+    if step_index < 0 or step_index >= len(store):
         return None
-
-    step_info = steps[step_index]
-    detector_el = step_info["detector_el"]
-    indexing_el = step_info["indexing_el"]
-
-    if detector_el is None:
+    if not store.has_peaks[step_index]:
         return None
 
-    peaks_el = detector_el.find("peaksXY")
-    if peaks_el is None:
-        return None
+    def column(tag):
+        values = store.peak_column(tag, step_index)
+        return None if values is None else values.copy()
 
-    # Parse peak positions and Q-vectors
-    xpixel = _float_array_from_el(peaks_el, "Xpixel")
-    ypixel = _float_array_from_el(peaks_el, "Ypixel")
-    qx = _float_array_from_el(peaks_el, "Qx")
-    qy = _float_array_from_el(peaks_el, "Qy")
-    qz = _float_array_from_el(peaks_el, "Qz")
-    intens = _float_array_from_el(peaks_el, "Intens")
-    integral = _float_array_from_el(peaks_el, "Integral")
-    hwhm_x = _float_array_from_el(peaks_el, "hwhmX")
-    hwhm_y = _float_array_from_el(peaks_el, "hwhmY")
-    tilt = _float_array_from_el(peaks_el, "tilt")
-    chisq = _float_array_from_el(peaks_el, "chisq")
-
-    n_peaks = int(peaks_el.get("Npeaks", "0"))
+    xpixel = column("Xpixel")
+    ypixel = column("Ypixel")
+    qx = column("Qx")
+    qy = column("Qy")
+    qz = column("Qz")
 
     pixel_positions = None
     if xpixel is not None and ypixel is not None:
@@ -353,53 +520,35 @@ def get_step_peaks(parsed: dict, step_index: int) -> dict | None:
     if qx is not None and qy is not None and qz is not None:
         q_vectors = np.column_stack([qx, qy, qz])
 
-    # Parse per-pattern indexing info
+    # Per-pattern indexing info
     patterns = []
-    if indexing_el is not None:
-        for pat_el in indexing_el.findall("pattern"):
-            pat_info = {
-                "pattern_num": int(pat_el.get("num", "0")),
-                "rms_error": float(pat_el.get("rms_error", "nan")),
-                "goodness": float(pat_el.get("goodness", "nan")),
-                "n_indexed": int(pat_el.get("Nindexed", "0")),
-                "hkl": None,
-                "peak_indices": None,
+    for p in store.pattern_rows(step_index):
+        hkl = store.hkl.get(p)
+        pk_idx = store.peak_index.get(p)
+        patterns.append(
+            {
+                "pattern_num": _int_or_default(store.pattern_num[p]),
+                "rms_error": float(store.rms_error[p]),
+                "goodness": float(store.goodness[p]),
+                "n_indexed": _int_or_default(store.n_indexed[p]),
+                "hkl": None if hkl is None else hkl.copy(),
+                "peak_indices": None if pk_idx is None else pk_idx.copy(),
+                "recip_lattice": store.recip_lattice[p].copy() if store.has_recip[p] else None,
             }
-            hkl_el = pat_el.find("hkl_s")
-            if hkl_el is not None:
-                h = _int_array(hkl_el, "h")
-                k = _int_array(hkl_el, "k")
-                l = _int_array(hkl_el, "l")
-                pk_idx = _int_array(hkl_el, "PkIndex")
-                if h is not None and k is not None and l is not None:
-                    pat_info["hkl"] = np.column_stack([h, k, l])
-                if pk_idx is not None:
-                    pat_info["peak_indices"] = pk_idx
-            recip_el = pat_el.find("recip_lattice")
-            if recip_el is not None:
-                astar = _float_array(recip_el, "astar")
-                bstar = _float_array(recip_el, "bstar")
-                cstar = _float_array(recip_el, "cstar")
-                if astar is not None and bstar is not None and cstar is not None:
-                    pat_info["recip_lattice"] = np.array([astar, bstar, cstar])
-                else:
-                    pat_info["recip_lattice"] = None
-            else:
-                pat_info["recip_lattice"] = None
-            patterns.append(pat_info)
+        )
 
     return {
         "pixel_positions": pixel_positions,
         "q_vectors": q_vectors,
-        "intensities": intens,
-        "integrals": integral,
-        "hwhm_x": hwhm_x,
-        "hwhm_y": hwhm_y,
-        "tilt": tilt,
-        "chisq": chisq,
-        "n_peaks": n_peaks,
-        "peak_attrs": dict(peaks_el.attrib),
-        "input_image": _text(detector_el, "inputImage"),
+        "intensities": column("Intens"),
+        "integrals": column("Integral"),
+        "hwhm_x": column("hwhmX"),
+        "hwhm_y": column("hwhmY"),
+        "tilt": column("tilt"),
+        "chisq": column("chisq"),
+        "n_peaks": int(store.n_peaks[step_index]),
+        "peak_attrs": store.peak_attrs.get(step_index),
+        "input_image": store.input_image.get(step_index),
         "patterns": patterns,
     }
 
@@ -409,109 +558,18 @@ def get_all_patterns(parsed: dict) -> list[dict]:
     Build a flat list of indexed pattern/grain solutions across all steps.
 
     Useful for a pattern-level table where each row summarizes one indexed
-    solution rather than one indexed peak.
+    solution rather than one indexed peak.  The row dicts of
+    :func:`patterns_frame`; prefer the frame for whole-scan work.
     """
-    rows = []
-    n_steps = len(parsed["_steps"])
-    pos_hf = parsed.get("positions_hf")
-
-    for si in range(n_steps):
-        step_info = parsed["_steps"][si]
-        indexing_el = step_info.get("indexing_el")
-        if indexing_el is None:
-            continue
-
-        patterns = indexing_el.findall("pattern")
-        if not patterns:
-            continue
-
-        scan_num = int(parsed["scan_nums"][si])
-        n_patterns = _safe_int(indexing_el.get("Npatterns"))
-        n_peaks = _safe_int(indexing_el.get("Npeaks"))
-        parent_n_indexed = _safe_int(indexing_el.get("Nindexed"))
-        energy = _safe_float(parsed["energies"][si])
-        depth = _safe_float(parsed["depths"][si])
-        x_pos = _safe_float(parsed["positions"][si, 0])
-        y_pos = _safe_float(parsed["positions"][si, 1])
-        z_pos = _safe_float(parsed["positions"][si, 2])
-        h_pos = _safe_float(pos_hf[si, 0]) if pos_hf is not None else None
-        f_pos = _safe_float(pos_hf[si, 1]) if pos_hf is not None else None
-
-        detector_el = step_info.get("detector_el")
-        input_image = _text(detector_el, "inputImage") if detector_el is not None else None
-
-        for rank, pat_el in enumerate(patterns):
-            pat_n_indexed = _safe_int(pat_el.get("Nindexed"))
-            indexed_fraction = None
-            if pat_n_indexed is not None and n_peaks not in (None, 0):
-                indexed_fraction = pat_n_indexed / n_peaks
-
-            row = {
-                "step_index": si,
-                "step_scan_num": scan_num,
-                "pattern_num": _safe_int(pat_el.get("num")),
-                "rank": rank,
-                "n_indexed": pat_n_indexed,
-                "n_peaks": n_peaks,
-                "indexed_fraction": indexed_fraction,
-                "rms_error": _safe_float(pat_el.get("rms_error")),
-                "goodness": _safe_float(pat_el.get("goodness")),
-                "n_patterns": n_patterns,
-                "parent_n_indexed": parent_n_indexed,
-                "x_sample": x_pos,
-                "y_sample": y_pos,
-                "z_sample": z_pos,
-                "h_sample": h_pos,
-                "f_sample": f_pos,
-                "depth": depth,
-                "energy": energy,
-                "structure": parsed.get("structure_desc") or None,
-                "space_group": parsed.get("space_group") or None,
-                "index_program": indexing_el.get("indexProgram"),
-                "kev_max_calc": _safe_float(indexing_el.get("keVmaxCalc")),
-                "kev_max_test": _safe_float(indexing_el.get("keVmaxTest")),
-                "angle_tolerance": _safe_float(indexing_el.get("angleTolerance")),
-                "cone": _safe_float(indexing_el.get("cone")),
-                "hkl_prefer": indexing_el.get("hklPrefer"),
-                "execution_time": _safe_float(indexing_el.get("executionTime")),
-                "input_image": input_image,
-            }
-
-            recip_el = pat_el.find("recip_lattice")
-            if recip_el is not None:
-                row["astar"] = _format_vector(_float_array(recip_el, "astar"))
-                row["bstar"] = _format_vector(_float_array(recip_el, "bstar"))
-                row["cstar"] = _format_vector(_float_array(recip_el, "cstar"))
-            else:
-                row["astar"] = None
-                row["bstar"] = None
-                row["cstar"] = None
-
-            hkl_el = pat_el.find("hkl_s")
-            if hkl_el is not None:
-                pk_idx = _int_array(hkl_el, "PkIndex")
-                h = _int_array(hkl_el, "h")
-                k = _int_array(hkl_el, "k")
-                l = _int_array(hkl_el, "l")
-                row["indexed_peak_ids"] = " ".join(str(int(v)) for v in pk_idx) if pk_idx is not None else None
-                if h is not None and k is not None and l is not None:
-                    row["hkl_count"] = int(min(len(h), len(k), len(l)))
-                else:
-                    row["hkl_count"] = None
-            else:
-                row["indexed_peak_ids"] = None
-                row["hkl_count"] = None
-
-            rows.append(row)
-
-    return rows
+    return frame_records(patterns_frame(parsed))
 
 
 def get_all_indexed_peaks(parsed: dict) -> list[dict]:
     """
     Build a flat list of all indexed peaks across all steps and patterns.
 
-    Useful for populating the indexed peak table (AG Grid).
+    The row dicts of :func:`indexed_peaks_frame`; prefer the frame for
+    whole-scan work.
 
     Returns
     -------
@@ -520,99 +578,236 @@ def get_all_indexed_peaks(parsed: dict) -> list[dict]:
         h, k, l, peak_index, x_pixel, y_pixel, intensity, integral,
         qx, qy, qz, rms_error, goodness
     """
-    rows = []
-    n_steps = len(parsed["_steps"])
+    return frame_records(indexed_peaks_frame(parsed))
 
-    for si in range(n_steps):
-        step_peaks = get_step_peaks(parsed, si)
-        if step_peaks is None:
-            continue
 
-        scan_num = int(parsed["scan_nums"][si])
-        n_peaks = step_peaks["n_peaks"]
-        peak_attrs = step_peaks.get("peak_attrs", {})
-        energy = _safe_float(parsed["energies"][si])
+def frame_records(frame: pd.DataFrame) -> list[dict]:
+    """``frame`` as JSON-ready row dicts (Python scalars, ``None`` for missing)."""
+    values = frame.astype(object)
+    return values.where(frame.notna(), None).to_dict("records")
+
+
+def patterns_frame(parsed: dict) -> pd.DataFrame:
+    """
+    One row per indexed pattern across all steps, built column-wise.
+
+    Patterns are gathered straight from the :class:`PeakStore` arrays;
+    steps without an ``<indexing>`` element contribute no rows.  Integer
+    columns that can be missing are ``Int64``, missing floats are NaN and
+    missing strings ``None``.  Column order and values match the rows of
+    :func:`get_all_patterns`.
+    """
+    store = parsed["_steps"]
+    pattern_step = _pattern_steps(store)
+    patterns = np.flatnonzero(store.indexing_attrs.present[pattern_step])
+    step = pattern_step[patterns]
+    n = len(patterns)
+    attrs = store.indexing_attrs
+
+    n_indexed = np.trunc(store.n_indexed[patterns])
+    n_peaks = _attribute_ints(attrs, "Npeaks", step)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        indexed_fraction = n_indexed / n_peaks.to_numpy(dtype=float, na_value=np.nan)
+    indexed_fraction[n_peaks.to_numpy(dtype=float, na_value=0.0) == 0] = np.nan
+
+    pos_hf = parsed.get("positions_hf")
+    hf = pos_hf[step] if pos_hf is not None else np.full((n, 2), np.nan)
+    positions = parsed["positions"][step]
+    recip = _recip_strings(store, patterns)
+
+    pk = store.peak_index
+    pk_strings = pk.values.astype(str).tolist()
+    starts, ends = pk.offsets[patterns].tolist(), pk.offsets[patterns + 1].tolist()
+    indexed_peak_ids = np.array(
+        [
+            " ".join(pk_strings[a:b]) if present else None
+            for a, b, present in zip(starts, ends, pk.present[patterns].tolist(), strict=True)
+        ],
+        dtype=object,
+    )
+
+    columns = {
+        "step_index": step,
+        "step_scan_num": parsed["scan_nums"][step].astype(np.int64),
+        "pattern_num": _nullable_ints(store.pattern_num[patterns]),
+        "rank": patterns - store.pattern_offsets[step],
+        "n_indexed": _nullable_ints(n_indexed),
+        "n_peaks": n_peaks,
+        "indexed_fraction": indexed_fraction,
+        "rms_error": store.rms_error[patterns],
+        "goodness": store.goodness[patterns],
+        "n_patterns": _attribute_ints(attrs, "Npatterns", step),
+        "parent_n_indexed": _attribute_ints(attrs, "Nindexed", step),
+        "x_sample": positions[:, 0],
+        "y_sample": positions[:, 1],
+        "z_sample": positions[:, 2],
+        "h_sample": hf[:, 0],
+        "f_sample": hf[:, 1],
+        "depth": parsed["depths"][step],
+        "energy": parsed["energies"][step],
+        "structure": np.full(n, parsed.get("structure_desc") or None, dtype=object),
+        "space_group": _nullable_ints(np.full(n, parsed.get("space_group") or np.nan, dtype=float)),
+        "index_program": _attribute_strings(attrs.column("indexProgram"), step),
+        "kev_max_calc": _attribute_floats(attrs, "keVmaxCalc", step),
+        "kev_max_test": _attribute_floats(attrs, "keVmaxTest", step),
+        "angle_tolerance": _attribute_floats(attrs, "angleTolerance", step),
+        "cone": _attribute_floats(attrs, "cone", step),
+        "hkl_prefer": _attribute_strings(attrs.column("hklPrefer"), step),
+        "execution_time": _attribute_floats(attrs, "executionTime", step),
+        "input_image": _attribute_strings(store.input_image, step),
+        "astar": recip[0],
+        "bstar": recip[1],
+        "cstar": recip[2],
+        "indexed_peak_ids": indexed_peak_ids,
+        "hkl_count": _nullable_ints(np.where(store.hkl.present[patterns], store.hkl.lengths[patterns], np.nan)),
+    }
+    return pd.DataFrame(columns)
+
+
+def indexed_peaks_frame(parsed: dict) -> pd.DataFrame:
+    """
+    One row per indexed peak across all steps and patterns, built column-wise.
+
+    Each pattern with both ``hkl`` and ``PkIndex`` arrays, on a step with
+    ``<peaksXY>``, contributes one row per ``PkIndex`` entry.  Peak values
+    are gathered from the ragged ``<peaksXY>`` columns with one fancy
+    index per column; a peak index past the end of a column (or a missing
+    column) gives NaN / ``None``.  Column order and values match the rows
+    of :func:`get_all_indexed_peaks`.
+    """
+    store = parsed["_steps"]
+    pattern_step = _pattern_steps(store)
+    usable = store.has_peaks[pattern_step] & store.hkl.present & store.peak_index.present
+    patterns = np.flatnonzero(usable)
+    counts = store.peak_index.lengths[patterns]
+    pattern = np.repeat(patterns, counts)
+    # Position of every row within its pattern's PkIndex list.
+    within = np.arange(len(pattern), dtype=np.int64) - np.repeat(np.cumsum(counts) - counts, counts)
+    step = pattern_step[pattern]
+    peak_index = store.peak_index.values[store.peak_index.offsets[pattern] + within]
+    hkl = store.hkl.values[store.hkl.offsets[pattern] + within].reshape(-1, 3)
+
+    x_pixel, y_pixel = _gather_peaks(store, ("Xpixel", "Ypixel"), step, peak_index)
+    qx, qy, qz = _gather_peaks(store, ("Qx", "Qy", "Qz"), step, peak_index)
+    (intensity,) = _gather_peaks(store, ("Intens",), step, peak_index)
+    (integral,) = _gather_peaks(store, ("Integral",), step, peak_index)
+    (hwhm_x,) = _gather_peaks(store, ("hwhmX",), step, peak_index)
+    (hwhm_y,) = _gather_peaks(store, ("hwhmY",), step, peak_index)
+    (tilt,) = _gather_peaks(store, ("tilt",), step, peak_index)
+    (chisq,) = _gather_peaks(store, ("chisq",), step, peak_index)
+
+    n_peaks = store.n_peaks[step]
+    pattern_n_indexed = np.nan_to_num(store.n_indexed[pattern], nan=0.0).astype(np.int64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        aspect_ratio = np.where(hwhm_y != 0, hwhm_x / hwhm_y, np.nan)
+        indexed_fraction = np.where(n_peaks != 0, pattern_n_indexed / n_peaks, np.nan)
+    attrs = store.peak_attrs
+
+    columns = {
+        "step_index": step,
+        "step_scan_num": parsed["scan_nums"][step].astype(np.int64),
+        "pattern_num": np.nan_to_num(store.pattern_num[pattern], nan=0.0).astype(np.int64),
+        "h": hkl[:, 0],
+        "k": hkl[:, 1],
+        "l": hkl[:, 2],
+        "peak_index": peak_index,
+        "rms_error": store.rms_error[pattern],
+        "goodness": store.goodness[pattern],
+        "x_pixel": x_pixel,
+        "y_pixel": y_pixel,
+        "intensity": intensity,
+        "integral": integral,
+        "qx": qx,
+        "qy": qy,
+        "qz": qz,
+        "q_magnitude": np.sqrt(qx**2 + qy**2 + qz**2),
+        "hwhm_x": hwhm_x,
+        "hwhm_y": hwhm_y,
+        "tilt": tilt,
+        "chisq": chisq,
+        "aspect_ratio": aspect_ratio,
+        "n_peaks": n_peaks,
+        "energy": parsed["energies"][step],
+        "input_image": _attribute_strings(store.input_image, step),
+        "peak_shape": _attribute_strings(attrs.column("peakShape"), step),
+        "boxsize": _attribute_floats(attrs, "boxsize", step),
+        "min_width": _attribute_floats(attrs, "minwidth", step),
+        "max_width": _attribute_floats(attrs, "maxwidth", step),
+        "min_separation": _attribute_floats(attrs, "min_separation", step),
+        "pattern_n_indexed": pattern_n_indexed,
+        "pattern_indexed_fraction": indexed_fraction,
+    }
+    return pd.DataFrame(columns)
 
-        for pat in step_peaks["patterns"]:
-            if pat["hkl"] is None or pat["peak_indices"] is None:
-                continue
 
-            hkl = pat["hkl"]
-            pk_indices = pat["peak_indices"]
-            n_idx = len(pk_indices)
-
-            for j in range(n_idx):
-                pk_i = int(pk_indices[j])
-                row = {
-                    "step_index": si,
-                    "step_scan_num": scan_num,
-                    "pattern_num": pat["pattern_num"],
-                    "h": int(hkl[j, 0]),
-                    "k": int(hkl[j, 1]),
-                    "l": int(hkl[j, 2]),
-                    "peak_index": pk_i,
-                    "rms_error": pat["rms_error"],
-                    "goodness": pat["goodness"],
-                }
-
-                # Add pixel position and Q-vector if available
-                if step_peaks["pixel_positions"] is not None and pk_i < len(step_peaks["pixel_positions"]):
-                    row["x_pixel"] = float(step_peaks["pixel_positions"][pk_i, 0])
-                    row["y_pixel"] = float(step_peaks["pixel_positions"][pk_i, 1])
-                else:
-                    row["x_pixel"] = None
-                    row["y_pixel"] = None
-
-                if step_peaks["intensities"] is not None and pk_i < len(step_peaks["intensities"]):
-                    row["intensity"] = float(step_peaks["intensities"][pk_i])
-                else:
-                    row["intensity"] = None
-
-                if step_peaks["integrals"] is not None and pk_i < len(step_peaks["integrals"]):
-                    row["integral"] = float(step_peaks["integrals"][pk_i])
-                else:
-                    row["integral"] = None
-
-                if step_peaks["q_vectors"] is not None and pk_i < len(step_peaks["q_vectors"]):
-                    qx_val = float(step_peaks["q_vectors"][pk_i, 0])
-                    qy_val = float(step_peaks["q_vectors"][pk_i, 1])
-                    qz_val = float(step_peaks["q_vectors"][pk_i, 2])
-                    row["qx"] = qx_val
-                    row["qy"] = qy_val
-                    row["qz"] = qz_val
-                    row["q_magnitude"] = float(np.sqrt(qx_val**2 + qy_val**2 + qz_val**2))
-                else:
-                    row["qx"] = None
-                    row["qy"] = None
-                    row["qz"] = None
-                    row["q_magnitude"] = None
-
-                row["hwhm_x"] = _array_value(step_peaks.get("hwhm_x"), pk_i)
-                row["hwhm_y"] = _array_value(step_peaks.get("hwhm_y"), pk_i)
-                row["tilt"] = _array_value(step_peaks.get("tilt"), pk_i)
-                row["chisq"] = _array_value(step_peaks.get("chisq"), pk_i)
-                if row["hwhm_x"] is not None and row["hwhm_y"] not in (None, 0):
-                    row["aspect_ratio"] = row["hwhm_x"] / row["hwhm_y"]
-                else:
-                    row["aspect_ratio"] = None
-
-                row["n_peaks"] = n_peaks
-                row["energy"] = energy
-                row["input_image"] = step_peaks.get("input_image")
-                row["peak_shape"] = peak_attrs.get("peakShape")
-                row["boxsize"] = _safe_float(peak_attrs.get("boxsize"))
-                row["min_width"] = _safe_float(peak_attrs.get("minwidth"))
-                row["max_width"] = _safe_float(peak_attrs.get("maxwidth"))
-                row["min_separation"] = _safe_float(peak_attrs.get("min_separation"))
-                row["pattern_n_indexed"] = pat["n_indexed"]
-                if n_peaks:
-                    row["pattern_indexed_fraction"] = pat["n_indexed"] / n_peaks
-                else:
-                    row["pattern_indexed_fraction"] = None
-
-                rows.append(row)
-
-    return rows
+def _pattern_steps(store: PeakStore) -> np.ndarray:
+    """Step index of every pattern row."""
+    return np.repeat(np.arange(len(store), dtype=np.int64), np.diff(store.pattern_offsets))
+
+
+def _gather_peaks(store: PeakStore, tags: tuple, step: np.ndarray, peak_index: np.ndarray) -> list[np.ndarray]:
+    """
+    Gather ``<peaksXY>`` values at (``step``, ``peak_index``) for ``tags``.
+
+    The tags are read together, as one multi-column array would be: a
+    value is NaN unless every tag is present on the step and the index is
+    in range of the shortest of them (negative indices count from the end).
+    """
+    columns = [store.peaks.get(tag) for tag in tags]
+    if any(column is None for column in columns):
+        return [np.full(len(step), np.nan) for _ in tags]
+    length = np.min([column.lengths[step] for column in columns], axis=0) if len(step) else np.zeros(0, np.int64)
+    valid = np.logical_and.reduce([column.present[step] for column in columns])
+    valid &= (peak_index < length) & (peak_index >= -length)
+    local = np.where(peak_index < 0, peak_index + length, peak_index)[valid]
+    out = []
+    for column in columns:
+        values = np.full(len(step), np.nan)
+        values[valid] = column.values[column.offsets[step[valid]] + local]
+        out.append(values)
+    return out
+
+
+def _attribute_strings(column, rows: np.ndarray) -> np.ndarray:
+    """Object array of a :class:`StringColumn` at ``rows`` (``None`` where missing)."""
+    # Code -1 (None) indexes the trailing None.
+    lookup = np.array([str(value) for value in column.categories] + [None], dtype=object)
+    return lookup[column.codes[rows]]
+
+
+def _attribute_floats(table, key: str, rows: np.ndarray) -> np.ndarray:
+    """Attribute ``key`` parsed as floats at ``rows`` (NaN where missing or unparsable)."""
+    column = table.column(key)
+    parsed = [_safe_float(value) for value in column.categories] + [None]
+    lookup = np.array([np.nan if value is None else value for value in parsed], dtype=float)
+    return lookup[column.codes[rows]]
+
+
+def _attribute_ints(table, key: str, rows: np.ndarray) -> pd.arrays.IntegerArray:
+    """Attribute ``key`` parsed as nullable ints at ``rows``."""
+    column = table.column(key)
+    parsed = [_safe_int(value) for value in column.categories] + [None]
+    lookup = np.array([0 if value is None else value for value in parsed], dtype=np.int64)
+    missing = np.array([value is None for value in parsed], dtype=bool)
+    codes = column.codes[rows]
+    return pd.arrays.IntegerArray(lookup[codes], missing[codes])
+
+
+def _nullable_ints(values: np.ndarray) -> pd.arrays.IntegerArray:
+    """NaN-for-missing floats as nullable ints (truncated, as ``int()`` does)."""
+    missing = np.isnan(values)
+    return pd.arrays.IntegerArray(np.where(missing, 0, values).astype(np.int64), missing)
+
+
+def _recip_strings(store: PeakStore, patterns: np.ndarray) -> list[np.ndarray]:
+    """Formatted a*, b*, c* of ``patterns`` (``None`` without a reciprocal lattice)."""
+    out = [np.full(len(patterns), None, dtype=object) for _ in range(3)]
+    with_recip = patterns[store.has_recip[patterns]]
+    rows = np.flatnonzero(store.has_recip[patterns])
+    for axis in range(3):
+        # "%.4g" gives the same text as the former per-row f"{v:.4g}" formatting.
+        out[axis][rows] = ["(%.4g, %.4g, %.4g)" % tuple(v) for v in store.recip_lattice[with_recip, axis].tolist()]
+    return out
 
 
 # ---------------------------------------------------------------------------
@@ -639,6 +834,14 @@ def _float_text(parent, tag: str) -> float:
         return np.nan
 
 
+def _float_attr(el, name: str) -> float:
+    """Get a float attribute; returns NaN when absent or malformed."""
+    try:
+        return float(el.get(name, "nan"))
+    except ValueError:
+        return np.nan
+
+
 def _float_array(parent, tag: str) -> np.ndarray | None:
     """Parse space-separated floats from a child element."""
     text = _text(parent, tag)
@@ -650,13 +853,6 @@ def _float_array(parent, tag: str) -> np.ndarray | None:
         return None
 
 
-def _array_value(values, index: int) -> float | None:
-    """Return one optional numeric value from a parsed XML array."""
-    if values is None or index >= len(values):
-        return None
-    return _safe_float(values[index])
-
-
 def _parse_xtl_atoms(xtl_el) -> list[dict]:
     """Parse fractional atom positions from an ``<xtl>`` block."""
     atoms = []
@@ -698,6 +894,13 @@ def _safe_float(value) -> float | None:
     return parsed
 
 
+def _int_or_default(value: float, default: int = 0) -> int:
+    """Convert a NaN-for-missing float column value to int with a default."""
+    if np.isnan(value):
+        return default
+    return int(value)
+
+
 def _safe_int(value) -> int | None:
     """Parse optional ints from XML attributes."""
     try:
@@ -706,13 +909,6 @@ def _safe_int(value) -> int | None:
         return None
 
 
-def _format_vector(values: np.ndarray | None) -> str | None:
-    """Format a 3-vector compactly for table display."""
-    if values is None or len(values) == 0:
-        return None
-    return "(" + ", ".join(f"{float(v):.4g}" for v in values) + ")"
-
-
 def _float_array_from_el(parent, tag: str) -> np.ndarray | None:
     """Parse space-separated floats from a child element (handles long lines)."""
     el = parent.find(tag)
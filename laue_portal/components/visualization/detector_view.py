@@ -21,17 +21,27 @@ Visual conventions mirror Igor Pro's ``DisplayResultOfIndexing`` and
 
 The figure is plotted in detector-pixel coordinates (Y axis inverted so
 pixel (0, 0) is at the top-left, matching detector image convention).
+
+The optional detector image is drawn as a PNG-encoded ``go.Image`` of the
+pyramid level that matches the current zoom (see
+:meth:`~laue_portal.analysis.detector_image.DetectorImage.view`) instead of
+a full-resolution ``go.Heatmap``; :func:`detector_image_trace` rebuilds just
+that trace when the viewport changes.
 """
 
 from __future__ import annotations
 
-from typing import List, Optional
+import base64
+import io
+from typing import List, Optional, Tuple, Union
 
 import numpy as np
 import plotly.graph_objects as go
-from plotly.colors import sample_colorscale
+from PIL import Image
+from plotly.colors import get_colorscale, sample_colorscale, unlabel_rgb
 
 from laue_portal.analysis.back_projection import StepOverlay
+from laue_portal.analysis.detector_image import DetectorImage
 
 # Colours chosen to match Igor Pro's ``DisplayResultOfIndexing`` defaults
 # (RGB / 65535 in Igor; we use CSS rgb() so they read well in Plotly).
@@ -87,12 +97,14 @@ def make_detector_view(
     marker_size: int = 10,
     label_size: int = 10,
     selected_patterns: Optional[List[int]] = None,
-    detector_image: Optional[np.ndarray] = None,
+    detector_image: Union[DetectorImage, np.ndarray, None] = None,
     image_visible: bool = True,
     image_colorscale: str = "gray",
     image_vmin: Optional[float] = None,
     image_vmax: Optional[float] = None,
     image_opacity: float = 0.8,
+    image_x_range: Optional[Tuple[float, float]] = None,
+    image_y_range: Optional[Tuple[float, float]] = None,
 ) -> go.Figure:
     """
     Render the detector-pixel overlay for one step.
@@ -118,10 +130,14 @@ def make_detector_view(
     selected_patterns : list[int] | None
         If supplied, only patterns whose ``pattern_num`` is in this list
         are drawn.  ``None`` shows everything (Igor's default).
-    detector_image : ndarray | None
-        Optional 2-D detector intensity image shown under the peak overlays.
+    detector_image : DetectorImage | ndarray | None
+        Optional detector intensity image shown under the peak overlays.
+        It is always the first trace of the figure when drawn.
     image_visible, image_colorscale, image_vmin, image_vmax, image_opacity
         Display controls for the optional detector image.
+    image_x_range, image_y_range : (float, float) | None
+        Current viewport in pixels; selects the pyramid level and crop
+        (``None``: the whole chip).
 
     Returns
     -------
@@ -168,21 +184,38 @@ def make_detector_view(
             y_max = (overlay.roi.endy - overlay.roi.starty) / overlay.roi.groupy
 
     if detector_image is not None and image_visible:
-        img = np.asarray(detector_image, dtype=float)
-        image_zmin = float(image_vmin) if image_vmin is not None else float(np.nanmin(img))
-        image_zmax = float(image_vmax) if image_vmax is not None else float(np.nanmax(img))
+        if not isinstance(detector_image, DetectorImage):
+            detector_image = _array_image(detector_image)
+        image_zmin = float(image_vmin) if image_vmin is not None else detector_image.vmin
+        image_zmax = float(image_vmax) if image_vmax is not None else detector_image.vmax
+        fig.add_trace(
+            detector_image_trace(
+                detector_image,
+                colorscale=image_colorscale,
+                vmin=image_zmin,
+                vmax=image_zmax,
+                opacity=image_opacity,
+                x_range=image_x_range,
+                y_range=image_y_range,
+            )
+        )
+        # go.Image has no colorbar; an empty scatter carries it.
         fig.add_trace(
-            go.Heatmap(
-                z=img,
-                x=np.arange(img.shape[1]),
-                y=np.arange(img.shape[0]),
-                zmin=image_zmin,
-                zmax=image_zmax,
-                colorscale=_detector_colorscale(image_colorscale),
-                opacity=max(0.0, min(1.0, float(image_opacity))),
-                name="Detector image",
-                colorbar=dict(title="I", thickness=14, len=0.75),
-                hovertemplate="x: %{x}<br>y: %{y}<br>I: %{z:.3g}<extra>image</extra>",
+            go.Scatter(
+                x=[None],
+                y=[None],
+                mode="markers",
+                marker=dict(
+                    color=[image_zmin],
+                    cmin=image_zmin,
+                    cmax=image_zmax,
+                    colorscale=_detector_colorscale(image_colorscale),
+                    showscale=True,
+                    colorbar=dict(title="I", thickness=14, len=0.75),
+                ),
+                hoverinfo="skip",
+                showlegend=False,
+                name="Detector image scale",
             )
         )
 
@@ -412,6 +445,76 @@ def make_detector_view(
     return fig
 
 
+def detector_image_trace(
+    image: DetectorImage,
+    colorscale: str = "gray",
+    vmin: Optional[float] = None,
+    vmax: Optional[float] = None,
+    opacity: float = 0.8,
+    x_range: Optional[Tuple[float, float]] = None,
+    y_range: Optional[Tuple[float, float]] = None,
+    max_pixels: int = 1024,
+) -> go.Image:
+    """
+    PNG ``go.Image`` of the pyramid level and crop matching a viewport.
+
+    Pixels are mapped through ``colorscale`` between ``vmin`` and ``vmax``
+    (default: the image's precomputed contrast limits); NaN pixels are
+    transparent.  ``x_range`` / ``y_range`` and ``max_pixels`` are passed
+    to :meth:`DetectorImage.view`.
+    """
+    vmin = image.vmin if vmin is None else float(vmin)
+    vmax = image.vmax if vmax is None else float(vmax)
+    tile, x0, y0, step = image.view(x_range, y_range, max_pixels=max_pixels)
+    return go.Image(
+        source=_png_data_uri(_colorize(tile, colorscale, vmin, vmax)),
+        x0=x0,
+        y0=y0,
+        dx=step,
+        dy=step,
+        opacity=max(0.0, min(1.0, float(opacity))),
+        name="Detector image",
+        hovertemplate="x: %{x}<br>y: %{y}<extra>image</extra>",
+    )
+
+
+def _array_image(data: np.ndarray) -> DetectorImage:
+    """Wrap a bare 2-D array (full-range contrast) as a :class:`DetectorImage`."""
+    data = np.asarray(data, dtype=np.float32)
+    finite = data[np.isfinite(data)]
+    vmin, vmax = (float(finite.min()), float(finite.max())) if finite.size else (0.0, 1.0)
+    return DetectorImage(data=data, path="", dataset="", vmin=vmin, vmax=vmax)
+
+
+def _colorize(tile: np.ndarray, colorscale: str, vmin: float, vmax: float) -> np.ndarray:
+    """Map intensities to (h, w, 4) uint8 RGBA through a 256-entry lookup table."""
+    span = vmax - vmin if vmax > vmin else 1.0
+    scaled = (np.asarray(tile, dtype=np.float32) - np.float32(vmin)) * np.float32(255.0 / span)
+    nan = np.isnan(scaled)
+    codes = np.clip(np.nan_to_num(scaled, nan=0.0), 0, 255).astype(np.uint8)
+    rgba = _colorscale_lut(colorscale)[codes]
+    rgba[nan, 3] = 0
+    return rgba
+
+
+def _colorscale_lut(name: str) -> np.ndarray:
+    """(256, 4) uint8 RGBA table sampled from the detector colorscale."""
+    scale = _detector_colorscale(name)
+    if isinstance(scale, str):
+        scale = get_colorscale(scale)
+    colors = sample_colorscale(scale, [i / 255 for i in range(256)])
+    lut = np.full((256, 4), 255, dtype=np.uint8)
+    lut[:, :3] = np.rint([unlabel_rgb(c) for c in colors])
+    return lut
+
+
+def _png_data_uri(rgba: np.ndarray) -> str:
+    """Encode an (h, w, 4) uint8 RGBA array as a base64 PNG data URI (fast compression)."""
+    buf = io.BytesIO()
+    Image.fromarray(rgba, mode="RGBA").save(buf, format="PNG", compress_level=1)
+    return "data:image/png;base64," + base64.b64encode(buf.getvalue()).decode("ascii")
+
+
 def _detector_colorscale(name: str):
     """Return a Plotly colorscale for detector image intensity."""
     scale = _IMAGE_COLOR_SCALES.get(name or "terrain_r", _IMAGE_COLOR_SCALES["terrain_r"])
@@ -20,27 +20,32 @@ from laue_portal.analysis.coloring import (
     batch_ipf_colors,
     batch_rodrigues_rgb,
     hsv_wheel_color,
+    palette_colorscale,
+    plotly_marker_colors,
     pole_figure_color_radius,
-    rgb_to_plotly_colors,
+)
+from laue_portal.analysis.derived_cache import (
+    cached_crystal_directions,
+    cached_orientations,
+    cached_rodrigues,
 )
 from laue_portal.analysis.orientation import (
-    batch_crystal_directions,
-    batch_orientations,
-    batch_rodrigues,
     misorientation_from_reference,
     symmetry_ops_for_name,
     symmetry_ops_for_space_group,
 )
 from laue_portal.analysis.projection import (
+    closest_pole_offsets,
     cubic_hkl_family,
     get_surface_vectors,
     pole_figure_points,
+    pole_figure_points_for_xml,
 )
 
 # Igor Pro background: gbRGB=(40000,40000,40000) / 65535
 _GRAY_BG = "rgb(156, 156, 156)"
 
-# Orientation color modes (no colorscale -- per-point RGB)
+# Orientation color modes (per-point RGB; any colorscale is an exact palette)
 _ORIENTATION_MODES = {"cubic_ipf", "rodrigues", "misorientation", "pole_hsv"}
 
 # Scalar color modes (use Viridis colorscale + colorbar)
@@ -122,6 +127,7 @@ def make_orientation_map(
     rgb_reference_step: int = None,
     rgb_reference_matrix=None,
     surface_vectors=None,
+    xml_path: str = None,
 ) -> go.Figure:
     """
     Create a 2D orientation scatter plot.
@@ -164,6 +170,9 @@ def make_orientation_map(
         heuristic, default), ``"X"``, ``"Y"``, ``"Z"``, ``"H"``, ``"F"``,
         or ``"depth"``.  H and F are wire-frame coordinates rotated from
         ``(Y, Z)`` (see ``xml_parser.yz_to_hf``).
+    xml_path : str, optional
+        Path of the XML *parsed* came from.  When given, orientation
+        intermediates are shared through ``analysis.derived_cache``.
 
     Returns
     -------
@@ -199,6 +208,7 @@ def make_orientation_map(
         rgb_reference_step=rgb_reference_step,
         rgb_reference_matrix=rgb_reference_matrix,
         surface_vectors=surface_vectors,
+        xml_path=xml_path,
     )
 
     fig.add_trace(
@@ -260,6 +270,7 @@ def make_orientation_map_3d(
     rgb_reference_step: int = None,
     rgb_reference_matrix=None,
     surface_vectors=None,
+    xml_path: str = None,
 ) -> go.Figure:
     """
     Create a 3D orientation scatter plot using all three sample coordinates.
@@ -290,6 +301,8 @@ def make_orientation_map_3d(
         Names of the three axes.  Each is one of ``"X"``, ``"Y"``, ``"Z"``,
         ``"H"``, ``"F"``, or ``"depth"``.  Defaults reproduce the legacy
         X / Y / Z Cartesian layout.
+    xml_path : str, optional
+        See :func:`make_orientation_map`.
 
     Returns
     -------
@@ -319,6 +332,7 @@ def make_orientation_map_3d(
         rgb_reference_step=rgb_reference_step,
         rgb_reference_matrix=rgb_reference_matrix,
         surface_vectors=surface_vectors,
+        xml_path=xml_path,
     )
 
     fig.add_trace(
@@ -382,6 +396,7 @@ def _build_marker_dict(
     rgb_reference_step=None,
     rgb_reference_matrix=None,
     surface_vectors=None,
+    xml_path=None,
 ):
     """Build Plotly marker dict for the given coloring mode."""
     base = dict(
@@ -392,7 +407,7 @@ def _build_marker_dict(
         base["symbol"] = marker_symbol
 
     if color_by in _ORIENTATION_MODES:
-        colors = _get_orientation_colors(
+        rgb, alpha = _get_orientation_colors(
             parsed,
             color_by,
             surface=surface,
@@ -405,10 +420,12 @@ def _build_marker_dict(
             rgb_reference_step=rgb_reference_step,
             rgb_reference_matrix=rgb_reference_matrix,
             surface_vectors=surface_vectors,
+            xml_path=xml_path,
         )
 
-        base["color"] = colors
-        # No colorscale or colorbar for per-point RGB
+        # Per-point RGB, sent as palette indices when colors repeat; never
+        # a colorbar.
+        base.update(plotly_marker_colors(rgb, alpha=alpha))
     else:
         color_vals, color_label = _get_scalar_color_values(parsed, color_by)
         base["color"] = color_vals
@@ -552,10 +569,15 @@ def _get_orientation_colors(
     rgb_reference_step=None,
     rgb_reference_matrix=None,
     surface_vectors=None,
+    xml_path=None,
 ):
-    """Return list of 'rgb(r,g,b)' strings for orientation coloring modes."""
+    """Return ``(rgb, alpha)`` for orientation coloring modes.
+
+    ``rgb`` is an (N, 3) array in [0, 1]; ``alpha`` is an (N,) opacity
+    array, or None when every point is opaque.  With *xml_path* the
+    orientation intermediates come from the derived-quantity cache.
+    """
     recip_lattices = parsed["recip_lattices"]
-    lattice_params = parsed["lattice_params"]
 
     # Look up the surface normal vector for the chosen surface direction.
     if surface_vectors is None:
@@ -563,10 +585,12 @@ def _get_orientation_colors(
     else:
         surf_normal, surf_roll, surf_tilt = surface_vectors
 
+    def ipf_colors():
+        crystal_dirs = cached_crystal_directions(xml_path, parsed, surf_normal)
+        return batch_ipf_colors(crystal_dirs), None
+
     if color_by == "cubic_ipf":
-        crystal_dirs = batch_crystal_directions(recip_lattices, normal=surf_normal)
-        rgb = batch_ipf_colors(crystal_dirs)
-        return rgb_to_plotly_colors(rgb)
+        return ipf_colors()
 
     elif color_by == "rodrigues":
         if rgb_symmetry == "auto":
@@ -583,30 +607,24 @@ def _get_orientation_colors(
             if matrix.shape == (3, 3) and np.all(np.isfinite(matrix)):
                 reference_recip = matrix
 
-        rod_vecs, valid = batch_rodrigues(
-            recip_lattices,
-            lattice_params,
+        rod_vecs, valid = cached_rodrigues(
+            xml_path,
+            parsed,
             symmetry_ops=symmetry_ops,
             reference_index=reference_index,
             reference_recip=reference_recip,
-            return_valid=True,
         )
-        rgb = batch_rodrigues_rgb(rod_vecs)
-        alpha = np.where(valid, 1.0, 0.0)
-        return rgb_to_plotly_colors(rgb, alpha=alpha)
+        return batch_rodrigues_rgb(rod_vecs), np.where(valid, 1.0, 0.0)
 
     elif color_by == "misorientation" and ref_grain_index is not None:
-        orientations = batch_orientations(recip_lattices, lattice_params)
+        orientations = cached_orientations(xml_path, parsed)
         ref_idx = int(ref_grain_index)
         if ref_idx < 0 or ref_idx >= len(orientations):
             # Invalid reference -- fall back to IPF
-            crystal_dirs = batch_crystal_directions(recip_lattices, normal=surf_normal)
-            rgb = batch_ipf_colors(crystal_dirs)
-            return rgb_to_plotly_colors(rgb)
+            return ipf_colors()
 
         result = misorientation_from_reference(orientations, ref_idx)
-        rgb = batch_rodrigues_rgb(result["rodrigues"])
-        return rgb_to_plotly_colors(rgb)
+        return batch_rodrigues_rgb(result["rodrigues"]), None
 
     elif color_by == "pole_hsv":
         rgb = _compute_pole_hsv_colors(
@@ -617,14 +635,13 @@ def _get_orientation_colors(
             surface_tilt=surf_tilt,
             center_xy=pole_center_xy,
             color_rad_deg=pole_color_rad_deg,
+            xml_path=xml_path,
         )
-        return rgb_to_plotly_colors(rgb)
+        return rgb, None
 
     else:
         # Fallback to IPF
-        crystal_dirs = batch_crystal_directions(recip_lattices, normal=surf_normal)
-        rgb = batch_ipf_colors(crystal_dirs)
-        return rgb_to_plotly_colors(rgb)
+        return ipf_colors()
 
 
 def _compute_pole_hsv_colors(
@@ -635,6 +652,7 @@ def _compute_pole_hsv_colors(
     surface_tilt=None,
     center_xy=None,
     color_rad_deg=22.5,
+    xml_path=None,
 ):
     """
     Compute per-grain HSV pole-figure colors for the orientation map.
@@ -658,6 +676,9 @@ def _compute_pole_hsv_colors(
         ``(x0, y0)`` center for the HSV color wheel on the pole figure.
     color_rad_deg : float
         Angular color-saturation radius in degrees.
+    xml_path : str, optional
+        XML the lattices came from; memoises the projection (see
+        ``projection.pole_figure_points_for_xml``).
 
     Returns
     -------
@@ -684,7 +705,10 @@ def _compute_pole_hsv_colors(
     if surface_tilt is not None:
         kwargs["surface_tilt"] = surface_tilt
 
-    points, grain_indices = pole_figure_points(recip_lattices, family, **kwargs)
+    if xml_path is None:
+        points, grain_indices = pole_figure_points(recip_lattices, family, **kwargs)
+    else:
+        points, grain_indices = pole_figure_points_for_xml(xml_path, family, **kwargs)
 
     # Filter out NaN/inf points
     if len(points) > 0:
@@ -693,18 +717,10 @@ def _compute_pole_hsv_colors(
         grain_indices = grain_indices[finite_mask]
 
     # Compute per-grain HSV color from closest pole to center
+    offsets = closest_pole_offsets(points, grain_indices, N_grains, (x0, y0))
     grain_rgb = np.ones((N_grains, 3))  # default white
-
-    for grain_idx in range(N_grains):
-        mask = grain_indices == grain_idx
-        if not np.any(mask):
-            continue
-        grain_pts = points[mask]
-        dists = np.sum((grain_pts - np.array([x0, y0])) ** 2, axis=1)
-        closest = np.argmin(dists)
-        dx = grain_pts[closest, 0] - x0
-        dy = grain_pts[closest, 1] - y0
-        grain_rgb[grain_idx] = hsv_wheel_color(dx, dy, rmax=rmax)
+    has_pole = ~np.isnan(offsets[:, 0])
+    grain_rgb[has_pole] = hsv_wheel_color(offsets[has_pole, 0], offsets[has_pole, 1], rmax=rmax)
 
     return grain_rgb
 
@@ -714,6 +730,13 @@ def _compute_pole_hsv_colors(
 # ---------------------------------------------------------------------------
 
 
+def _with_opacity(color, opacity):
+    """Turn an opaque ``rgb(...)`` string into ``rgba(...)``; other colors pass through."""
+    if color.startswith("rgb("):
+        return color.replace("rgb(", "rgba(").replace(")", f",{opacity:.2f})")
+    return color
+
+
 def apply_selection_highlight(
     fig,
     parsed,
@@ -766,22 +789,34 @@ def apply_selection_highlight(
         0.2,
     )
 
-    # Determine if colors are per-point RGB strings or scalar values
+    # Determine if colors are per-point RGB strings, palette indices into
+    # an exact colorscale (see ``plotly_marker_colors``), or scalar values
     is_rgb_strings = (
         isinstance(current_colors, (list, tuple))
         and len(current_colors) == n_points
         and isinstance(current_colors[0], str)
     )
+    is_palette_indices = (
+        isinstance(current_colors, np.ndarray)
+        and current_colors.dtype.kind in "iu"
+        and main_trace.marker.showscale is False
+        and main_trace.marker.colorscale is not None
+    )
 
     if is_rgb_strings:
         # Per-point RGB strings -- convert to RGBA with opacity
-        new_colors = []
-        for i, c in enumerate(current_colors):
-            if c.startswith("rgb("):
-                new_colors.append(c.replace("rgb(", "rgba(").replace(")", f",{opacity_arr[i]:.2f})"))
-            else:
-                new_colors.append(c)
-        main_trace.marker.color = new_colors
+        main_trace.marker.color = [_with_opacity(c, opacity_arr[i]) for i, c in enumerate(current_colors)]
+    elif is_palette_indices:
+        # Palette indices -- double the palette (selected, then dimmed
+        # copies) so the trace stays compact.
+        palette = [color for _, color in main_trace.marker.colorscale]
+        palette = [_with_opacity(c, 1.0) for c in palette] + [_with_opacity(c, 0.2) for c in palette]
+        dimmed_offset = len(palette) // 2
+        main_trace.marker.color = (current_colors + np.where(opacity_arr < 1.0, dimmed_offset, 0)).astype(
+            current_colors.dtype
+        )
+        main_trace.marker.colorscale = palette_colorscale(palette)
+        main_trace.marker.cmax = len(palette) - 1
     else:
         # Scalar colorscale mode -- Scattergl doesn't support per-point
         # opacity, so sample the colorscale to get per-point RGB strings,
@@ -810,13 +845,7 @@ def apply_selection_highlight(
 
         # Sample colorscale to get per-point RGB, then apply opacity
         sampled = pc.sample_colorscale(colorscale, normed, colortype="rgb")
-        new_colors = []
-        for i, c in enumerate(sampled):
-            if c.startswith("rgb("):
-                new_colors.append(c.replace("rgb(", "rgba(").replace(")", f",{opacity_arr[i]:.2f})"))
-            else:
-                new_colors.append(c)
-        main_trace.marker.color = new_colors
+        main_trace.marker.color = [_with_opacity(c, opacity_arr[i]) for i, c in enumerate(sampled)]
         # Remove colorscale since we're now using per-point colors
         main_trace.marker.colorscale = None
 
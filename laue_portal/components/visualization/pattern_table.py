@@ -34,14 +34,18 @@ def _text_col(header, field, width=130, hide=False):
     }
 
 
-def make_pattern_table(patterns: list[dict]) -> html.Div:
+def make_pattern_table(patterns: list[dict] | None = None, row_count: int | None = None) -> html.Div:
     """
     Create an AG Grid table of indexed patterns.
 
     Parameters
     ----------
-    patterns : list[dict]
-        Output from xml_parser.get_all_patterns().
+    patterns : list[dict], optional
+        Output from xml_parser.get_all_patterns(), sent to the browser in full.
+    row_count : int, optional
+        Used instead of ``patterns``: total number of rows, which the grid
+        then requests block by block through its infinite row model
+        (``getRowsRequest``, answered by ``table_query.query_rows``).
 
     Returns
     -------
@@ -101,21 +105,15 @@ def make_pattern_table(patterns: list[dict]) -> html.Div:
 
     grid = dag.AgGrid(
         id="indexed-patterns-grid",
-        rowData=patterns,
         columnDefs=column_defs,
         defaultColDef={
             "resizable": True,
             "sortable": True,
             "filter": True,
         },
-        dashGridOptions={
-            "pagination": True,
-            "paginationPageSize": 50,
-            "animateRows": True,
-            "rowSelection": "single",
-        },
         style={"height": "calc(100vh - 260px)", "minHeight": "400px", "width": "100%"},
         className="ag-theme-alpine",
+        **_row_model_props(patterns, row_count),
     )
 
     selector = html.Div(
@@ -204,7 +202,7 @@ def make_pattern_table(patterns: list[dict]) -> html.Div:
     return html.Div(
         [
             html.H5(
-                f"Indexed Patterns ({len(patterns)} total)",
+                f"Indexed Patterns ({row_count if patterns is None else len(patterns)} total)",
                 className="mt-3 mb-2",
             ),
             html.Div(
@@ -216,3 +214,14 @@ def make_pattern_table(patterns: list[dict]) -> html.Div:
             ),
         ]
     )
+
+
+def _row_model_props(patterns, row_count):
+    """Client-side ``rowData`` for explicit rows, else the paged infinite row model."""
+    grid_options = {"pagination": True, "paginationPageSize": 50, "rowSelection": "single"}
+    if patterns is not None:
+        return {"rowData": patterns, "dashGridOptions": {**grid_options, "animateRows": True}}
+    return {
+        "rowModelType": "infinite",
+        "dashGridOptions": {**grid_options, "cacheBlockSize": 50, "maxBlocksInCache": 20},
+    }
@@ -35,14 +35,18 @@ def _text_col(header, field, width=130, hide=False):
     }
 
 
-def make_peak_table(indexed_peaks: list[dict]) -> html.Div:
+def make_peak_table(indexed_peaks: list[dict] | None = None, row_count: int | None = None) -> html.Div:
     """
     Create an AG Grid table of indexed peaks.
 
     Parameters
     ----------
-    indexed_peaks : list[dict]
-        Output from xml_parser.get_all_indexed_peaks().
+    indexed_peaks : list[dict], optional
+        Output from xml_parser.get_all_indexed_peaks(), sent to the browser in full.
+    row_count : int, optional
+        Used instead of ``indexed_peaks``: total number of rows, which the grid
+        then requests block by block through its infinite row model
+        (``getRowsRequest``, answered by ``table_query.query_rows``).
 
     Returns
     -------
@@ -101,21 +105,15 @@ def make_peak_table(indexed_peaks: list[dict]) -> html.Div:
 
     grid = dag.AgGrid(
         id="indexed-peaks-grid",
-        rowData=indexed_peaks,
         columnDefs=column_defs,
         defaultColDef={
             "resizable": True,
             "sortable": True,
             "filter": True,
         },
-        dashGridOptions={
-            "pagination": True,
-            "paginationPageSize": 50,
-            "animateRows": True,
-            "rowSelection": "single",
-        },
         style={"height": "calc(100vh - 260px)", "minHeight": "400px", "width": "100%"},
         className="ag-theme-alpine",
+        **_row_model_props(indexed_peaks, row_count),
     )
 
     selector = html.Div(
@@ -216,7 +214,7 @@ def make_peak_table(indexed_peaks: list[dict]) -> html.Div:
     return html.Div(
         [
             html.H5(
-                f"Indexed Peaks ({len(indexed_peaks)} total)",
+                f"Indexed Peaks ({row_count if indexed_peaks is None else len(indexed_peaks)} total)",
                 className="mt-3 mb-2",
             ),
             html.Div(
@@ -228,3 +226,14 @@ def make_peak_table(indexed_peaks: list[dict]) -> html.Div:
             ),
         ]
     )
+
+
+def _row_model_props(indexed_peaks, row_count):
+    """Client-side ``rowData`` for explicit rows, else the paged infinite row model."""
+    grid_options = {"pagination": True, "paginationPageSize": 50, "rowSelection": "single"}
+    if indexed_peaks is not None:
+        return {"rowData": indexed_peaks, "dashGridOptions": {**grid_options, "animateRows": True}}
+    return {
+        "rowModelType": "infinite",
+        "dashGridOptions": {**grid_options, "cacheBlockSize": 50, "maxBlocksInCache": 20},
+    }
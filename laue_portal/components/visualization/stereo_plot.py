@@ -8,15 +8,15 @@ import plotly.graph_objects as go
 from laue_portal.analysis.coloring import (
     batch_ipf_colors,
     hsv_wheel_color,
+    plotly_marker_colors,
     pole_figure_color_radius,
-    rgb_to_plotly_colors,
-)
-from laue_portal.analysis.orientation import (
-    batch_crystal_directions,
 )
+from laue_portal.analysis.derived_cache import cached_crystal_directions
 from laue_portal.analysis.projection import (
+    closest_pole_offsets,
     cubic_hkl_family,
     pole_figure_points,
+    pole_figure_points_for_xml,
 )
 
 logger = logging.getLogger(__name__)
@@ -52,6 +52,7 @@ def make_pole_figure(
     surface="normal",
     center_xy=None,
     surface_vectors=None,
+    xml_path=None,
 ):
     """
     Create a pole figure scatter plot.
@@ -91,6 +92,12 @@ def make_pole_figure(
         When a user clicks a point on the pole figure, pass its
         stereographic coordinates here to recenter the HSV color wheel
         (matching Igor Pro's cursor-based ``MakePolePoints``).
+    surface_vectors : tuple of ndarray (3,), optional
+        ``(normal, roll, tilt)`` overriding *surface*.
+    xml_path : str, optional
+        Path of the XML *parsed* came from.  When given, the projection and
+        crystal directions are memoised (see ``analysis.derived_cache``)
+        so that styling-only redraws skip them.
 
     Returns
     -------
@@ -129,8 +136,9 @@ def make_pole_figure(
 
     # Compute pole figure points using the measured reciprocal lattices
     # directly (matching Igor Pro's MakePolePoints: q = gm * hkl).
-    points, grain_indices = pole_figure_points(
-        recip_lattices,
+    project = pole_figure_points if xml_path is None else pole_figure_points_for_xml
+    points, grain_indices = project(
+        recip_lattices if xml_path is None else xml_path,
         family,
         surface_normal=surf_normal,
         surface_roll=surf_roll,
@@ -152,33 +160,21 @@ def make_pole_figure(
             x0, y0 = 0.0, 0.0
         rmax = pole_figure_color_radius(x0, y0, color_rad_deg)
 
-        N_grains = len(recip_lattices)
-        grain_rgb = np.ones((N_grains, 3))  # default white
-
-        for grain_idx in range(N_grains):
-            mask = grain_indices == grain_idx
-            if not np.any(mask):
-                continue
-            grain_pts = points[mask]
-            dists = np.sum((grain_pts - np.array([x0, y0])) ** 2, axis=1)
-            closest = np.argmin(dists)
-            dx = grain_pts[closest, 0] - x0
-            dy = grain_pts[closest, 1] - y0
-            grain_rgb[grain_idx] = hsv_wheel_color(dx, dy, rmax=rmax)
+        offsets = closest_pole_offsets(points, grain_indices, len(recip_lattices), (x0, y0))
+        grain_rgb = np.ones((len(recip_lattices), 3))  # default white
+        has_pole = ~np.isnan(offsets[:, 0])
+        grain_rgb[has_pole] = hsv_wheel_color(offsets[has_pole, 0], offsets[has_pole, 1], rmax=rmax)
 
-        point_colors = rgb_to_plotly_colors(grain_rgb[grain_indices])
+        point_colors = plotly_marker_colors(grain_rgb[grain_indices])
 
     elif color_scheme == "ipf" and len(points) > 0:
-        crystal_dirs = batch_crystal_directions(
-            recip_lattices,
-            normal=surf_normal,
-        )
+        crystal_dirs = cached_crystal_directions(xml_path, parsed, surf_normal)
         ipf_rgb = batch_ipf_colors(crystal_dirs)
 
         # Map grain colors to pole points
-        point_colors = rgb_to_plotly_colors(ipf_rgb[grain_indices])
+        point_colors = plotly_marker_colors(ipf_rgb[grain_indices])
     else:
-        point_colors = "rgb(214, 20, 0)"
+        point_colors = {"color": "rgb(214, 20, 0)"}
 
     fig = go.Figure()
 
@@ -190,9 +186,9 @@ def make_pole_figure(
                 mode="markers",
                 marker=dict(
                     size=marker_size,
-                    color=point_colors,
                     symbol="circle",
                     line=dict(width=0),
+                    **point_colors,
                 ),
                 customdata=grain_indices.reshape(-1, 1),
                 hovertemplate=("x: %{x:.4f}<br>y: %{y:.4f}<br>Grain: %{customdata[0]}<br><extra></extra>"),
@@ -27,6 +27,7 @@ from laue_portal.components.visualization.ipf_legend import (
 )
 from laue_portal.config import DEFAULT_VARIABLES
 from laue_portal.database.db_utils import get_catalog_data, remove_root_path_prefix
+from laue_portal.processing.xml_merge import is_partial_xml_path, partial_xml_path
 
 dash.register_page(__name__, path="/peakindexing")  # Simplified path
 
@@ -1137,6 +1138,10 @@ def load_peakindexing_data(href):
                     header_content = [
                         html.Span(f"Peak Indexing ID: {peakindex_id}", className="pi-page-title"),
                     ]
+                    if xml_path and is_partial_xml_path(xml_path):
+                        header_content.append(
+                            html.Span("Partial results (indexing in progress)", className="pi-page-partial")
+                        )
 
                     if related_links:
                         link_children = []
@@ -1438,6 +1443,7 @@ def update_orientation_map(
                 rgb_reference_step=rgb_reference_step,
                 rgb_reference_matrix=rgb_reference_matrix,
                 surface_vectors=surface_vectors,
+                xml_path=xml_path,
             )
         else:
             fig = make_orientation_map(
@@ -1460,6 +1466,7 @@ def update_orientation_map(
                 rgb_reference_step=rgb_reference_step,
                 rgb_reference_matrix=rgb_reference_matrix,
                 surface_vectors=surface_vectors,
+                xml_path=xml_path,
             )
 
         # Cross-plot highlighting: dim unselected points, ring selected ones
@@ -1687,6 +1694,7 @@ def update_pole_figure(
             surface=surface or "normal",
             center_xy=center_xy,
             surface_vectors=surface_vectors,
+            xml_path=xml_path,
         )
 
         return fig, marker_size, rad_col_style, ""
@@ -1713,12 +1721,11 @@ def update_peak_table(xml_path):
         raise PreventUpdate
 
     try:
-        from laue_portal.analysis.xml_parser import get_all_indexed_peaks, parse_indexing_xml
+        from laue_portal.analysis.table_query import PEAK_TABLE, table_frame
         from laue_portal.components.visualization.peak_table import make_peak_table
 
-        parsed = parse_indexing_xml(xml_path)
-        indexed_peaks = get_all_indexed_peaks(parsed)
-        return make_peak_table(indexed_peaks)
+        # Rows are served block by block by serve_peak_table_rows.
+        return make_peak_table(row_count=len(table_frame(xml_path, PEAK_TABLE)))
     except Exception as e:
         print(f"Error creating peak table: {e}")
         traceback.print_exc()
@@ -1742,12 +1749,11 @@ def update_pattern_table(xml_path):
         raise PreventUpdate
 
     try:
-        from laue_portal.analysis.xml_parser import get_all_patterns, parse_indexing_xml
+        from laue_portal.analysis.table_query import PATTERN_TABLE, table_frame
         from laue_portal.components.visualization.pattern_table import make_pattern_table
 
-        parsed = parse_indexing_xml(xml_path)
-        patterns = get_all_patterns(parsed)
-        return make_pattern_table(patterns)
+        # Rows are served block by block by serve_pattern_table_rows.
+        return make_pattern_table(row_count=len(table_frame(xml_path, PATTERN_TABLE)))
     except Exception as e:
         print(f"Error creating pattern table: {e}")
         traceback.print_exc()
@@ -1756,6 +1762,50 @@ def update_pattern_table(xml_path):
         )
 
 
+# ---------------------------------------------------------------------------
+# Callbacks: serve table rows to the grids' infinite row model
+# ---------------------------------------------------------------------------
+
+
+@callback(
+    Output("indexed-peaks-grid", "getRowsResponse"),
+    Input("indexed-peaks-grid", "getRowsRequest"),
+    State("peakindexing-xml-path", "data"),
+    prevent_initial_call=True,
+)
+def serve_peak_table_rows(request, xml_path):
+    """Return the requested block of filtered / sorted indexed peaks."""
+    from laue_portal.analysis.table_query import PEAK_TABLE
+
+    return _serve_table_rows(xml_path, PEAK_TABLE, request)
+
+
+@callback(
+    Output("indexed-patterns-grid", "getRowsResponse"),
+    Input("indexed-patterns-grid", "getRowsRequest"),
+    State("peakindexing-xml-path", "data"),
+    prevent_initial_call=True,
+)
+def serve_pattern_table_rows(request, xml_path):
+    """Return the requested block of filtered / sorted patterns."""
+    from laue_portal.analysis.table_query import PATTERN_TABLE
+
+    return _serve_table_rows(xml_path, PATTERN_TABLE, request)
+
+
+def _serve_table_rows(xml_path, table, request):
+    if not xml_path or request is None:
+        raise PreventUpdate
+    from laue_portal.analysis.table_query import query_rows
+
+    try:
+        return query_rows(xml_path, table, request)
+    except Exception as e:
+        print(f"Error serving {table} table rows: {e}")
+        traceback.print_exc()
+        return {"rowData": [], "rowCount": 0}
+
+
 # ---------------------------------------------------------------------------
 # Callback: show/hide indexed peak table columns
 # ---------------------------------------------------------------------------
@@ -1911,11 +1961,9 @@ def handle_pole_figure_click(
 
                 from laue_portal.analysis.projection import (
                     cubic_hkl_family,
-                    pole_figure_points,
+                    pole_figure_points_for_xml,
                 )
-                from laue_portal.analysis.xml_parser import parse_indexing_xml
 
-                parsed = parse_indexing_xml(xml_path)
                 hkl = _parse_stereo_hkl(h, k, l)
                 family = cubic_hkl_family(*hkl)
                 surf_normal, surf_roll, surf_tilt = _resolved_surface_vectors(
@@ -1932,8 +1980,8 @@ def handle_pole_figure_click(
                         surface_normal_z,
                     ],
                 )
-                pts, grain_indices = pole_figure_points(
-                    parsed["recip_lattices"],
+                pts, grain_indices = pole_figure_points_for_xml(
+                    xml_path,
                     family,
                     surface_normal=surf_normal,
                     surface_roll=surf_roll,
@@ -2055,11 +2103,8 @@ def handle_pole_selection(
 
             from laue_portal.analysis.projection import (
                 cubic_hkl_family,
-                pole_figure_points,
+                pole_figure_points_for_xml,
             )
-            from laue_portal.analysis.xml_parser import parse_indexing_xml
-
-            parsed = parse_indexing_xml(xml_path)
 
             hkl = _parse_stereo_hkl(h, k, l)
             family = cubic_hkl_family(*hkl)
@@ -2077,8 +2122,8 @@ def handle_pole_selection(
                     surface_normal_z,
                 ],
             )
-            points, grain_indices = pole_figure_points(
-                parsed["recip_lattices"],
+            points, grain_indices = pole_figure_points_for_xml(
+                xml_path,
                 family,
                 surface_normal=surf_normal,
                 surface_roll=surf_roll,
@@ -2112,7 +2157,7 @@ def handle_pole_selection(
     # Compute misorientation statistics if we have the XML and >= 2 grains.
     # Pairwise misorientation is O(k^2 * 24) so cap the grain count to
     # keep the response interactive.
-    _MAX_GRAINS_FOR_MISORIENTATION = 700
+    _MAX_GRAINS_FOR_MISORIENTATION = 2000
     misorientation_info = []
     if xml_path and len(selected) >= 2:
         if len(selected) > _MAX_GRAINS_FOR_MISORIENTATION:
@@ -2125,17 +2170,12 @@ def handle_pole_selection(
             ]
         else:
             try:
-                from laue_portal.analysis.orientation import (
-                    batch_orientations,
-                    pairwise_misorientation,
-                )
+                from laue_portal.analysis.derived_cache import cached_orientations
+                from laue_portal.analysis.orientation import pairwise_misorientation
                 from laue_portal.analysis.xml_parser import parse_indexing_xml
 
                 parsed = parse_indexing_xml(xml_path)
-                orientations = batch_orientations(
-                    parsed["recip_lattices"],
-                    parsed["lattice_params"],
-                )
+                orientations = cached_orientations(xml_path, parsed)
 
                 # Only compute if selected indices are within bounds
                 valid_indices = [i for i in selected if i < len(orientations)]
@@ -2463,6 +2503,7 @@ def populate_detector_pattern_checklist(xml_path, step_value):
     Input("detector-image-vmin", "value"),
     Input("detector-image-vmax", "value"),
     Input("detector-image-opacity", "value"),
+    State("detector-view-graph", "relayoutData"),
     prevent_initial_call=True,
 )
 def update_detector_view(
@@ -2481,6 +2522,7 @@ def update_detector_view(
     image_vmin,
     image_vmax,
     image_opacity,
+    relayout_data,
 ):
     """Re-render the detector overlay whenever the user changes any control."""
     if not xml_path or step_value is None:
@@ -2491,13 +2533,16 @@ def update_detector_view(
             build_step_overlay,
             overlay_statistics,
         )
-        from laue_portal.analysis.detector_image import load_detector_image
         from laue_portal.analysis.geometry import resolve_geometry_for_indexing
-        from laue_portal.analysis.xml_parser import parse_indexing_xml
+        from laue_portal.analysis.xml_parser import parse_indexing_step
         from laue_portal.components.visualization.detector_view import make_detector_view
 
-        parsed = parse_indexing_xml(xml_path)
         step_idx = int(step_value)
+        # Only this step is parsed (seeking via the file's step index).
+        try:
+            step = parse_indexing_step(xml_path, step_idx)
+        except IndexError:
+            step = None
 
         geometry = resolve_geometry_for_indexing(xml_path)
         if geometry is None or not geometry.detectors:
@@ -2511,22 +2556,22 @@ def update_detector_view(
             )
             return fig, summary, ""
 
-        overlay = build_step_overlay(parsed, step_idx, geometry, simulate_missing=bool(show_missing))
+        overlay = None
+        if step is not None:
+            overlay = build_step_overlay(step, 0, geometry, simulate_missing=bool(show_missing))
+        if overlay is not None:
+            overlay.step_index = step_idx
 
         image_result = None
         detector_image = None
+        x_range, y_range = _detector_view_ranges(relayout_data) or (None, None)
         image_vmin_eff = image_vmin
         image_vmax_eff = image_vmax
         if overlay is not None and show_image:
-            path_context = path_context or {}
-            image_result = load_detector_image(
-                overlay.image_path,
-                xml_path=xml_path,
-                data_folder=path_context.get("data_folder"),
-                root_path=path_context.get("root_path"),
-            )
+            image_result = _load_detector_image(overlay.image_path, xml_path, path_context)
+            _prefetch_detector_images(xml_path, path_context, step_idx)
             if image_result.image is not None:
-                detector_image = image_result.image.data
+                detector_image = image_result.image
                 image_vmin_eff, image_vmax_eff = _detector_image_range(
                     image_vmin,
                     image_vmax,
@@ -2551,9 +2596,12 @@ def update_detector_view(
             image_vmin=image_vmin_eff,
             image_vmax=image_vmax_eff,
             image_opacity=float(image_opacity if image_opacity is not None else 0.8),
+            # The figure keeps its zoom (uirevision), so start at that level.
+            image_x_range=x_range,
+            image_y_range=y_range,
         )
 
-        summary_children = _detector_step_summary(parsed, step_idx, overlay, overlay_statistics, image_result)
+        summary_children = _detector_step_summary(step, step_idx, overlay, overlay_statistics, image_result)
         return fig, summary_children, ""
 
     except PreventUpdate:
@@ -2568,15 +2616,130 @@ def update_detector_view(
         )
 
 
-def _detector_step_summary(parsed, step_idx, overlay, overlay_statistics, image_result=None):
-    """Compose the small summary card shown beneath the detector graph."""
+@callback(
+    Output("detector-view-graph", "figure", allow_duplicate=True),
+    Input("detector-view-graph", "relayoutData"),
+    State("peakindexing-xml-path", "data"),
+    State("peakindexing-path-context", "data"),
+    State("detector-step-select", "value"),
+    State("detector-show-image", "value"),
+    State("detector-image-colormap", "value"),
+    State("detector-image-vmin", "value"),
+    State("detector-image-vmax", "value"),
+    State("detector-image-opacity", "value"),
+    prevent_initial_call=True,
+)
+def refetch_detector_image_tile(
+    relayout_data,
+    xml_path,
+    path_context,
+    step_value,
+    show_image,
+    image_colormap,
+    image_vmin,
+    image_vmax,
+    image_opacity,
+):
+    """Swap in the pyramid level / crop matching the new zoom after a relayout."""
+    ranges = _detector_view_ranges(relayout_data)
+    if ranges is None or not show_image or not xml_path or step_value is None:
+        raise PreventUpdate
+
+    from laue_portal.analysis.geometry import resolve_geometry_for_indexing
+    from laue_portal.analysis.xml_parser import get_step_peaks, parse_indexing_step
+    from laue_portal.components.visualization.detector_view import detector_image_trace
+
+    # Without geometry update_detector_view draws no image to patch.
+    geometry = resolve_geometry_for_indexing(xml_path)
+    if geometry is None or not geometry.detectors:
+        raise PreventUpdate
+    try:
+        step_peaks = get_step_peaks(parse_indexing_step(xml_path, int(step_value)), 0)
+    except (IndexError, ValueError, OSError):
+        step_peaks = None
+    if step_peaks is None:
+        raise PreventUpdate
+    image = _load_detector_image(step_peaks.get("input_image"), xml_path, path_context).image
+    if image is None:
+        raise PreventUpdate
+
+    vmin, vmax = _detector_image_range(image_vmin, image_vmax, image.vmin, image.vmax)
+    trace = detector_image_trace(
+        image,
+        colorscale=image_colormap or "gray",
+        vmin=vmin,
+        vmax=vmax,
+        opacity=float(image_opacity if image_opacity is not None else 0.8),
+        x_range=ranges[0],
+        y_range=ranges[1],
+    )
+    # The image is always trace 0 (see make_detector_view); patch only it.
+    patch = dash.Patch()
+    for key in ("source", "x0", "y0", "dx", "dy"):
+        patch["data"][0][key] = trace[key]
+    return patch
+
+
+def _load_detector_image(input_image, xml_path, path_context):
+    """Resolve and load (cached) the detector image of one step."""
+    from laue_portal.analysis.detector_image import load_detector_image
+
+    path_context = path_context or {}
+    return load_detector_image(
+        input_image,
+        xml_path=xml_path,
+        data_folder=path_context.get("data_folder"),
+        root_path=path_context.get("root_path"),
+    )
+
+
+def _prefetch_detector_images(xml_path, path_context, step_idx):
+    """Warm the image cache with the steps "Jump to next indexed step" visits next."""
+    from laue_portal.analysis.detector_image import prefetch_step_images
+
+    path_context = path_context or {}
+    prefetch_step_images(
+        xml_path,
+        step_idx,
+        data_folder=path_context.get("data_folder"),
+        root_path=path_context.get("root_path"),
+    )
+
+
+def _detector_view_ranges(relayout_data):
+    """
+    Viewport ``(x_range, y_range)`` from a detector graph ``relayoutData``.
+
+    A range is ``None`` after an autorange (whole chip).  Returns ``None``
+    when the event did not touch the axes (e.g. a dragmode change).
+    """
+    if not relayout_data:
+        return None
+    ranges = []
+    touched = False
+    for axis in ("xaxis", "yaxis"):
+        value = relayout_data.get(f"{axis}.range")
+        if value is None and f"{axis}.range[0]" in relayout_data:
+            value = (relayout_data[f"{axis}.range[0]"], relayout_data.get(f"{axis}.range[1]"))
+        if value is not None and None not in value:
+            ranges.append((float(value[0]), float(value[1])))
+            touched = True
+        else:
+            ranges.append(None)
+            touched = touched or f"{axis}.autorange" in relayout_data
+    return tuple(ranges) if touched else None
+
+
+def _detector_step_summary(step, step_idx, overlay, overlay_statistics, image_result=None):
+    """Compose the small summary card shown beneath the detector graph.
+
+    ``step`` is the one-step dict from ``parse_indexing_step``.
+    """
     if overlay is None:
         return html.Small("No detector data for this step.", className="text-muted")
 
     stats = overlay_statistics(overlay)
-    x_pos = float(parsed["positions"][step_idx, 0])
-    y_pos = float(parsed["positions"][step_idx, 1])
-    z_pos = float(parsed["positions"][step_idx, 2])
+    x_pos, y_pos, z_pos = (float(v) for v in step["positions"][0])
 
     header_bits = [
         html.Strong(f"Step #{step_idx}"),
@@ -2633,19 +2796,24 @@ def _resolve_xml_path(peakindex_data, root_path: str) -> str | None:
     Checks in order:
     1. peakindex_data.outputXML as an absolute path
     2. peakindex_data.outputFolder / peakindex_data.outputXML
-    3. Glob for *.xml in outputFolder
+    3. The partial merge of either, while the indexing job is still running
+    4. Glob for *.xml in outputFolder
     """
-    # Try outputXML directly
+    candidates = []
     if peakindex_data.outputXML:
-        candidate = Path(peakindex_data.outputXML)
+        # Try outputXML directly, then relative to outputFolder
+        candidates.append(Path(peakindex_data.outputXML))
+        if peakindex_data.outputFolder:
+            candidates.append(Path(peakindex_data.outputFolder) / peakindex_data.outputXML)
+
+    for candidate in candidates:
         if candidate.is_file():
             return str(candidate)
 
-        # Try relative to outputFolder
-        if peakindex_data.outputFolder:
-            candidate = Path(peakindex_data.outputFolder) / peakindex_data.outputXML
-            if candidate.is_file():
-                return str(candidate)
+    for candidate in candidates:
+        partial = Path(partial_xml_path(str(candidate)))
+        if partial.is_file():
+            return str(partial)
 
     # Fallback: look for XML files in outputFolder
     if peakindex_data.outputFolder:
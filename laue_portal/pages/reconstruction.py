@@ -3,7 +3,6 @@ from pathlib import Path
 
 import dash
 import dash_bootstrap_components as dbc
-import h5py
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
@@ -14,6 +13,7 @@ from sqlalchemy.orm import Session
 import laue_portal.components.navbar as navbar
 import laue_portal.database.db_schema as db_schema
 import laue_portal.database.session_utils as session_utils
+from laue_portal.analysis.recon_results import open_results
 from laue_portal.components.recon_form import recon_form, set_recon_form_props
 
 dash.register_page(__name__, path="/reconstruction")
@@ -41,6 +41,22 @@ layout = html.Div(
                     placeholder="Select Detector Pixel",
                     id="pixels",
                 ),
+                dbc.RadioItems(
+                    id="depth-resolution",
+                    options=[{"label": "Integrated", "value": 0}],
+                    value=0,
+                    inline=True,
+                ),
+                dcc.Slider(
+                    id="depth-slider",
+                    min=0,
+                    max=0,
+                    step=1,
+                    value=0,
+                    marks=None,
+                    disabled=True,
+                ),
+                html.Div(id="depth-slice-label"),
                 dcc.Graph(
                     style={"display": "inline-block"},
                     id="lineout-graph",
@@ -109,13 +125,10 @@ def set_lineout_and_detector_graphs(
             else:
                 set_props("zoom_info", {"data": None})
 
-    if trigger_id in ("pixels", "detector-graph", "index_pointer"):
-        ind = [e["value"] for e in pixels_options]
-
     if trigger_id == "detector-graph":
         clicked_pixel_index = [clickData["points"][0][k] for k in ["x", "y"]]
 
-        if clicked_pixel_index not in ind:
+        if open_results(file_output).row_of(*clicked_pixel_index) is None:
             set_props("alert-auto-no-data", {"is_open": True})
             print("alert-auto-no-data")
 
@@ -157,11 +170,10 @@ def set_lineout_and_detector_graphs(
         p_x, p_y = pixel_index
         print(f"Selected: {p_x}, {p_y}")
 
-        # Lineout plot
-        all_ind = loahdh5(file_output, "ind")
-        lau_slice = np.where((all_ind[:, 0] == pixel_index[0]) & (all_ind[:, 1] == pixel_index[1]))[0][0]
-        print("slice", lau_slice)
-        lau_lineout = loahdh5(file_output, "lau", lau_slice)
+        # Lineout plot: one row of "lau", located through the pooled pixel map
+        lau_lineout = open_results(file_output).lineout(p_x, p_y)
+        if lau_lineout is None:
+            raise PreventUpdate
         print("lineout shape", lau_lineout.shape)
 
         fig1 = px.line(lau_lineout)
@@ -196,6 +208,37 @@ def set_lineout_and_detector_graphs(
     set_props("detector-graph", {"figure": fig2})
 
 
+@dash.callback(
+    Output("integrated-lau", "value"),
+    Output("depth-slider", "max"),
+    Output("depth-slider", "value"),
+    Output("depth-slider", "disabled"),
+    Output("depth-slice-label", "children"),
+    Input("depth-resolution", "value"),
+    Input("depth-slider", "value"),
+    State("results-path", "value"),
+    prevent_initial_call=True,
+)
+def show_depth_slice(bin_width, index, file_output):
+    """Show one slice of the chosen depth-binned stack (or the integrated image)."""
+    if not file_output:
+        raise PreventUpdate
+    results = open_results(file_output)
+    if not bin_width:
+        image = results.integrated_image()
+        if image is None:
+            raise PreventUpdate
+        return np.nan_to_num(image), 0, 0, True, "Depth-integrated image"
+
+    centres = results.depth_centres(bin_width)
+    if ctx.triggered_id == "depth-resolution":
+        index = len(centres) // 2
+    index = int(np.clip(index or 0, 0, len(centres) - 1))
+    image = np.nan_to_num(results.depth_image(bin_width, index))
+    label = f"Depth {centres[index]:.1f} µm ({bin_width:g} µm bins, slice {index + 1} of {len(centres)})"
+    return image, len(centres) - 1, index, False, label
+
+
 @dash.callback(Output("zoom_info", "data"), Input("detector-graph", "relayoutData"))
 def update_zoom_info(relayout_data):
     return relayout_data
@@ -222,17 +265,24 @@ def load_recon_data(href):
                     file_output = recon_data.file_output
                     set_props("results-path", {"value": file_output})
 
-                    integrated_lau = loadnpy(file_output)
+                    # Reconstructions written before the depth stacks only have imgresults.npy.
+                    results = open_results(file_output)
+                    integrated_lau = results.integrated_image()
+                    if integrated_lau is None:
+                        integrated_lau = loadnpy(file_output)
                     integrated_lau[np.isnan(integrated_lau)] = 0
                     set_props("integrated-lau", {"value": integrated_lau})
+                    depth_options = [{"label": "Integrated", "value": 0}]
+                    depth_options += [{"label": f"{w:g} µm", "value": w} for w in results.depth_bin_widths()]
+                    set_props("depth-resolution", {"options": depth_options, "value": 0})
 
                     if np.count_nonzero(integrated_lau) > int(1e2):
                         ind_slice = np.sort(
                             np.argpartition(integrated_lau, -30, axis=None)[-30:]
                         )  # np.sort(np.random.randint(0,2048**2,30))#np.argsort(-integrated_lau)[:30]
-                        ind = loahdh5(file_output, "ind", ind_slice)
+                        ind = results.read("ind", ind_slice)
                     else:
-                        ind = loahdh5(file_output, "ind")
+                        ind = results.read("ind")
                     pixel_selections = [{"label": f"{i}", "value": i} for i in ind]
                     set_props("pixels", {"options": pixel_selections})
 
@@ -273,16 +323,6 @@ def load_recon_data(href):
     return "No Recon ID provided"
 
 
-def loahdh5(path, key, slice=None, results_filename="results.h5"):
-    results_file = Path(path) / results_filename
-    f = h5py.File(results_file, "r")
-    if slice is None:
-        value = f[key][:]
-    else:
-        value = f[key][slice]
-    return value
-
-
 def loadnpy(path, results_filename="img" + "results" + ".npy"):
     results_file = Path(path) / results_filename
     value = np.zeros((2**11, 2**11))
@@ -9,9 +9,9 @@ from sqlalchemy.orm import Session
 
 import laue_portal.database.session_utils as session_utils
 from laue_portal.database import db_schema
-from laue_portal.processing.queue.core import STATUS_REVERSE_MAPPING, redis_conn
+from laue_portal.processing.queue.core import STATUS_REVERSE_MAPPING, XML_MERGE_WORKERS, redis_conn
 from laue_portal.processing.queue.lifecycle import publish_job_update
-from laue_portal.processing.xml_merge import merge_xml_files
+from laue_portal.processing.xml_merge import finalize_partial_merge, resolve_merged_xml_path
 
 logger = logging.getLogger(__name__)
 
@@ -56,19 +56,17 @@ def execute_peakindexing_batch_coordinator(job_id: int, output_dir: str, output_
                 xml_source_dir = os.path.join(output_dir, "xml")
 
                 # Determine where to save the merged XML
-                if os.path.isabs(output_xml):
-                    # Absolute path - use directly
-                    merged_xml_path = output_xml
-                else:
-                    # Relative path or filename - save to output_dir
-                    merged_xml_path = os.path.join(output_dir, output_xml)
+                merged_xml_path = resolve_merged_xml_path(output_dir, output_xml)
 
-                # Perform the merge
+                # Perform the merge; chunks have usually merged all but the last
+                # files incrementally, otherwise this does a full merge.
                 if os.path.exists(xml_source_dir):
-                    merge_result = merge_xml_files(xml_source_dir, merged_xml_path)
+                    merge_result = finalize_partial_merge(xml_source_dir, merged_xml_path, workers=XML_MERGE_WORKERS)
 
                     if merge_result["success"]:
                         merge_message = f"\nMerged {merge_result['files_merged']} XML files into {merged_xml_path}"
+                        if merge_result.get("store_path"):
+                            merge_message += f"\nWrote results store {merge_result['store_path']}"
                     else:
                         merge_message = f"\nXML merge failed: {merge_result['error']}"
                 else:
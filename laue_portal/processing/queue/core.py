@@ -28,6 +28,9 @@ STATUS_MAPPING = {0: "Queued", 1: "Running", 2: "Finished", 3: "Failed", 4: "Can
 STATUS_REVERSE_MAPPING = {v: k for k, v in STATUS_MAPPING.items()}
 
 PEAKINDEXING_QUEUE_BATCH_SIZE = max(1, int(os.environ.get("LAUE_PEAKINDEXING_QUEUE_BATCH_SIZE", "50")))
+XML_MERGE_WORKERS = max(1, int(os.environ.get("LAUE_XML_MERGE_WORKERS", "1")))
+PEAKINDEXING_CHUNK_WORKERS = max(1, int(os.environ.get("LAUE_PEAKINDEXING_CHUNK_WORKERS", "1")))
+INCREMENTAL_XML_MERGE = os.environ.get("LAUE_INCREMENTAL_XML_MERGE", "1").lower() in {"1", "true", "yes"}
 WRITE_SUCCESS_SUBJOB_DETAILS = os.environ.get("LAUE_WRITE_SUCCESS_SUBJOB_DETAILS", "0").lower() in {
     "1",
     "true",
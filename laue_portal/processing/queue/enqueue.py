@@ -11,12 +11,13 @@ from sqlalchemy.orm import Session
 import laue_portal.database.session_utils as session_utils
 from laue_portal.database import db_schema
 from laue_portal.processing.queue.batch import setup_batch_counter
-from laue_portal.processing.queue.core import PEAKINDEXING_QUEUE_BATCH_SIZE, _chunked, job_queue
+from laue_portal.processing.queue.core import INCREMENTAL_XML_MERGE, PEAKINDEXING_QUEUE_BATCH_SIZE, _chunked, job_queue
 from laue_portal.processing.queue.executors import (
     execute_peakindexing_chunk,
     execute_reconstruction_job,
     execute_wire_reconstruction_job,
 )
+from laue_portal.processing.xml_merge import clear_partial_merge, resolve_merged_xml_path
 
 logger = logging.getLogger(__name__)
 
@@ -323,12 +324,19 @@ def enqueue_peakindexing(
         os.makedirs(params_dir, exist_ok=True)
         shutil.copy2(geometry_file, params_dir)
         shutil.copy2(crystal_file, params_dir)
+        # A partial merge left by an earlier run into this directory must not
+        # be resumed: its manifest describes another job's XML files.
+        clear_partial_merge(resolve_merged_xml_path(output_dir, output_xml))
 
     subjob_specs = [
         {"subjob_id": subjob.subjob_id, "input_file": input_files[i], "output_file": output_files[i]}
         for i, subjob in enumerate(subjob_data)
     ]
     chunks = list(_chunked(subjob_specs, queue_batch_size))
+    if INCREMENTAL_XML_MERGE and output_dir:
+        # Each chunk appends its XML output to a partial merge as it finishes.
+        kwargs["xml_merge_dir"] = os.path.join(output_dir, "xml")
+        kwargs["merged_xml_path"] = resolve_merged_xml_path(output_dir, output_xml)
     rq_job_ids = [f"peakindexing_batch_{job_id}_{chunk_index}" for chunk_index in range(len(chunks))]
     chunk_subjob_ids = [[spec["subjob_id"] for spec in chunk] for chunk in chunks]
 
@@ -1,18 +1,29 @@
 """RQ worker execution functions for Laue processing jobs."""
 
 import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from datetime import datetime
 from typing import Any, Dict, List
 
 from laueanalysis.indexing import index
 from laueanalysis.reconstruct import reconstruct as wire_reconstruct
+from rq import get_current_job
 from sqlalchemy.orm import Session
 
 import laue_portal.database.session_utils as session_utils
 from laue_portal.database import db_schema
 from laue_portal.processing.queue.batch import notify_subjobs_completed
-from laue_portal.processing.queue.core import STATUS_REVERSE_MAPPING, WRITE_SUCCESS_SUBJOB_DETAILS
-from laue_portal.processing.queue.lifecycle import execute_with_status_updates, publish_job_update
+from laue_portal.processing.queue.core import (
+    PEAKINDEXING_CHUNK_WORKERS,
+    STATUS_REVERSE_MAPPING,
+    WRITE_SUCCESS_SUBJOB_DETAILS,
+)
+from laue_portal.processing.queue.lifecycle import (
+    execute_with_status_updates,
+    publish_job_update,
+    update_job_progress,
+)
+from laue_portal.processing.xml_merge import append_to_partial_merge
 
 logger = logging.getLogger(__name__)
 
@@ -68,9 +79,25 @@ def execute_peakindexing_chunk(
     index_h: int,
     index_k: int,
     index_l: int,
+    xml_merge_dir: str | None = None,
+    merged_xml_path: str | None = None,
+    index_workers: int | None = None,
     **kwargs,
 ):
-    """Execute a chunk of peak indexing subjobs with coalesced DB writes."""
+    """
+    Execute a chunk of peak indexing subjobs with coalesced DB writes.
+
+    The ``index()`` calls of the chunk are fanned out over a process pool
+    of ``index_workers`` processes (default ``LAUE_PEAKINDEXING_CHUNK_WORKERS``;
+    ``1`` runs them serially in the worker).  Progress is reported as each
+    subjob finishes, while the subjob rows are still written with a single
+    ``bulk_update_mappings`` once the whole chunk is done.
+
+    When ``xml_merge_dir`` and ``merged_xml_path`` are given, the per-point
+    XML files finished so far are appended to the job's partial merge
+    before the chunk reports completion, so results are viewable while the
+    job runs and the coordinator only has to finalize.
+    """
     if not chunk_specs:
         return []
 
@@ -90,67 +117,106 @@ def execute_peakindexing_chunk(
             job_data.start_time = chunk_start_time
             session.commit()
 
-    results = []
-    for spec in chunk_specs:
-        subjob_id = spec["subjob_id"]
-        input_file = spec["input_file"]
-        output_dir = spec["output_file"]
-        try:
-            index_result = index(
-                input_image=input_file,
-                output_dir=output_dir,
-                geo_file=geometry_file,
-                crystal_file=crystal_file,
-                boxsize=boxsize,
-                max_rfactor=max_rfactor,
-                min_size=min_size,
-                min_separation=min_separation,
-                threshold=threshold,
-                peak_shape=peak_shape,
-                max_peaks=max_peaks,
-                smooth=smooth,
-                index_kev_max_calc=index_kev_max_calc,
-                index_kev_max_test=index_kev_max_test,
-                index_angle_tolerance=index_angle_tolerance,
-                index_cone=index_cone,
-                index_h=index_h,
-                index_k=index_k,
-                index_l=index_l,
-                **kwargs,
+    index_kwargs = dict(
+        geo_file=geometry_file,
+        crystal_file=crystal_file,
+        boxsize=boxsize,
+        max_rfactor=max_rfactor,
+        min_size=min_size,
+        min_separation=min_separation,
+        threshold=threshold,
+        peak_shape=peak_shape,
+        max_peaks=max_peaks,
+        smooth=smooth,
+        index_kev_max_calc=index_kev_max_calc,
+        index_kev_max_test=index_kev_max_test,
+        index_angle_tolerance=index_angle_tolerance,
+        index_cone=index_cone,
+        index_h=index_h,
+        index_k=index_k,
+        index_l=index_l,
+        **kwargs,
+    )
+    workers = min(max(1, int(index_workers or PEAKINDEXING_CHUNK_WORKERS)), len(chunk_specs))
+    results: List[Dict[str, Any] | None] = [None] * len(chunk_specs)
+    rq_job = get_current_job()
+
+    def _record(position, update):
+        results[position] = update
+        done = sum(update is not None for update in results)
+        if rq_job is not None:
+            update_job_progress(
+                rq_job.id, int(100 * done / len(chunk_specs)), f"{done}/{len(chunk_specs)} subjob(s) indexed"
             )
 
-            update = {
-                "subjob_id": subjob_id,
-                "status": STATUS_REVERSE_MAPPING["Finished"],
-                "start_time": chunk_start_time,
-                "finish_time": datetime.now(),
+    if workers == 1:
+        for position, spec in enumerate(chunk_specs):
+            _record(position, _index_chunk_spec(job_id, spec, chunk_start_time, index_kwargs))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(_index_chunk_spec, job_id, spec, chunk_start_time, index_kwargs): position
+                for position, spec in enumerate(chunk_specs)
             }
-            if WRITE_SUCCESS_SUBJOB_DETAILS:
-                if hasattr(index_result, "command_history") and index_result.command_history:
-                    update["command"] = "\n".join(index_result.command_history)
-                update["messages"] = str(index_result)
-            results.append(update)
-        except Exception as e:
-            logger.exception(f"Peakindexing subjob {subjob_id} failed inside chunk for job {job_id}")
-            results.append(
-                {
-                    "subjob_id": subjob_id,
-                    "status": STATUS_REVERSE_MAPPING["Failed"],
-                    "start_time": chunk_start_time,
-                    "finish_time": datetime.now(),
-                    "messages": f"Error: {str(e)}",
-                }
-            )
+            for future in as_completed(futures):
+                position = futures[future]
+                try:
+                    update = future.result()
+                except Exception as e:
+                    # The pool itself failed (e.g. a killed process), not index().
+                    logger.exception(f"Peakindexing worker process failed inside chunk for job {job_id}")
+                    update = _failed_update(chunk_specs[position]["subjob_id"], chunk_start_time, e)
+                _record(position, update)
 
     with Session(session_utils.get_engine()) as session:
         session.bulk_update_mappings(db_schema.SubJob, results)
         session.commit()
 
+    if xml_merge_dir and merged_xml_path:
+        # Failures only cost time: the coordinator merges whatever is left.
+        merge_result = append_to_partial_merge(xml_merge_dir, merged_xml_path)
+        if not merge_result["success"]:
+            logger.warning(f"Incremental XML merge failed for job {job_id}: {merge_result['error']}")
+
     notify_subjobs_completed(job_id, len(results))
     publish_job_update(job_id, "running", f"Peakindexing chunk completed {len(results)} subjob(s)")
     return results
 
 
+def _index_chunk_spec(
+    job_id: int, spec: Dict[str, Any], chunk_start_time: datetime, index_kwargs: Dict[str, Any]
+) -> Dict[str, Any]:
+    """Run ``index()`` for one chunk spec and return its SubJob update mapping (never raises)."""
+    subjob_id = spec["subjob_id"]
+    try:
+        index_result = index(input_image=spec["input_file"], output_dir=spec["output_file"], **index_kwargs)
+    except Exception as e:
+        logger.exception(f"Peakindexing subjob {subjob_id} failed inside chunk for job {job_id}")
+        return _failed_update(subjob_id, chunk_start_time, e)
+
+    update = {
+        "subjob_id": subjob_id,
+        "status": STATUS_REVERSE_MAPPING["Finished"],
+        "start_time": chunk_start_time,
+        "finish_time": datetime.now(),
+    }
+    if WRITE_SUCCESS_SUBJOB_DETAILS:
+        if hasattr(index_result, "command_history") and index_result.command_history:
+            update["command"] = "\n".join(index_result.command_history)
+        update["messages"] = str(index_result)
+    return update
+
+
+def _failed_update(subjob_id: int, chunk_start_time: datetime, error: Exception) -> Dict[str, Any]:
+    return {
+        "subjob_id": subjob_id,
+        "status": STATUS_REVERSE_MAPPING["Failed"],
+        "start_time": chunk_start_time,
+        "finish_time": datetime.now(),
+        "messages": f"Error: {str(error)}",
+    }
+
+
 def execute_peakindexing_job(
     job_id: int,
     input_file: str,
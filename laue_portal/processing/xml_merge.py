@@ -1,15 +1,50 @@
 """XML output merge helpers for Laue processing jobs."""
 
+import fcntl
 import glob
+import itertools
+import json
 import logging
 import os
+import shutil
+import tempfile
 import xml.etree.ElementTree as ET
-from typing import Any, Dict
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from laue_portal.analysis import parse_cache, partial_xml
+from laue_portal.analysis.xml_parser import AllStepsAccumulator, concat_parsed
 
 logger = logging.getLogger(__name__)
 
+# Parallel merges hand each worker process batches of input files, keeping
+# a few batches per worker queued ahead of the (ordered) writer.
+_FILES_PER_TASK = 64
+_TASKS_PER_WORKER = 2
+
+_XML_HEADER = b'<?xml version="1.0" ?>\n<AllSteps>'
+_XML_FOOTER = partial_xml.XML_FOOTER
+_STEP_SEPARATOR = b"\n    "
+_PARTIAL_SUFFIX = ".partial"
+
 
-def merge_xml_files(xml_dir: str, output_xml_path: str) -> Dict[str, Any]:
+def resolve_merged_xml_path(output_dir: str, output_xml: str) -> str:
+    """
+    Return where the merged XML of a peakindexing job is written.
+
+    An absolute ``output_xml`` is used as is; a relative path or bare
+    filename is placed under ``output_dir``.
+    """
+    if os.path.isabs(output_xml):
+        return output_xml
+    return os.path.join(output_dir, output_xml)
+
+
+def merge_xml_files(xml_dir: str, output_xml_path: str, write_store: bool = True, workers: int = 1) -> Dict[str, Any]:
     """
     Merge multiple XML files from a directory into a single XML file.
 
@@ -17,18 +52,33 @@ def merge_xml_files(xml_dir: str, output_xml_path: str) -> Dict[str, Any]:
     The merged file will have a single <AllSteps> root containing all <step> elements
     from all input files.
 
+    The merge is streamed: the <AllSteps> header is written first and each
+    input file's <step> subtrees are indented, serialized and released as
+    soon as they are read, so memory is bounded by the largest input file
+    rather than the whole job.  Output goes to a temporary file that is
+    renamed over ``output_xml_path`` only once the merge succeeds.
+
+    While merging, each <step> is also reduced into the columnar results store
+    that ``parse_indexing_xml`` would build from the merged file, and that store
+    is written as the merged XML's parse-cache sidecar.  The viewer then opens
+    the store directly instead of parsing the XML again.
+
     Args:
         xml_dir: Directory containing the individual XML files
         output_xml_path: Path for the merged output XML file
+        write_store: Also write the columnar results store (default True)
+        workers: Number of processes used to parse input files.  Steps are
+            always written in sorted file order regardless of this setting.
 
     Returns:
         Dict with merge status information:
         - success: bool
         - files_merged: int
         - output_path: str
+        - store_path: str (None if no store was written)
         - error: str (if failed)
     """
-    result = {"success": False, "files_merged": 0, "output_path": output_xml_path, "error": None}
+    result = {"success": False, "files_merged": 0, "output_path": output_xml_path, "store_path": None, "error": None}
 
     try:
         # Find all XML files in the directory
@@ -40,64 +90,464 @@ def merge_xml_files(xml_dir: str, output_xml_path: str) -> Dict[str, Any]:
             logger.warning(result["error"])
             return result
 
-        # Create the merged root element
-        merged_root = ET.Element("AllSteps")
-
-        # Process each XML file
-        for xml_file in xml_files:
-            try:
-                tree = ET.parse(xml_file)
-                root = tree.getroot()
-
-                # Find all <step> elements and add them to the merged root.
-                # Use a match that handles both namespaced and non-namespaced
-                # step elements. ElementTree represents namespaced tags as
-                # {namespace_uri}localname, so a plain findall('.//step') will
-                # miss elements like <step xmlns="...">.
-                found_steps = root.findall(".//step")
-                if not found_steps:
-                    # Try wildcard namespace match: .//{*}step matches
-                    # <step> in any namespace (Python 3.8+)
-                    found_steps = root.findall(".//{*}step")
-
-                for step in found_steps:
-                    # Deep copy the step element to avoid issues with element ownership
-                    merged_root.append(step)
-
-            except ET.ParseError as e:
-                logger.warning(f"Failed to parse XML file {xml_file}: {e}")
-                continue
-            except Exception as e:
-                logger.warning(f"Error processing XML file {xml_file}: {e}")
-                continue
-
-        # Check if we have any steps (handle both namespaced and non-namespaced)
-        steps = list(merged_root)
-        if not steps:
-            result["error"] = f"No valid <step> elements found in XML files from {xml_dir}"
-            logger.warning(result["error"])
-            return result
-
         # Create the output directory if it doesn't exist
         output_dir = os.path.dirname(output_xml_path)
         if output_dir and not os.path.exists(output_dir):
             os.makedirs(output_dir, exist_ok=True)
 
-        # Format and write the merged XML file
-        ET.indent(merged_root, space="    ")
-        tree = ET.ElementTree(merged_root)
+        accumulator = AllStepsAccumulator() if write_store else None
+        fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(output_xml_path)}.", dir=output_dir or None)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(_XML_HEADER)
+                n_steps = 0
+                for text, step in _iter_file_steps(xml_files, workers, want_elements=accumulator is not None):
+                    f.write(_STEP_SEPARATOR)
+                    f.write(text.encode("utf-8"))
+                    n_steps += 1
+                    if step is not None:
+                        accumulator.add_step(step)
+                f.write(_XML_FOOTER)
 
-        with open(output_xml_path, "w", encoding="utf-8") as f:
-            f.write('<?xml version="1.0" ?>\n')
-            tree.write(f, encoding="unicode", xml_declaration=False)
+            # Check if we have any steps (handle both namespaced and non-namespaced)
+            if not n_steps:
+                result["error"] = f"No valid <step> elements found in XML files from {xml_dir}"
+                logger.warning(result["error"])
+                return result
+
+            os.chmod(tmp_path, 0o644)  # mkstemp creates 0600
+            os.replace(tmp_path, output_xml_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
 
         result["success"] = True
         result["files_merged"] = len(xml_files)
         logger.info(f"Successfully merged {len(xml_files)} XML files into {output_xml_path}")
 
+        if accumulator is not None and len(accumulator):
+            result["store_path"] = _write_results_store(output_xml_path, lambda: accumulator.finish(output_xml_path))
+
         return result
 
     except Exception as e:
         result["error"] = str(e)
         logger.error(f"Error merging XML files: {e}")
         return result
+
+
+def _read_steps(xml_file: str, quiet: bool = False) -> Optional[List[ET.Element]]:
+    """Parse one input file and return its <step> elements (``None`` if unreadable)."""
+    try:
+        root = ET.parse(xml_file).getroot()
+    except ET.ParseError as e:
+        if not quiet:
+            logger.warning(f"Failed to parse XML file {xml_file}: {e}")
+        return None
+    except Exception as e:
+        if not quiet:
+            logger.warning(f"Error processing XML file {xml_file}: {e}")
+        return None
+
+    # Use a match that handles both namespaced and non-namespaced
+    # step elements. ElementTree represents namespaced tags as
+    # {namespace_uri}localname, so a plain findall('.//step') will
+    # miss elements like <step xmlns="...">.
+    found_steps = root.findall(".//step")
+    if not found_steps:
+        # Try wildcard namespace match: .//{*}step matches
+        # <step> in any namespace (Python 3.8+)
+        found_steps = root.findall(".//{*}step")
+    return found_steps
+
+
+def _serialize_step(step: ET.Element) -> str:
+    """Serialize one <step> as a child of <AllSteps>, indented as ``ET.indent`` would."""
+    step.tail = None
+    ET.indent(step, space="    ", level=1)
+    return ET.tostring(step, encoding="unicode")
+
+
+def _read_serialized_steps(xml_files: List[str]) -> List[Tuple[bool, str]]:
+    """Process-pool worker: ``(is_plain_step, text)`` for each step of a batch of files."""
+    return [
+        (step.tag == "step", _serialize_step(step)) for xml_file in xml_files for step in _read_steps(xml_file) or []
+    ]
+
+
+def _iter_file_steps(
+    xml_files: List[str], workers: int, want_elements: bool
+) -> Iterator[Tuple[str, ET.Element | None]]:
+    """
+    Yield ``(text, element)`` for every step of every input file, in file order.
+
+    ``element`` is the parsed plain <step> when ``want_elements`` is set
+    (for the results store) and ``None`` otherwise.  With ``workers > 1``
+    files are parsed and serialized in a process pool, ``_FILES_PER_TASK``
+    at a time.  Only ``_TASKS_PER_WORKER`` tasks per worker are in flight,
+    so pending output stays bounded while file order is preserved.
+    """
+    if workers <= 1 or len(xml_files) <= _FILES_PER_TASK:
+        for xml_file in xml_files:
+            for step in _read_steps(xml_file) or []:
+                yield _serialize_step(step), step if want_elements and step.tag == "step" else None
+        return
+
+    batches = (xml_files[i : i + _FILES_PER_TASK] for i in range(0, len(xml_files), _FILES_PER_TASK))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque(
+            pool.submit(_read_serialized_steps, batch)
+            for batch in itertools.islice(batches, workers * _TASKS_PER_WORKER)
+        )
+        while pending:
+            future = pending.popleft()
+            for batch in itertools.islice(batches, 1):
+                pending.append(pool.submit(_read_serialized_steps, batch))
+            for is_plain, text in future.result():
+                # Re-parsing the serialized text is far cheaper than pickling Elements.
+                yield text, ET.fromstring(text) if want_elements and is_plain else None
+
+
+def _write_results_store(output_xml_path: str, build: Callable[[], dict]) -> str | None:
+    """
+    Write the columnar store returned by ``build()`` as the merged XML's parse-cache sidecar.
+
+    It always goes next to the merged XML, in the job's output directory,
+    whatever ``LAUE_PARSE_CACHE_DIR`` is set to: the viewer may run as
+    another user or on another host and could not see this worker's cache.
+    """
+    try:
+        parsed = build()
+        store_path = parse_cache.write_sidecar(
+            parsed,
+            output_xml_path,
+            os.stat(output_xml_path),
+            path=parse_cache.adjacent_path(output_xml_path),
+        )
+    except Exception as e:
+        # The merged XML is still valid; the viewer will just parse it itself.
+        logger.warning(f"Failed to write results store for {output_xml_path}: {e}")
+        return None
+    if store_path is not None:
+        logger.info(f"Wrote columnar results store {store_path}")
+        return str(store_path)
+    return None
+
+
+# ---------------------------------------------------------------------------
+# Incremental merge
+# ---------------------------------------------------------------------------
+#
+# Each peakindexing chunk appends the per-point XML files it finds that are
+# not yet merged to ``<output>.partial.xml``, in the order the chunks finish.
+# A JSON manifest records, per input file, the byte span of its steps in the
+# partial XML, its row range in the per-append results stores, and its
+# mtime and size (a changed file is merged again).  Appends write only the
+# new steps, in place, and then publish the new end of the document (see
+# ``laue_portal.analysis.partial_xml``); the viewer, which opens the file
+# while the job runs, reads up to that end, so it never sees a half-written
+# step.  Finalizing parses only the files no chunk has merged yet, then
+# reorders by copying byte spans and gathering store rows -- no XML is
+# re-parsed.
+
+
+def partial_xml_path(merged_xml_path: str) -> str:
+    """Path of the in-progress merge that becomes ``merged_xml_path``."""
+    root, ext = os.path.splitext(merged_xml_path)
+    return f"{root}{_PARTIAL_SUFFIX}{ext or '.xml'}"
+
+
+def is_partial_xml_path(xml_path: str) -> bool:
+    """True if ``xml_path`` names an in-progress merge (see :func:`partial_xml_path`)."""
+    return os.path.splitext(os.path.splitext(xml_path)[0])[1] == _PARTIAL_SUFFIX
+
+
+def _manifest_path(partial_path: str) -> str:
+    return f"{partial_path}.manifest.json"
+
+
+def _parts_dir(partial_path: str) -> str:
+    return f"{partial_path}.parts"
+
+
+@contextmanager
+def _merge_lock(partial_path: str):
+    """Serialize appends to one partial merge across worker processes."""
+    with open(f"{partial_path}.lock", "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+def _load_manifest(partial_path: str, write_store: bool) -> Dict[str, Any]:
+    path = _manifest_path(partial_path)
+    if os.path.exists(path) and os.path.exists(partial_path):
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    # "end" is where the next step is written (just before </AllSteps>).
+    return {"end": len(_XML_HEADER), "files": {}, "parts": [], "next_part": 0, "n_stored": 0, "store": write_store}
+
+
+def _save_manifest(partial_path: str, manifest: Dict[str, Any]) -> None:
+    path = _manifest_path(partial_path)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(json.dumps(manifest))
+    os.replace(tmp_path, path)
+
+
+def _append_new_files(xml_dir: str, partial_path: str, manifest: Dict[str, Any], final: bool) -> int:
+    """
+    Append the steps of every new or changed file in ``xml_dir`` to the partial XML.
+
+    A file is (re-)merged unless the manifest holds it with its current
+    mtime and size; a re-merged file's earlier steps stay in the partial
+    XML but are no longer referenced by the manifest.  Unreadable files are
+    left for a later append (a running subjob may still be writing them)
+    unless ``final`` is set, in which case they are recorded as merged with
+    no steps, as :func:`merge_xml_files` skips them.  Returns the number of
+    files appended.
+
+    Only the new steps are written: the partial XML grows in place and the
+    caller publishes its new end (see :mod:`laue_portal.analysis.partial_xml`)
+    once the manifest is saved.
+    """
+    merged = manifest["files"]
+    new_files = []
+    for xml_file in sorted(glob.glob(os.path.join(xml_dir, "*.xml"))):
+        stat = os.stat(xml_file)
+        entry = merged.get(os.path.basename(xml_file))
+        if entry is None or (entry.get("mtime_ns"), entry.get("size")) != (stat.st_mtime_ns, stat.st_size):
+            new_files.append((xml_file, stat))
+    if not new_files:
+        return 0
+
+    accumulator = AllStepsAccumulator() if manifest["store"] else None
+    n_stored = manifest["n_stored"]
+    appended = 0
+    fresh = not (merged and os.path.exists(partial_path))
+    if fresh:
+        # The first version is written whole and renamed into place.
+        fd, tmp_path = tempfile.mkstemp(
+            prefix=f".{os.path.basename(partial_path)}.", dir=os.path.dirname(partial_path) or None
+        )
+        f = os.fdopen(fd, "w+b")
+        f.write(_XML_HEADER)
+        manifest["end"] = len(_XML_HEADER)
+    else:
+        tmp_path = None
+        f = open(partial_path, "r+b")
+    try:
+        with f:
+            # Bytes up to the published end are never rewritten.
+            f.seek(manifest["end"])
+            for xml_file, stat in new_files:
+                steps = _read_steps(xml_file, quiet=not final)
+                if steps is None and not final:
+                    continue
+                span_start = f.tell()
+                row_start = n_stored + (len(accumulator) if accumulator is not None else 0)
+                for step in steps or []:
+                    f.write(_STEP_SEPARATOR)
+                    f.write(_serialize_step(step).encode("utf-8"))
+                    # parse_indexing_xml only reads plain (non-namespaced) steps
+                    if accumulator is not None and step.tag == "step":
+                        accumulator.add_step(step)
+                row_stop = n_stored + (len(accumulator) if accumulator is not None else 0)
+                merged[os.path.basename(xml_file)] = {
+                    "span": [span_start, f.tell()],
+                    "rows": [row_start, row_stop],
+                    "mtime_ns": stat.st_mtime_ns,
+                    "size": stat.st_size,
+                }
+                appended += 1
+            manifest["end"] = f.tell()
+            # Keeps the file a complete document for tools that ignore the published end.
+            f.write(_XML_FOOTER)
+            f.truncate()
+        if tmp_path is not None:
+            os.chmod(tmp_path, 0o644)  # mkstemp creates 0600
+            _unlink_if_exists(partial_xml.published_path(partial_path))
+            os.replace(tmp_path, partial_path)
+    finally:
+        if tmp_path is not None:
+            _unlink_if_exists(tmp_path)
+
+    obsolete = []
+    if accumulator is not None and len(accumulator):
+        _add_part(partial_path, manifest, accumulator.finish(partial_path))
+        manifest["n_stored"] += len(accumulator)
+        obsolete = _compact_parts(partial_path, manifest)
+    _save_manifest(partial_path, manifest)
+    partial_xml.publish_end(partial_path, manifest["end"])
+    # Only drop merged parts once the manifest no longer refers to them.
+    for name in obsolete:
+        os.unlink(os.path.join(_parts_dir(partial_path), name))
+    return appended
+
+
+def _add_part(partial_path: str, manifest: Dict[str, Any], parsed: dict) -> None:
+    name = f"part_{manifest['next_part']:05d}.npz"
+    manifest["next_part"] += 1
+    parse_cache.write_store(os.path.join(_parts_dir(partial_path), name), parsed)
+    manifest["parts"].append({"name": name, "n_steps": len(parsed["_steps"])})
+
+
+def _compact_parts(partial_path: str, manifest: Dict[str, Any]) -> List[str]:
+    """
+    Merge trailing results-store parts of similar size, like a binary counter.
+
+    Keeps O(log n) parts for finalizing to read at an amortized O(n log n)
+    total cost.  Returns the names of the parts that were merged away.
+    """
+    parts = manifest["parts"]
+    parts_dir = _parts_dir(partial_path)
+    obsolete = []
+    while len(parts) >= 2 and parts[-2]["n_steps"] <= parts[-1]["n_steps"]:
+        last = parts.pop()
+        previous = parts.pop()
+        merged = concat_parsed([parse_cache.read_store(os.path.join(parts_dir, p["name"])) for p in (previous, last)])
+        _add_part(partial_path, manifest, merged)
+        obsolete += [previous["name"], last["name"]]
+    return obsolete
+
+
+def append_to_partial_merge(xml_dir: str, merged_xml_path: str, write_store: bool = True) -> Dict[str, Any]:
+    """
+    Append newly finished per-point XML files to the job's partial merge.
+
+    Called by each peakindexing chunk once its subjobs are done, so the
+    work of merging is spread over the job and the partial XML (see
+    :func:`partial_xml_path`) shows the results so far.  Safe to call
+    concurrently from several workers.
+
+    Args:
+        xml_dir: Directory containing the individual XML files
+        merged_xml_path: Final merged XML path of the job
+        write_store: Also keep columnar results stores for the appended
+            steps (only honoured by the first append of a job)
+
+    Returns:
+        Dict with success, files_appended, partial_path and error.
+    """
+    partial_path = partial_xml_path(merged_xml_path)
+    result = {"success": False, "files_appended": 0, "partial_path": partial_path, "error": None}
+    try:
+        os.makedirs(os.path.dirname(partial_path) or ".", exist_ok=True)
+        with _merge_lock(partial_path):
+            manifest = _load_manifest(partial_path, write_store)
+            result["files_appended"] = _append_new_files(xml_dir, partial_path, manifest, final=False)
+        result["success"] = True
+    except Exception as e:
+        result["error"] = str(e)
+        logger.error(f"Error appending XML files to {partial_path}: {e}")
+    return result
+
+
+def finalize_partial_merge(
+    xml_dir: str, merged_xml_path: str, write_store: bool = True, workers: int = 1
+) -> Dict[str, Any]:
+    """
+    Turn a job's partial merge into the final merged XML.
+
+    Any files the chunks have not merged yet are appended first, then the
+    steps are written to ``merged_xml_path`` in sorted file order by
+    copying their byte spans out of the partial XML, so the output is
+    identical to :func:`merge_xml_files`.  The per-append results stores
+    are reordered the same way into the merged XML's parse-cache sidecar.
+    The partial files are removed afterwards.
+
+    Falls back to :func:`merge_xml_files` when the job has no partial merge.
+    Returns the same dict as :func:`merge_xml_files`.
+    """
+    partial_path = partial_xml_path(merged_xml_path)
+    if not os.path.exists(_manifest_path(partial_path)):
+        return merge_xml_files(xml_dir, merged_xml_path, write_store=write_store, workers=workers)
+
+    result = {"success": False, "files_merged": 0, "output_path": merged_xml_path, "store_path": None, "error": None}
+    try:
+        with _merge_lock(partial_path):
+            manifest = _load_manifest(partial_path, write_store)
+            _append_new_files(xml_dir, partial_path, manifest, final=True)
+            files = [manifest["files"][name] for name in sorted(manifest["files"])]
+
+            if not files:
+                result["error"] = f"No XML files found in {xml_dir}"
+                logger.warning(result["error"])
+                return result
+            if all(entry["span"][0] == entry["span"][1] for entry in files):
+                result["error"] = f"No valid <step> elements found in XML files from {xml_dir}"
+                logger.warning(result["error"])
+                return result
+
+            output_dir = os.path.dirname(merged_xml_path)
+            fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(merged_xml_path)}.", dir=output_dir or None)
+            try:
+                with os.fdopen(fd, "wb") as out, open(partial_path, "rb") as partial:
+                    out.write(_XML_HEADER)
+                    for entry in files:
+                        start, stop = entry["span"]
+                        partial.seek(start)
+                        out.write(partial.read(stop - start))
+                    out.write(_XML_FOOTER)
+                os.chmod(tmp_path, 0o644)  # mkstemp creates 0600
+                os.replace(tmp_path, merged_xml_path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+
+            result["success"] = True
+            result["files_merged"] = len(files)
+            logger.info(f"Finalized incremental merge of {len(files)} XML files into {merged_xml_path}")
+
+            if write_store and manifest["store"] and manifest["n_stored"]:
+                order = np.concatenate([np.arange(*entry["rows"], dtype=np.int64) for entry in files])
+                parts_dir = _parts_dir(partial_path)
+                result["store_path"] = _write_results_store(
+                    merged_xml_path,
+                    lambda: concat_parsed(
+                        [parse_cache.read_store(os.path.join(parts_dir, p["name"])) for p in manifest["parts"]], order
+                    ),
+                )
+
+            _remove_partial_merge(partial_path)
+        return result
+
+    except Exception as e:
+        result["error"] = str(e)
+        logger.error(f"Error finalizing merge into {merged_xml_path}: {e}")
+        return result
+
+
+def clear_partial_merge(merged_xml_path: str) -> None:
+    """
+    Remove any partial merge left behind for ``merged_xml_path``.
+
+    Called when a job is enqueued, so a run into the same output directory
+    never resumes the manifest (and byte spans) of an earlier, crashed or
+    failed run.
+    """
+    _remove_partial_merge(partial_xml_path(merged_xml_path))
+
+
+def _remove_partial_merge(partial_path: str) -> None:
+    # The lock file goes too; flock holds on the open descriptor, not the name.
+    paths = [
+        partial_path,
+        _manifest_path(partial_path),
+        partial_xml.published_path(partial_path),
+        f"{partial_path}.lock",
+        *parse_cache.sidecar_paths(partial_path),
+    ]
+    for path in paths:
+        _unlink_if_exists(path)
+    shutil.rmtree(_parts_dir(partial_path), ignore_errors=True)
+
+
+def _unlink_if_exists(path) -> None:
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
@@ -6,6 +6,8 @@ import fire
 import h5py
 import numpy as np
 
+from laue_portal.recon.results_writer import ResultsWriter
+
 
 def savenpyimg(path, vals, inds, shape, frame=None, swap=False):
     _vals = cold.expand(vals, inds, shape)
@@ -52,9 +54,9 @@ def savenpyimg2(path, vals, frame=None, swap=False):
 
 def saveh5basic(path, name, vals):
 
-    with h5py.File(path + ".h5", "a") as f:
-        if name not in f.keys():
-            f.create_dataset(name, data=vals)
+    with ResultsWriter(path + ".h5") as writer:
+        if name not in writer:
+            writer.write(name, vals)
 
     logging.info(f"Saved: {name} in + {path}.h5")
 
@@ -2,7 +2,6 @@ import warnings
 from pathlib import Path
 
 import fire
-import h5py
 import numpy as np
 import pandas as pd
 
@@ -13,6 +12,8 @@ import time
 import cold
 
 import laue_portal.recon.calib_indices as calib_indices
+from laue_portal.analysis.recon_results import IMAGES_GROUP
+from laue_portal.recon.results_writer import ResultsWriter, source_depths, write_depth_stacks
 
 resolve_data = True
 
@@ -78,52 +79,11 @@ def choose_indices(indices_selection):
     return indices
 
 
-def saveh5img(path, name, vals, inds, shape, frame=None, swap=False):
-    _vals = cold.expand(vals, inds, shape)
-    data = _vals
-
-    """Saves Laue diffraction data to file."""
-
-    if frame is not None:
-        data = data[frame[0] : frame[1], frame[2] : frame[3]]
-    if swap is True:
-        data = np.swapaxes(data, 0, 2)
-        data = np.swapaxes(data, 1, 2)
-
-    with h5py.File(path + ".h5", "a") as f:
-        if name not in f.keys():
-            f.create_dataset(name, data=data)
-
-    logging.info(f"Saved: {name} in + {path}.h5")
-
-
-def savenpyimg(path, vals, inds, shape, frame=None, swap=False):
-    _vals = cold.expand(vals, inds, shape)
-    data = _vals
-
-    """Saves Laue diffraction data to file."""
-
-    if frame is not None:
-        data = data[frame[0] : frame[1], frame[2] : frame[3]]
-    if swap is True:
-        data = np.swapaxes(data, 0, 2)
-        data = np.swapaxes(data, 1, 2)
-
-    with open(path + ".npy", "wb") as f:
-        if data.ndim > 2:
-            saved_data = np.sum(data, axis=2)
-        else:
-            saved_data = data.copy()
-        np.save(f, saved_data)
-
-    logging.info(f"Saved: {path}.npy")
-
-
 def saveh5basic(path, name, vals):
 
-    with h5py.File(path + ".h5", "a") as f:
-        if name not in f.keys():
-            f.create_dataset(name, data=vals)
+    with ResultsWriter(path + ".h5") as writer:
+        if name not in writer:
+            writer.write(name, vals)
 
     logging.info(f"Saved: {name} in + {path}.h5")
 
@@ -214,10 +174,6 @@ def run_recon(config_dict, indices_selection="CALIB_3_X1800", debug=False):
 
     shape_, frame_ = (file["frame"][1], file["frame"][3]), file["frame"]
 
-    h5path_ = str(output_dir / ("img" + "results"))
-
-    savenpyimg(h5path_, lau, ind, shape_, frame_)
-
     h5path = str(output_dir / "results")
     saveh5basic(h5path, "ind", np.flip(ind, axis=1))
     saveh5basic(h5path, "ene", ene)
@@ -225,6 +181,13 @@ def run_recon(config_dict, indices_selection="CALIB_3_X1800", debug=False):
     saveh5basic(h5path, "sig", sig)
     saveh5basic(h5path, "lau", lau)
 
+    # Integrated and depth-binned images for the reconstruction page
+    # (replaces the expanded-cube imgresults.npy).
+    depths = source_depths(geo.get("source"), lau.shape[1])
+    with ResultsWriter(h5path + ".h5") as writer:
+        if IMAGES_GROUP not in writer:
+            write_depth_stacks(writer, lau, ind, shape_, depths=depths, frame=frame_)
+
     # Save a list of all indices used
     with open(output_dir / ("indices" + name_append + ".txt"), "w") as f:
         f.writelines("\n".join([str(i) for i in ind]))
@@ -0,0 +1,250 @@
+"""
+Chunked, compressed writer for reconstruction ``results.h5`` files.
+
+``lau``, ``pos``, ``sig`` and ``ind`` used to be written with a plain
+``create_dataset(data=...)``: one contiguous, uncompressed block per
+array that had to be fully in memory.  :class:`ResultsWriter` creates
+every dataset chunked along the viewer's access patterns -- axis 0 is the
+pixel, axis 1 the depth bin -- so a per-pixel depth lineout and a
+per-depth image each touch only the chunks that hold them.  Datasets are
+resizable along the pixel axis, so blocks of pixels can be appended as
+they finish.
+
+:func:`write_depth_stacks` adds the images the reconstruction page shows:
+the depth-integrated image and stacks of depth-binned images at several
+bin widths (1, 5 and 25 um by default), chunked one tile of one slice at a
+time so the page's depth slider reads a single slice.
+
+Compression is chosen by ``LAUE_RECON_COMPRESSION``:
+
+- ``gzip`` (default): gzip level 1 with byte shuffle, readable by any
+  HDF5 installation.
+- ``lz4``: Blosc/LZ4 through the optional ``hdf5plugin`` package.  Faster,
+  but every reader of the file needs ``hdf5plugin`` as well.
+- ``none``: chunked, uncompressed.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+
+import h5py
+import numpy as np
+
+from laue_portal.analysis.recon_results import IMAGES_GROUP, INTEGRATED_IMAGE, depth_stack_name
+
+DEPTH_BIN_WIDTHS = (1.0, 5.0, 25.0)
+
+# Target size of one uncompressed chunk.
+_CHUNK_BYTES = 128 * 1024
+# Depth bins per chunk: a lineout reads depth / _DEPTH_CHUNK chunks.
+_DEPTH_CHUNK = 8
+# Image chunks are _IMAGE_TILE x _IMAGE_TILE pixels of one slice.
+_IMAGE_TILE = 256
+
+
+def compression_options(compression: str | None = None) -> dict:
+    """
+    ``create_dataset`` keyword arguments for ``compression``.
+
+    Parameters
+    ----------
+    compression : {"gzip", "lz4", "none"}, optional
+        Defaults to ``LAUE_RECON_COMPRESSION`` (``"gzip"`` if unset).
+
+    Raises
+    ------
+    ValueError
+        For an unknown name.
+    ImportError
+        For ``"lz4"`` without ``hdf5plugin``.
+    """
+    compression = (compression or os.environ.get("LAUE_RECON_COMPRESSION") or "gzip").lower()
+    if compression == "none":
+        return {}
+    if compression == "gzip":
+        return {"compression": "gzip", "compression_opts": 1, "shuffle": True}
+    if compression == "lz4":
+        try:
+            import hdf5plugin
+        except ImportError as exc:
+            raise ImportError("LAUE_RECON_COMPRESSION=lz4 requires the hdf5plugin package") from exc
+        return dict(hdf5plugin.Blosc(cname="lz4", clevel=5, shuffle=hdf5plugin.Blosc.SHUFFLE))
+    raise ValueError(f"Unknown compression {compression!r}")
+
+
+def chunk_shape(shape: tuple, itemsize: int, max_rows: int | None = None) -> tuple:
+    """
+    Chunk shape for a per-pixel array of ``shape``.
+
+    Axis 1 (depth) is split into blocks of at most 8 bins and any further
+    axes are kept whole; axis 0 (pixels) gets as many rows as fit in
+    about 128 KiB, capped at ``max_rows``.
+    """
+    trailing = [max(int(n), 1) for n in shape[1:]]
+    if trailing:
+        trailing[0] = min(trailing[0], _DEPTH_CHUNK)
+    rows = max(_CHUNK_BYTES // (itemsize * math.prod(trailing)), 1)
+    if max_rows:
+        rows = min(rows, max_rows)
+    return (rows, *trailing)
+
+
+class ResultsWriter:
+    """
+    Write per-pixel reconstruction arrays to one HDF5 file.
+
+    Parameters
+    ----------
+    path : str
+        Output file, opened in append mode (existing datasets are kept).
+    compression : str, optional
+        See :func:`compression_options`.
+    """
+
+    def __init__(self, path, compression: str | None = None):
+        self.path = path
+        self._options = compression_options(compression)
+        self._file = h5py.File(path, "a")
+
+    def __enter__(self) -> ResultsWriter:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._file
+
+    def write(self, name: str, values) -> h5py.Dataset:
+        """Create dataset ``name`` holding ``values`` (still appendable along axis 0)."""
+        values = np.asarray(values)
+        if values.ndim == 0:
+            return self._file.create_dataset(name, data=values)
+        dataset = self._create(name, values.shape, values.dtype, max_rows=len(values))
+        dataset[...] = values
+        return dataset
+
+    def append(self, name: str, block) -> h5py.Dataset:
+        """Append the rows (pixels) of ``block`` to ``name``, creating it on first use."""
+        block = np.asarray(block)
+        if block.ndim == 0:
+            raise ValueError(f"Cannot append a scalar to {name!r}")
+        if name in self._file:
+            dataset = self._file[name]
+            start = dataset.shape[0]
+            dataset.resize(start + len(block), axis=0)
+        else:
+            dataset = self._create(name, block.shape, block.dtype)
+            start = 0
+        dataset[start : start + len(block)] = block
+        return dataset
+
+    def create_images(self, name: str, shape: tuple, dtype=np.float32) -> h5py.Dataset:
+        """Create an image (``(ny, nx)``) or image stack (``(n, ny, nx)``) dataset, chunked by tile."""
+        tile = tuple(max(min(int(n), _IMAGE_TILE), 1) for n in shape[-2:])
+        return self._file.create_dataset(
+            name, shape=shape, dtype=dtype, chunks=(1,) * (len(shape) - 2) + tile, **self._options
+        )
+
+    def close(self) -> None:
+        self._file.close()
+
+    def _create(self, name: str, shape: tuple, dtype, max_rows: int | None = None) -> h5py.Dataset:
+        dtype = np.dtype(dtype)
+        return self._file.create_dataset(
+            name,
+            shape=shape,
+            dtype=dtype,
+            maxshape=(None, *shape[1:]),
+            chunks=chunk_shape(shape, dtype.itemsize, max_rows),
+            **self._options,
+        )
+
+
+def depth_bin_starts(depths: np.ndarray, bin_width: float) -> np.ndarray:
+    """
+    First depth index of every ``bin_width`` bin of the ascending ``depths``.
+
+    Bins are aligned to ``depths[0]``; use with ``np.add.reduceat``.
+    """
+    labels = np.floor((np.asarray(depths, dtype=float) - depths[0]) / bin_width + 1e-9).astype(np.int64)
+    return np.flatnonzero(np.r_[True, labels[1:] != labels[:-1]])
+
+
+def source_depths(source: dict | None, n_bins: int) -> np.ndarray | None:
+    """
+    Depth (um) of each of the ``n_bins`` reconstructed bins of ``geo.source``.
+
+    ``source["grid"]`` is ``[start, stop, step]`` and ``source["offset"]``
+    a shift, both in mm (as shown, times 1000, on the scan page).  Returns
+    ``None`` without a grid.
+    """
+    grid = (source or {}).get("grid")
+    if not grid:
+        return None
+    return 1000.0 * (grid[0] + (source.get("offset") or 0) + grid[2] * np.arange(n_bins))
+
+
+def write_depth_stacks(
+    writer: ResultsWriter,
+    lau: np.ndarray,
+    ind: np.ndarray,
+    shape: tuple,
+    depths: np.ndarray | None = None,
+    bin_widths=DEPTH_BIN_WIDTHS,
+    frame=None,
+) -> None:
+    """
+    Write the integrated image and depth-binned image stacks of a reconstruction.
+
+    Pixel values are placed as ``cold.expand`` does, without expanding the
+    whole (ny, nx, depth) cube: each slice is summed over its depth bins
+    per pixel and scattered into one image at a time.
+
+    Parameters
+    ----------
+    writer : ResultsWriter
+        Destination; datasets go under ``images/``.
+    lau : ndarray (N, D)
+        Depth profile of each reconstructed pixel.
+    ind : ndarray (N, 2)
+        (row, column) of each pixel, as passed to ``cold.expand``.
+    shape : tuple
+        (ny, nx) detector image shape.
+    depths : ndarray (D,), optional
+        Ascending depth of each bin in um (default: ``0 .. D-1``).
+    bin_widths : sequence of float
+        Depth bin widths in um.  Widths that give the same bins as a
+        previous one are skipped.
+    frame : sequence of 4 ints, optional
+        ``[row0, row1, col0, col1]`` crop (the recon config's ``file.frame``).
+    """
+    lau = np.asarray(lau)
+    ind = np.asarray(ind)
+    depths = np.arange(lau.shape[1], dtype=float) if depths is None else np.asarray(depths, dtype=float)
+    row0, row1, col0, col1 = frame if frame is not None else (0, shape[0], 0, shape[1])
+    rows, cols = ind[:, 0] - row0, ind[:, 1] - col0
+    inside = (rows >= 0) & (rows < row1 - row0) & (cols >= 0) & (cols < col1 - col0)
+    rows, cols, lau = rows[inside], cols[inside], lau[inside]
+    image_shape = (row1 - row0, col1 - col0)
+
+    image = np.zeros(image_shape, dtype=np.float32)
+    image[rows, cols] = lau.sum(axis=1)
+    writer.create_images(f"{IMAGES_GROUP}/{INTEGRATED_IMAGE}", image_shape)[...] = image
+
+    seen = set()
+    for width in sorted(float(w) for w in bin_widths):
+        starts = depth_bin_starts(depths, width)
+        if tuple(starts) in seen:
+            continue
+        seen.add(tuple(starts))
+        stops = np.r_[starts[1:], len(depths)]
+        stack = writer.create_images(depth_stack_name(width), (len(starts), *image_shape))
+        stack.attrs["bin_width"] = width
+        stack.attrs["depth"] = (depths[starts] + depths[stops - 1]) / 2.0
+        for k, (start, stop) in enumerate(zip(starts, stops, strict=True)):
+            # Every slice writes the same pixels, so the rest of ``image`` stays zero.
+            image[rows, cols] = lau[:, start:stop].sum(axis=1)
+            stack[k] = image
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Benchmark the vectorised q → pixel back-projection against the scalar port.
+
+Pushes N random reciprocal-space vectors through ``q_to_pixel`` one row at
+a time and through ``q_to_pixel_batch`` in one call, checks that both agree
+and reports the speed-up.  The default sizes bracket the ~15k candidate
+HKLs (``hkl_limit=12``) that the missing-spot overlay projects per pattern.
+
+Usage:
+    python scripts/benchmarks/bench_back_projection.py
+    python scripts/benchmarks/bench_back_projection.py --sizes 1000 15625 100000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir))
+sys.path.insert(0, PROJECT_ROOT)
+
+from laue_portal.analysis.back_projection import q_to_pixel, q_to_pixel_batch  # noqa: E402
+from laue_portal.analysis.geometry import DetectorGeometry  # noqa: E402
+
+
+def _best_of(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 15625])
+    parser.add_argument("--repeat", type=int, default=3, help="timing repeats (best is reported)")
+    args = parser.parse_args()
+
+    # 34ID-E style top detector, tilted ~90 degrees about (-1,-1,-1).
+    detector = DetectorGeometry(R=[-1.2, -1.2, -1.2], P=[25.3, -2.1, 510.0])
+    rng = np.random.default_rng(0)
+
+    print(f"{'N':>8} {'scalar loop (s)':>16} {'batch (s)':>12} {'speed-up':>10} {'max |diff| px':>14}")
+    for n in args.sizes:
+        qvecs = rng.normal(size=(n, 3))
+        t_loop, loop = _best_of(
+            lambda qvecs=qvecs: np.array([q_to_pixel(detector, q, depth=0.01, on_detector=True) for q in qvecs]),
+            args.repeat,
+        )
+        t_batch, batch = _best_of(
+            lambda qvecs=qvecs: q_to_pixel_batch(detector, qvecs, depth=0.01, on_detector=True), args.repeat
+        )
+        if not np.array_equal(np.isnan(loop), np.isnan(batch)):
+            raise SystemExit(f"N={n}: NaN masks differ between scalar and batch results")
+        diff = np.nanmax(np.abs(loop - batch)) if np.isfinite(loop).any() else 0.0
+        print(f"{n:>8} {t_loop:>16.4f} {t_batch:>12.5f} {t_loop / t_batch:>9.0f}x {diff:>14.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Benchmark the array colour mappings and the compact marker-colour payload.
+
+``batch_ipf_colors``, ``rodrigues_rgb`` and ``rgb_to_plotly_colors`` used
+to work one point at a time; those loops are reproduced here as the
+reference.  The synthetic map holds N points drawn from a few hundred
+grains with a small orientation spread, like a real polycrystal scan.
+The payload columns compare the serialized Scattergl marker for one
+string per point against ``plotly_marker_colors``.
+
+Usage:
+    python scripts/benchmarks/bench_coloring.py
+    python scripts/benchmarks/bench_coloring.py --points 40000 --grains 300
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import plotly.graph_objects as go
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir))
+sys.path.insert(0, PROJECT_ROOT)
+
+from laue_portal.analysis.coloring import (  # noqa: E402
+    _ipf_single,
+    batch_ipf_colors,
+    plotly_marker_colors,
+    rgb_to_plotly_colors,
+    rodrigues_rgb,
+)
+
+
+def synthetic_map(n, n_grains, rng):
+    """Crystal directions and Rodrigues vectors for N points in n_grains grains."""
+    grain = rng.integers(0, n_grains, size=n)
+    directions = rng.normal(size=(n_grains, 3))[grain] + 2e-3 * rng.normal(size=(n, 3))
+    directions /= np.linalg.norm(directions, axis=1, keepdims=True)
+    directions[rng.random(n) < 0.05] = np.nan
+    rodrigues = rng.normal(scale=0.1, size=(n_grains, 3))[grain] + 1e-3 * rng.normal(size=(n, 3))
+    return directions, rodrigues
+
+
+def loop_ipf(directions):
+    rgb = np.full((len(directions), 3), 0.5)
+    for i, d in enumerate(directions):
+        if not np.any(np.isnan(d)):
+            rgb[i] = _ipf_single(d)
+    return rgb
+
+
+def loop_rodrigues(rodrigues_vec, max_angle_deg):
+    lengths = np.linalg.norm(rodrigues_vec, axis=1)
+    angles_deg = 2.0 * np.degrees(np.arctan(lengths))
+    rgb = np.zeros((len(rodrigues_vec), 3))
+    for i, length in enumerate(lengths):
+        if length < 1e-12:
+            continue
+        cx, cy, cz = np.clip(rodrigues_vec[i] / length * (angles_deg[i] / max_angle_deg), -1.0, 1.0)
+        r = g = b = 0.0
+        if cx > 0:
+            r += cx
+        else:
+            g += abs(cx) / 2.0
+            b += abs(cx) / 2.0
+        if cy > 0:
+            g += cy
+        else:
+            r += abs(cy) / 2.0
+            b += abs(cy) / 2.0
+        if cz > 0:
+            b += cz
+        else:
+            r += abs(cz) / 2.0
+            g += abs(cz) / 2.0
+        rgb[i] = np.clip([r, g, b], 0.0, 1.0)
+    return rgb
+
+
+def loop_strings(rgb_array):
+    colors = []
+    for i in range(len(rgb_array)):
+        r = int(np.clip(rgb_array[i, 0] * 255, 0, 255))
+        g = int(np.clip(rgb_array[i, 1] * 255, 0, 255))
+        b = int(np.clip(rgb_array[i, 2] * 255, 0, 255))
+        colors.append(f"rgb({r},{g},{b})")
+    return colors
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def payload_bytes(marker):
+    return len(go.Figure(go.Scattergl(marker=marker)).to_json())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--points", type=int, default=40000)
+    parser.add_argument("--grains", type=int, default=300)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    directions, rodrigues = synthetic_map(args.points, args.grains, rng)
+
+    ipf_loop, t_ipf_loop = timed(loop_ipf, directions)
+    ipf, t_ipf = timed(batch_ipf_colors, directions)
+    np.testing.assert_allclose(ipf, ipf_loop, atol=1e-12)
+
+    rod_loop, t_rod_loop = timed(loop_rodrigues, rodrigues, 30.0)
+    rod, t_rod = timed(rodrigues_rgb, rodrigues, max_angle_deg=30.0)
+    np.testing.assert_array_equal(rod, rod_loop)
+
+    strings_loop, t_str_loop = timed(loop_strings, ipf)
+    strings, t_str = timed(rgb_to_plotly_colors, ipf)
+    assert strings == strings_loop
+
+    marker, t_marker = timed(plotly_marker_colors, ipf)
+
+    print(f"{args.points} points, {args.grains} grains")
+    print(f"{'step':<22} {'loop (s)':>9} {'array (s)':>10} {'speed-up':>9}")
+    for name, t_loop, t_array in (
+        ("batch_ipf_colors", t_ipf_loop, t_ipf),
+        ("rodrigues_rgb", t_rod_loop, t_rod),
+        ("rgb_to_plotly_colors", t_str_loop, t_str),
+    ):
+        print(f"{name:<22} {t_loop:>9.3f} {t_array:>10.4f} {t_loop / t_array:>8.0f}x")
+
+    n_palette = len(np.unique(marker["color"])) if "colorscale" in marker else len(set(strings))
+    print(f"plotly_marker_colors: {t_marker:.4f} s, {n_palette} distinct colors")
+    per_point = payload_bytes({"color": strings})
+    compact = payload_bytes(marker)
+    print(f"figure JSON: per-point strings {per_point / 1e3:.0f} kB, compact {compact / 1e3:.0f} kB")
+
+
+if __name__ == "__main__":
+    main()
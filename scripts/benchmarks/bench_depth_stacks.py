@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Benchmark the reconstruction page images: expanded cube vs depth-binned stacks.
+
+``run_recon`` used to expand the whole (ny, nx, depth) cube with
+``cold.expand`` and sum it over depth into ``imgresults.npy``, the only
+image the page could show.  ``write_depth_stacks`` scatters per-pixel
+depth sums straight into one image at a time and writes the integrated
+image plus 1 / 5 / 25 um stacks to ``results.h5``; the page's depth
+slider then reads one slice.  A synthetic reconstruction of ``--pixels``
+random pixels of a ``--size`` x ``--size`` detector with ``--depth`` 1 um
+bins (one depth peak per pixel) is used, and the integrated images are
+checked to agree.
+
+Usage:
+    python scripts/benchmarks/bench_depth_stacks.py
+    python scripts/benchmarks/bench_depth_stacks.py --size 2048 --depth 200
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir))
+sys.path.insert(0, PROJECT_ROOT)
+
+from laue_portal.analysis import recon_results  # noqa: E402
+from laue_portal.recon.results_writer import ResultsWriter, write_depth_stacks  # noqa: E402
+
+
+def old_integrated(lau, ind, shape):
+    """Former savenpyimg: expand the full cube (as cold.expand does), then sum over depth."""
+    cube = np.zeros((*shape, lau.shape[1]), dtype=lau.dtype)
+    cube[ind[:, 0], ind[:, 1]] = lau
+    return cube.sum(axis=2), cube.nbytes
+
+
+def new_stacks(path, lau, ind, shape):
+    with ResultsWriter(path) as writer:
+        write_depth_stacks(writer, lau, ind, shape)
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size", type=int, default=1024, help="detector side in pixels")
+    parser.add_argument("--pixels", type=int, default=100_000, help="reconstructed pixels")
+    parser.add_argument("--depth", type=int, default=100, help="1 um depth bins")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    shape = (args.size, args.size)
+    flat = rng.choice(args.size * args.size, args.pixels, replace=False)
+    ind = np.stack(np.unravel_index(flat, shape), axis=1)
+    # Each pixel diffracts from one depth: a Gaussian profile, zero beyond its tails.
+    z = np.arange(args.depth, dtype=np.float32)
+    centres = rng.uniform(0, args.depth, (args.pixels, 1)).astype(np.float32)
+    lau = rng.uniform(1e2, 1e4, (args.pixels, 1)).astype(np.float32) * np.exp(-((z - centres) ** 2) / 8.0)
+    lau[lau < 1.0] = 0.0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        (old, cube_bytes), t_old = timed(old_integrated, lau, ind, shape)
+        _, t_new = timed(new_stacks, os.path.join(tmp, "results.h5"), lau, ind, shape)
+        results = recon_results.open_results(tmp)
+        np.testing.assert_allclose(results.integrated_image(), old, rtol=1e-5)
+        widths = results.depth_bin_widths()
+        reads = {w: timed(results.depth_image, w, len(results.depth_centres(w)) // 2)[1] for w in widths}
+        size = os.path.getsize(os.path.join(tmp, "results.h5"))
+        recon_results.close_all()
+
+    print(f"{args.pixels} pixels on {args.size} x {args.size}, {args.depth} depth bins")
+    print(f"before: expand {cube_bytes / 1e9:.2f} GB cube + sum {t_old:.2f} s, integrated image only")
+    print(f"after:  integrated + {', '.join(f'{w:g}' for w in widths)} um stacks {t_new:.2f} s, {size / 1e6:.1f} MB")
+    print("        slider slice read " + ", ".join(f"{w:g} um {t * 1e3:.1f} ms" for w, t in reads.items()))
+
+
+if __name__ == "__main__":
+    main()
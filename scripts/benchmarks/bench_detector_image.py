@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark the detector image payload: full-resolution heatmap vs pyramid PNG.
+
+The detector view used to convert every frame to float64, compute the
+contrast limits with ``np.nanpercentile`` and ship the whole array as a
+``go.Heatmap``.  It now loads a ``uint16`` / ``float32`` pyramid once
+(cached) and sends a PNG ``go.Image`` of the level matching the zoom.
+Without an image argument a synthetic 2048 x 2048 ``uint16`` frame with
+Laue-like spots (optionally stacked, ``--frames``) is written to a
+temporary HDF5 file.  The shared cache is
+disabled so the first load is cold; the revisit is served by the
+in-process image LRU.
+
+Usage:
+    python scripts/benchmarks/bench_detector_image.py
+    python scripts/benchmarks/bench_detector_image.py --size 4096
+    python scripts/benchmarks/bench_detector_image.py --frames 50
+    python scripts/benchmarks/bench_detector_image.py frame.h5
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import h5py
+import numpy as np
+import plotly.graph_objects as go
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir))
+sys.path.insert(0, PROJECT_ROOT)
+os.environ["LAUE_SHARED_CACHE"] = "none"
+
+from laue_portal.analysis.detector_image import load_detector_image  # noqa: E402
+from laue_portal.components.visualization.detector_view import detector_image_trace  # noqa: E402
+
+
+def synthetic_frame(path, size, frames=1):
+    """Poisson background plus a few hundred bright Gaussian spots, repeated ``frames`` times."""
+    rng = np.random.default_rng(0)
+    frame = rng.poisson(50, size=(size, size)).astype(np.float64)
+    yy, xx = np.mgrid[-6:7, -6:7]
+    spot = np.exp(-(xx**2 + yy**2) / 8.0)
+    xs, ys = rng.integers(6, size - 7, (2, 400))
+    for x, y, amp in zip(xs, ys, rng.uniform(1e3, 3e4, 400), strict=True):
+        frame[y - 6 : y + 7, x - 6 : x + 7] += amp * spot
+    with h5py.File(path, "w") as h5:
+        frame = np.minimum(frame, 65535).astype(np.uint16)
+        dset = h5.create_dataset(
+            "entry1/data/data", shape=(frames, size, size), dtype=np.uint16, chunks=(1, size, size)
+        )
+        for i in range(frames):
+            dset[i] = frame
+
+
+def old_heatmap(path, dataset):
+    """Former path: float64 frame, nanpercentile limits, full Heatmap trace."""
+    with h5py.File(path, "r") as h5:
+        img = np.asarray(h5[dataset.lstrip("/")][()], dtype=float)
+    while img.ndim > 2:
+        img = img[0]
+    vmin, vmax = np.nanpercentile(img, (1.0, 99.9))
+    trace = go.Heatmap(
+        z=img, x=np.arange(img.shape[1]), y=np.arange(img.shape[0]), zmin=vmin, zmax=vmax, colorscale="Gray"
+    )
+    return (float(vmin), float(vmax)), trace
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def payload_bytes(trace):
+    return len(go.Figure(trace).to_json())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("image", nargs="?", help="HDF5 detector frame (default: synthetic)")
+    parser.add_argument("--size", type=int, default=2048, help="synthetic frame side in pixels")
+    parser.add_argument("--frames", type=int, default=1, help="synthetic stack depth (only frame 0 is shown)")
+    parser.add_argument("--max-pixels", type=int, default=1024, help="display budget per axis")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.image
+        if path is None:
+            path = os.path.join(tmp, "frame.h5")
+            synthetic_frame(path, args.size, args.frames)
+
+        result, t_load = timed(load_detector_image, os.path.abspath(path))
+        image = result.image
+        _, t_reload = timed(load_detector_image, os.path.abspath(path))
+        (old_limits, old_trace), t_old = timed(old_heatmap, path, image.dataset)
+        np.testing.assert_allclose((image.vmin, image.vmax), old_limits, rtol=1e-6)
+        np.testing.assert_array_equal(image.data, old_trace.z)
+
+        full, t_full = timed(detector_image_trace, image, colorscale="Gray", max_pixels=args.max_pixels)
+        ny, nx = image.data.shape
+        zoom = ((nx * 0.4, nx * 0.6), (ny * 0.4, ny * 0.6))
+        crop, t_crop = timed(
+            detector_image_trace, image, colorscale="Gray", max_pixels=args.max_pixels, x_range=zoom[0], y_range=zoom[1]
+        )
+
+        old_bytes, t_old_json = timed(payload_bytes, old_trace)
+        print(f"{nx} x {ny} frame, {len(image.levels)} pyramid levels")
+        print(f"before: load + nanpercentile {t_old:.3f} s, Heatmap JSON {old_bytes / 1e6:.1f} MB ({t_old_json:.2f} s)")
+        print(f"after:  load + pyramid + limits {t_load:.3f} s (once per file), revisit {t_reload * 1e6:.0f} us")
+        print(f"        full view  step {full.dx}: {payload_bytes(full) / 1e6:.2f} MB PNG in {t_full * 1e3:.0f} ms")
+        print(f"        20% zoom   step {crop.dx}: {payload_bytes(crop) / 1e6:.2f} MB PNG in {t_crop * 1e3:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Benchmark batched misorientation against the former per-grain loops.
+
+``misorientation_from_reference`` used to loop over grains in Python with
+one ``(24, 3, 3)`` matmul each, and ``pairwise_misorientation`` called
+``misorientation_angle`` once per pair; both loops are reproduced here as
+the reference and must agree with the batched versions.  The neighbour
+mode of ``pairwise_misorientation`` is timed on square scan grids.
+
+Usage:
+    python scripts/benchmarks/bench_misorientation.py
+    python scripts/benchmarks/bench_misorientation.py --sizes 1000 10000 100000 400000
+    python scripts/benchmarks/bench_misorientation.py --pair-sizes 100 700 --grid-sizes 200 400
+"""
+
+import argparse
+import os
+import sys
+import time
+from itertools import combinations
+
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir))
+sys.path.insert(0, PROJECT_ROOT)
+
+from laue_portal.analysis.orientation import (  # noqa: E402
+    _SYM_OPS_T,
+    misorientation_angle,
+    misorientation_from_reference,
+    pairwise_misorientation,
+)
+
+
+def random_rotations(n, rng):
+    """Uniformly random rotation matrices from unit quaternions."""
+    w, x, y, z = rng.normal(size=(n, 4)).T
+    norm = np.sqrt(w * w + x * x + y * y + z * z)
+    w, x, y, z = w / norm, x / norm, y / norm, z / norm
+    return np.stack(
+        [
+            np.stack([1 - 2 * (y * y + z * z), 2 * (x * y - z * w), 2 * (x * z + y * w)], axis=1),
+            np.stack([2 * (x * y + z * w), 1 - 2 * (x * x + z * z), 2 * (y * z - x * w)], axis=1),
+            np.stack([2 * (x * z - y * w), 2 * (y * z + x * w), 1 - 2 * (x * x + y * y)], axis=1),
+        ],
+        axis=1,
+    )
+
+
+def loop_misorientation_from_reference(orientations, ref_index, symmetry_reduce=True):
+    """The per-grain loop ``misorientation_from_reference`` used to run."""
+    N = len(orientations)
+    R_ref_inv = np.linalg.inv(orientations[ref_index])
+    rodrigues = np.zeros((N, 3))
+    angles = np.zeros(N)
+    sym_ref_inv = _SYM_OPS_T @ R_ref_inv if symmetry_reduce else R_ref_inv[None]
+    for i in range(N):
+        if i == ref_index:
+            continue
+        C_all = orientations[i] @ sym_ref_inv
+        traces = C_all[:, 0, 0] + C_all[:, 1, 1] + C_all[:, 2, 2]
+        all_angles = np.degrees(np.arccos(np.clip((traces - 1.0) / 2.0, -1.0, 1.0)))
+        best = int(np.argmin(all_angles))
+        angle = all_angles[best]
+        angles[i] = angle
+        if angle < 1e-12:
+            continue
+        C = C_all[best]
+        axis = np.array([C[1, 2] - C[2, 1], C[2, 0] - C[0, 2], C[0, 1] - C[1, 0]])
+        axis_norm = np.linalg.norm(axis)
+        if axis_norm < 1e-12:
+            continue
+        rodrigues[i] = axis / axis_norm * np.tan(np.radians(angle) / 2.0)
+    return {"rodrigues": rodrigues, "angles": angles}
+
+
+def loop_pairwise_angles(orientations, indices):
+    """The per-pair loop ``pairwise_misorientation`` used to run."""
+    return np.array([misorientation_angle(orientations[i], orientations[j]) for i, j in combinations(indices, 2)])
+
+
+def bench_reference(sizes, rng):
+    print(f"{'N':>8} {'symmetry':>9} {'loop (s)':>10} {'batched (s)':>12} {'speed-up':>9} {'max |dangle|':>13}")
+    for n in sizes:
+        orientations = random_rotations(n, rng)
+        for symmetry_reduce in (True, False):
+            start = time.perf_counter()
+            loop = loop_misorientation_from_reference(orientations, 0, symmetry_reduce)
+            t_loop = time.perf_counter() - start
+            start = time.perf_counter()
+            batched = misorientation_from_reference(orientations, 0, symmetry_reduce)
+            t_batched = time.perf_counter() - start
+            # Relative tolerance: tan(angle / 2) amplifies rounding near 180 degrees.
+            np.testing.assert_allclose(batched["rodrigues"], loop["rodrigues"], rtol=1e-4, atol=1e-9)
+            diff = np.max(np.abs(batched["angles"] - loop["angles"]))
+            print(
+                f"{n:>8} {str(symmetry_reduce):>9} {t_loop:>10.3f} {t_batched:>12.4f} "
+                f"{t_loop / t_batched:>8.0f}x {diff:>13.2e}"
+            )
+
+
+def bench_pairwise(sizes, loop_limit, rng):
+    print(f"\n{'grains':>8} {'pairs':>10} {'loop (s)':>10} {'blocked (s)':>12} {'speed-up':>9}")
+    for n in sizes:
+        orientations = random_rotations(n, rng)
+        start = time.perf_counter()
+        blocked = pairwise_misorientation(orientations)
+        t_blocked = time.perf_counter() - start
+        if n <= loop_limit:
+            start = time.perf_counter()
+            loop = loop_pairwise_angles(orientations, np.arange(n))
+            t_loop = time.perf_counter() - start
+            np.testing.assert_allclose(blocked["angles"], loop, atol=1e-8)
+            timing = f"{t_loop:>10.3f} {t_blocked:>12.4f} {t_loop / t_blocked:>8.0f}x"
+        else:
+            timing = f"{'-':>10} {t_blocked:>12.4f} {'-':>9}"
+        print(f"{n:>8} {len(blocked['angles']):>10} {timing}")
+
+
+def bench_neighbors(grid_sizes, rng):
+    print(f"\n{'grid':>9} {'grains':>8} {'pairs':>10} {'neighbour mode (s)':>19}")
+    for side in grid_sizes:
+        n = side * side
+        y, x = np.divmod(np.arange(n), side)
+        positions = np.column_stack([x * 0.5, y * 0.5, np.zeros(n)])
+        orientations = random_rotations(n, rng)
+        start = time.perf_counter()
+        result = pairwise_misorientation(orientations, positions=positions)
+        elapsed = time.perf_counter() - start
+        # 4-connected grid: 2 * side * (side - 1) adjacent pairs.
+        assert len(result["pairs"]) == 2 * side * (side - 1)
+        print(f"{side:>4}x{side:<4} {n:>8} {len(result['pairs']):>10} {elapsed:>19.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--pair-sizes", type=int, nargs="+", default=[100, 700, 2000])
+    parser.add_argument("--grid-sizes", type=int, nargs="+", default=[200, 400])
+    parser.add_argument("--loop-limit", type=int, default=1000, help="skip the per-pair loop above this many grains")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    bench_reference(args.sizes, rng)
+    bench_pairwise(args.pair_sizes, args.loop_limit, rng)
+    bench_neighbors(args.grid_sizes, rng)
+
+
+if __name__ == "__main__":
+    main()
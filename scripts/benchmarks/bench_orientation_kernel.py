@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Benchmark the array-native orientation kernel against per-step loops.
+
+``batch_crystal_directions``, ``batch_orientations`` and
+``batch_rodrigues`` used to loop over steps calling the scalar functions
+(``crystal_direction_along_normal``, ``recip_to_orientation``,
+``symmetry_reduce_orientation``, ``orientation_to_rodrigues``); those
+loops are reproduced here as the reference.  The synthetic scan holds N
+randomly oriented, slightly strained Si lattices with a sprinkling of
+un-indexed (NaN) steps.
+
+Usage:
+    python scripts/benchmarks/bench_orientation_kernel.py
+    python scripts/benchmarks/bench_orientation_kernel.py --steps 10000 100000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir))
+sys.path.insert(0, PROJECT_ROOT)
+
+from laue_portal.analysis.orientation import (  # noqa: E402
+    CUBIC_SYMMETRY_OPS,
+    batch_orientation_kernel,
+    crystal_direction_along_normal,
+    lattice_params_to_reciprocal,
+    orientation_to_rodrigues,
+    recip_to_orientation,
+    symmetry_reduce_orientation,
+)
+
+LATTICE_PARAMS = np.array([0.5431, 0.5431, 0.5431, 90.0, 90.0, 90.0])
+
+
+def synthetic_lattices(n, rng):
+    ref = lattice_params_to_reciprocal(*LATTICE_PARAMS)
+    rotations, _ = np.linalg.qr(rng.normal(size=(n, 3, 3)))
+    rotations *= np.linalg.det(rotations)[:, None, None]
+    recip = np.swapaxes(rotations @ ref.T, 1, 2) * (1.0 + 1e-3 * rng.normal(size=(n, 1, 1)))
+    recip[rng.random(n) < 0.05] = np.nan
+    return recip
+
+
+def loop_reference(recip_lattices, symmetry_ops):
+    """Per-step loops of the former batch_* functions."""
+    ref_recip = lattice_params_to_reciprocal(*LATTICE_PARAMS)
+    n = len(recip_lattices)
+    directions = np.full((n, 3), np.nan)
+    orientations = np.tile(np.eye(3), (n, 1, 1))
+    rodrigues = np.zeros((n, 3))
+    for i, rl in enumerate(recip_lattices):
+        if np.any(np.isnan(rl)) or np.allclose(rl, 0.0):
+            continue
+        directions[i] = crystal_direction_along_normal(rl)
+        orientations[i] = recip_to_orientation(rl, ref_recip)
+        rodrigues[i] = orientation_to_rodrigues(symmetry_reduce_orientation(orientations[i], None, symmetry_ops))
+    return directions, orientations, rodrigues
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--steps", type=int, nargs="+", default=[10000, 100000])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'steps':>8} {'per-step loops (s)':>19} {'kernel (s)':>11} {'speed-up':>9}")
+    for n in args.steps:
+        recip = synthetic_lattices(n, rng)
+        start = time.perf_counter()
+        directions, orientations, rodrigues = loop_reference(recip, CUBIC_SYMMETRY_OPS)
+        t_loop = time.perf_counter() - start
+        start = time.perf_counter()
+        kernel = batch_orientation_kernel(recip, LATTICE_PARAMS, symmetry_ops=CUBIC_SYMMETRY_OPS)
+        t_kernel = time.perf_counter() - start
+
+        np.testing.assert_allclose(kernel["directions"], directions, atol=1e-9, equal_nan=True)
+        np.testing.assert_allclose(kernel["orientations"], orientations, atol=1e-9)
+        np.testing.assert_allclose(kernel["rodrigues"], rodrigues, rtol=1e-6, atol=1e-9)
+        print(f"{n:>8} {t_loop:>19.3f} {t_kernel:>11.4f} {t_loop / t_kernel:>8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark the broadcast pole_figure_points against the per-pole loop.
+
+The loop over grains x family members that ``pole_figure_points`` used to
+run is reproduced here as the reference.  The synthetic scan holds N
+randomly oriented cubic grains with a sprinkling of un-indexed (NaN)
+steps; the family defaults to {110} (12 poles).
+
+Usage:
+    python scripts/benchmarks/bench_pole_figure.py
+    python scripts/benchmarks/bench_pole_figure.py --grains 10000 50000 --hkl 3 2 1
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir))
+sys.path.insert(0, PROJECT_ROOT)
+
+from laue_portal.analysis.projection import (  # noqa: E402
+    cubic_hkl_family,
+    get_surface_vectors,
+    pole_figure_points,
+)
+
+
+def loop_reference(recip_lattices, family, normal, roll, tilt):
+    """Per-grain, per-pole projection of the former implementation."""
+    xs, ys, grains = [], [], []
+    for i, gm in enumerate(recip_lattices):
+        for pole_dir in family:
+            vec = gm.T @ pole_dir
+            vec_norm = np.linalg.norm(vec)
+            if vec_norm < 1e-12:
+                continue
+            vec = vec / vec_norm
+            dot_normal = np.dot(vec, normal)
+            if dot_normal < 0:
+                continue
+            sin_theta = np.sqrt(1.0 - np.clip(dot_normal, 0, 1) ** 2)
+            r = sin_theta / (1.0 + dot_normal) if (1.0 + dot_normal) > 1e-12 else 0.0
+            phi = np.arctan2(np.dot(vec, roll), np.dot(vec, tilt))
+            xs.append(r * np.cos(phi))
+            ys.append(r * np.sin(phi))
+            grains.append(i)
+    return np.column_stack([xs, ys]), np.array(grains, dtype=int)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--grains", type=int, nargs="+", default=[10000, 50000])
+    parser.add_argument("--hkl", type=int, nargs=3, default=[1, 1, 0])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    family = cubic_hkl_family(*args.hkl)
+    normal, roll, tilt = get_surface_vectors("normal")
+    print(f"{{{''.join(map(str, args.hkl))}}}: {len(family)} poles")
+    print(f"{'grains':>8} {'loop (s)':>9} {'broadcast (s)':>14} {'speed-up':>9}")
+    for n in args.grains:
+        recip, _ = np.linalg.qr(rng.normal(size=(n, 3, 3)))
+        recip[rng.random(n) < 0.05] = np.nan
+
+        start = time.perf_counter()
+        expected_points, expected_grains = loop_reference(recip, family, normal, roll, tilt)
+        t_loop = time.perf_counter() - start
+        start = time.perf_counter()
+        points, grains = pole_figure_points(recip, family)
+        t_array = time.perf_counter() - start
+
+        np.testing.assert_array_equal(grains, expected_grains)
+        np.testing.assert_allclose(points, expected_points, atol=1e-12)
+        print(f"{n:>8} {t_loop:>9.2f} {t_array:>14.4f} {t_loop / t_array:>8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmark reconstruction lineouts: full ``ind`` scan per click vs pooled pixel map.
+
+Each click on the reconstruction page used to open ``results.h5``, load
+the whole ``ind`` pixel index, find the pixel with ``np.where`` and read
+that row of ``lau``.  ``recon_results.open_results`` keeps the file open,
+builds a dense pixel -> row map once and then reads a single row.
+Without a directory argument a synthetic ``--size`` x ``--size``
+reconstruction with ``--depth`` depth bins is written to a temporary
+``results.h5``.
+
+Usage:
+    python scripts/benchmarks/bench_recon_lineout.py
+    python scripts/benchmarks/bench_recon_lineout.py --size 2048 --depth 16
+    python scripts/benchmarks/bench_recon_lineout.py /path/to/recon_output
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import h5py
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir))
+sys.path.insert(0, PROJECT_ROOT)
+
+from laue_portal.analysis.recon_results import open_results  # noqa: E402
+
+
+def synthetic_results(directory, size, depth):
+    """Row-major pixel index and random float32 depth profiles."""
+    ind = np.indices((size, size)).reshape(2, -1).T
+    with h5py.File(Path(directory) / "results.h5", "w") as h5:
+        h5.create_dataset("ind", data=ind)
+        lau = h5.create_dataset("lau", shape=(len(ind), depth), dtype=np.float32, chunks=(4096, depth))
+        rng = np.random.default_rng(0)
+        for start in range(0, len(ind), 1 << 20):
+            stop = min(start + (1 << 20), len(ind))
+            lau[start:stop] = rng.random((stop - start, depth), dtype=np.float32)
+
+
+def old_lineout(directory, x, y):
+    """Former click handler: whole ``ind`` read and ``np.where`` per click."""
+    f = h5py.File(Path(directory) / "results.h5", "r")
+    all_ind = f["ind"][:]
+    row = np.where((all_ind[:, 0] == x) & (all_ind[:, 1] == y))[0][0]
+    return h5py.File(Path(directory) / "results.h5", "r")["lau"][row]
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("directory", nargs="?", help="reconstruction output directory (default: synthetic)")
+    parser.add_argument("--size", type=int, default=1024, help="synthetic detector side in pixels")
+    parser.add_argument("--depth", type=int, default=32, help="synthetic depth bins")
+    parser.add_argument("--clicks", type=int, default=20, help="pixels to look up")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = args.directory
+        if directory is None:
+            directory = tmp
+            synthetic_results(directory, args.size, args.depth)
+        with h5py.File(Path(directory) / "results.h5", "r") as h5:
+            ind = h5["ind"][:: max(len(h5["ind"]) // args.clicks, 1)][: args.clicks]
+
+        old, t_old = timed(lambda: [old_lineout(directory, x, y) for x, y in ind])
+        results, t_open = timed(open_results, directory)
+        _, t_map = timed(lambda: results.pixel_rows)
+        new, t_new = timed(lambda: [results.lineout(x, y) for x, y in ind])
+        for a, b in zip(old, new, strict=True):
+            np.testing.assert_array_equal(a, b)
+
+        n = len(ind)
+        print(f"{results.pixel_rows.size} pixels, {len(old[0])} depth bins, {n} clicks")
+        print(f"before: {t_old / n * 1e3:.1f} ms per click")
+        print(f"after:  open {t_open * 1e3:.1f} ms + pixel map {t_map * 1e3:.0f} ms (once per file)")
+        print(f"        {t_new / n * 1e3:.3f} ms per click")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Benchmark the reconstruction results layout: contiguous datasets vs chunked, compressed.
+
+``run_recon`` used to write ``lau`` / ``ind`` with a plain
+``create_dataset(data=...)``.  ``ResultsWriter`` writes them chunked
+(pixels x 8 depth bins) and compressed, appending blocks of pixels.  A
+synthetic sparse reconstruction (``--size`` x ``--size`` pixels,
+``--depth`` bins, a few percent of pixels lit at a few depths) is written
+both ways; the script reports write time, file size, a per-pixel
+lineout and a per-depth slice, checking both files read back equal.
+
+Usage:
+    python scripts/benchmarks/bench_results_writer.py
+    python scripts/benchmarks/bench_results_writer.py --size 2048 --depth 100
+    python scripts/benchmarks/bench_results_writer.py --compression lz4
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import h5py
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir))
+sys.path.insert(0, PROJECT_ROOT)
+
+from laue_portal.recon.results_writer import ResultsWriter  # noqa: E402
+
+
+def synthetic_lau(size, depth, seed=0):
+    """Mostly-zero depth profiles: ~3% of pixels carry a Gaussian peak at some depth."""
+    rng = np.random.default_rng(seed)
+    lau = np.zeros((size * size, depth), dtype=np.float32)
+    lit = rng.choice(size * size, size * size // 32, replace=False)
+    centres = rng.uniform(0, depth, len(lit))
+    z = np.arange(depth, dtype=np.float32)
+    lau[lit] = rng.uniform(1e2, 1e4, (len(lit), 1)) * np.exp(-((z - centres[:, None]) ** 2) / 8.0)
+    return lau
+
+
+def old_write(path, ind, lau):
+    """Former saveh5basic: one contiguous, uncompressed dataset per array."""
+    with h5py.File(path, "a") as f:
+        f.create_dataset("ind", data=ind)
+        f.create_dataset("lau", data=lau)
+
+
+def new_write(path, ind, lau, compression, block_rows):
+    with ResultsWriter(path, compression=compression) as writer:
+        for start in range(0, len(lau), block_rows):
+            writer.append("ind", ind[start : start + block_rows])
+            writer.append("lau", lau[start : start + block_rows])
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def read_cold(path, func):
+    """Time ``func(h5)`` on a freshly opened file (no chunk cache carried over)."""
+    with h5py.File(path, "r") as h5:
+        return timed(func, h5)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--size", type=int, default=1024, help="detector side in pixels")
+    parser.add_argument("--depth", type=int, default=64, help="depth bins")
+    parser.add_argument("--compression", default="gzip", help="gzip, lz4 or none")
+    parser.add_argument("--block-rows", type=int, default=1 << 18, help="pixels per appended block")
+    args = parser.parse_args()
+
+    ind = np.indices((args.size, args.size)).reshape(2, -1).T
+    lau = synthetic_lau(args.size, args.depth)
+    pixel, depth = len(lau) // 2 + 17, args.depth // 2
+
+    with tempfile.TemporaryDirectory() as tmp:
+        old_path, new_path = os.path.join(tmp, "old.h5"), os.path.join(tmp, "new.h5")
+        _, t_old = timed(old_write, old_path, ind, lau)
+        _, t_new = timed(new_write, new_path, ind, lau, args.compression, args.block_rows)
+
+        results = {}
+        for label, path in (("before", old_path), ("after", new_path)):
+            line, t_line = read_cold(path, lambda h5: h5["lau"][pixel])
+            image, t_image = read_cold(path, lambda h5: h5["lau"][:, depth])
+            np.testing.assert_array_equal(line, lau[pixel])
+            np.testing.assert_array_equal(image, lau[:, depth])
+            results[label] = (os.path.getsize(path), t_line, t_image)
+
+        print(f"{len(lau)} pixels x {args.depth} depth bins ({lau.nbytes / 1e6:.0f} MB), {args.compression}")
+        for label, t_write in (("before", t_old), ("after", t_new)):
+            size, t_line, t_image = results[label]
+            print(
+                f"{label + ':':8}write {t_write:.2f} s, {size / 1e6:.1f} MB, "
+                f"lineout {t_line * 1e3:.2f} ms, depth slice {t_image * 1e3:.0f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Benchmark whole-scan overlay statistics against the per-step loop.
+
+Times ``build_step_overlay`` + ``overlay_statistics`` over every step of an
+indexed AllSteps XML against one ``scan_overlay_statistics`` call, and
+checks that the per-step counts agree.
+
+Usage:
+    python scripts/benchmarks/bench_scan_overlay.py output.xml
+    python scripts/benchmarks/bench_scan_overlay.py output.xml --missing --workers 4
+    python scripts/benchmarks/bench_scan_overlay.py output.xml --geo geoN_2023-04-05.xml
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir))
+sys.path.insert(0, PROJECT_ROOT)
+
+from laue_portal.analysis.back_projection import (  # noqa: E402
+    build_step_overlay,
+    overlay_statistics,
+    scan_overlay_statistics,
+)
+from laue_portal.analysis.geometry import (  # noqa: E402
+    BeamlineGeometry,
+    DetectorGeometry,
+    parse_geometry_xml,
+    resolve_geometry_for_indexing,
+)
+from laue_portal.analysis.xml_parser import parse_indexing_xml  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("xml", help="indexed AllSteps XML")
+    parser.add_argument("--geo", help="geometry XML (default: the XML's <geoFile>, else a synthetic detector)")
+    parser.add_argument("--missing", action="store_true", help="also simulate missing spots")
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    parsed = parse_indexing_xml(args.xml)
+    geometry = parse_geometry_xml(args.geo) if args.geo else resolve_geometry_for_indexing(args.xml)
+    if geometry is None:
+        geometry = BeamlineGeometry(detectors=[DetectorGeometry(R=[-1.2, -1.2, -1.2], P=[25.3, -2.1, 510.0])])
+    n_steps = len(parsed["positions"])
+
+    start = time.perf_counter()
+    per_step = []
+    for step in range(n_steps):
+        overlay = build_step_overlay(parsed, step, geometry, simulate_missing=args.missing)
+        per_step.append(None if overlay is None else overlay_statistics(overlay))
+    t_loop = time.perf_counter() - start
+
+    start = time.perf_counter()
+    scan = scan_overlay_statistics(parsed, geometry, simulate_missing=args.missing, workers=args.workers)
+    t_scan = time.perf_counter() - start
+
+    matched = np.array([0 if stats is None else sum(p["n_matched"] for p in stats["patterns"]) for stats in per_step])
+    missing = np.array([0 if stats is None else sum(p["n_missing"] for p in stats["patterns"]) for stats in per_step])
+    if not (np.array_equal(matched, scan["n_matched"]) and np.array_equal(missing, scan["n_missing"])):
+        raise SystemExit("per-step and whole-scan statistics differ")
+
+    print(f"{n_steps} steps, {len(scan['patterns']['step'])} patterns, missing spots: {args.missing}")
+    print(f"  per-step loop : {t_loop:8.3f} s")
+    print(f"  whole scan    : {t_scan:8.3f} s  ({t_loop / t_scan:.1f}x, workers={args.workers})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark single-step access through the byte-offset step index.
+
+Compares what the detector view used to pay for one step -- a full
+``parse_indexing_xml`` plus an ``ET.parse`` of the whole file to read
+``<geoFile>`` -- with ``parse_indexing_step`` and the index-based
+``extract_geo_paths_from_indexing_xml``.  Without an XML argument the
+steps of tests/fixtures/test_indexing.xml are repeated to build a
+synthetic scan.  The sidecar and shared caches are disabled so every
+variant starts cold.
+
+Usage:
+    python scripts/benchmarks/bench_step_access.py
+    python scripts/benchmarks/bench_step_access.py --steps 50000
+    python scripts/benchmarks/bench_step_access.py output.xml --step 1234
+"""
+
+import argparse
+import os
+import re
+import sys
+import tempfile
+import time
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir))
+sys.path.insert(0, PROJECT_ROOT)
+os.environ["LAUE_PARSE_CACHE"] = "0"
+os.environ["LAUE_SHARED_CACHE"] = "none"
+
+from laue_portal.analysis.geometry import extract_geo_paths_from_indexing_xml  # noqa: E402
+from laue_portal.analysis.step_index import get_step_index  # noqa: E402
+from laue_portal.analysis.xml_parser import (  # noqa: E402
+    _parse_indexing_xml_impl,
+    get_step_peaks,
+    parse_indexing_step,
+)
+
+FIXTURE_XML = os.path.join(PROJECT_ROOT, "tests", "fixtures", "test_indexing.xml")
+
+
+def synthetic_xml(path, n_steps):
+    """Repeat the fixture's steps (with a <geoFile>) until there are n_steps."""
+    with open(FIXTURE_XML) as f:
+        steps = re.findall(r"<step>.*?</step>", f.read(), flags=re.S)
+    steps = [s.replace("<detector>", "<detector>\n      <geoFile>/data/geoN.xml</geoFile>", 1) for s in steps]
+    with open(path, "w") as f:
+        f.write('<?xml version="1.0"?>\n<AllSteps>\n')
+        for i in range(n_steps):
+            f.write(steps[i % len(steps)])
+            f.write("\n")
+        f.write("</AllSteps>\n")
+
+
+def old_geo_paths(path):
+    """Whole-document ``ET.parse`` of the former extract_geo_paths_from_indexing_xml."""
+    out = []
+    for step in ET.parse(path).getroot().findall("step"):
+        for det in step.findall("detector"):
+            geo_el = det.find("geoFile")
+            if geo_el is not None and geo_el.text and geo_el.text.strip() not in out:
+                out.append(geo_el.text.strip())
+    return out
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("xml", nargs="?", help="indexed AllSteps XML (default: synthetic)")
+    parser.add_argument("--steps", type=int, default=20000, help="synthetic scan size")
+    parser.add_argument("--step", type=int, help="step to load (default: the middle one)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.xml
+        if path is None:
+            path = os.path.join(tmp, "synthetic.xml")
+            synthetic_xml(path, args.steps)
+
+        full, t_full = timed(_parse_indexing_xml_impl, path)
+        geo_old, t_geo_old = timed(old_geo_paths, path)
+        n_steps = len(full["positions"])
+        step = n_steps // 2 if args.step is None else args.step
+
+        _, t_index = timed(get_step_index, path)
+        one, t_step = timed(parse_indexing_step, path, step)
+        geo_new, t_geo_new = timed(extract_geo_paths_from_indexing_xml, path)
+
+        want, got = get_step_peaks(full, step), get_step_peaks(one, 0)
+        np.testing.assert_array_equal(got["pixel_positions"], want["pixel_positions"])
+        assert one["space_group"] == full["space_group"]
+        assert geo_new == geo_old[:1]
+
+        print(f"{os.path.getsize(path) / 1e6:.1f} MB, {n_steps} steps, loading step {step}")
+        print(f"before: full parse {t_full:.3f} s + geoFile ET.parse {t_geo_old:.3f} s")
+        print(f"after:  index build {t_index:.3f} s (once per file), step parse {t_step * 1e3:.2f} ms")
+        print(f"        geoFile lookup {t_geo_new * 1e3:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Benchmark the indexed-peak and pattern tables: per-row dicts vs columnar frames.
+
+``get_all_indexed_peaks`` / ``get_all_patterns`` used to walk every step,
+pattern and peak in Python, building one dict per row.  The tables are now
+built column-wise by ``indexed_peaks_frame`` / ``patterns_frame``: one
+fancy index per column over the ragged offset arrays of the parsed
+``PeakStore``.  Both versions start from the same parsed XML and their
+rows are checked to be equal.  Without an XML argument the fixture's steps
+(with peak-shape and indexing attributes added) are repeated to
+``--steps`` steps.
+
+Usage:
+    python scripts/benchmarks/bench_table_columns.py
+    python scripts/benchmarks/bench_table_columns.py --steps 100000
+    python scripts/benchmarks/bench_table_columns.py output.xml
+"""
+
+import argparse
+import math
+import os
+import re
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir, os.pardir))
+sys.path.insert(0, PROJECT_ROOT)
+
+from laue_portal.analysis.xml_parser import (  # noqa: E402
+    _parse_indexing_xml_impl,
+    _safe_float,
+    _safe_int,
+    frame_records,
+    get_step_peaks,
+    indexed_peaks_frame,
+    patterns_frame,
+)
+
+FIXTURE_XML = os.path.join(PROJECT_ROOT, "tests", "fixtures", "test_indexing.xml")
+
+
+# Row-building helpers of the former per-row tables.
+
+
+def _array_value(values, index):
+    """Return one optional numeric value from a parsed XML array."""
+    if values is None or index >= len(values):
+        return None
+    return _safe_float(values[index])
+
+
+def _safe_int_value(value):
+    """Convert a NaN-for-missing float column value to an optional int."""
+    if np.isnan(value):
+        return None
+    return int(value)
+
+
+def _format_vector(values):
+    """Format a 3-vector compactly for table display."""
+    if values is None or len(values) == 0:
+        return None
+    return "(" + ", ".join(f"{float(v):.4g}" for v in values) + ")"
+
+
+def synthetic_xml(path, n_steps):
+    """Repeat the fixture's steps, with peak-shape and indexing attributes, until there are n_steps."""
+    with open(FIXTURE_XML) as f:
+        steps = re.findall(r"<step>.*?</step>", f.read(), flags=re.S)
+    widths = " ".join(f"{1.0 + 0.1 * i:.1f}" for i in range(12))
+    steps = [
+        s.replace("<peaksXY ", '<peaksXY peakShape="Lorentzian" boxsize="18" minwidth="0.01" ', 1)
+        .replace("<indexing ", '<indexing indexProgram="euler" keVmaxCalc="17.2" cone="72" ', 1)
+        .replace("</Qz>", f"</Qz>\n        <hwhmX>{widths}</hwhmX>\n        <hwhmY>{widths}</hwhmY>", 1)
+        for s in steps
+    ]
+    with open(path, "w") as f:
+        f.write('<?xml version="1.0"?>\n<AllSteps>\n')
+        for i in range(n_steps):
+            f.write(steps[i % len(steps)])
+            f.write("\n")
+        f.write("</AllSteps>\n")
+
+
+def old_patterns(parsed):
+    """Former get_all_patterns: one dict per pattern, built step by step."""
+    rows = []
+    store = parsed["_steps"]
+    pos_hf = parsed.get("positions_hf")
+    for si in range(len(store)):
+        indexing_attrs = store.indexing_attrs.get(si)
+        if indexing_attrs is None:
+            continue
+        n_peaks = _safe_int(indexing_attrs.get("Npeaks"))
+        for rank, p in enumerate(store.pattern_rows(si)):
+            pat_n_indexed = _safe_int_value(store.n_indexed[p])
+            indexed_fraction = None
+            if pat_n_indexed is not None and n_peaks not in (None, 0):
+                indexed_fraction = pat_n_indexed / n_peaks
+            row = {
+                "step_index": si,
+                "step_scan_num": int(parsed["scan_nums"][si]),
+                "pattern_num": _safe_int_value(store.pattern_num[p]),
+                "rank": rank,
+                "n_indexed": pat_n_indexed,
+                "n_peaks": n_peaks,
+                "indexed_fraction": indexed_fraction,
+                "rms_error": _safe_float(store.rms_error[p]),
+                "goodness": _safe_float(store.goodness[p]),
+                "n_patterns": _safe_int(indexing_attrs.get("Npatterns")),
+                "parent_n_indexed": _safe_int(indexing_attrs.get("Nindexed")),
+                "x_sample": _safe_float(parsed["positions"][si, 0]),
+                "y_sample": _safe_float(parsed["positions"][si, 1]),
+                "z_sample": _safe_float(parsed["positions"][si, 2]),
+                "h_sample": _safe_float(pos_hf[si, 0]) if pos_hf is not None else None,
+                "f_sample": _safe_float(pos_hf[si, 1]) if pos_hf is not None else None,
+                "depth": _safe_float(parsed["depths"][si]),
+                "energy": _safe_float(parsed["energies"][si]),
+                "structure": parsed.get("structure_desc") or None,
+                "space_group": parsed.get("space_group") or None,
+                "index_program": indexing_attrs.get("indexProgram"),
+                "kev_max_calc": _safe_float(indexing_attrs.get("keVmaxCalc")),
+                "kev_max_test": _safe_float(indexing_attrs.get("keVmaxTest")),
+                "angle_tolerance": _safe_float(indexing_attrs.get("angleTolerance")),
+                "cone": _safe_float(indexing_attrs.get("cone")),
+                "hkl_prefer": indexing_attrs.get("hklPrefer"),
+                "execution_time": _safe_float(indexing_attrs.get("executionTime")),
+                "input_image": store.input_image.get(si),
+            }
+            for axis, name in enumerate(("astar", "bstar", "cstar")):
+                row[name] = _format_vector(store.recip_lattice[p, axis]) if store.has_recip[p] else None
+            pk_idx = store.peak_index.get(p)
+            hkl = store.hkl.get(p)
+            row["indexed_peak_ids"] = " ".join(str(int(v)) for v in pk_idx) if pk_idx is not None else None
+            row["hkl_count"] = len(hkl) if hkl is not None else None
+            rows.append(row)
+    return rows
+
+
+def old_indexed_peaks(parsed):
+    """Former get_all_indexed_peaks: get_step_peaks per step, one dict per peak."""
+    rows = []
+    for si in range(len(parsed["_steps"])):
+        sp = get_step_peaks(parsed, si)
+        if sp is None:
+            continue
+        n_peaks = sp["n_peaks"]
+        peak_attrs = sp.get("peak_attrs", {})
+        for pat in sp["patterns"]:
+            if pat["hkl"] is None or pat["peak_indices"] is None:
+                continue
+            for j, pk_i in enumerate(int(v) for v in pat["peak_indices"]):
+                xy = (
+                    sp["pixel_positions"]
+                    if sp["pixel_positions"] is not None and pk_i < len(sp["pixel_positions"])
+                    else None
+                )
+                q = sp["q_vectors"] if sp["q_vectors"] is not None and pk_i < len(sp["q_vectors"]) else None
+                intens = sp["intensities"] if sp["intensities"] is not None and pk_i < len(sp["intensities"]) else None
+                integ = sp["integrals"] if sp["integrals"] is not None and pk_i < len(sp["integrals"]) else None
+                row = {
+                    "step_index": si,
+                    "step_scan_num": int(parsed["scan_nums"][si]),
+                    "pattern_num": pat["pattern_num"],
+                    "h": int(pat["hkl"][j, 0]),
+                    "k": int(pat["hkl"][j, 1]),
+                    "l": int(pat["hkl"][j, 2]),
+                    "peak_index": pk_i,
+                    "rms_error": pat["rms_error"],
+                    "goodness": pat["goodness"],
+                    "x_pixel": None if xy is None else float(xy[pk_i, 0]),
+                    "y_pixel": None if xy is None else float(xy[pk_i, 1]),
+                    "intensity": None if intens is None else float(intens[pk_i]),
+                    "integral": None if integ is None else float(integ[pk_i]),
+                    "qx": None if q is None else float(q[pk_i, 0]),
+                    "qy": None if q is None else float(q[pk_i, 1]),
+                    "qz": None if q is None else float(q[pk_i, 2]),
+                    "q_magnitude": None if q is None else float(np.sqrt(np.sum(q[pk_i] ** 2))),
+                    "hwhm_x": _array_value(sp.get("hwhm_x"), pk_i),
+                    "hwhm_y": _array_value(sp.get("hwhm_y"), pk_i),
+                    "tilt": _array_value(sp.get("tilt"), pk_i),
+                    "chisq": _array_value(sp.get("chisq"), pk_i),
+                }
+                if row["hwhm_x"] is not None and row["hwhm_y"] not in (None, 0):
+                    row["aspect_ratio"] = row["hwhm_x"] / row["hwhm_y"]
+                else:
+                    row["aspect_ratio"] = None
+                row["n_peaks"] = n_peaks
+                row["energy"] = _safe_float(parsed["energies"][si])
+                row["input_image"] = sp.get("input_image")
+                row["peak_shape"] = peak_attrs.get("peakShape")
+                row["boxsize"] = _safe_float(peak_attrs.get("boxsize"))
+                row["min_width"] = _safe_float(peak_attrs.get("minwidth"))
+                row["max_width"] = _safe_float(peak_attrs.get("maxwidth"))
+                row["min_separation"] = _safe_float(peak_attrs.get("min_separation"))
+                row["pattern_n_indexed"] = pat["n_indexed"]
+                row["pattern_indexed_fraction"] = pat["n_indexed"] / n_peaks if n_peaks else None
+                rows.append(row)
+    return rows
+
+
+def assert_rows_equal(got, want):
+    """Rows equal value for value and type for type (NaN in ``want`` reads back as None)."""
+    assert len(got) == len(want)
+    for g, w in zip(got, want, strict=True):
+        w = {k: None if isinstance(v, float) and math.isnan(v) else v for k, v in w.items()}
+        assert list(g) == list(w)
+        assert g == w
+        assert [type(v) for v in g.values()] == [type(v) for v in w.values()]
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("xml", nargs="?", help="indexed AllSteps XML (default: synthetic)")
+    parser.add_argument("--steps", type=int, default=20000, help="synthetic scan size")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.xml
+        if path is None:
+            path = os.path.join(tmp, "synthetic.xml")
+            synthetic_xml(path, args.steps)
+        parsed = _parse_indexing_xml_impl(path)
+
+        old_peak_rows, t_old_peaks = timed(old_indexed_peaks, parsed)
+        old_pattern_rows, t_old_patterns = timed(old_patterns, parsed)
+        peaks, t_peaks = timed(indexed_peaks_frame, parsed)
+        patterns, t_patterns = timed(patterns_frame, parsed)
+        assert_rows_equal(frame_records(peaks), old_peak_rows)
+        assert_rows_equal(frame_records(patterns), old_pattern_rows)
+
+        print(f"{len(parsed['positions'])} steps, {len(peaks)} indexed peaks, {len(patterns)} patterns")
+        print(f"before: peak rows {t_old_peaks:.3f} s, pattern rows {t_old_patterns:.3f} s")
+        print(f"after:  peak frame {t_peaks:.3f} s, pattern frame {t_patterns:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
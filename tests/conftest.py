@@ -1,12 +1,13 @@
 """
 Shared pytest fixtures and utilities for the Laue Portal test suite.
 
-This module provides reusable database fixtures and entity factories
-to reduce code duplication across test files.
+This module provides reusable database fixtures, entity factories and
+indexing-XML fixtures to reduce code duplication across test files.
 """
 
 import datetime
 import os
+import shutil
 import sys
 import tempfile
 from typing import Any, List, Optional, Tuple
@@ -18,6 +19,26 @@ import pytest
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 sys.path.insert(0, project_root)
 
+# Keep parse_indexing_xml sidecar caches out of tests/fixtures.
+os.environ.setdefault("LAUE_PARSE_CACHE_DIR", tempfile.mkdtemp(prefix="laue_parse_cache_"))
+os.environ.setdefault("LAUE_SHARED_CACHE_DIR", tempfile.mkdtemp(prefix="laue_shared_cache_"))
+
+FIXTURE_XML = os.path.join(os.path.dirname(__file__), "fixtures", "test_indexing.xml")
+
+
+@pytest.fixture
+def xml_copy(tmp_path, monkeypatch):
+    """
+    Pytest fixture that copies the indexing fixture XML into ``tmp_path``, with the parse sidecar cache off.
+
+    Returns:
+        str: Path of the private copy
+    """
+    monkeypatch.setenv("LAUE_PARSE_CACHE", "0")
+    path = tmp_path / "output.xml"
+    shutil.copy(FIXTURE_XML, path)
+    return str(path)
+
 
 def create_test_metadata(scan_number: int = 1) -> Any:
     """
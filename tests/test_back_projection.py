@@ -22,18 +22,26 @@ import pytest
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 sys.path.insert(0, project_root)
 
+from laue_portal.analysis import back_projection  # noqa: E402
 from laue_portal.analysis.back_projection import (  # noqa: E402
     ROI,
     StepOverlay,
     _centering_allowed_mask,
+    _hkl_candidate_table,
+    _rows_in,
     build_step_overlay,
     full_to_roi,
+    overlay_statistics,
     pixel_to_xyz,
     q_to_pixel,
     q_to_pixel_batch,
+    scan_overlay_statistics,
     xyz_to_pixel,
+    xyz_to_pixel_batch,
 )
 from laue_portal.analysis.geometry import (  # noqa: E402
+    BeamlineGeometry,
+    DetectorGeometry,
     extract_geo_paths_from_indexing_xml,
     parse_geometry_xml,
     resolve_geometry_for_indexing,
@@ -41,6 +49,8 @@ from laue_portal.analysis.geometry import (  # noqa: E402
 )
 from laue_portal.analysis.xml_parser import parse_indexing_xml  # noqa: E402
 
+FIXTURE_XML = os.path.join(os.path.dirname(__file__), "fixtures", "test_indexing.xml")
+
 # ---------------------------------------------------------------------------
 # Synthetic geometry fixture: writes a tiny geoN-style XML next to a
 # minimal indexed XML in a temp dir so the tests don't depend on the
@@ -231,6 +241,48 @@ class TestQtoPixel:
         out_loop = np.array([q_to_pixel(syn_det, q) for q in qs])
         np.testing.assert_allclose(out_batch, out_loop, equal_nan=True)
 
+    @pytest.mark.parametrize("on_detector", [False, True])
+    @pytest.mark.parametrize("depth", [0.0, 0.013, np.nan])
+    def test_batch_matches_scalar_random(self, syn_det, on_detector, depth):
+        qs = np.random.default_rng(1).normal(size=(500, 3))
+        out_batch = q_to_pixel_batch(syn_det, qs, depth=depth, on_detector=on_detector)
+        out_loop = np.array([q_to_pixel(syn_det, q, depth=depth, on_detector=on_detector) for q in qs])
+        np.testing.assert_array_equal(np.isnan(out_batch), np.isnan(out_loop))
+        np.testing.assert_allclose(out_batch, out_loop, atol=1e-6, equal_nan=True)
+
+    def test_xyz_batch_matches_scalar(self, syn_det):
+        xyz = np.random.default_rng(2).normal(size=(200, 3)) * 100.0
+        depths = np.linspace(-0.05, 0.05, len(xyz))
+        out_batch = xyz_to_pixel_batch(syn_det, xyz, depth=depths, on_detector=True)
+        out_loop = np.array(
+            [xyz_to_pixel(syn_det, v, depth=d, on_detector=True) for v, d in zip(xyz, depths, strict=True)]
+        )
+        np.testing.assert_array_equal(out_batch, out_loop)
+
+
+def test_rows_in_matches_set_membership():
+    rng = np.random.default_rng(3)
+    candidates = rng.integers(-6, 7, size=(300, 3))
+    observed = candidates[::7]
+    expected = [tuple(row) in {tuple(o) for o in observed} for row in candidates]
+    np.testing.assert_array_equal(_rows_in(candidates, observed), expected)
+    assert not _rows_in(candidates, np.empty((0, 3), dtype=int)).any()
+
+
+def test_hkl_candidate_table_groups_harmonics():
+    table = _hkl_candidate_table(225, 4)
+    assert _hkl_candidate_table(225, 4) is table
+    hkl = table.hkl.astype(int)
+    # F-centering: all-even or all-odd reflections only.
+    assert np.all(np.ptp(np.mod(hkl, 2), axis=1) == 0)
+    # Every reflection is a positive multiple of its direction, and
+    # harmonics come in increasing order within each direction.
+    multiple = np.gcd.reduce(np.abs(hkl), axis=1)
+    np.testing.assert_array_equal(hkl, table.directions[table.direction] * multiple[:, None])
+    same_direction = table.direction[1:] == table.direction[:-1]
+    assert np.all(multiple[1:][same_direction] > multiple[:-1][same_direction])
+    assert not table.hkl.flags.writeable
+
 
 # ===========================================================================
 # Systematic absence helpers
@@ -488,3 +540,80 @@ def test_build_step_overlay_empty_step(tmp_path, syn_geo_path):
     assert overlay is not None
     assert len(overlay.measured_xy) == 0
     assert len(overlay.patterns) == 0
+
+
+# ===========================================================================
+# scan_overlay_statistics: whole-scan batch vs per-step overlays
+# ===========================================================================
+
+
+def _per_step_statistics(parsed, geom, **kwargs):
+    stats = []
+    for step in range(len(parsed["positions"])):
+        overlay = build_step_overlay(parsed, step, geom, **kwargs)
+        stats.append(None if overlay is None else overlay_statistics(overlay))
+    return stats
+
+
+def _assert_scan_matches(result, expected):
+    row = 0
+    for step, stats in enumerate(expected):
+        assert result["has_overlay"][step] == (stats is not None)
+        if stats is None:
+            continue
+        for key in ("n_measured", "n_indexed", "indexed_fraction"):
+            assert result[key][step] == stats[key]
+        assert result["n_patterns"][step] == len(stats["patterns"])
+        for pattern in stats["patterns"]:
+            assert result["patterns"]["step"][row] == step
+            for key, value in pattern.items():
+                np.testing.assert_equal(result["patterns"][key][row], value)
+            row += 1
+    assert row == len(result["patterns"]["step"])
+
+
+class TestScanOverlayStatistics:
+    @pytest.fixture
+    def parsed(self):
+        return parse_indexing_xml(FIXTURE_XML)
+
+    @pytest.mark.parametrize(
+        "geom",
+        [
+            BeamlineGeometry(detectors=[DetectorGeometry(P=[0.0, 0.0, 500.0])]),
+            BeamlineGeometry(detectors=[DetectorGeometry(R=[-1.2, -1.2, -1.2], P=[25.3, -2.1, 510.0])]),
+            BeamlineGeometry(detectors=[]),
+        ],
+    )
+    def test_matches_per_step_overlays(self, parsed, geom):
+        kwargs = {"simulate_missing": True, "missing_hkl_limit": 6}
+        result = scan_overlay_statistics(parsed, geom, **kwargs)
+        _assert_scan_matches(result, _per_step_statistics(parsed, geom, **kwargs))
+        np.testing.assert_array_equal(
+            result["n_missing"],
+            np.bincount(
+                result["patterns"]["step"], weights=result["patterns"]["n_missing"], minlength=len(result["n_missing"])
+            ),
+        )
+
+    def test_synthetic_step(self, tmp_path, syn_geo_path):
+        indexed_path, *_ = _make_synthetic_indexed_xml(tmp_path, syn_geo_path)
+        parsed = parse_indexing_xml(indexed_path)
+        geom = resolve_geometry_for_indexing(indexed_path)
+        kwargs = {"simulate_missing": True, "missing_energy_range_kev": (0.01, 50.0), "missing_hkl_limit": 2}
+        result = scan_overlay_statistics(parsed, geom, **kwargs)
+        _assert_scan_matches(result, _per_step_statistics(parsed, geom, **kwargs))
+        assert result["n_indexed"][0] == 1
+        assert result["n_predicted_on_detector"][0] == 1
+        assert result["n_missing"][0] > 0
+
+    def test_process_pool_matches_in_process(self, parsed, monkeypatch):
+        monkeypatch.setattr(back_projection, "_MIN_STEPS_PER_TASK", 1)
+        geom = BeamlineGeometry(detectors=[DetectorGeometry(P=[0.0, 0.0, 500.0])])
+        serial = scan_overlay_statistics(parsed, geom, simulate_missing=True, missing_hkl_limit=6)
+        pooled = scan_overlay_statistics(parsed, geom, simulate_missing=True, missing_hkl_limit=6, workers=2)
+        for key, value in serial.items():
+            if key != "patterns":
+                np.testing.assert_array_equal(pooled[key], value)
+        for key, value in serial["patterns"].items():
+            np.testing.assert_array_equal(pooled["patterns"][key], value)
@@ -18,8 +18,11 @@ from laue_portal.analysis.coloring import (
     batch_rodrigues_rgb,
     cubic_ipf_color,
     hsv_wheel_color,
+    indexed_colors,
     make_color_hexagon,
     make_cubic_ipf_triangle,
+    palette_colorscale,
+    plotly_marker_colors,
     pole_figure_color_radius,
     rgb_to_plotly_colors,
     rodrigues_rgb,
@@ -250,6 +253,54 @@ class TestBatchUtilities:
         colors = rgb_to_plotly_colors(rgb)
         assert colors[0] == "rgb(255,0,127)"
 
+    def test_batch_ipf_matches_single_direction(self):
+        rng = np.random.default_rng(0)
+        dirs = rng.normal(size=(50, 3))
+        dirs[3] = 0.0
+        rgb = batch_ipf_colors(dirs)
+        for i in range(len(dirs)):
+            np.testing.assert_allclose(rgb[i], cubic_ipf_color(dirs[i]), atol=1e-12)
+
+    def test_rodrigues_rgb_matches_single_vector(self):
+        rng = np.random.default_rng(1)
+        vecs = rng.normal(scale=0.3, size=(50, 3))
+        vecs[0] = 0.0
+        rgb = rodrigues_rgb(vecs, max_angle_deg=30)
+        for i in range(len(vecs)):
+            np.testing.assert_array_equal(rgb[i], rodrigues_rgb(vecs[i], max_angle_deg=30))
+
+    def test_hsv_wheel_matches_single_point(self):
+        rng = np.random.default_rng(2)
+        dx, dy = rng.normal(size=(2, 50))
+        rgb = hsv_wheel_color(dx, dy, rmax=0.8)
+        for i in range(len(dx)):
+            np.testing.assert_array_equal(rgb[i], hsv_wheel_color(dx[i], dy[i], rmax=0.8))
+
+    def test_indexed_colors_reproduce_strings(self):
+        rng = np.random.default_rng(3)
+        rgb = rng.integers(0, 3, size=(40, 3)) / 2.0
+        alpha = np.where(rng.random(40) < 0.5, 1.0, 0.0)
+        for a in (None, alpha):
+            indices, palette = indexed_colors(rgb, alpha=a)
+            assert len(palette) == len(set(palette))
+            assert [palette[i] for i in indices] == rgb_to_plotly_colors(rgb, alpha=a)
+
+    def test_palette_colorscale_stops_on_integers(self):
+        scale = palette_colorscale(["rgb(0,0,0)", "rgb(1,1,1)", "rgb(2,2,2)"])
+        assert scale == [[0.0, "rgb(0,0,0)"], [0.5, "rgb(1,1,1)"], [1.0, "rgb(2,2,2)"]]
+        assert palette_colorscale(["rgb(0,0,0)"]) == [[0.0, "rgb(0,0,0)"], [1.0, "rgb(0,0,0)"]]
+
+    def test_plotly_marker_colors_indexed_when_repeated(self):
+        rgb = np.array([[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]] * 4)
+        marker = plotly_marker_colors(rgb)
+        np.testing.assert_array_equal(marker["color"], [1, 0] * 4)
+        assert marker["colorscale"] == [[0.0, "rgb(0,255,0)"], [1.0, "rgb(255,0,0)"]]
+        assert (marker["cmin"], marker["cmax"], marker["showscale"]) == (0, 1, False)
+
+    def test_plotly_marker_colors_strings_when_distinct(self):
+        rgb = np.array([[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]])
+        assert plotly_marker_colors(rgb) == {"color": rgb_to_plotly_colors(rgb)}
+
 
 # ---------------------------------------------------------------------------
 # Pole figure color radius
@@ -0,0 +1,98 @@
+"""
+Tests for laue_portal.analysis.derived_cache (memoised derived arrays).
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+from laue_portal.analysis import derived_cache
+from laue_portal.analysis.derived_cache import DerivedCache, cached_derived, cached_orientations
+from laue_portal.analysis.orientation import batch_orientations
+from laue_portal.analysis.xml_parser import parse_indexing_xml
+from laue_portal.components.visualization.orientation_map import make_orientation_map
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    cache = DerivedCache(max_bytes=1 << 20)
+    monkeypatch.setattr(derived_cache, "_CACHE", cache)
+    return cache
+
+
+class TestDerivedCache:
+    def test_evicts_least_recently_used_by_bytes(self):
+        cache = DerivedCache(max_bytes=3 * 800)
+        for key in "abc":
+            cache.get_or_compute(key, lambda: np.zeros(100))
+        cache.get_or_compute("a", lambda: pytest.fail("should be cached"))
+        cache.get_or_compute("d", lambda: np.zeros(100))
+        assert len(cache) == 3
+        assert cache.nbytes == 3 * 800
+        calls = []
+        cache.get_or_compute("b", lambda: calls.append("b") or np.zeros(100))
+        cache.get_or_compute("a", lambda: pytest.fail("should be cached"))
+        assert calls == ["b"]
+
+    def test_oversized_value_is_not_stored(self):
+        cache = DerivedCache(max_bytes=100)
+        value = cache.get_or_compute("big", lambda: np.zeros(100))
+        assert value.shape == (100,)
+        assert len(cache) == 0
+        assert cache.nbytes == 0
+
+    def test_cached_arrays_are_read_only(self):
+        cache = DerivedCache(max_bytes=1 << 20)
+        points, indices = cache.get_or_compute("k", lambda: (np.zeros((2, 2)), np.arange(2)))
+        assert not points.flags.writeable
+        assert not indices.flags.writeable
+
+
+class TestCachedDerived:
+    def test_key_includes_name_params_and_mtime(self, xml_copy, cache):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return np.ones(3)
+
+        first = cached_derived(xml_copy, "q", (np.array([0.0, 1.0]), 2), compute)
+        assert cached_derived(xml_copy, "q", (np.array([0.0, 1.0]), 2), compute) is first
+        cached_derived(xml_copy, "q", (np.array([0.0, 1.5]), 2), compute)
+        cached_derived(xml_copy, "other", (np.array([0.0, 1.0]), 2), compute)
+        assert len(calls) == 3
+
+        stat = os.stat(xml_copy)
+        os.utime(xml_copy, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        cached_derived(xml_copy, "q", (np.array([0.0, 1.0]), 2), compute)
+        assert len(calls) == 4
+
+    def test_without_path_computes_every_time(self, cache):
+        calls = []
+        cached_derived(None, "q", None, lambda: calls.append(1) or np.ones(2))
+        cached_derived(None, "q", None, lambda: calls.append(1) or np.ones(2))
+        assert len(calls) == 2
+        assert len(cache) == 0
+
+    def test_cached_orientations_match_batch(self, xml_copy, cache):
+        parsed = parse_indexing_xml(xml_copy)
+        orientations = cached_orientations(xml_copy, parsed)
+        np.testing.assert_array_equal(
+            orientations, batch_orientations(parsed["recip_lattices"], parsed["lattice_params"])
+        )
+        assert cached_orientations(xml_copy, parsed) is orientations
+
+    @pytest.mark.parametrize("color_by", ["cubic_ipf", "rodrigues", "misorientation", "pole_hsv"])
+    def test_orientation_map_colors_unchanged(self, xml_copy, cache, color_by):
+        parsed = parse_indexing_xml(xml_copy)
+        kwargs = dict(color_by=color_by, ref_grain_index=1, pole_hkl=(1, 1, 0))
+        expected = make_orientation_map(parsed, **kwargs).data[0].marker
+        for _ in range(2):
+            marker = make_orientation_map(parsed, xml_path=xml_copy, **kwargs).data[0].marker
+            assert marker.to_plotly_json() == expected.to_plotly_json()
+        assert len(cache) > 0
@@ -0,0 +1,264 @@
+"""
+Tests for the detector image pyramid and its PNG rendering in the detector view.
+"""
+
+import base64
+import io
+import os
+import shutil
+import sys
+
+import h5py
+import numpy as np
+import plotly.graph_objects as go
+import pytest
+from PIL import Image
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+from laue_portal.analysis import detector_image, xml_parser
+from laue_portal.analysis.back_projection import StepOverlay
+from laue_portal.analysis.derived_cache import DerivedCache
+from laue_portal.analysis.detector_image import (
+    DetectorImage,
+    build_pyramid,
+    image_contrast_limits,
+    load_detector_image,
+    neighbour_indexed_steps,
+    prefetch_step_images,
+)
+from laue_portal.components.visualization.detector_view import (
+    _colorscale_lut,
+    detector_image_trace,
+    make_detector_view,
+)
+
+FIXTURE_XML = os.path.join(os.path.dirname(__file__), "fixtures", "test_indexing.xml")
+
+
+def _image(shape=(1000, 600), seed=0):
+    data = np.random.default_rng(seed).integers(0, 4000, size=shape).astype(np.uint16)
+    vmin, vmax = image_contrast_limits(data)
+    return DetectorImage(data=data, path="img.h5", dataset="/data", vmin=vmin, vmax=vmax)
+
+
+def _decode_png(source):
+    assert source.startswith("data:image/png;base64,")
+    return np.asarray(Image.open(io.BytesIO(base64.b64decode(source.split(",", 1)[1]))))
+
+
+class TestPyramid:
+    def test_levels_halve_until_min_size(self):
+        levels = build_pyramid(np.zeros((1001, 600), dtype=np.uint16), min_size=128)
+        assert [lvl.shape for lvl in levels] == [(1001, 600), (501, 300), (251, 150), (126, 75)]
+        assert all(lvl.dtype == np.uint16 for lvl in levels)
+
+    def test_max_pooling_keeps_isolated_spots(self):
+        data = np.zeros((513, 512), dtype=np.float32)
+        data[511, 3] = 7.0
+        data[512, 500] = 9.0  # in the padded odd row
+        data[0, 0] = np.nan
+        levels = build_pyramid(data, min_size=64)
+        for lvl in levels:
+            assert np.nanmax(lvl) == 9.0
+            assert np.count_nonzero(lvl == 7.0) == 1
+        assert levels[1][0, 0] == 0.0  # NaN ignored by fmax
+
+    def test_dataclass_builds_pyramid(self):
+        image = _image((600, 300))
+        assert image.levels[0] is image.data
+        assert len(image.levels) == 3
+
+
+class TestContrastLimits:
+    def test_integer_histogram_matches_percentile(self):
+        values = np.random.default_rng(1).integers(3, 60000, size=10001).astype(np.uint16)
+        got = detector_image._integer_percentiles(values, (0.0, 1.0, 50.0, 99.9, 100.0))
+        np.testing.assert_allclose(got, np.percentile(values, (0.0, 1.0, 50.0, 99.9, 100.0)))
+
+    def test_matches_nanpercentile_of_float_copy(self):
+        data = np.random.default_rng(2).integers(0, 5000, size=(64, 64)).astype(np.uint16)
+        want = np.nanpercentile(data.astype(float), (1.0, 99.9))
+        np.testing.assert_allclose(image_contrast_limits(data), want)
+        floats = data.astype(np.float32)
+        floats[:3] = np.nan
+        want = np.nanpercentile(floats.astype(float), (1.0, 99.9))
+        np.testing.assert_allclose(image_contrast_limits(floats), want, rtol=1e-6)
+
+    def test_degenerate_images(self):
+        sparse = np.zeros((100, 100), dtype=np.uint16)
+        sparse[0, 0] = 5
+        assert image_contrast_limits(sparse) == (0.0, 5.0)
+        assert image_contrast_limits(np.full((4, 4), np.nan, dtype=np.float32)) == (0.0, 1.0)
+
+
+class TestView:
+    def test_whole_image_uses_level_within_budget(self):
+        image = _image((1000, 600))
+        tile, x0, y0, step = image.view(max_pixels=300)
+        assert step == 4
+        assert tile is not None and tile.shape == image.levels[2].shape
+        assert (x0, y0) == (1.5, 1.5)
+
+    def test_zoomed_view_is_full_resolution_crop(self):
+        image = _image((1000, 600))
+        tile, x0, y0, step = image.view((100, 200), (300, 250), max_pixels=300, margin=0.0)
+        assert step == 1
+        assert (x0, y0) == (100.0, 250.0)
+        np.testing.assert_array_equal(tile, image.data[250:301, 100:201])
+
+    def test_viewport_off_image_keeps_one_pixel(self):
+        tile, *_ = _image((100, 100)).view((500, 600), (-50, -10))
+        assert tile.shape == (1, 1)
+
+
+@pytest.fixture
+def fresh_caches(monkeypatch):
+    """No shared cache and an empty in-process image LRU."""
+    monkeypatch.setattr(detector_image.shared_cache, "_BACKEND", detector_image.shared_cache.SharedCache())
+    monkeypatch.setattr(detector_image, "_IMAGE_CACHE", DerivedCache(1 << 30))
+
+
+def _write_frame(path, value=1):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with h5py.File(path, "w") as h5:
+        h5.create_dataset("entry1/data/data", data=np.full((300, 300), value, dtype=np.uint16))
+
+
+@pytest.mark.usefixtures("fresh_caches")
+class TestLoad:
+    def test_loads_compact_dtype_and_pyramid(self, tmp_path):
+        data = np.arange(600 * 400, dtype=np.int32).reshape(600, 400) % 1000
+        with h5py.File(tmp_path / "img.h5", "w") as h5:
+            h5.create_dataset("entry1/data/data", data=data[None])
+        result = load_detector_image("img.h5", xml_path=str(tmp_path / "out.xml"))
+        image = result.image
+        assert image.data.dtype == np.uint16
+        np.testing.assert_array_equal(image.data, data)
+        assert image.dataset == "/entry1/data/data"
+        assert [lvl.shape for lvl in image.levels] == [(600, 400), (300, 200), (150, 100)]
+        np.testing.assert_allclose((image.vmin, image.vmax), np.percentile(data, (1.0, 99.9)))
+
+    def test_reads_first_frame_of_stack_in_compact_dtype(self, tmp_path):
+        stack = np.random.default_rng(3).random((5, 40, 30))
+        with h5py.File(tmp_path / "stack.h5", "w") as h5:
+            h5.create_dataset("entry/data/data", data=stack, chunks=(1, 40, 30))
+            h5.create_dataset("entry/data/counts", data=np.arange(5, dtype=np.uint8).repeat(6).reshape(5, 6))
+        image = load_detector_image(str(tmp_path / "stack.h5")).image
+        assert image.data.dtype == np.float32
+        np.testing.assert_array_equal(image.data, stack[0].astype(np.float32))
+        counts, _ = detector_image._read_hdf5_image(tmp_path / "stack.h5", ["/entry/data/counts"])
+        assert counts.dtype == np.uint16
+        np.testing.assert_array_equal(counts, np.arange(5).repeat(6).reshape(5, 6))
+
+    def test_discovery_skips_non_image_datasets(self, tmp_path):
+        with h5py.File(tmp_path / "img.h5", "w") as h5:
+            h5.create_dataset("a/labels", data=np.array([[b"x", b"y"]]))
+            h5.create_dataset("a/trace", data=np.arange(10))
+            h5.create_dataset("b/frame", data=np.arange(12, dtype=np.int64).reshape(3, 4) - 2)
+        data, dataset = detector_image._read_hdf5_image(tmp_path / "img.h5", [])
+        assert dataset == "/b/frame"
+        assert data.dtype == np.float32  # negative values do not fit uint16
+        np.testing.assert_array_equal(data, np.arange(12).reshape(3, 4) - 2)
+
+    @pytest.mark.parametrize(
+        "values, dtype",
+        [
+            (np.array([[-1, 2]]), np.float32),
+            (np.array([[0, 70000]]), np.float32),
+            (np.array([[True, False]]), np.uint16),
+            (np.array([[1.5, 2.0]]), np.float32),
+        ],
+    )
+    def test_coerced_dtype(self, values, dtype):
+        assert detector_image._coerce_image_2d(values).dtype == dtype
+
+
+@pytest.mark.usefixtures("fresh_caches")
+class TestImageCache:
+    def test_reload_skips_hdf5(self, tmp_path, monkeypatch):
+        path = str(tmp_path / "img.h5")
+        _write_frame(path)
+        first = load_detector_image(path).image
+        read = detector_image._read_hdf5_image
+        monkeypatch.setattr(detector_image, "_read_hdf5_image", lambda *a: pytest.fail("should be cached"))
+        assert load_detector_image(path).image.levels[0] is first.levels[0]
+
+        # A rewritten file is a new key.
+        monkeypatch.setattr(detector_image, "_read_hdf5_image", read)
+        _write_frame(path, value=7)
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        assert load_detector_image(path).image.data[0, 0] == 7
+
+    def test_lru_is_bounded_by_bytes(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(detector_image, "_IMAGE_CACHE", DerivedCache(300 * 300 * 2 * 2))
+        for i in range(3):
+            _write_frame(str(tmp_path / f"img{i}.h5"))
+            load_detector_image(str(tmp_path / f"img{i}.h5"))
+        assert len(detector_image._IMAGE_CACHE) == 1
+
+
+class TestPrefetch:
+    def test_neighbour_indexed_steps(self):
+        n_indexed = np.array([3, 0, 5, 0, 0, 2, 1, 0])
+        checked = []
+
+        def is_indexed(i):
+            checked.append(i)
+            return n_indexed[i] > 0
+
+        assert neighbour_indexed_steps(is_indexed, 8, 2, 2) == [5, 0, 6]
+        assert len(checked) == len(set(checked))
+        assert neighbour_indexed_steps(is_indexed, 8, 3, 1) == [5, 2]
+        assert neighbour_indexed_steps(is_indexed, 8, 0, 0) == []
+        assert neighbour_indexed_steps(lambda i: False, 4, 1, 2) == []
+        assert neighbour_indexed_steps(is_indexed, 8, 2, 2, max_scan=2) == [0]
+
+    def test_prefetch_loads_neighbour_images(self, tmp_path, monkeypatch, fresh_caches):
+        monkeypatch.setenv("LAUE_PARSE_CACHE", "0")
+        xml_path = str(tmp_path / "output.xml")
+        shutil.copy(FIXTURE_XML, xml_path)
+        for i in range(1, 5):
+            _write_frame(str(tmp_path / "test" / f"image_00{i}.h5"), value=i)
+
+        # Neighbours are found step by step, never through a full parse.
+        monkeypatch.setattr(xml_parser, "parse_indexing_xml", lambda *a: pytest.fail("full parse"))
+        prefetch_step_images(xml_path, 0, count=1)
+        detector_image._prefetch_executor.submit(lambda: None).result()
+
+        monkeypatch.setattr(detector_image, "_read_hdf5_image", lambda *a: pytest.fail("should be prefetched"))
+        for name, value in (("image_002.h5", 2), ("image_004.h5", 4)):
+            image = load_detector_image(f"test/{name}", xml_path=xml_path).image
+            assert image.data[0, 0] == value
+        assert len(detector_image._IMAGE_CACHE) == 2
+
+
+class TestDetectorViewImage:
+    def test_image_trace_is_png_of_view(self):
+        image = _image((512, 512))
+        trace = detector_image_trace(image, colorscale="gray", vmin=0, vmax=4000, max_pixels=256)
+        assert isinstance(trace, go.Image)
+        assert (trace.dx, trace.dy, trace.x0) == (2, 2, 0.5)
+        rgba = _decode_png(trace.source)
+        assert rgba.shape == (256, 256, 4)
+        codes = (image.levels[1].astype(np.float32) * np.float32(255 / 4000)).astype(np.uint8)
+        np.testing.assert_array_equal(rgba, _colorscale_lut("gray")[codes])
+
+    def test_nan_pixels_are_transparent(self):
+        data = np.ones((8, 8), dtype=np.float32)
+        data[2, 3] = np.nan
+        trace = detector_image_trace(DetectorImage(data=data, path="", dataset="", vmin=0.0, vmax=1.0))
+        alpha = _decode_png(trace.source)[..., 3]
+        assert alpha[2, 3] == 0
+        assert np.count_nonzero(alpha == 255) == 63
+
+    def test_figure_draws_image_first(self):
+        overlay = StepOverlay(step_index=0, detector_id="det", Nx=512, Ny=512)
+        fig = make_detector_view(overlay, detector_image=_image((512, 512)))
+        assert isinstance(fig.data[0], go.Image)
+        assert not any(isinstance(trace, go.Heatmap) for trace in fig.data)
+        # Legacy bare arrays are still accepted.
+        fig = make_detector_view(overlay, detector_image=np.ones((16, 16)))
+        assert isinstance(fig.data[0], go.Image)
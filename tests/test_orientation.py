@@ -7,6 +7,7 @@ Rodrigues vector conversion, and crystal direction calculation.
 
 import os
 import sys
+from itertools import combinations
 
 import numpy as np
 import pytest
@@ -14,10 +15,12 @@ import pytest
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 sys.path.insert(0, project_root)
 
+from laue_portal.analysis import orientation
 from laue_portal.analysis.orientation import (
     CUBIC_SYMMETRY_OPS,
     HEXAGONAL_SYMMETRY_OPS,
     batch_crystal_directions,
+    batch_orientation_kernel,
     batch_orientations,
     batch_rodrigues,
     crystal_direction_along_normal,
@@ -340,6 +343,48 @@ class TestBatchOperations:
         valid = ~np.any(np.isnan(dirs_default), axis=1)
         assert not np.allclose(dirs_default[valid], dirs_z[valid])
 
+    def test_kernel_matches_wrappers(self, cubic_data):
+        recip_lattices, lattice_params = cubic_data
+        out = batch_orientation_kernel(recip_lattices, lattice_params, symmetry_ops=CUBIC_SYMMETRY_OPS)
+        rodrigues, valid = batch_rodrigues(
+            recip_lattices, lattice_params, symmetry_ops=CUBIC_SYMMETRY_OPS, return_valid=True
+        )
+        np.testing.assert_array_equal(out["directions"], batch_crystal_directions(recip_lattices))
+        np.testing.assert_array_equal(out["orientations"], batch_orientations(recip_lattices, lattice_params))
+        np.testing.assert_array_equal(out["rodrigues"], rodrigues)
+        np.testing.assert_array_equal(out["rodrigues_valid"], valid)
+        assert out["valid"].all()
+
+    def test_kernel_matches_per_step_functions(self):
+        """Random, NaN, zero and singular lattices agree with the scalar functions."""
+        rng = np.random.default_rng(3)
+        lattice_params = np.array([0.40495, 0.40495, 0.40495, 90, 90, 90])
+        ref = lattice_params_to_reciprocal(*lattice_params)
+        rotations = np.array([np.linalg.qr(m)[0] for m in rng.normal(size=(12, 3, 3))])
+        rotations *= np.linalg.det(rotations)[:, None, None]
+        recip_lattices = np.array([(R @ ref.T).T for R in rotations])
+        recip_lattices[2] = np.nan
+        recip_lattices[5] = 0.0
+        recip_lattices[7] = np.outer([1.0, 2.0, 3.0], [1.0, 0.0, 1.0])
+
+        out = batch_orientation_kernel(
+            recip_lattices, lattice_params, symmetry_ops=CUBIC_SYMMETRY_OPS, reference_index=4
+        )
+        np.testing.assert_array_equal(out["valid"], [i not in (2, 5) for i in range(12)])
+        np.testing.assert_allclose(out["directions"][7], 0.0)
+        assert np.isnan(out["directions"][[2, 5]]).all()
+
+        ref_orientation = recip_to_orientation(recip_lattices[4], ref)
+        for i in (0, 1, 3, 6, 11):
+            np.testing.assert_allclose(
+                out["directions"][i], crystal_direction_along_normal(recip_lattices[i]), atol=1e-10
+            )
+            R = recip_to_orientation(recip_lattices[i], ref)
+            np.testing.assert_allclose(out["orientations"][i], R, atol=1e-10)
+            candidates = [R @ S.T @ ref_orientation.T for S in CUBIC_SYMMETRY_OPS]
+            expected = orientation_to_rodrigues(max(candidates, key=np.trace))
+            np.testing.assert_allclose(out["rodrigues"][i], expected, atol=1e-8)
+
 
 # ---------------------------------------------------------------------------
 # Cubic symmetry operations
@@ -538,7 +583,8 @@ class TestPairwiseMisorientation:
         """3 grains -> 3 pairs: (0,1), (0,2), (1,2)."""
         result = pairwise_misorientation(orientations)
         assert len(result["angles"]) == 3
-        assert len(result["pairs"]) == 3
+        assert result["pairs"].shape == (3, 2)
+        assert result["pairs"].dtype.kind == "i"
 
     def test_known_angles(self, orientations):
         """Angles should be ~10, ~20, ~10 degrees (no symmetry reduction for
@@ -559,6 +605,7 @@ class TestPairwiseMisorientation:
         """Single grain -> no pairs."""
         result = pairwise_misorientation(orientations, indices=[0])
         assert len(result["angles"]) == 0
+        assert result["pairs"].shape == (0, 2)
         assert result["mean"] == 0.0
 
     def test_mean_min_max(self, orientations):
@@ -567,6 +614,47 @@ class TestPairwiseMisorientation:
         assert abs(result["min"] - 10.0) < 1e-4
         assert abs(result["max"] - 20.0) < 1e-4
 
+    @pytest.fixture
+    def random_orientations(self):
+        rng = np.random.default_rng(1)
+        rotations = np.array([np.linalg.qr(m)[0] for m in rng.normal(size=(12, 3, 3))])
+        return rotations * np.linalg.det(rotations)[:, None, None]
+
+    @pytest.mark.parametrize("symmetry_reduce", [True, False])
+    def test_matches_per_pair_angles(self, random_orientations, monkeypatch, symmetry_reduce):
+        """Blocked evaluation matches misorientation_angle, in combinations order."""
+        monkeypatch.setattr(orientation, "_PAIR_BLOCK", 7)
+        indices = [0, 3, 4, 7, 8, 11]
+        result = pairwise_misorientation(random_orientations, indices=indices, symmetry_reduce=symmetry_reduce)
+        expected_pairs = list(combinations(indices, 2))
+        np.testing.assert_array_equal(result["pairs"], expected_pairs)
+        expected = [
+            misorientation_angle(random_orientations[i], random_orientations[j], symmetry_reduce=symmetry_reduce)
+            for i, j in expected_pairs
+        ]
+        np.testing.assert_allclose(result["angles"], expected, atol=1e-8)
+
+    def test_neighbor_mode_compares_grid_neighbors(self, random_orientations):
+        """On a 4 x 3 grid only the 17 edge-adjacent pairs are compared."""
+        y, x = np.divmod(np.arange(12), 4)
+        positions = np.column_stack([x * 1.5, y * 2.0, np.zeros(12)])
+        result = pairwise_misorientation(random_orientations, positions=positions, neighbor_radius=2.0)
+        assert len(result["pairs"]) == 17
+        for (i, j), angle in zip(result["pairs"], result["angles"], strict=True):
+            assert i < j
+            assert np.linalg.norm(positions[i] - positions[j]) <= 2.0
+            assert abs(angle - misorientation_angle(random_orientations[i], random_orientations[j])) < 1e-8
+
+    def test_neighbor_mode_default_radius(self, random_orientations):
+        """The default radius picks up the nearest grid spacing only."""
+        y, x = np.divmod(np.arange(12), 4)
+        positions = np.column_stack([x * 1.0, y * 1.0, np.zeros(12)])
+        positions[5] = np.nan
+        result = pairwise_misorientation(random_orientations, positions=positions)
+        # 4 x 3 grid has 17 adjacent pairs; grain 5 has 4 neighbours.
+        assert len(result["pairs"]) == 13
+        assert all(5 not in pair for pair in result["pairs"])
+
 
 # ---------------------------------------------------------------------------
 # Misorientation from reference
@@ -689,3 +777,17 @@ class TestMisorientationFromReference:
                 symmetry_reduce=True,
             )
             assert abs(ref_result["angles"][i] - pairwise_angle) < 1e-6
+
+    @pytest.mark.parametrize("symmetry_reduce", [True, False])
+    def test_blocked_matches_per_grain(self, monkeypatch, symmetry_reduce):
+        """Batched blocks agree with per-grain misorientation_angle."""
+        monkeypatch.setattr(orientation, "_MISORIENTATION_BLOCK", 4)
+        rng = np.random.default_rng(0)
+        orientations = np.array([np.linalg.qr(m)[0] for m in rng.normal(size=(11, 3, 3))])
+        orientations *= np.linalg.det(orientations)[:, None, None]
+        result = misorientation_from_reference(orientations, ref_index=5, symmetry_reduce=symmetry_reduce)
+        expected = [misorientation_angle(R, orientations[5], symmetry_reduce=symmetry_reduce) for R in orientations]
+        expected[5] = 0.0
+        np.testing.assert_allclose(result["angles"], expected, atol=1e-8)
+        lengths = np.linalg.norm(result["rodrigues"], axis=1)
+        np.testing.assert_allclose(lengths, np.tan(np.radians(result["angles"]) / 2.0), rtol=1e-8)
@@ -0,0 +1,126 @@
+"""
+Tests for laue_portal.analysis.parse_cache (HDF5 sidecar for parsed XML).
+"""
+
+import os
+import shutil
+import sys
+from pathlib import Path
+
+import h5py
+import numpy as np
+import pytest
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+from laue_portal.analysis import parse_cache, xml_parser
+from laue_portal.analysis.xml_parser import get_all_indexed_peaks, get_all_patterns, get_step_peaks
+
+FIXTURE_XML = os.path.join(os.path.dirname(__file__), "fixtures", "test_indexing.xml")
+
+
+@pytest.fixture
+def xml_copy(tmp_path, monkeypatch):
+    """A private copy of the fixture XML with the default sidecar location under ``tmp_path``."""
+    monkeypatch.delenv("LAUE_PARSE_CACHE_DIR", raising=False)
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path / "user_cache"))
+    path = tmp_path / "data" / "output.xml"
+    path.parent.mkdir()
+    shutil.copy(FIXTURE_XML, path)
+    return str(path)
+
+
+def test_first_load_writes_sidecar_to_user_cache(xml_copy, tmp_path):
+    xml_parser._load_or_parse(xml_copy)
+    assert os.listdir(os.path.dirname(xml_copy)) == ["output.xml"]
+    assert parse_cache.sidecar_path(xml_copy).is_file()
+    assert parse_cache.sidecar_path(xml_copy).is_relative_to(tmp_path / "user_cache")
+
+
+def test_adjacent_sidecar(xml_copy, monkeypatch):
+    monkeypatch.setenv("LAUE_PARSE_CACHE_DIR", parse_cache.ADJACENT)
+    xml_parser._load_or_parse(xml_copy)
+    assert os.path.isfile(xml_copy + parse_cache.SIDECAR_SUFFIX)
+
+
+def test_adjacent_sidecar_is_always_read(xml_copy, tmp_path):
+    parsed = xml_parser._parse_indexing_xml_impl(xml_copy)
+    stat = os.stat(xml_copy)
+    written = parse_cache.write_sidecar(parsed, xml_copy, stat, path=parse_cache.adjacent_path(xml_copy))
+    assert written == Path(xml_copy + parse_cache.SIDECAR_SUFFIX)
+    assert parse_cache.read_sidecar(xml_copy, stat) is not None
+    assert not parse_cache.sidecar_path(xml_copy).exists()
+
+
+def test_stale_sidecar_falls_through_to_fallback(xml_copy, tmp_path, monkeypatch):
+    monkeypatch.setattr(parse_cache.tempfile, "gettempdir", lambda: str(tmp_path / "tmp"))
+    stat = os.stat(xml_copy)
+    parsed = xml_parser._parse_indexing_xml_impl(xml_copy)
+    preferred, fallback, _ = parse_cache.sidecar_paths(xml_copy)
+    parse_cache.write_sidecar(parsed, xml_copy, stat)
+    fallback.parent.mkdir(parents=True)
+    os.replace(preferred, fallback)
+    parse_cache.write_sidecar(parsed, xml_copy, stat)
+    with h5py.File(preferred, "r+") as h5:
+        h5.attrs["source_mtime_ns"] = 0
+    assert parse_cache.read_sidecar(xml_copy, stat) is not None
+    fallback.unlink()
+    assert parse_cache.read_sidecar(xml_copy, stat) is None
+
+
+def test_sidecar_load_matches_fresh_parse(xml_copy):
+    fresh = xml_parser._parse_indexing_xml_impl(xml_copy)
+    xml_parser._load_or_parse(xml_copy)
+    cached = parse_cache.read_sidecar(xml_copy, os.stat(xml_copy))
+    assert cached is not None
+
+    for key in ("positions", "depths", "recip_lattices", "n_indexed", "lattice_params"):
+        np.testing.assert_array_equal(cached[key], fresh[key])
+    assert cached["space_group"] == fresh["space_group"]
+    assert cached["atoms"] == fresh["atoms"]
+    assert get_all_patterns(cached) == get_all_patterns(fresh)
+    assert get_all_indexed_peaks(cached) == get_all_indexed_peaks(fresh)
+    assert get_step_peaks(cached, 0)["peak_attrs"] == get_step_peaks(fresh, 0)["peak_attrs"]
+
+
+def test_peak_arrays_are_memory_mapped(xml_copy):
+    xml_parser._load_or_parse(xml_copy)
+    cached = xml_parser._load_or_parse(xml_copy)
+    assert isinstance(cached["_steps"].peaks["Xpixel"].values.base, np.memmap)
+
+
+def test_stale_sidecar_is_ignored(xml_copy):
+    xml_parser._load_or_parse(xml_copy)
+    with open(xml_copy, "a") as f:
+        f.write("\n")
+    assert parse_cache.read_sidecar(xml_copy, os.stat(xml_copy)) is None
+    parsed = xml_parser._load_or_parse(xml_copy)
+    assert len(parsed["positions"]) == 4
+    assert parse_cache.read_sidecar(xml_copy, os.stat(xml_copy)) is not None
+
+
+def test_cache_dir_override(xml_copy, tmp_path, monkeypatch):
+    cache_dir = tmp_path / "cache"
+    monkeypatch.setenv("LAUE_PARSE_CACHE_DIR", str(cache_dir))
+    xml_parser._load_or_parse(xml_copy)
+    assert not parse_cache.sidecar_path(xml_copy).is_relative_to(tmp_path / "user_cache")
+    assert len(list(cache_dir.glob("*" + parse_cache.SIDECAR_SUFFIX))) == 1
+
+
+def test_cache_can_be_disabled(xml_copy, monkeypatch):
+    monkeypatch.setenv("LAUE_PARSE_CACHE", "0")
+    xml_parser._load_or_parse(xml_copy)
+    assert not any(path.exists() for path in parse_cache.sidecar_paths(xml_copy))
+
+
+def test_store_file_round_trip(xml_copy, tmp_path):
+    fresh = xml_parser._parse_indexing_xml_impl(xml_copy)
+    path = tmp_path / "part.npz"
+    parse_cache.write_store(str(path), fresh)
+    loaded = parse_cache.read_store(str(path))
+
+    np.testing.assert_array_equal(loaded["recip_lattices"], fresh["recip_lattices"])
+    assert loaded["atoms"] == fresh["atoms"]
+    assert get_all_patterns(loaded) == get_all_patterns(fresh)
+    assert get_all_indexed_peaks(loaded) == get_all_indexed_peaks(fresh)
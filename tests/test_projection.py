@@ -5,6 +5,7 @@ Tests pole figure computation and cubic hkl family generation.
 """
 
 import os
+import shutil
 import sys
 
 import numpy as np
@@ -12,13 +13,18 @@ import numpy as np
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 sys.path.insert(0, project_root)
 
+from laue_portal.analysis import projection
 from laue_portal.analysis.projection import (
+    closest_pole_offsets,
     cubic_hkl_family,
     get_surface_vectors,
     normalize_surface_frame,
     pole_figure_points,
+    pole_figure_points_for_xml,
 )
 
+FIXTURE_XML = os.path.join(os.path.dirname(__file__), "fixtures", "test_indexing.xml")
+
 # ---------------------------------------------------------------------------
 # Cubic {hkl} Family
 # ---------------------------------------------------------------------------
@@ -150,6 +156,76 @@ class TestPoleFigurePoints:
         radii = np.sqrt(points2[:, 0] ** 2 + points2[:, 1] ** 2)
         assert np.all(radii <= 1.0 + 1e-10)
 
+    def test_blocked_matches_per_pole_projection(self, monkeypatch):
+        """Blocked broadcasting matches a per-grain, per-pole projection."""
+        monkeypatch.setattr(projection, "_POLE_BLOCK_GRAINS", 4)
+        rng = np.random.default_rng(0)
+        recip_lattices = rng.normal(size=(11, 3, 3))
+        recip_lattices[3] = np.nan
+        recip_lattices[6] = 0.0
+        family = cubic_hkl_family(1, 1, 0)
+        normal, roll, tilt = get_surface_vectors("normal")
+
+        expected_points, expected_grains = [], []
+        for i, gm in enumerate(recip_lattices):
+            for pole in family:
+                vec = gm.T @ pole
+                if np.linalg.norm(vec) < 1e-12:
+                    continue
+                vec = vec / np.linalg.norm(vec)
+                cos_t = np.dot(vec, normal)
+                if cos_t < 0:
+                    continue
+                r = np.sqrt(1.0 - cos_t**2) / (1.0 + cos_t)
+                phi = np.arctan2(np.dot(vec, roll), np.dot(vec, tilt))
+                expected_points.append([r * np.cos(phi), r * np.sin(phi)])
+                expected_grains.append(i)
+
+        points, indices = pole_figure_points(recip_lattices, family)
+        np.testing.assert_array_equal(indices, expected_grains)
+        np.testing.assert_allclose(points, expected_points, atol=1e-12)
+        assert np.all(np.isnan(points[indices == 3]))
+        assert not np.any(indices == 6)
+
+
+class TestPoleFigurePointsForXml:
+    def test_memoised_until_xml_changes(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("LAUE_PARSE_CACHE", "0")
+        xml_path = str(tmp_path / "output.xml")
+        shutil.copy(FIXTURE_XML, xml_path)
+        family = cubic_hkl_family(1, 0, 0)
+
+        first = pole_figure_points_for_xml(xml_path, family)
+        assert pole_figure_points_for_xml(xml_path, family) is first
+        assert not first[0].flags.writeable
+        assert pole_figure_points_for_xml(xml_path, family, surface_normal=[0.0, 0.0, 1.0]) is not first
+
+        from laue_portal.analysis.xml_parser import parse_indexing_xml
+
+        expected = pole_figure_points(parse_indexing_xml(xml_path)["recip_lattices"], family)
+        np.testing.assert_array_equal(first[0], expected[0])
+        np.testing.assert_array_equal(first[1], expected[1])
+
+        stat = os.stat(xml_path)
+        os.utime(xml_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        assert pole_figure_points_for_xml(xml_path, family) is not first
+
+
+class TestClosestPoleOffsets:
+    def test_picks_nearest_pole_per_grain(self):
+        points = np.array([[0.5, 0.0], [0.1, 0.2], [0.3, 0.3], [0.3, 0.3], [-0.4, 0.0]])
+        grains = np.array([0, 0, 2, 2, 3])
+        offsets = closest_pole_offsets(points, grains, 5, center_xy=(0.1, 0.1))
+        np.testing.assert_allclose(offsets[0], [0.0, 0.1])
+        np.testing.assert_allclose(offsets[2], [0.2, 0.2])
+        np.testing.assert_allclose(offsets[3], [-0.5, -0.1])
+        assert np.all(np.isnan(offsets[[1, 4]]))
+
+    def test_empty(self):
+        offsets = closest_pole_offsets(np.empty((0, 2)), np.empty(0, dtype=int), 2)
+        assert offsets.shape == (2, 2)
+        assert np.all(np.isnan(offsets))
+
 
 # ---------------------------------------------------------------------------
 # Surface frame matrices (X / Y / Z / H / F / normal)
@@ -341,6 +341,51 @@ def test_execute_peakindexing_chunk_marks_all_failed_without_raising(queue_db, m
         assert all("failed" in subjob.messages for subjob in subjobs)
 
 
+def _fake_pool_index(input_image, **kwargs):
+    if input_image == "bad.tif":
+        raise RuntimeError("index failed")
+    return SimpleNamespace(command_history=[f"index {input_image}"])
+
+
+def test_execute_peakindexing_chunk_fans_out_over_process_pool(queue_db, monkeypatch):
+    notifications = []
+    progress = []
+    monkeypatch.setattr(executors, "index", _fake_pool_index)
+    monkeypatch.setattr(
+        executors, "notify_subjobs_completed", lambda job_id, count: notifications.append((job_id, count))
+    )
+    monkeypatch.setattr(executors, "get_current_job", lambda: SimpleNamespace(id="peakindexing_batch_8_0"))
+    monkeypatch.setattr(executors, "update_job_progress", lambda *args: progress.append(args))
+    monkeypatch.setattr(lifecycle, "redis_conn", FakeRedis())
+    bulk_updates = []
+    original_bulk_update = executors.Session.bulk_update_mappings
+
+    def record_bulk_update(self, mapper, mappings):
+        bulk_updates.append(list(mappings))
+        return original_bulk_update(self, mapper, mappings)
+
+    monkeypatch.setattr(executors.Session, "bulk_update_mappings", record_bulk_update)
+
+    with session_utils.get_session() as session:
+        add_job_with_subjobs(session, job_id=8, subjob_count=4)
+
+    specs = [
+        {"subjob_id": 800 + i, "input_file": name, "output_file": "/out"}
+        for i, name in enumerate(["a.tif", "bad.tif", "c.tif", "d.tif"])
+    ]
+    result = executors.execute_peakindexing_chunk(8, specs, index_workers=3, **peakindex_args())
+
+    assert [item["subjob_id"] for item in result] == [800, 801, 802, 803]
+    assert len(bulk_updates) == 1
+    assert notifications == [(8, 4)]
+    assert [args[1] for args in progress] == [25, 50, 75, 100]
+    assert all(args[0] == "peakindexing_batch_8_0" for args in progress)
+    with session_utils.get_session() as session:
+        statuses = [s.status for s in session.query(db_schema.SubJob).order_by(db_schema.SubJob.subjob_id)]
+        finished, failed = core.STATUS_REVERSE_MAPPING["Finished"], core.STATUS_REVERSE_MAPPING["Failed"]
+        assert statuses == [finished, failed, finished, finished]
+
+
 def test_execute_peakindexing_chunk_skips_terminal_parent_and_notifies_counter(queue_db, monkeypatch):
     calls = []
     notifications = []
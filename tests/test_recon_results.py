@@ -0,0 +1,103 @@
+"""
+Tests for the pooled results.h5 accessor behind the reconstruction lineouts.
+"""
+
+import os
+import sys
+
+import h5py
+import numpy as np
+import pytest
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+from laue_portal.analysis import recon_results
+from laue_portal.analysis.recon_results import open_results
+
+
+def _write_results(directory, shape=(6, 5), depth=4, seed=0, name="results.h5"):
+    """Shuffled pixel index (ind) and matching depth profiles (lau)."""
+    rng = np.random.default_rng(seed)
+    ind = np.indices(shape).reshape(2, -1).T[rng.permutation(shape[0] * shape[1])]
+    lau = rng.random((len(ind), depth)).astype(np.float32)
+    with h5py.File(directory / name, "w") as h5:
+        h5.create_dataset("ind", data=ind)
+        h5.create_dataset("lau", data=lau)
+    return ind, lau
+
+
+@pytest.fixture(autouse=True)
+def empty_pool():
+    recon_results.close_all()
+    yield
+    recon_results.close_all()
+
+
+class TestPixelLookup:
+    def test_lineout_matches_scan_of_ind(self, tmp_path):
+        ind, lau = _write_results(tmp_path)
+        results = open_results(tmp_path)
+        for x, y in [(0, 0), (5, 4), (3, 2)]:
+            row = np.where((ind[:, 0] == x) & (ind[:, 1] == y))[0][0]
+            assert results.row_of(x, y) == row
+            np.testing.assert_array_equal(results.lineout(x, y), lau[row])
+
+    def test_missing_pixels(self, tmp_path):
+        ind = np.array([[0, 0], [2, 3], [-1, 7]])
+        with h5py.File(tmp_path / "results.h5", "w") as h5:
+            h5.create_dataset("ind", data=ind)
+            h5.create_dataset("lau", data=np.zeros((3, 2)))
+        results = open_results(tmp_path)
+        assert results.pixel_rows.shape == (3, 4)
+        assert results.row_of(1, 1) is None
+        assert results.row_of(2, 3) == 1
+        assert results.row_of(9, 0) is None and results.row_of(-1, 7) is None
+        assert results.lineout(1, 1) is None
+
+    def test_duplicate_pixel_maps_to_first_row(self, tmp_path):
+        with h5py.File(tmp_path / "results.h5", "w") as h5:
+            h5.create_dataset("ind", data=np.array([[1, 1], [0, 0], [1, 1]]))
+        assert open_results(tmp_path).row_of(1, 1) == 0
+
+    def test_read_selection(self, tmp_path):
+        ind, _ = _write_results(tmp_path)
+        results = open_results(tmp_path)
+        np.testing.assert_array_equal(results.read("ind", [1, 4, 7]), ind[[1, 4, 7]])
+        np.testing.assert_array_equal(results.read("ind"), ind)
+
+
+class TestPool:
+    def test_reuses_open_handle(self, tmp_path):
+        _write_results(tmp_path)
+        results = open_results(tmp_path)
+        assert open_results(str(tmp_path)) is results
+        assert results.pixel_rows is results.pixel_rows
+
+    def test_rewritten_file_is_reopened(self, tmp_path):
+        _write_results(tmp_path)
+        first = open_results(tmp_path)
+        # A new file moved into place, as a reconstruction run in another process would leave it.
+        _, lau = _write_results(tmp_path, seed=1, name="new.h5")
+        stat = os.stat(tmp_path / "results.h5")
+        os.utime(tmp_path / "new.h5", ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        os.replace(tmp_path / "new.h5", tmp_path / "results.h5")
+        second = open_results(tmp_path)
+        assert second is not first
+        np.testing.assert_array_equal(second.read("lau"), lau)
+
+    def test_evicts_least_recently_used(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("LAUE_RECON_RESULTS_HANDLES", "2")
+        handles = []
+        for i in range(3):
+            directory = tmp_path / str(i)
+            directory.mkdir()
+            _write_results(directory)
+            handles.append(open_results(directory))
+        assert len(recon_results._pool) == 2
+        assert not handles[0]._file.id.valid
+        assert handles[2]._file.id.valid
+
+    def test_missing_file_raises(self, tmp_path):
+        with pytest.raises(OSError):
+            open_results(tmp_path)
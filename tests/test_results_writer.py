@@ -0,0 +1,172 @@
+"""
+Tests for the chunked, compressed reconstruction results writer.
+"""
+
+import os
+import sys
+
+import h5py
+import numpy as np
+import pytest
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+from laue_portal.analysis import recon_results
+from laue_portal.recon.results_writer import (
+    ResultsWriter,
+    chunk_shape,
+    compression_options,
+    depth_bin_starts,
+    source_depths,
+    write_depth_stacks,
+)
+
+
+class TestLayout:
+    @pytest.mark.parametrize(
+        "shape, itemsize, max_rows, expected",
+        [
+            ((4_000_000, 200), 4, None, (4096, 8)),
+            ((4_000_000, 3), 4, None, (10922, 3)),
+            ((4_000_000, 2), 8, None, (8192, 2)),
+            ((100,), 8, 100, (100,)),
+            ((10, 0), 4, 10, (10, 1)),
+        ],
+    )
+    def test_chunk_shape(self, shape, itemsize, max_rows, expected):
+        assert chunk_shape(shape, itemsize, max_rows) == expected
+
+    def test_compression_options(self, monkeypatch):
+        assert compression_options("gzip") == {"compression": "gzip", "compression_opts": 1, "shuffle": True}
+        assert compression_options("none") == {}
+        monkeypatch.setenv("LAUE_RECON_COMPRESSION", "none")
+        assert compression_options() == {}
+        with pytest.raises(ValueError):
+            compression_options("zstd")
+
+    def test_lz4_needs_hdf5plugin(self, monkeypatch):
+        monkeypatch.setitem(sys.modules, "hdf5plugin", None)
+        with pytest.raises(ImportError, match="hdf5plugin"):
+            compression_options("lz4")
+
+
+class TestResultsWriter:
+    def test_write_is_chunked_and_compressed(self, tmp_path):
+        lau = np.random.default_rng(0).random((5000, 40)).astype(np.float32)
+        with ResultsWriter(tmp_path / "results.h5") as writer:
+            writer.write("lau", lau)
+            writer.write("ene", np.float64(7.5))
+            assert "lau" in writer
+        with h5py.File(tmp_path / "results.h5", "r") as h5:
+            dataset = h5["lau"]
+            assert dataset.chunks == (4096, 8)
+            assert dataset.compression == "gzip" and dataset.shuffle
+            assert dataset.maxshape == (None, 40)
+            np.testing.assert_array_equal(dataset[()], lau)
+            assert h5["ene"][()] == 7.5
+
+    def test_append_blocks(self, tmp_path):
+        ind = np.indices((30, 20)).reshape(2, -1).T
+        lau = np.arange(600 * 3, dtype=np.float32).reshape(600, 3)
+        with ResultsWriter(tmp_path / "results.h5", compression="none") as writer:
+            for start in range(0, 600, 250):
+                writer.append("ind", ind[start : start + 250])
+                writer.append("lau", lau[start : start + 250])
+        with h5py.File(tmp_path / "results.h5", "r") as h5:
+            np.testing.assert_array_equal(h5["ind"][()], ind)
+            np.testing.assert_array_equal(h5["lau"][()], lau)
+            assert h5["lau"].compression is None
+
+    def test_appends_to_existing_file(self, tmp_path):
+        with ResultsWriter(tmp_path / "results.h5") as writer:
+            writer.write("pos", np.zeros(4))
+        with ResultsWriter(tmp_path / "results.h5") as writer:
+            assert "pos" in writer
+            writer.append("pos", np.ones(2))
+        with h5py.File(tmp_path / "results.h5", "r") as h5:
+            assert h5["pos"][()].tolist() == [0, 0, 0, 0, 1, 1]
+
+    def test_append_scalar_raises(self, tmp_path):
+        with ResultsWriter(tmp_path / "results.h5") as writer, pytest.raises(ValueError):
+            writer.append("ene", 1.0)
+
+    def test_lineouts_read_back(self, tmp_path):
+        ind = np.indices((16, 16)).reshape(2, -1).T
+        lau = np.random.default_rng(1).random((256, 50)).astype(np.float32)
+        with ResultsWriter(tmp_path / "results.h5") as writer:
+            writer.write("ind", ind)
+            writer.write("lau", lau)
+        try:
+            results = recon_results.open_results(tmp_path)
+            np.testing.assert_array_equal(results.lineout(3, 9), lau[3 * 16 + 9])
+        finally:
+            recon_results.close_all()
+
+
+def _expand(lau, ind, shape):
+    """Reference for cold.expand: the full (ny, nx, depth) cube."""
+    cube = np.zeros((*shape, lau.shape[1]))
+    cube[ind[:, 0], ind[:, 1]] = lau
+    return cube
+
+
+class TestDepthStacks:
+    def test_bin_starts(self):
+        depths = -50.0 + 2.0 * np.arange(20)
+        assert depth_bin_starts(depths, 2.0).tolist() == list(range(20))
+        assert depth_bin_starts(depths, 5.0).tolist() == [0, 3, 5, 8, 10, 13, 15, 18]
+        assert depth_bin_starts(depths, 25.0).tolist() == [0, 13]
+
+    def test_source_grid_is_in_mm(self, tmp_path):
+        source = {"offset": 0.05, "grid": [-0.25, 0.45, 0.001]}  # [mm], as in the recon configs
+        depths = source_depths(source, 700)
+        np.testing.assert_allclose(depths[[0, -1]], [-200.0, 499.0])
+        assert source_depths({"offset": 0}, 700) is None
+        lau = np.ones((1, 700))
+        with ResultsWriter(tmp_path / "results.h5") as writer:
+            write_depth_stacks(writer, lau, np.zeros((1, 2), dtype=int), (1, 1), depths=depths)
+        with h5py.File(tmp_path / "results.h5", "r") as h5:
+            assert [len(h5[f"images/depth_{w}um"]) for w in (1, 5, 25)] == [700, 140, 28]
+            np.testing.assert_allclose(h5["images/depth_25um"].attrs["depth"][:2], [-188.0, -163.0])
+
+    def test_stacks_match_expanded_cube(self, tmp_path):
+        rng = np.random.default_rng(2)
+        shape = (40, 30)
+        ind = np.indices(shape).reshape(2, -1).T[rng.choice(1200, 300, replace=False)]
+        lau = rng.random((300, 12))
+        frame = [5, 35, 0, 30]
+        with ResultsWriter(tmp_path / "results.h5") as writer:
+            write_depth_stacks(writer, lau, ind, shape, bin_widths=(1, 5, 25), frame=frame)
+        cube = _expand(lau, ind, shape)[5:35, 0:30]
+        try:
+            results = recon_results.open_results(tmp_path)
+            np.testing.assert_allclose(results.integrated_image(), cube.sum(axis=2), rtol=1e-6)
+            assert results.depth_bin_widths() == [1.0, 5.0, 25.0]
+            np.testing.assert_array_equal(results.depth_centres(5), [2.0, 7.0, 10.5])
+            np.testing.assert_allclose(results.depth_image(5, 1), cube[:, :, 5:10].sum(axis=2), rtol=1e-6)
+            np.testing.assert_allclose(results.depth_image(1, 99), cube[:, :, 11], rtol=1e-6)
+            assert results.depth_image(25, 0).shape == (30, 30)
+        finally:
+            recon_results.close_all()
+        with h5py.File(tmp_path / "results.h5", "r") as h5:
+            assert h5["images/depth_1um"].chunks == (1, 30, 30)
+
+    def test_duplicate_widths_are_skipped(self, tmp_path):
+        lau = np.ones((4, 6))
+        ind = np.array([[0, 0], [0, 1], [1, 0], [1, 1]])
+        with ResultsWriter(tmp_path / "results.h5") as writer:
+            write_depth_stacks(writer, lau, ind, (2, 2), depths=np.arange(6) * 2.0, bin_widths=(1, 2, 25))
+        with h5py.File(tmp_path / "results.h5", "r") as h5:
+            assert sorted(h5["images"]) == ["depth_1um", "depth_25um", "integrated"]
+            assert h5["images/depth_25um"][0].tolist() == [[6.0, 6.0], [6.0, 6.0]]
+
+    def test_results_without_images(self, tmp_path):
+        with ResultsWriter(tmp_path / "results.h5") as writer:
+            writer.write("ind", np.zeros((1, 2), dtype=int))
+        try:
+            results = recon_results.open_results(tmp_path)
+            assert results.integrated_image() is None
+            assert results.depth_bin_widths() == []
+        finally:
+            recon_results.close_all()
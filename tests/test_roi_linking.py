@@ -149,6 +149,38 @@ class TestOrientationMapHighlighting:
         # Selected point (index 0) should have full opacity
         assert ",1.00)" in colors[0]
 
+    def test_palette_indices_dimmed_in_palette(self):
+        """Repeated colors are sent as palette indices; dimming keeps them indexed."""
+        rotated = np.array([[0.0, -1.0, 0.0], [1.0, 0.0, 0.0], [0.0, 0.0, 1.0]])
+        n_points = 8
+        parsed = {
+            "positions": np.column_stack([np.arange(n_points), np.zeros(n_points), np.zeros(n_points)]).astype(float),
+            "positions_hf": np.zeros((n_points, 2)),
+            "depths": np.full(n_points, np.nan),
+            "recip_lattices": np.array([np.eye(3), rotated @ np.diag([1.0, 2.0, 3.0])] * (n_points // 2)),
+            "lattice_params": np.array([2 * np.pi, 2 * np.pi, 2 * np.pi, 90.0, 90.0, 90.0]),
+            "space_group": 225,
+            "n_patterns": np.ones(n_points, dtype=int),
+            "n_indexed": np.ones(n_points, dtype=int),
+            "goodnesses": np.ones(n_points),
+            "rms_errors": np.zeros(n_points),
+        }
+        fig = make_orientation_map(parsed, color_by="cubic_ipf")
+        marker = fig.data[0].marker
+        palette = [color for _, color in marker.colorscale]
+        before = [palette[i] for i in marker.color]
+        assert before[0].startswith("rgb(")
+
+        apply_selection_highlight(fig, parsed, [0, 3], marker_size=40)
+        marker = fig.data[0].marker
+        assert marker.color.dtype.kind == "u"
+        assert marker.cmax == len(marker.colorscale) - 1
+        palette = [color for _, color in marker.colorscale]
+        after = [palette[i] for i in marker.color]
+        assert after[0] == before[0].replace("rgb(", "rgba(").replace(")", ",1.00)")
+        assert after[1] == before[1].replace("rgb(", "rgba(").replace(")", ",0.20)")
+        assert after[3].endswith(",1.00)")
+
     def test_empty_selection_no_highlight(self):
         """Empty selection should not add any highlight trace."""
         parsed = _parsed()
@@ -0,0 +1,331 @@
+"""
+Tests for laue_portal.analysis.shared_cache (cross-process cache backends).
+"""
+
+import io
+import mmap
+import os
+import shutil
+import sys
+import threading
+import time
+
+import numpy as np
+import pytest
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+from laue_portal.analysis import derived_cache, geometry, shared_cache, xml_parser
+from laue_portal.analysis.derived_cache import DerivedCache, cached_orientations
+from laue_portal.analysis.shared_cache import DiskCache, RedisCache, decode, encode, write_blob
+
+FIXTURE_XML = os.path.join(os.path.dirname(__file__), "fixtures", "test_indexing.xml")
+
+
+class FakeRedis:
+    """The subset of redis.Redis used by RedisCache (expiry is not simulated)."""
+
+    def __init__(self):
+        self.values = {}
+        self.hashes = {}
+        self.zsets = {}
+        self.hvals_calls = 0
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, ex=None):
+        self.values[key] = value
+
+    def setnx(self, key, value):
+        self.values.setdefault(key, str(value).encode())
+
+    def incrby(self, key, amount):
+        self.values[key] = str(int(self.values.get(key, 0)) + amount).encode()
+        return int(self.values[key])
+
+    def expire(self, key, seconds):
+        pass
+
+    def delete(self, *keys):
+        for key in keys:
+            self.values.pop(key, None)
+            self.hashes.pop(key, None)
+            self.zsets.pop(key, None)
+
+    def hset(self, name, key, value):
+        self.hashes.setdefault(name, {})[key.encode()] = str(value).encode()
+
+    def hget(self, name, key):
+        return self.hashes.get(name, {}).get(key.encode() if isinstance(key, str) else key)
+
+    def hmget(self, name, keys):
+        return [self.hget(name, key) for key in keys]
+
+    def hvals(self, name):
+        self.hvals_calls += 1
+        return list(self.hashes.get(name, {}).values())
+
+    def hdel(self, name, *keys):
+        for key in keys:
+            self.hashes.get(name, {}).pop(key, None)
+
+    def zadd(self, name, mapping):
+        self.zsets.setdefault(name, {}).update({k.encode(): v for k, v in mapping.items()})
+
+    def zrange(self, name, start, end):
+        members = sorted(self.zsets.get(name, {}).items(), key=lambda item: item[1])
+        return [member for member, _ in members][start : None if end == -1 else end + 1]
+
+    def zrem(self, name, *keys):
+        for key in keys:
+            self.zsets.get(name, {}).pop(key, None)
+
+    def pipeline(self):
+        return self
+
+    def execute(self):
+        pass
+
+    def lock(self, name, timeout=None, blocking_timeout=None):
+        return threading.Lock()
+
+
+_GEO_XML = """<?xml version="1.0" encoding="UTF-8" ?>
+<geoN xmlns="http://sector34.xray.aps.anl.gov/34ide/geoN">
+  <Sample><Origin unit="micron">1 2 3</Origin><R unit="radian">0 0 0</R></Sample>
+  <Detectors Ndetectors="1">
+    <Detector N="0">
+      <Npixels>2048 2048</Npixels>
+      <size unit="mm">409.6 409.6</size>
+      <R unit="radian">0.1 -0.2 0.3</R>
+      <P unit="mm">25 -2 510</P>
+      <ID>SYN-DET</ID>
+    </Detector>
+  </Detectors>
+</geoN>
+"""
+
+
+def _blob(value):
+    header, arrays = encode(value)
+    buffer = io.BytesIO()
+    write_blob(buffer, header, arrays)
+    return buffer.getvalue()
+
+
+class TestSerialisation:
+    def test_round_trip_nested_value(self):
+        value = {
+            "points": np.arange(12.0).reshape(4, 3),
+            "pair": (np.array([1, 2], dtype=np.int32), np.array([True, False])),
+            "empty": np.empty((0, 3)),
+            "meta": [1, 2.5, "Si", None, np.float64(3.0)],
+        }
+        loaded = decode(_blob(value))
+        np.testing.assert_array_equal(loaded["points"], value["points"])
+        assert loaded["pair"][0].dtype == np.int32
+        np.testing.assert_array_equal(loaded["pair"][1], [True, False])
+        assert loaded["empty"].shape == (0, 3)
+        assert loaded["meta"] == [1, 2.5, "Si", None, 3.0]
+        assert not loaded["points"].flags.writeable
+
+    def test_unsupported_values_raise_type_error(self):
+        with pytest.raises(TypeError):
+            encode(np.array(["a", None], dtype=object))
+        with pytest.raises(TypeError):
+            encode({1: np.zeros(2)})
+
+
+class TestDiskCache:
+    def test_loaded_arrays_are_memory_mapped(self, tmp_path):
+        cache = DiskCache(tmp_path, max_bytes=1 << 20)
+        cache.set("k", (np.arange(10.0), np.arange(3)))
+        points, indices = cache.get("k")
+        np.testing.assert_array_equal(points, np.arange(10.0))
+        assert isinstance(points.base, mmap.mmap)
+        assert not points.flags.writeable
+        assert cache.get("missing") is None
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        cache = DiskCache(tmp_path, max_bytes=3 * 1024)
+        for i, key in enumerate("abc"):
+            cache.set(key, np.zeros(100))
+            os.utime(tmp_path / f"{key}.entry", (i, i))
+        cache.get("a")  # now the most recently used
+        cache.set("d", np.zeros(100))
+        assert cache.get("b") is None
+        assert all(cache.get(key) is not None for key in "acd")
+
+    def test_sweeps_only_when_over_budget(self, tmp_path, monkeypatch):
+        cache = DiskCache(tmp_path, max_bytes=3 * 1024)
+        sweeps = []
+        entries = cache._entries
+        monkeypatch.setattr(cache, "_entries", lambda: sweeps.append(1) or entries())
+        for key in "abc":
+            cache.set(key, np.zeros(100))
+            cache.set(key, np.zeros(100))  # replacing an entry does not grow the total
+        assert len(sweeps) == 1  # the first write learns the directory's size
+        with cache.lock("d"):
+            pass
+        cache.set("d", np.zeros(100))
+        assert len(sweeps) == 2
+        assert sorted(os.listdir(tmp_path)) == ["b.entry", "c.entry", "d.entry", "d.lock"]
+
+    def test_evicted_entries_take_their_lock_files(self, tmp_path):
+        cache = DiskCache(tmp_path, max_bytes=1 << 20)
+        cache.get_or_compute("k", lambda: np.ones(3))
+        assert (tmp_path / "k.lock").exists()
+        cache.clear()
+        assert os.listdir(tmp_path) == []
+
+    def test_oversized_value_is_not_stored(self, tmp_path):
+        cache = DiskCache(tmp_path, max_bytes=100)
+        cache.set("big", np.zeros(100))
+        assert cache.get("big") is None
+
+    def test_unused_entries_expire(self, tmp_path):
+        cache = DiskCache(tmp_path, max_bytes=1 << 20, ttl=60)
+        cache.set("k", np.ones(3))
+        assert cache.get("k") is not None
+        old = time.time() - 120
+        os.utime(tmp_path / "k.entry", (old, old))
+        assert cache.get("k") is None
+        assert not (tmp_path / "k.entry").exists()
+
+    def test_corrupt_entry_is_dropped(self, tmp_path):
+        cache = DiskCache(tmp_path, max_bytes=1 << 20)
+        (tmp_path / "k.entry").write_bytes(b"garbage")
+        assert cache.get("k") is None
+        assert not (tmp_path / "k.entry").exists()
+
+    def test_concurrent_misses_compute_once(self, tmp_path):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return np.ones(3)
+
+        # Separate instances open separate lock files, like separate workers.
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(DiskCache(tmp_path, 1 << 20).get_or_compute("k", compute)))
+            for _ in range(2)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(calls) == 1
+        assert len(results) == 2
+        for result in results:
+            np.testing.assert_array_equal(result, np.ones(3))
+
+
+class TestRedisCache:
+    def test_round_trip_and_lru_eviction(self):
+        conn = FakeRedis()
+        cache = RedisCache(conn, max_bytes=3 * 1024, ttl=60)
+        for key in "abc":
+            cache.set(key, np.zeros(100))
+            time.sleep(0.001)
+        np.testing.assert_array_equal(cache.get("a"), np.zeros(100))
+        cache.set("d", np.zeros(100))
+        assert cache.get("b") is None
+        assert all(cache.get(key) is not None for key in "acd")
+
+    def test_running_total_avoids_rescanning_sizes(self):
+        conn = FakeRedis()
+        cache = RedisCache(conn, max_bytes=3 * 1024)
+        for key in "abcab":
+            cache.set(key, np.zeros(100))
+            time.sleep(0.001)
+        assert conn.hvals_calls == 1
+        assert int(conn.get(cache._total_key)) == sum(int(size) for size in conn.hvals(cache._sizes_key))
+        cache.set("d", np.zeros(100))
+        assert cache.get("c") is None
+        assert all(cache.get(key) is not None for key in "abd")
+
+    def test_get_or_compute_stores_result(self):
+        cache = RedisCache(FakeRedis(), max_bytes=1 << 20)
+        calls = []
+        for _ in range(2):
+            value = cache.get_or_compute("k", lambda: calls.append(1) or (np.arange(3), 7))
+        assert len(calls) == 1
+        np.testing.assert_array_equal(value[0], np.arange(3))
+        assert value[1] == 7
+
+    def test_clear(self):
+        cache = RedisCache(FakeRedis(), max_bytes=1 << 20)
+        cache.set("k", np.ones(2))
+        cache.clear()
+        assert cache.get("k") is None
+
+
+class TestConfiguredBackend:
+    @pytest.fixture
+    def backend(self, tmp_path, monkeypatch):
+        monkeypatch.setenv("LAUE_PARSE_CACHE", "0")
+        backend = DiskCache(tmp_path / "shared", max_bytes=1 << 24)
+        monkeypatch.setattr(shared_cache, "_BACKEND", backend)
+        return backend
+
+    @pytest.mark.parametrize("kind, cls", [("disk", DiskCache), ("none", shared_cache.SharedCache)])
+    def test_backend_from_env(self, monkeypatch, kind, cls):
+        monkeypatch.setenv("LAUE_SHARED_CACHE", kind)
+        assert type(shared_cache._backend_from_env()) is cls
+
+    def test_derived_arrays_shared_between_processes(self, backend, tmp_path, monkeypatch):
+        xml_path = tmp_path / "output.xml"
+        shutil.copy(FIXTURE_XML, xml_path)
+        parsed = xml_parser.parse_indexing_xml(str(xml_path))
+
+        monkeypatch.setattr(derived_cache, "_CACHE", DerivedCache(1 << 20))
+        first = cached_orientations(str(xml_path), parsed)
+        # A fresh in-process cache (another worker) loads the stored entry.
+        monkeypatch.setattr(derived_cache, "_CACHE", DerivedCache(1 << 20))
+        monkeypatch.setattr(
+            "laue_portal.analysis.orientation.batch_orientations", lambda *a: pytest.fail("should be shared")
+        )
+        second = cached_orientations(str(xml_path), parsed)
+        np.testing.assert_array_equal(second, first)
+        assert isinstance(second.base, mmap.mmap)
+
+    def test_geometry_round_trips_through_shared_cache(self, backend, tmp_path):
+        geo_path = str(tmp_path / "geoN_syn.xml")
+        with open(geo_path, "w") as f:
+            f.write(_GEO_XML)
+        expected = geometry._parse_geometry_xml_impl(geo_path)
+        geometry._cached_parse_geometry.cache_clear()
+        geometry.parse_geometry_xml(geo_path)
+        geometry._cached_parse_geometry.cache_clear()
+        loaded = geometry.parse_geometry_xml(geo_path)
+        assert len(backend._entries()) == 1
+        for got, want in zip(loaded.detectors, expected.detectors, strict=True):
+            assert got.detector_id == want.detector_id
+            np.testing.assert_array_equal(got.P, want.P)
+            np.testing.assert_allclose(got.rho, want.rho)
+        assert loaded.detectors[0].P.flags.writeable
+
+    def test_sidecar_parse_waits_for_key_lock(self, backend, tmp_path, monkeypatch):
+        monkeypatch.setenv("LAUE_PARSE_CACHE", "1")
+        monkeypatch.setenv("LAUE_PARSE_CACHE_DIR", str(tmp_path / "sidecars"))
+        xml_path = str(tmp_path / "output.xml")
+        shutil.copy(FIXTURE_XML, xml_path)
+        calls = []
+        parse = xml_parser._parse_indexing_xml_impl
+
+        def slow_parse(path):
+            calls.append(path)
+            time.sleep(0.2)
+            return parse(path)
+
+        monkeypatch.setattr(xml_parser, "_parse_indexing_xml_impl", slow_parse)
+        threads = [threading.Thread(target=xml_parser._load_or_parse, args=(xml_path,)) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(calls) == 1
@@ -0,0 +1,113 @@
+"""
+Tests for laue_portal.analysis.step_index and single-step XML access.
+"""
+
+import os
+import sys
+import textwrap
+
+import numpy as np
+import pytest
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+from laue_portal.analysis import step_index
+from laue_portal.analysis.geometry import extract_geo_paths_from_indexing_xml
+from laue_portal.analysis.step_index import build_step_index, get_step_index, read_step
+from laue_portal.analysis.xml_parser import get_step_peaks, parse_indexing_step, parse_indexing_xml
+
+_TWO_GEO_XML = textwrap.dedent(
+    """\
+    <?xml version="1.0"?>
+    <AllSteps>
+      <step><Xsample>0</Xsample></step>
+      <step >
+        <Xsample>1</Xsample>
+        <detector><geoFile> /first/geo.xml </geoFile></detector>
+      </step>
+      <step>
+        <Xsample>2</Xsample>
+        <detector><geoFile>/second/geo.xml</geoFile></detector>
+      </step>
+    </AllSteps>
+    """
+)
+
+
+class TestStepIndex:
+    def test_ranges_cover_each_step(self, xml_copy):
+        index = build_step_index(xml_copy)
+        assert len(index) == len(parse_indexing_xml(xml_copy)["positions"])
+        with open(xml_copy, "rb") as f:
+            data = f.read()
+        for start, end in zip(index.starts, index.ends, strict=True):
+            assert data[start:end].startswith(b"<step")
+            assert data[start:end].endswith(b"</step>")
+        assert index.header_step == 0
+
+    def test_block_boundaries_do_not_change_index(self, xml_copy, monkeypatch):
+        expected = build_step_index(xml_copy)
+        for block in (7, 13, 100):
+            monkeypatch.setattr(step_index, "_BLOCK_BYTES", block)
+            got = build_step_index(xml_copy)
+            np.testing.assert_array_equal(got.starts, expected.starts)
+            np.testing.assert_array_equal(got.ends, expected.ends)
+            assert got.header_step == expected.header_step
+
+    def test_first_geo_step(self, tmp_path):
+        path = tmp_path / "indexed.xml"
+        path.write_text(_TWO_GEO_XML)
+        index = build_step_index(str(path))
+        assert len(index) == 3
+        assert index.geo_step == 1
+        assert index.header_step == -1
+        assert read_step(str(path), 2, index).findtext("Xsample") == "2"
+
+    def test_unbalanced_steps_raise(self, tmp_path):
+        path = tmp_path / "broken.xml"
+        path.write_text("<AllSteps><step><Xsample>0</Xsample></AllSteps>")
+        with pytest.raises(ValueError):
+            build_step_index(str(path))
+
+    def test_cached_until_file_changes(self, tmp_path):
+        path = tmp_path / "indexed.xml"
+        path.write_text(_TWO_GEO_XML)
+        index = get_step_index(str(path))
+        assert get_step_index(str(path)) is index
+        path.write_text(_TWO_GEO_XML.replace("</AllSteps>", "<step><Xsample>3</Xsample></step></AllSteps>"))
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        assert len(get_step_index(str(path))) == 4
+
+
+class TestParseIndexingStep:
+    def test_matches_full_parse(self, xml_copy):
+        full = parse_indexing_xml(xml_copy)
+        for i in range(len(full["positions"])):
+            step = parse_indexing_step(xml_copy, i)
+            np.testing.assert_array_equal(step["positions"][0], full["positions"][i])
+            np.testing.assert_array_equal(step["depths"][0], full["depths"][i])
+            assert step["space_group"] == full["space_group"]
+            np.testing.assert_array_equal(step["lattice_params"], full["lattice_params"])
+            want = get_step_peaks(full, i)
+            got = get_step_peaks(step, 0)
+            if want is None:
+                assert got is None
+                continue
+            assert got["peak_attrs"] == want["peak_attrs"]
+            assert got["input_image"] == want["input_image"]
+            np.testing.assert_array_equal(got["pixel_positions"], want["pixel_positions"])
+            for got_pat, want_pat in zip(got["patterns"], want["patterns"], strict=True):
+                np.testing.assert_array_equal(got_pat["hkl"], want_pat["hkl"])
+                np.testing.assert_array_equal(got_pat["recip_lattice"], want_pat["recip_lattice"])
+
+    def test_out_of_range_step_raises(self, xml_copy):
+        with pytest.raises(IndexError):
+            parse_indexing_step(xml_copy, 999)
+
+
+def test_geo_path_extraction_stops_at_first_geo_file(tmp_path):
+    path = tmp_path / "indexed.xml"
+    path.write_text(_TWO_GEO_XML)
+    assert extract_geo_paths_from_indexing_xml(str(path)) == ["/first/geo.xml"]
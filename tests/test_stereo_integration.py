@@ -79,10 +79,13 @@ def test_pole_figure_default_hsv_position():
     fig = make_pole_figure(_parsed(), hkl=(1, 0, 0))
     # With hsv_position and data, there should be: data trace + color circle + unit circle
     assert len(fig.data) >= 2
-    # Data trace should have per-point colors
-    colors = fig.data[0].marker.color
-    assert isinstance(colors, (list, tuple))
-    assert colors[0].startswith("rgb(")
+    # Data trace should have per-point colors: each grain's color repeats on
+    # all of its poles, so they arrive as indices into an exact palette
+    marker = fig.data[0].marker
+    assert marker.color.dtype.kind == "u"
+    assert marker.showscale is False
+    palette = [color for _, color in marker.colorscale]
+    assert palette[marker.color[0]].startswith("rgb(")
 
 
 def test_pole_figure_hsv_has_color_circle():
@@ -0,0 +1,113 @@
+"""
+Tests for laue_portal.analysis.table_query (server-side AG Grid rows).
+"""
+
+import os
+import sys
+
+import pytest
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, project_root)
+
+from laue_portal.analysis import table_query
+from laue_portal.analysis.table_query import PATTERN_TABLE, PEAK_TABLE, query_rows, table_frame
+from laue_portal.analysis.xml_parser import get_all_indexed_peaks, get_all_patterns, parse_indexing_xml
+
+FIXTURE_XML = os.path.join(os.path.dirname(__file__), "fixtures", "test_indexing.xml")
+
+
+def _all(xml_path, table, **request):
+    return query_rows(xml_path, table, {"startRow": 0, "endRow": 1000, **request})
+
+
+class TestQueryRows:
+    @pytest.mark.parametrize(
+        "table, rows_func", [(PEAK_TABLE, get_all_indexed_peaks), (PATTERN_TABLE, get_all_patterns)]
+    )
+    def test_unfiltered_rows_match_row_builders(self, xml_copy, table, rows_func):
+        expected = rows_func(parse_indexing_xml(xml_copy))
+        result = _all(xml_copy, table)
+        assert result["rowCount"] == len(expected)
+        assert result["rowData"] == expected
+        for got, want in zip(result["rowData"], expected, strict=True):
+            assert [type(v) for v in got.values()] == [type(v) for v in want.values()]
+
+    def test_paging_slices_the_sorted_rows(self, xml_copy):
+        sort = [{"colId": "intensity", "sort": "desc"}]
+        everything = _all(xml_copy, PEAK_TABLE, sortModel=sort)["rowData"]
+        page = query_rows(xml_copy, PEAK_TABLE, {"startRow": 5, "endRow": 10, "sortModel": sort})
+        assert page["rowCount"] == len(everything)
+        assert page["rowData"] == everything[5:10]
+        intensities = [row["intensity"] for row in everything]
+        assert intensities == sorted(intensities, reverse=True)
+
+    def test_multi_column_sort(self, xml_copy):
+        sort = [{"colId": "pattern_num", "sort": "asc"}, {"colId": "step_index", "sort": "desc"}]
+        rows = _all(xml_copy, PATTERN_TABLE, sortModel=sort)["rowData"]
+        keys = [(row["pattern_num"], -row["step_index"]) for row in rows]
+        assert keys == sorted(keys)
+
+    def test_number_and_text_filters(self, xml_copy):
+        expected = get_all_indexed_peaks(parse_indexing_xml(xml_copy))
+        result = _all(
+            xml_copy,
+            PEAK_TABLE,
+            filterModel={
+                "step_index": {"filterType": "number", "type": "lessThanOrEqual", "filter": 1},
+                "input_image": {"filterType": "text", "type": "contains", "filter": "IMAGE_00"},
+            },
+        )
+        want = [row for row in expected if row["step_index"] <= 1]
+        assert result["rowData"] == want
+        assert result["rowCount"] == len(want)
+
+    def test_combined_and_blank_filters(self, xml_copy):
+        expected = get_all_patterns(parse_indexing_xml(xml_copy))
+        either = {
+            "filterType": "number",
+            "operator": "OR",
+            "conditions": [
+                {"filterType": "number", "type": "equals", "filter": 0},
+                {"filterType": "number", "type": "inRange", "filter": 1.5, "filterTo": 10},
+            ],
+        }
+        rows = _all(xml_copy, PATTERN_TABLE, filterModel={"step_index": either})["rowData"]
+        assert rows == [row for row in expected if row["step_index"] == 0 or 1.5 < row["step_index"] < 10]
+        blank = _all(xml_copy, PATTERN_TABLE, filterModel={"astar": {"filterType": "text", "type": "blank"}})
+        assert blank["rowData"] == [row for row in expected if row["astar"] is None]
+
+    def test_frame_is_rebuilt_when_file_changes(self, xml_copy):
+        first = table_frame(xml_copy, PEAK_TABLE)
+        assert table_frame(xml_copy, PEAK_TABLE) is first
+        stat = os.stat(xml_copy)
+        os.utime(xml_copy, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        assert table_frame(xml_copy, PEAK_TABLE) is not first
+
+    def test_order_matches_frame_when_file_changes_mid_query(self, xml_copy, monkeypatch):
+        expected = _all(xml_copy, PEAK_TABLE, sortModel=[{"colId": "h", "sort": "desc"}])["rowData"]
+        table_query._cached_frame.cache_clear()
+        table_query._cached_order.cache_clear()
+        cached_frame = table_query._cached_frame
+        replaced = []
+
+        def frame_then_append(*args):
+            frame = cached_frame(*args)
+            if not replaced:
+                # The XML is replaced (one step fewer) right after the frame lookup.
+                with open(FIXTURE_XML) as f:
+                    text = f.read()
+                first_step = text.index("<step")
+                with open(xml_copy, "w") as f:
+                    f.write(text[:first_step] + text[text.index("<step", first_step + 1) :])
+                stat = os.stat(xml_copy)
+                os.utime(xml_copy, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+                replaced.append(True)
+            return frame
+
+        monkeypatch.setattr(table_query, "_cached_frame", frame_then_append)
+        assert _all(xml_copy, PEAK_TABLE, sortModel=[{"colId": "h", "sort": "desc"}])["rowData"] == expected
+
+    def test_unknown_table_raises(self, xml_copy):
+        with pytest.raises(ValueError):
+            table_frame(xml_copy, "steps")
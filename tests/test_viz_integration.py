@@ -142,3 +142,15 @@ def test_pattern_table_creates_div():
     table = make_pattern_table(patterns)
     assert table is not None
     assert hasattr(table, "children")
+
+
+def test_tables_without_rows_use_infinite_row_model():
+    for make_table, grid_id in ((make_peak_table, "indexed-peaks-grid"), (make_pattern_table, "indexed-patterns-grid")):
+        table = make_table(row_count=1234)
+        header, content = table.children
+        assert "1234 total" in header.children
+        grid = content.children[1].children
+        assert grid.id == grid_id
+        assert grid.rowModelType == "infinite"
+        assert not hasattr(grid, "rowData") or grid.rowData is None
+        assert grid.dashGridOptions["pagination"] is True
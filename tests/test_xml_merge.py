@@ -5,8 +5,16 @@ Unit tests for XML merge functionality.
 import os
 import xml.etree.ElementTree as ET
 
+import numpy as np
+
+from laue_portal.analysis import parse_cache, partial_xml
+from laue_portal.analysis.step_index import get_step_index
+from laue_portal.analysis.xml_parser import _parse_indexing_xml_impl, get_all_indexed_peaks, get_all_patterns
+from laue_portal.processing import xml_merge
 from laue_portal.processing.xml_merge import merge_xml_files
 
+FIXTURE_XML = os.path.join(os.path.dirname(__file__), "fixtures", "test_indexing.xml")
+
 
 def create_test_xml(path: str, step_data: dict):
     """Helper to create a test XML file with step data."""
@@ -258,3 +266,250 @@ class TestMergeXmlFiles:
         result = merge_xml_files(str(xml_dir), str(output_path))
 
         assert result["output_path"] == str(output_path)
+
+    def test_parallel_merge_matches_serial(self, tmp_path, monkeypatch):
+        """Parallel parsing keeps steps in sorted file order."""
+        monkeypatch.setattr(xml_merge, "_FILES_PER_TASK", 2)
+        xml_dir = tmp_path / "xml"
+        xml_dir.mkdir()
+        for i in range(7):
+            create_test_xml(xml_dir / f"test_{i}.xml", {"scanNum": str(i), "Xsample": f"{i * 10}.0"})
+        (xml_dir / "test_3.xml").write_text("<AllSteps><step>")
+
+        serial_path = tmp_path / "serial.xml"
+        parallel_path = tmp_path / "parallel.xml"
+        merge_xml_files(str(xml_dir), str(serial_path), write_store=False)
+        result = merge_xml_files(str(xml_dir), str(parallel_path), write_store=False, workers=2)
+
+        assert result["success"] is True
+        assert parallel_path.read_text() == serial_path.read_text()
+        scan_nums = [s.find("scanNum").text for s in ET.parse(parallel_path).getroot().findall("step")]
+        assert scan_nums == ["0", "1", "2", "4", "5", "6"]
+
+    def test_failed_merge_leaves_no_partial_output(self, tmp_path):
+        """A merge with no steps neither creates the output nor leaves temp files."""
+        xml_dir = tmp_path / "xml"
+        xml_dir.mkdir()
+        (xml_dir / "bad.xml").write_text("<AllSteps/>")
+
+        result = merge_xml_files(str(xml_dir), str(tmp_path / "out" / "merged.xml"))
+
+        assert result["success"] is False
+        assert os.listdir(tmp_path / "out") == []
+
+
+def split_fixture_steps(xml_dir, indices=None):
+    """Write each <step> of the indexing fixture to its own chunk file."""
+    root = ET.parse(FIXTURE_XML).getroot()
+    for i, step in enumerate(root.findall("step")):
+        if indices is not None and i not in indices:
+            continue
+        chunk = ET.Element("AllSteps")
+        chunk.append(step)
+        ET.ElementTree(chunk).write(xml_dir / f"chunk_{i}.xml", encoding="unicode")
+
+
+class TestMergeResultsStore:
+    """The merge also writes the columnar results store for the viewer."""
+
+    def test_store_matches_fresh_parse(self, tmp_path):
+        xml_dir = tmp_path / "xml"
+        xml_dir.mkdir()
+        split_fixture_steps(xml_dir)
+
+        output_path = str(tmp_path / "merged.xml")
+        result = merge_xml_files(str(xml_dir), output_path)
+
+        assert result["success"] is True
+        # Next to the merged XML, not in this process's LAUE_PARSE_CACHE_DIR.
+        assert result["store_path"] == output_path + parse_cache.SIDECAR_SUFFIX
+        assert os.path.isfile(result["store_path"])
+
+        cached = parse_cache.read_sidecar(output_path, os.stat(output_path))
+        fresh = _parse_indexing_xml_impl(output_path)
+        assert cached is not None
+        for key in ("positions", "depths", "recip_lattices", "n_indexed"):
+            np.testing.assert_array_equal(cached[key], fresh[key])
+        assert get_all_patterns(cached) == get_all_patterns(fresh)
+        assert get_all_indexed_peaks(cached) == get_all_indexed_peaks(fresh)
+
+    def test_store_can_be_skipped(self, tmp_path):
+        xml_dir = tmp_path / "xml"
+        xml_dir.mkdir()
+        split_fixture_steps(xml_dir)
+
+        output_path = str(tmp_path / "merged.xml")
+        result = merge_xml_files(str(xml_dir), output_path, write_store=False)
+
+        assert result["success"] is True
+        assert result["store_path"] is None
+        assert parse_cache.read_sidecar(output_path, os.stat(output_path)) is None
+
+    def test_no_store_for_namespaced_steps(self, tmp_path):
+        xml_dir = tmp_path / "xml"
+        xml_dir.mkdir()
+        root = ET.Element("AllSteps", xmlns="http://sector34.xray.aps.anl.gov/34ide:indexResult")
+        ET.SubElement(root, "step")
+        ET.ElementTree(root).write(xml_dir / "ns.xml", encoding="unicode")
+
+        result = merge_xml_files(str(xml_dir), str(tmp_path / "merged.xml"))
+
+        assert result["success"] is True
+        assert result["store_path"] is None
+
+
+class TestIncrementalMerge:
+    """Chunks append to a partial merge; the coordinator only finalizes."""
+
+    def test_finalize_matches_full_merge(self, tmp_path):
+        xml_dir = tmp_path / "xml"
+        xml_dir.mkdir()
+        merged_path = str(tmp_path / "merged.xml")
+
+        # Chunks finish out of order.
+        for indices in ({2}, {0, 3}):
+            split_fixture_steps(xml_dir, indices)
+            assert xml_merge.append_to_partial_merge(str(xml_dir), merged_path)["success"] is True
+        split_fixture_steps(xml_dir, {1})
+        result = xml_merge.finalize_partial_merge(str(xml_dir), merged_path)
+
+        reference_path = str(tmp_path / "reference.xml")
+        merge_xml_files(str(xml_dir), reference_path, write_store=False)
+        assert result["success"] is True
+        assert result["files_merged"] == 4
+        with open(merged_path) as merged, open(reference_path) as reference:
+            assert merged.read() == reference.read()
+
+        cached = parse_cache.read_sidecar(merged_path, os.stat(merged_path))
+        fresh = _parse_indexing_xml_impl(merged_path)
+        assert cached is not None
+        np.testing.assert_array_equal(cached["positions"], fresh["positions"])
+        assert get_all_patterns(cached) == get_all_patterns(fresh)
+        assert get_all_indexed_peaks(cached) == get_all_indexed_peaks(fresh)
+        assert sorted(os.listdir(tmp_path)) == ["merged.xml", "merged.xml.peaks.h5", "reference.xml", "xml"]
+
+    def test_partial_merge_is_viewable(self, tmp_path):
+        xml_dir = tmp_path / "xml"
+        xml_dir.mkdir()
+        merged_path = str(tmp_path / "merged.xml")
+        split_fixture_steps(xml_dir, {1, 3})
+
+        result = xml_merge.append_to_partial_merge(str(xml_dir), merged_path)
+
+        assert result["files_appended"] == 2
+        assert xml_merge.is_partial_xml_path(result["partial_path"])
+        parsed = _parse_indexing_xml_impl(result["partial_path"])
+        assert len(parsed["positions"]) == 2
+        assert not os.path.exists(merged_path)
+
+    def test_append_grows_in_place_and_publishes_its_end(self, tmp_path, monkeypatch):
+        """Appends write only new steps; readers see up to the published end."""
+        xml_dir = tmp_path / "xml"
+        xml_dir.mkdir()
+        merged_path = str(tmp_path / "merged.xml")
+        split_fixture_steps(xml_dir, {1, 3})
+        partial_path = xml_merge.append_to_partial_merge(str(xml_dir), merged_path)["partial_path"]
+        with open(partial_path, "rb") as f:
+            first = f.read()
+        inode = os.stat(partial_path).st_ino
+
+        seen_before_publish = []
+        publish_end = partial_xml.publish_end
+
+        def publish_after_read(path, end):
+            with partial_xml.open_indexing_xml(path) as f:
+                seen_before_publish.append(len(ET.fromstring(f.read()).findall("step")))
+            publish_end(path, end)
+
+        monkeypatch.setattr(partial_xml, "publish_end", publish_after_read)
+        split_fixture_steps(xml_dir, {0, 2})
+        assert xml_merge.append_to_partial_merge(str(xml_dir), merged_path)["files_appended"] == 2
+
+        assert seen_before_publish == [2]
+        assert os.stat(partial_path).st_ino == inode
+        with open(partial_path, "rb") as f:
+            assert f.read(len(first) - len(partial_xml.XML_FOOTER)) == first[: -len(partial_xml.XML_FOOTER)]
+        assert len(_parse_indexing_xml_impl(partial_path)["positions"]) == 4
+        assert not [name for name in os.listdir(tmp_path) if name.startswith(".")]
+
+    def test_published_end_hides_unpublished_steps(self, tmp_path):
+        xml_dir = tmp_path / "xml"
+        xml_dir.mkdir()
+        merged_path = str(tmp_path / "merged.xml")
+        split_fixture_steps(xml_dir, {0, 1})
+        partial_path = xml_merge.append_to_partial_merge(str(xml_dir), merged_path)["partial_path"]
+        with open(partial_path, "r+b") as f:
+            f.seek(partial_xml.published_end(partial_path))
+            f.write(b"\n    <step><Xsample>1")  # an append in progress
+
+        assert len(_parse_indexing_xml_impl(partial_path)["positions"]) == 2
+        assert len(get_step_index(partial_path)) == 2
+
+    def test_changed_file_is_merged_again(self, tmp_path):
+        xml_dir = tmp_path / "xml"
+        xml_dir.mkdir()
+        merged_path = str(tmp_path / "merged.xml")
+        create_test_xml(xml_dir / "test_0.xml", {"scanNum": "0"})
+        create_test_xml(xml_dir / "test_1.xml", {"scanNum": "1"})
+        assert xml_merge.append_to_partial_merge(str(xml_dir), merged_path)["files_appended"] == 2
+        assert xml_merge.append_to_partial_merge(str(xml_dir), merged_path)["files_appended"] == 0
+
+        create_test_xml(xml_dir / "test_1.xml", {"scanNum": "11"})
+        result = xml_merge.finalize_partial_merge(str(xml_dir), merged_path)
+
+        assert result["success"] is True
+        scan_nums = [s.find("scanNum").text for s in ET.parse(merged_path).getroot().findall("step")]
+        assert scan_nums == ["0", "11"]
+
+    def test_clear_partial_merge_forgets_earlier_run(self, tmp_path):
+        xml_dir = tmp_path / "xml"
+        xml_dir.mkdir()
+        merged_path = str(tmp_path / "merged.xml")
+        create_test_xml(xml_dir / "test_0.xml", {"scanNum": "0"})
+        xml_merge.append_to_partial_merge(str(xml_dir), merged_path)
+
+        xml_merge.clear_partial_merge(merged_path)
+
+        assert sorted(os.listdir(tmp_path)) == ["xml"]
+        assert xml_merge.finalize_partial_merge(str(xml_dir), merged_path)["success"] is True
+
+    def test_finalize_removes_partial_sidecars(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(parse_cache.tempfile, "gettempdir", lambda: str(tmp_path / "tmp"))
+        xml_dir = tmp_path / "xml"
+        xml_dir.mkdir()
+        merged_path = str(tmp_path / "merged.xml")
+        split_fixture_steps(xml_dir)
+        partial_path = xml_merge.append_to_partial_merge(str(xml_dir), merged_path)["partial_path"]
+        sidecars = parse_cache.sidecar_paths(partial_path)
+        for sidecar in sidecars:
+            sidecar.parent.mkdir(parents=True, exist_ok=True)
+            sidecar.write_bytes(b"")
+
+        assert xml_merge.finalize_partial_merge(str(xml_dir), merged_path)["success"] is True
+        assert not any(sidecar.exists() for sidecar in sidecars)
+
+    def test_unreadable_file_is_retried(self, tmp_path):
+        xml_dir = tmp_path / "xml"
+        xml_dir.mkdir()
+        merged_path = str(tmp_path / "merged.xml")
+        create_test_xml(xml_dir / "test_0.xml", {"scanNum": "0"})
+        (xml_dir / "test_1.xml").write_text("<AllSteps><step>")  # still being written
+
+        assert xml_merge.append_to_partial_merge(str(xml_dir), merged_path)["files_appended"] == 1
+        create_test_xml(xml_dir / "test_1.xml", {"scanNum": "1"})
+        result = xml_merge.finalize_partial_merge(str(xml_dir), merged_path)
+
+        assert result["success"] is True
+        scan_nums = [s.find("scanNum").text for s in ET.parse(merged_path).getroot().findall("step")]
+        assert scan_nums == ["0", "1"]
+
+    def test_finalize_without_partial_does_full_merge(self, tmp_path):
+        xml_dir = tmp_path / "xml"
+        xml_dir.mkdir()
+        split_fixture_steps(xml_dir)
+
+        result = xml_merge.finalize_partial_merge(str(xml_dir), str(tmp_path / "merged.xml"))
+
+        assert result["success"] is True
+        assert result["files_merged"] == 4
+        assert result["store_path"] is not None
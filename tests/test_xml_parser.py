@@ -13,11 +13,15 @@ import pytest
 project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 sys.path.insert(0, project_root)
 
+from laue_portal.analysis.peak_store import PeakStore, RaggedColumn, StringColumn
 from laue_portal.analysis.xml_parser import (
+    concat_parsed,
     get_all_indexed_peaks,
     get_all_patterns,
     get_step_peaks,
+    indexed_peaks_frame,
     parse_indexing_xml,
+    patterns_frame,
     positions_hf,
     yz_to_hf,
 )
@@ -290,6 +294,77 @@ class TestGetAllIndexedPeaks:
         assert abs(row["pattern_indexed_fraction"] - 0.75) < 0.001
 
 
+_RAGGED_XML = """<?xml version="1.0"?>
+<AllSteps>
+  <step>
+    <Xsample>1</Xsample><Ysample>2</Ysample><Zsample>3</Zsample>
+    <energy>15</energy><scanNum>5</scanNum>
+    <detector>
+      <inputImage>img_5.h5</inputImage>
+      <peaksXY Npeaks="3" peakShape="Gaussian" boxsize="9">
+        <Xpixel>10 20 30</Xpixel>
+        <Ypixel>11 21 31</Ypixel>
+        <Intens>100 200</Intens>
+        <hwhmX>2 4 6</hwhmX>
+        <hwhmY>1 0 3</hwhmY>
+      </peaksXY>
+    </detector>
+    <indexing Npeaks="3" Npatterns="2" indexProgram="euler" keVmaxCalc="nan">
+      <pattern num="4" Nindexed="3">
+        <hkl_s><h>1 2 3</h><k>0 0 0</k><l>1 1 1</l><PkIndex>2 0 1</PkIndex></hkl_s>
+      </pattern>
+      <pattern num="5" rms_error="0.1" Nindexed="1">
+        <recip_lattice><astar>1 0 0</astar><bstar>0 1 0</bstar><cstar>0 0 1</cstar></recip_lattice>
+      </pattern>
+    </indexing>
+  </step>
+</AllSteps>
+"""
+
+
+class TestColumnarFrames:
+    def test_frames_have_row_dict_columns(self, parsed):
+        peaks, patterns = indexed_peaks_frame(parsed), patterns_frame(parsed)
+        assert list(peaks.columns) == list(get_all_indexed_peaks(parsed)[0])
+        assert list(patterns.columns) == list(get_all_patterns(parsed)[0])
+        assert (len(peaks), len(patterns)) == (27, 5)
+
+    def test_column_dtypes(self, parsed):
+        peaks = indexed_peaks_frame(parsed)
+        assert peaks["h"].dtype == np.int64
+        assert peaks["x_pixel"].dtype == np.float64
+        assert peaks["peak_shape"].dtype == object
+        patterns = patterns_frame(parsed)
+        assert str(patterns["n_peaks"].dtype) == "Int64"
+        assert str(patterns["hkl_count"].dtype) == "Int64"
+
+    def test_ragged_peak_columns(self, tmp_path):
+        path = tmp_path / "ragged.xml"
+        path.write_text(_RAGGED_XML)
+        rows = get_all_indexed_peaks(parse_indexing_xml(str(path)))
+        assert [row["peak_index"] for row in rows] == [2, 0, 1]
+        assert [row["h"] for row in rows] == [1, 2, 3]
+        assert [row["x_pixel"] for row in rows] == [30.0, 10.0, 20.0]
+        assert [row["intensity"] for row in rows] == [None, 100.0, 200.0]
+        assert [row["aspect_ratio"] for row in rows] == [2.0, 2.0, None]
+        assert all(row["qx"] is None and row["q_magnitude"] is None for row in rows)
+        assert {(row["peak_shape"], row["boxsize"], row["pattern_num"]) for row in rows} == {("Gaussian", 9.0, 4)}
+        assert rows[0]["pattern_indexed_fraction"] == 1.0
+
+    def test_pattern_without_arrays(self, tmp_path):
+        path = tmp_path / "ragged.xml"
+        path.write_text(_RAGGED_XML)
+        first, second = get_all_patterns(parse_indexing_xml(str(path)))
+        assert (first["rank"], second["rank"]) == (0, 1)
+        assert first["rms_error"] is None and first["astar"] is None
+        assert first["indexed_peak_ids"] == "2 0 1" and first["hkl_count"] == 3
+        assert second["astar"] == "(1, 0, 0)"
+        assert second["indexed_peak_ids"] is None and second["hkl_count"] is None
+        assert second["indexed_fraction"] == pytest.approx(1 / 3)
+        assert first["index_program"] == "euler" and first["kev_max_calc"] is None
+        assert first["structure"] is None and first["space_group"] is None
+
+
 # ---------------------------------------------------------------------------
 # Edge cases
 # ---------------------------------------------------------------------------
@@ -305,6 +380,119 @@ class TestEdgeCases:
             assert get_step_peaks(parsed, i) is not None, f"Step {i} returned None"
 
 
+# ---------------------------------------------------------------------------
+# Columnar peak store (streaming parser)
+# ---------------------------------------------------------------------------
+
+_SPARSE_XML = """<AllSteps>
+  <step><Xsample>1</Xsample><Ysample>2</Ysample><Zsample>3</Zsample><scanNum>7</scanNum></step>
+  <step>
+    <Xsample>4</Xsample><Ysample>5</Ysample><Zsample>6</Zsample>
+    <detector>
+      <inputImage>a.h5</inputImage><detectorID>DET-1</detectorID>
+      <ROI startx="10" endx="1033" groupx="2" starty="0" endy="2047" groupy="1"/>
+      <peaksXY Npeaks="2" peakShape="Lorentzian"><Xpixel>1 2</Xpixel><Ypixel>3 4</Ypixel></peaksXY>
+    </detector>
+  </step>
+</AllSteps>
+"""
+
+
+class TestPeakStore:
+    def test_steps_is_columnar_store(self, parsed):
+        store = parsed["_steps"]
+        assert isinstance(store, PeakStore)
+        assert len(store) == 4
+        assert store.n_patterns_total == 5
+        assert store.peaks["Xpixel"].values.dtype == np.float64
+        assert store.hkl.values.shape[1] == 3
+
+    def test_peak_attrs_and_detector_fields(self, parsed):
+        store = parsed["_steps"]
+        assert store.detector_id.get(0) == "TEST-DET"
+        assert store.roi.get(0) is None
+        assert get_step_peaks(parsed, 0)["peak_attrs"] == {"Npeaks": "12"}
+
+    def test_returned_arrays_do_not_alias_store(self, parsed):
+        result = get_step_peaks(parsed, 0)
+        result["intensities"][:] = -1
+        result["patterns"][0]["hkl"][:] = 0
+        again = get_step_peaks(parsed, 0)
+        assert again["intensities"][0] == 1000
+        assert again["patterns"][0]["hkl"][0, 0] == 3
+
+    def test_sparse_steps(self, tmp_path):
+        path = tmp_path / "sparse.xml"
+        path.write_text(_SPARSE_XML)
+        parsed = parse_indexing_xml(str(path))
+        assert parsed["scan_nums"].tolist() == [7, 0]
+        assert get_step_peaks(parsed, 0) is None
+        step = get_step_peaks(parsed, 1)
+        assert step["patterns"] == []
+        assert step["q_vectors"] is None
+        assert step["intensities"] is None
+        assert step["pixel_positions"].tolist() == [[1.0, 3.0], [2.0, 4.0]]
+        assert parsed["_steps"].roi.get(1)["groupx"] == "2"
+        assert get_all_patterns(parsed) == []
+        assert get_all_indexed_peaks(parsed) == []
+
+    def test_no_steps_raises(self, tmp_path):
+        path = tmp_path / "empty.xml"
+        path.write_text("<AllSteps></AllSteps>")
+        with pytest.raises(ValueError):
+            parse_indexing_xml(str(path))
+
+    def test_ragged_column_round_trip(self):
+        column = RaggedColumn.from_rows([np.array([1.0, 2.0]), None, np.array([])])
+        assert column.get(0).tolist() == [1.0, 2.0]
+        assert column.get(1) is None
+        assert column.get(2).tolist() == []
+        assert column.lengths.tolist() == [2, 0, 0]
+
+    def test_string_column_dictionary_encodes(self):
+        column = StringColumn.from_values(["a", None, "a", "b"])
+        assert len(column.categories) == 2
+        assert [column.get(i) for i in range(4)] == ["a", None, "a", "b"]
+
+    def test_ragged_column_take_and_concat(self):
+        column = RaggedColumn.from_rows([np.array([1.0, 2.0]), None, np.array([3.0])])
+        taken = column.take(np.array([2, 0, 1]))
+        assert [None if r is None else r.tolist() for r in (taken.get(i) for i in range(3))] == [
+            [3.0],
+            [1.0, 2.0],
+            None,
+        ]
+        stacked = RaggedColumn.concat([column, taken])
+        assert stacked.get(3).tolist() == [3.0]
+        assert stacked.get(5) is None
+
+    def test_string_column_concat_merges_categories(self):
+        stacked = StringColumn.concat([StringColumn.from_values(["a", None]), StringColumn.from_values(["b", "a"])])
+        assert len(stacked.categories) == 2
+        assert [stacked.get(i) for i in range(4)] == ["a", None, "b", "a"]
+
+    def test_concat_parsed_reorders_steps(self, parsed, tmp_path):
+        sparse_path = tmp_path / "sparse.xml"
+        sparse_path.write_text(_SPARSE_XML)
+        sparse = parse_indexing_xml(str(sparse_path))
+        combined = concat_parsed([sparse, parsed], step_order=[2, 0, 3, 4, 5, 1])
+
+        assert len(combined["_steps"]) == len(combined["positions"]) == 6
+        assert combined["space_group"] == parsed["space_group"]
+        expected = [get_step_peaks(parsed, 0), get_step_peaks(sparse, 0), get_step_peaks(parsed, 1)]
+        for step_index, want in enumerate(expected):
+            got = get_step_peaks(combined, step_index)
+            if want is None:
+                assert got is None
+                continue
+            assert got["peak_attrs"] == want["peak_attrs"]
+            np.testing.assert_array_equal(got["pixel_positions"], want["pixel_positions"])
+            assert len(got["patterns"]) == len(want["patterns"])
+            for got_pat, want_pat in zip(got["patterns"], want["patterns"], strict=True):
+                np.testing.assert_array_equal(got_pat["hkl"], want_pat["hkl"])
+        assert get_step_peaks(combined, 5)["pixel_positions"].tolist() == [[1.0, 3.0], [2.0, 4.0]]
+
+
 # ---------------------------------------------------------------------------
 # H / F wire-frame coordinates
 # ---------------------------------------------------------------------------